@@ -0,0 +1,79 @@
+"""Benchmark comparing the validation of incoming Flockwave messages against
+the entire message schema with the per-type validators of the message hub.
+
+Usage: python benchmarks/message_validation.py [--messages N]
+"""
+
+import click
+
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
+from time import perf_counter
+from typing import Any, Callable
+
+from flockwave.server.message_validator import MessageValidator
+from flockwave.spec.schema import get_message_schema
+
+
+BODIES = [
+    {"type": "SYS-PING"},
+    {"type": "SYS-TIME"},
+    {"type": "OBJ-LIST", "filter": ["uav"]},
+    {"type": "UAV-INF", "ids": [f"{index:02}" for index in range(50)]},
+    {"type": "UAV-LIST"},
+    {"type": "CONN-INF", "ids": ["rtk", "beacon"]},
+]
+"""Bodies of the messages to validate; a mix of the most frequent requests of
+clients that poll the server.
+"""
+
+
+def create_messages(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "$fw.version": "1.0",
+            "id": f"msg-{index}",
+            "body": dict(BODIES[index % len(BODIES)]),
+        }
+        for index in range(count)
+    ]
+
+
+def run(validate: Callable[[Any], None], messages: list[dict[str, Any]]):
+    outcomes = []
+    started_at = perf_counter()
+    for message in messages:
+        try:
+            validate(message)
+        except ValidationError:
+            outcomes.append(False)
+        else:
+            outcomes.append(True)
+    return perf_counter() - started_at, outcomes
+
+
+@click.command()
+@click.option("--messages", default=20000, help="Number of messages to validate")
+def main(messages: int) -> None:
+    schema = get_message_schema()
+    items = create_messages(messages)
+
+    reference = validator_for(schema)(schema).validate
+    per_type = MessageValidator(schema).validate
+
+    results = {}
+    for name, func in (("reference", reference), ("per-type", per_type)):
+        elapsed, results[name] = run(func, items)
+        click.echo(
+            f"{name:>10}: {elapsed:.3f} s total, "
+            f"{messages / elapsed:.0f} messages per second"
+        )
+
+    if results["reference"] != results["per-type"]:
+        raise click.ClickException("Validators disagree on some of the messages")
+
+    click.echo("Validators agree on all messages.")
+
+
+if __name__ == "__main__":
+    main()
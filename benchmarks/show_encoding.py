@@ -0,0 +1,81 @@
+"""Benchmark comparing the reference and the vectorized trajectory encoders of
+the Skybrush binary show file format.
+
+Usage: python benchmarks/show_encoding.py [--drones N] [--keyframes N]
+"""
+
+import click
+
+from random import Random
+from time import perf_counter
+
+from flockwave.server.show.formats import SegmentEncoder
+from flockwave.server.show.trajectory import TrajectorySpecification
+from flockwave.server.show.vectorized import BatchSegmentEncoder, TrajectoryArrays
+
+
+def create_trajectory(rng: Random, num_keyframes: int) -> TrajectorySpecification:
+    """Creates a random trajectory with a mix of linear, cubic Bezier and
+    stationary segments, similar to the ones exported from Skybrush Studio.
+    """
+
+    def random_point():
+        return [rng.uniform(-100, 100), rng.uniform(-100, 100), rng.uniform(0, 120)]
+
+    point = random_point()
+    points = [[0, point, []]]
+    for index in range(1, num_keyframes + 1):
+        kind = rng.random()
+        if kind < 0.1:
+            control = []
+        elif kind < 0.3:
+            point, control = random_point(), []
+        else:
+            control = [random_point(), random_point()]
+            point = random_point()
+        points.append([round(index * 0.5, 3), point, control])
+
+    return TrajectorySpecification({"version": 1, "points": points, "takeoffTime": 10})
+
+
+def encode_reference(trajectory: TrajectorySpecification) -> bytes:
+    scale = trajectory.propose_scaling_factor()
+    segments = trajectory.iter_segments(max_length=65, absolute=True)
+    return SegmentEncoder(scale).encode_multiple_segments(segments)
+
+
+def encode_vectorized(trajectory: TrajectorySpecification) -> bytes:
+    arrays = TrajectoryArrays.from_trajectory(trajectory, max_length=65, absolute=True)
+    scale = arrays.propose_scaling_factor()
+    return BatchSegmentEncoder(scale).encode(arrays)
+
+
+@click.command()
+@click.option("--drones", default=200, help="Number of drones in the show")
+@click.option("--keyframes", default=2000, help="Number of keyframes per drone")
+@click.option("--seed", default=42, help="Seed of the random number generator")
+def main(drones: int, keyframes: int, seed: int) -> None:
+    rng = Random(seed)
+    trajectories = [create_trajectory(rng, keyframes) for _ in range(drones)]
+
+    results = {}
+    for name, func in (
+        ("reference", encode_reference),
+        ("vectorized", encode_vectorized),
+    ):
+        started_at = perf_counter()
+        results[name] = [func(trajectory) for trajectory in trajectories]
+        elapsed = perf_counter() - started_at
+        click.echo(
+            f"{name:>10}: {elapsed:.3f} s total, "
+            f"{elapsed / drones * 1000:.2f} ms per drone"
+        )
+
+    if results["reference"] != results["vectorized"]:
+        raise click.ClickException("Encoders produced different output")
+
+    click.echo("Outputs are byte-identical.")
+
+
+if __name__ == "__main__":
+    main()
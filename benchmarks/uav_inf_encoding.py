@@ -0,0 +1,108 @@
+"""Benchmark comparing the assembly and encoding of UAV-INF messages from the
+raw status objects of the UAVs with the cached JSON fragments of the status
+objects.
+
+Each tick updates the status of a given fraction of the UAVs and then encodes
+a UAV-INF message about all of them, similarly to what the server does when
+it broadcasts UAV-INF notifications.
+
+Usage: python benchmarks/uav_inf_encoding.py [--uavs N] [--ticks N]
+"""
+
+import click
+
+from random import Random
+from time import perf_counter
+from typing import Any, Callable
+
+from flockwave.encoders.json import create_json_encoder
+from flockwave.gps.vectors import GPSCoordinate, VelocityNED
+from flockwave.server.model import UAVStatusInfo
+from flockwave.server.model.battery import BatteryInfo
+
+
+def update_status(rng: Random, status: UAVStatusInfo, timestamp: int) -> None:
+    position = GPSCoordinate(
+        lat=47.47 + rng.random() * 1e-3, lon=19.06 + rng.random() * 1e-3, amsl=120
+    )
+    velocity = VelocityNED(north=rng.random(), east=rng.random(), down=0)
+    battery = BatteryInfo()
+    battery.voltage = rng.uniform(14, 16.8)
+
+    status.position.update_from(position, precision=7)
+    status.velocity.update_from(velocity, precision=2)
+    status.battery.update_from(battery)
+    status.heading = round(rng.uniform(0, 360), 2)
+    status.update_timestamp(timestamp)
+
+
+def from_status(status: UAVStatusInfo) -> dict[str, Any]:
+    result = dict(status.json)
+    result["airspeed"] = status.airspeed
+    return result
+
+
+def from_fragment(status: UAVStatusInfo) -> dict[str, Any]:
+    return status.to_json_fragment()
+
+
+def run(
+    getter: Callable[[UAVStatusInfo], dict[str, Any]],
+    num_uavs: int,
+    num_ticks: int,
+    update_ratio: float,
+    seed: int,
+) -> tuple[float, bytes]:
+    rng = Random(seed)
+    encoder = create_json_encoder()
+    uav_ids = [f"{index:03}" for index in range(num_uavs)]
+    statuses = {uav_id: UAVStatusInfo(id=uav_id) for uav_id in uav_ids}
+    for status in statuses.values():
+        update_status(rng, status, 0)
+
+    elapsed = 0.0
+    data = b""
+    for tick in range(1, num_ticks + 1):
+        # Timestamps are derived from the tick counter to make the output of
+        # the two runs comparable
+        for status in statuses.values():
+            if rng.random() < update_ratio:
+                update_status(rng, status, tick * 100)
+
+        started_at = perf_counter()
+        body = {
+            "type": "UAV-INF",
+            "status": {uav_id: getter(status) for uav_id, status in statuses.items()},
+        }
+        data = encoder(body)
+        elapsed += perf_counter() - started_at
+
+    return elapsed, data
+
+
+@click.command()
+@click.option("--uavs", default=500, help="Number of UAVs")
+@click.option("--ticks", default=200, help="Number of UAV-INF messages to encode")
+@click.option(
+    "--update-ratio",
+    default=0.2,
+    help="Fraction of UAVs whose status changes between UAV-INF messages",
+)
+@click.option("--seed", default=42, help="Seed of the random number generator")
+def main(uavs: int, ticks: int, update_ratio: float, seed: int) -> None:
+    results = {}
+    for name, getter in (("status", from_status), ("fragment", from_fragment)):
+        elapsed, results[name] = run(getter, uavs, ticks, update_ratio, seed)
+        click.echo(
+            f"{name:>10}: {elapsed:.3f} s total, "
+            f"{elapsed / ticks * 1000:.2f} ms per UAV-INF message"
+        )
+
+    if results["status"] != results["fragment"]:
+        raise click.ClickException("UAV-INF messages differ")
+
+    click.echo("UAV-INF messages are byte-identical.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +0,0 @@
-from .cameraActions import start_camera, stop_capture
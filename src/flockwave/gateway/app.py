@@ -74,12 +74,18 @@ class SkybrushGatewayServer(DaemonApp):
         else:
             return decode(token, secret, algorithms=["HS256"])
 
-    def _create_worker_config(self, index: int) -> Any:
+    def _create_worker_config(self, index: int, spare: bool = False) -> Any:
         config = deepcopy(self.config.get("WORKER_CONFIG", {}))
         port = self._get_port_for_worker(index)
         if "EXTENSIONS" in config:
             if "http_server" in config["EXTENSIONS"]:
                 config["EXTENSIONS"]["http_server"]["port"] = port
+            if spare and "auto_shutdown" in config["EXTENSIONS"]:
+                # Spare workers wait longer for their first client as they
+                # are not handed out to anyone right after they start
+                config["EXTENSIONS"]["auto_shutdown"]["initial_timeout"] = (
+                    self.config.get("SPARE_WORKER_IDLE_TIMEOUT", 600)
+                )
         return config
 
     def _get_listening_address(self) -> Optional[tuple[str, int]]:
@@ -113,6 +119,8 @@ class SkybrushGatewayServer(DaemonApp):
 
         self.worker_manager.max_count = config.get("MAX_WORKERS", 1)
         self.worker_manager.worker_config_factory = self._create_worker_config
+        self.worker_manager.worker_port_factory = self._get_port_for_worker
+        self.worker_manager.spare_count = config.get("SPARE_WORKERS", 0)
 
     async def _serve(self, nursery: Nursery) -> None:
         address = self._get_listening_address()
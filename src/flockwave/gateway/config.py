@@ -15,6 +15,15 @@ PORT = 8080
 # Maximum number of workers to launch at the same time
 MAX_WORKERS = 4
 
+# Number of idle workers to start in advance so they can be handed out to users
+# without having to wait for a new worker to boot. Spare workers count towards
+# the maximum number of workers.
+SPARE_WORKERS = 0
+
+# Number of seconds that a spare worker waits for its first client before it
+# shuts down and gets replaced by a new one
+SPARE_WORKER_IDLE_TIMEOUT = 600
+
 # Secret key used for JWT tokens sent to the gateway when someone wants to
 # spin up a new worker. Only tokens signed with this key will be accepted.
 JWT_SECRET = "bhu8nji9"
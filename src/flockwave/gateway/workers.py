@@ -6,8 +6,17 @@ from dataclasses import dataclass
 from pathlib import Path
 from subprocess import PIPE, STDOUT
 from tempfile import NamedTemporaryFile
-from trio import move_on_after, open_nursery, open_process, Process, sleep_forever
-from typing import Any, Callable, IO, Optional
+from trio import (
+    current_time,
+    move_on_after,
+    open_nursery,
+    open_process,
+    open_tcp_stream,
+    Process,
+    sleep,
+    sleep_forever,
+)
+from typing import Any, Awaitable, Callable, IO, Optional
 
 from .errors import NoIdleWorkerError
 from .logger import log as base_log
@@ -16,18 +25,53 @@ __all__ = ("WorkerManager",)
 
 log = base_log.getChild("workers")
 
+MAX_RESPAWN_DELAY = 60
+"""Maximum number of seconds to wait before starting a new spare worker after
+spare workers have repeatedly failed to start.
+"""
+
 
 @dataclass
 class WorkerEntry:
-    id: str
+    id: Optional[str] = None
+    """ID of the user that the worker is assigned to; ``None`` for spare
+    workers that were started in advance and are waiting for a user.
+    """
+
     name: Optional[str] = None
     process: Optional[Process] = None
     starting: bool = True
     config_fp: Optional[IO[bytes]] = None
 
+    started_at: float = 0.0
+    """Time when the process of the worker was started, according to the Trio
+    clock.
+    """
+
+    ready: bool = False
+    """Whether the worker is known to accept incoming connections."""
+
+    retiring: bool = False
+    """Whether the worker is a spare worker that is being stopped because it
+    is not needed any more. Retiring workers are not handed out to users.
+    """
+
+    @property
+    def is_alive(self) -> bool:
+        """Returns whether the process of the worker has been started and is
+        still running.
+        """
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def is_spare(self) -> bool:
+        """Returns whether the worker is not assigned to any user yet."""
+        return self.id is None
+
     def assign_process(self, process: Process) -> None:
         self.process = process
         self.starting = False
+        self.started_at = current_time()
 
     def remove_configuration_file_if_needed(self):
         if self.config_fp is not None:
@@ -43,42 +87,107 @@ class WorkerEntry:
 
 
 class WorkerManager:
-    """Class responsible for spinning up and stopping workers as needed."""
+    """Class responsible for spinning up and stopping workers as needed.
+
+    The manager may keep a given number of spare workers running in advance
+    so new users can be handed a worker that is already up instead of having
+    to wait for a new process to boot. Spare workers are replenished whenever
+    a worker is handed out or a worker exits.
+    """
 
     def __init__(
-        self, max_count: int = 1, worker_config_factory: Callable[[int], Any] = None
+        self,
+        max_count: int = 1,
+        worker_config_factory: Optional[Callable[..., Any]] = None,
+        spare_count: int = 0,
+        process_factory: Optional[Callable[[str], Awaitable[Process]]] = None,
     ):
         """Constructor.
 
         Parameters:
-            max_workers: maximum number of workers allowed to run concurrently
+            max_count: maximum number of workers allowed to run concurrently
+            worker_config_factory: function that is called with the index of
+                a worker slot and a keyword argument named ``spare`` that
+                tells whether the worker is started in advance, and that
+                returns the configuration of the worker
+            spare_count: number of idle workers to keep running in advance
+            process_factory: async function that is called with the path of
+                the configuration file of a worker and that starts the process
+                of the worker. Defaults to launching the server with the given
+                configuration file.
         """
         self._nursery = None
+        self._process_factory = process_factory or self._open_worker_process
 
-        self._processes = [None] * max_count
+        self._max_count = max_count
+        self._processes: list[Optional[WorkerEntry]] = [None] * max_count
+        self._spare_count = spare_count
+        self._num_spare_failures = 0
         self._users_to_entries = {}
 
         self.worker_config_factory = worker_config_factory
+        self.worker_port_factory: Optional[Callable[[int], int]] = None
+        """Function that returns the port that the worker in the slot with the
+        given index listens on. Used to check whether spare workers are ready
+        to accept connections.
+        """
 
     @property
     def max_count(self) -> int:
         """Returns the maximum number of worker processes supported by the
         worker manager.
         """
-        return len(self._processes)
+        return self._max_count
 
     @max_count.setter
     def max_count(self, value: int) -> None:
-        if value < self.max_count:
-            raise NotImplementedError(
-                "decreasing the number of workers is not implemented yet"
+        if value < 0:
+            raise ValueError("maximum number of workers must be non-negative")
+
+        self._max_count = value
+        if len(self._processes) < value:
+            self._processes += [None] * (value - len(self._processes))
+
+        # Spare workers in slots that were removed are stopped immediately;
+        # workers that are assigned to users are allowed to finish and their
+        # slots are removed when they exit
+        for index, entry in list(enumerate(self._processes)):
+            if index >= value and entry is not None and entry.is_spare:
+                self._retire_spare(index, entry)
+
+        self._remove_retired_slots()
+        self._replenish_spares()
+
+    @property
+    def spare_count(self) -> int:
+        """Returns the number of idle workers that the manager keeps running
+        in advance.
+        """
+        return self._spare_count
+
+    @spare_count.setter
+    def spare_count(self, value: int) -> None:
+        if value < 0:
+            raise ValueError("number of spare workers must be non-negative")
+
+        self._spare_count = value
+
+        spares = self._get_spare_entries()
+        surplus = len(spares) - value
+        if surplus > 0:
+            # Cancel the ones that have not been started yet, then stop the
+            # ones that were started most recently
+            spares.sort(
+                key=lambda item: (item[1].process is not None, -item[1].started_at)
             )
+            for index, entry in spares[:surplus]:
+                self._retire_spare(index, entry)
 
-        self._processes += [None] * (value - self.max_count)
+        self._replenish_spares()
 
     async def request_worker(self, id, name) -> int:
-        """Requests the worker manager to spin up a new worker and then
-        return the port that the worker will be listening on.
+        """Requests the worker manager to hand out a spare worker or spin up
+        a new one, and then return the index of the worker.
 
         May cancel existing workers registered under the same ID to ensure that
         a user has only one worker.
@@ -97,29 +206,110 @@ class WorkerManager:
             NoIdleWorkerError: when there aren't any idle workers available
         """
         user = f"{name} (id={id})" if name else id
-        entry = self._users_to_entries.get(id)
+        reserved = None
+        entry = self._users_to_entries.pop(id, None)
         if entry:
             log.info(f"Terminating existing process of user {user}")
-            await entry.terminate()
             try:
                 index = self._processes.index(entry)
-                self._processes[index] = None
-                if self._users_to_entries[entry.id] is entry:
-                    del self._users_to_entries[id]
             except ValueError:
                 pass
+            else:
+                # Keep the slot reserved for the user while the old process is
+                # shutting down so it is not taken by a new spare worker
+                reserved = WorkerEntry(id=str(id), name=name)
+                self._processes[index] = reserved
+            await entry.terminate()
+
+        index = self._find_spare_worker()
+        if index is not None:
+            entry = self._processes[index]
+            assert entry is not None
+
+            log.info(f"Assigning spare worker in slot {index} to user {user}")
+
+            if reserved is not None:
+                self._release_slot(self._processes.index(reserved), reserved)
+
+            entry.id, entry.name = str(id), name
+            self._users_to_entries[id] = entry
+            self._replenish_spares()
+            return index
 
-        index = self._find_vacant_slot()
-        if index is None:
-            raise NoIdleWorkerError("No idle worker available")
+        if reserved is not None and reserved in self._processes[: self._max_count]:
+            index = self._processes.index(reserved)
+            entry = reserved
+        else:
+            if reserved is not None:
+                self._release_slot(self._processes.index(reserved), reserved)
+            index = self._find_vacant_slot()
+            if index is None:
+                raise NoIdleWorkerError("No idle worker available")
+            self._processes[index] = entry = WorkerEntry(id=str(id), name=name)
 
         log.info(f"Launching new worker for user {user} in slot {index}")
 
-        self._processes[index] = entry = WorkerEntry(id=str(id), name=name)
         self._users_to_entries[id] = entry
 
+        await self._launch_process(index, entry)
+        self._replenish_spares()
+        return index
+
+    async def run(self) -> None:
+        try:
+            async with open_nursery() as nursery:
+                self._nursery = nursery
+                self._replenish_spares()
+                await sleep_forever()
+        finally:
+            # Cleared only after the nursery has exited; tasks that are still
+            # launching workers need it while they are being cancelled
+            self._nursery = None
+
+    def _find_spare_worker(self) -> Optional[int]:
+        """Returns the index of the spare worker that should be handed out to
+        the next user, or ``None`` if there are no spare workers.
+
+        Workers that already accept connections are preferred, starting from
+        the youngest one as it has the most time left before it shuts down on
+        its own. Otherwise the worker that has been booting for the longest
+        time is chosen.
+        """
+        spares = [
+            (index, entry)
+            for index, entry in self._get_spare_entries()
+            if entry.is_alive
+        ]
+        ready = [item for item in spares if item[1].ready]
+        if ready:
+            return max(ready, key=lambda item: item[1].started_at)[0]
+        elif spares:
+            return min(spares, key=lambda item: item[1].started_at)[0]
+        else:
+            return None
+
+    def _find_vacant_slot(self) -> Optional[int]:
+        for index, slot in enumerate(self._processes[: self._max_count]):
+            if slot is None:
+                return index
+        return None
+
+    def _get_spare_entries(self) -> list[tuple[int, WorkerEntry]]:
+        return [
+            (index, entry)
+            for index, entry in enumerate(self._processes[: self._max_count])
+            if entry is not None and entry.is_spare and not entry.retiring
+        ]
+
+    async def _launch_process(self, index: int, entry: WorkerEntry) -> bool:
+        """Launches the process of the worker in the given slot.
+
+        Returns:
+            whether the process was started successfully. The slot is vacated
+            if the process could not be started.
+        """
         if self.worker_config_factory:
-            config = self.worker_config_factory(index)
+            config = self.worker_config_factory(index, spare=entry.is_spare)
         else:
             config = {}
 
@@ -131,48 +321,142 @@ class WorkerManager:
                 for key, value in config.items():
                     fp.write(f"{key} = {value!r}\n")
             with move_on_after(10) as cancel_scope:
-                process = await open_process(
-                    [
-                        sys.executable,
-                        "-m",
-                        "flockwave.server.launcher",
-                        "--log-style=plain",
-                        "-c",
-                        entry.config_fp.name,
-                    ],
-                    stdout=PIPE,
-                    stderr=STDOUT,
-                    cwd=str(Path(__file__).parent.parent.parent),
-                )
+                process = await self._process_factory(entry.config_fp.name)
 
             if cancel_scope.cancelled_caught:
-                self._processes[index] = None
-                if self._users_to_entries.get(id) is entry:
-                    del self._users_to_entries[id]
+                self._release_slot(index, entry)
+                return False
             else:
                 self._nursery.start_soon(self._stream_process_output, index, process)
                 self._nursery.start_soon(self._supervise_process, index, entry)
                 entry.assign_process(process)
-
-            return index
+                return True
         finally:
             if entry.process is None:
                 # Process was not started in the end so remove the temporary file
                 entry.remove_configuration_file_if_needed()
 
-    async def run(self) -> None:
-        async with open_nursery() as nursery:
+    async def _launch_spare_worker(
+        self, index: int, entry: WorkerEntry, delay: float = 0
+    ) -> None:
+        # Sleep even if there is no delay; this ensures that we do not launch
+        # new workers while the manager is being cancelled
+        await sleep(delay)
+
+        if (
+            entry.retiring
+            or self._processes[index] is not entry
+            or index >= self._max_count
+        ):
+            # Slot was removed or the worker is not needed any more
+            self._release_slot(index, entry)
+            return
+
+        log.info(f"Launching spare worker in slot {index}")
+        if await self._launch_process(index, entry):
+            if entry.retiring or index >= self._max_count:
+                await entry.terminate()
+            else:
+                await self._wait_until_ready(index, entry)
+
+    async def _open_worker_process(self, config_path: str) -> Process:
+        """Starts the process of a worker with the given configuration file."""
+        return await open_process(
+            [
+                sys.executable,
+                "-m",
+                "flockwave.server.launcher",
+                "--log-style=plain",
+                "-c",
+                config_path,
+            ],
+            stdout=PIPE,
+            stderr=STDOUT,
+            cwd=str(Path(__file__).parent.parent.parent),
+        )
+
+    def _release_slot(self, index: int, entry: WorkerEntry) -> None:
+        if index < len(self._processes) and self._processes[index] is entry:
+            self._processes[index] = None
+
+        if entry.id is not None and self._users_to_entries.get(entry.id) is entry:
+            del self._users_to_entries[entry.id]
+
+        self._remove_retired_slots()
+
+    def _remove_retired_slots(self) -> None:
+        """Removes vacant slots from the end of the slot list that are beyond
+        the maximum number of workers.
+        """
+        while len(self._processes) > self._max_count and self._processes[-1] is None:
+            self._processes.pop()
+
+    def _replenish_spares(self) -> None:
+        """Reserves vacant slots for new spare workers until the desired number
+        of spare workers is reached or all the slots are taken.
+        """
+        if self._nursery is None:
+            return
+
+        if self._num_spare_failures:
+            # Back off if spare workers keep on exiting during startup
+            delay = min(2**self._num_spare_failures, MAX_RESPAWN_DELAY)
+        else:
+            delay = 0
+
+        missing = self._spare_count - len(self._get_spare_entries())
+        while missing > 0:
+            index = self._find_vacant_slot()
+            if index is None:
+                break
+
+            self._processes[index] = entry = WorkerEntry()
+            self._nursery.start_soon(self._launch_spare_worker, index, entry, delay)
+            missing -= 1
+
+    def _retire_spare(self, index: int, entry: WorkerEntry) -> None:
+        """Stops a spare worker that is not needed any more.
+
+        Spare workers that have not been started yet give up their slots
+        immediately. Running ones keep their slots until their processes
+        exit, but they are not handed out to users in the meanwhile.
+        """
+        entry.retiring = True
+        if entry.process is None:
+            self._release_slot(index, entry)
+        else:
+            self._terminate_soon(entry)
+
+    def _terminate_soon(self, entry: WorkerEntry) -> None:
+        if self._nursery is not None:
+            self._nursery.start_soon(entry.terminate)
+
+    async def _wait_until_ready(self, index: int, entry: WorkerEntry) -> None:
+        """Waits until the worker in the given slot starts accepting
+        connections and then marks it as ready.
+        """
+        port = None
+        if self.worker_port_factory:
             try:
-                self._nursery = nursery
-                await sleep_forever()
-            finally:
-                self._nursery = None
+                port = self.worker_port_factory(index)
+            except ValueError:
+                pass
 
-    def _find_vacant_slot(self) -> int:
-        for index, slot in enumerate(self._processes):
-            if slot is None:
-                return index
-        return None
+        while port is not None and entry.is_alive:
+            with move_on_after(1):
+                try:
+                    stream = await open_tcp_stream("127.0.0.1", port)
+                except OSError:
+                    pass
+                else:
+                    await stream.aclose()
+                    break
+            await sleep(0.5)
+
+        if entry.is_alive:
+            log.info(f"Worker #{index} is ready to accept connections")
+            entry.ready = True
+            self._num_spare_failures = 0
 
     async def _stream_process_output(self, index: int, process: Process) -> None:
         logger = log.getChild(f"worker{index}")
@@ -197,24 +481,24 @@ class WorkerManager:
 
     async def _supervise_process(self, index: int, entry: WorkerEntry) -> None:
         process = entry.process
-        user = entry.id
-        worker = f"Worker #{index} (user={user}, PID={process.pid})"
 
-        log.info(f"{worker} started")
+        def describe() -> str:
+            user = "spare" if entry.is_spare else entry.id
+            return f"Worker #{index} (user={user}, PID={process.pid})"
+
+        log.info(f"{describe()} started")
         try:
             code = await process.wait()
             if code:
-                log.warning(f"{worker} exited with code {code}")
+                log.warning(f"{describe()} exited with code {code}")
+                if entry.is_spare and not entry.ready:
+                    self._num_spare_failures += 1
             else:
-                log.info(f"{worker} exited.")
+                log.info(f"{describe()} exited.")
         except Exception as ex:
-            log.error(f"{worker} exited with an exception.")
+            log.error(f"{describe()} exited with an exception.")
             log.exception(ex)
         finally:
-            if self._processes[index] is entry:
-                self._processes[index] = None
-
-            if self._users_to_entries.get(entry.id) is entry:
-                del self._users_to_entries[entry.id]
-
+            self._release_slot(index, entry)
             entry.remove_configuration_file_if_needed()
+            self._replenish_spares()
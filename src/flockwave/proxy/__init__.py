@@ -16,6 +16,11 @@ can be as follows:
 - The Skybrush server and the Skybrush proxy is started up on the field computer.
   The proxy is instructed to connect to the remote server on port 5000 and to
   the local Skybrush server, also on port 5000.
+
+The proxy relays HTTP/1.0 and HTTP/1.1 traffic, including persistent
+connections and WebSocket upgrades. To make use of them, configure `nginx` with
+`proxy_http_version 1.1` and forward the `Upgrade` and `Connection` headers
+to the upstream.
 """
 
 from .version import __version__, __version_info__
@@ -0,0 +1,660 @@
+"""Streaming HTTP relay between a remote connection and the local Skybrush
+server.
+
+The relay parses just enough of the HTTP/1.x protocol to find the boundaries of
+requests and responses. Bodies are streamed between the two sides in bounded
+chunks without reassembling them in memory, and connections to the local
+server are pooled and reused across requests when both sides allow it.
+Connections that are upgraded to another protocol (e.g., WebSocket) are turned
+into a transparent, full-duplex tunnel.
+"""
+
+from dataclasses import dataclass, field
+from http.client import HTTPMessage, parse_headers
+from io import BytesIO
+from time import monotonic
+from trio import BrokenResourceError, CancelScope, ClosedResourceError, open_nursery
+from typing import Awaitable, Callable, Optional
+
+from flockwave.connections import StreamConnection
+
+from .logger import log
+
+__all__ = (
+    "HTTPRelay",
+    "LocalConnectionPool",
+    "ProtocolError",
+    "RelayStatistics",
+    "StreamReader",
+)
+
+CRLF = b"\r\n"
+CRLFCRLF = b"\r\n\r\n"
+
+CHUNK_SIZE = 65536
+"""Maximum number of bytes to read from a connection at once. Also the bound
+on the amount of data that the relay holds in memory for a single direction
+of a connection.
+"""
+
+MAX_HEAD_SIZE = 65536
+"""Maximum allowed size of the request or status line and the headers of a
+single HTTP message.
+"""
+
+BAD_GATEWAY_RESPONSE = (
+    b"HTTP/1.1 502 Bad Gateway\r\nConnection: close\r\nContent-Length: 0\r\n\r\n"
+)
+"""Response to send to the remote peer when the local server cannot be
+reached.
+"""
+
+NO_BODY_STATUS_CODES = frozenset((204, 304))
+"""HTTP status codes of responses that never have a body."""
+
+
+class ProtocolError(RuntimeError):
+    """Error raised when one of the peers of the relay violates the HTTP
+    protocol in a way that the relay cannot recover from.
+    """
+
+    pass
+
+
+class StreamReader:
+    """Buffered reader on top of a stream connection that allows the relay to
+    look for message boundaries while passing everything else through.
+    """
+
+    _buffer: bytearray
+    """Data that was read from the connection but not consumed yet."""
+
+    _conn: StreamConnection
+    """The connection to read from."""
+
+    _on_read: Optional[Callable[[int], None]]
+    """Function to call with the number of bytes read from the connection."""
+
+    eof: bool
+    """Whether the connection was closed by the peer."""
+
+    def __init__(
+        self, conn: StreamConnection, on_read: Optional[Callable[[int], None]] = None
+    ):
+        """Constructor.
+
+        Parameters:
+            conn: the connection to read from
+            on_read: function to call with the number of bytes whenever new
+                data is read from the connection
+        """
+        self._buffer = bytearray()
+        self._conn = conn
+        self._on_read = on_read
+        self.eof = False
+
+    @property
+    def has_buffered_data(self) -> bool:
+        """Returns whether there is data in the buffer that was not consumed
+        yet.
+        """
+        return bool(self._buffer)
+
+    async def read_some(self, max_bytes: int = CHUNK_SIZE) -> bytes:
+        """Returns at most the given number of bytes from the buffer, or from
+        the connection if the buffer is empty.
+
+        Returns:
+            the data that was read; empty if the connection was closed
+        """
+        if self._buffer:
+            data = bytes(self._buffer[:max_bytes])
+            del self._buffer[:max_bytes]
+            return data
+
+        return await self._receive(max_bytes)
+
+    async def read_until(
+        self, delimiter: bytes, max_size: int = MAX_HEAD_SIZE
+    ) -> Optional[bytes]:
+        """Reads data until the given delimiter and returns it, including the
+        delimiter.
+
+        Returns:
+            the data that was read, or `None` if the connection was closed
+            before any data was read
+
+        Raises:
+            ProtocolError: if the delimiter was not found in the given number
+                of bytes or if the connection was closed prematurely
+        """
+        start = 0
+        while True:
+            index = self._buffer.find(delimiter, start)
+            if index >= 0:
+                end = index + len(delimiter)
+                data = bytes(self._buffer[:end])
+                del self._buffer[:end]
+                return data
+
+            if len(self._buffer) > max_size:
+                raise ProtocolError("HTTP message head is too large")
+
+            start = max(len(self._buffer) - len(delimiter) + 1, 0)
+            data = await self._receive(CHUNK_SIZE)
+            if not data:
+                if self._buffer:
+                    raise ProtocolError("Connection closed in the middle of a message")
+                return None
+
+            self._buffer += data
+
+    async def _receive(self, max_bytes: int) -> bytes:
+        if self.eof:
+            return b""
+
+        data = await self._conn.read(max_bytes)
+        if data:
+            if self._on_read:
+                self._on_read(len(data))
+        else:
+            self.eof = True
+
+        return data
+
+
+@dataclass
+class RelayStatistics:
+    """Traffic and latency counters of a single remote connection handled by
+    the relay.
+    """
+
+    bytes_received: int = 0
+    """Number of bytes received from the remote peer."""
+
+    bytes_sent: int = 0
+    """Number of bytes sent to the remote peer."""
+
+    num_requests: int = 0
+    """Number of requests forwarded to the local server."""
+
+    num_reused_connections: int = 0
+    """Number of requests that were forwarded on a pooled connection."""
+
+    max_latency: float = 0.0
+    """Longest time that the relay had to wait for the head of a response
+    from the local server, in seconds.
+    """
+
+    total_latency: float = 0.0
+    """Total time that the relay spent waiting for the heads of responses from
+    the local server, in seconds.
+    """
+
+    started_at: float = field(default_factory=monotonic)
+    """Timestamp when the connection was opened."""
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean time that the relay had to wait for the head of a response
+        from the local server, in seconds.
+        """
+        return self.total_latency / self.num_requests if self.num_requests else 0.0
+
+    def add_latency(self, latency: float) -> None:
+        """Records the latency of a single request."""
+        self.num_requests += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def add_received(self, num_bytes: int) -> None:
+        """Records the given number of bytes as received from the remote
+        peer.
+        """
+        self.bytes_received += num_bytes
+
+    def add_sent(self, num_bytes: int) -> None:
+        """Records the given number of bytes as sent to the remote peer."""
+        self.bytes_sent += num_bytes
+
+    def format(self) -> str:
+        """Returns a short human-readable summary of the statistics."""
+        return (
+            f"{self.num_requests} requests, {self.bytes_received} bytes in, "
+            f"{self.bytes_sent} bytes out, mean latency "
+            f"{self.mean_latency * 1000:.1f} ms, max latency "
+            f"{self.max_latency * 1000:.1f} ms"
+        )
+
+
+@dataclass
+class _PooledConnection:
+    conn: StreamConnection
+    reader: StreamReader
+    idle_since: float = 0.0
+
+
+class LocalConnectionPool:
+    """Pool of open connections to the local Skybrush server."""
+
+    _factory: Callable[[], StreamConnection]
+    _idle: list[_PooledConnection]
+
+    idle_timeout: float
+    """Number of seconds after which idle connections are not reused any
+    more. Should be shorter than the keep-alive timeout of the local server.
+    """
+
+    max_idle: int
+    """Maximum number of idle connections to keep in the pool."""
+
+    def __init__(
+        self,
+        factory: Callable[[], StreamConnection],
+        *,
+        max_idle: int = 8,
+        idle_timeout: float = 3,
+    ):
+        """Constructor.
+
+        Parameters:
+            factory: function that creates a new, unopened connection to the
+                local server
+            max_idle: maximum number of idle connections to keep in the pool
+            idle_timeout: number of seconds after which idle connections are
+                not reused any more
+        """
+        self._factory = factory
+        self._idle = []
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+
+    async def acquire(self, reuse: bool = True) -> tuple[_PooledConnection, bool]:
+        """Returns an open connection to the local server.
+
+        Parameters:
+            reuse: whether an idle connection from the pool may be returned;
+                `False` means that a new connection is opened
+
+        Returns:
+            the connection and whether it was reused from the pool
+        """
+        now = monotonic()
+        while reuse and self._idle:
+            item = self._idle.pop()
+            if now - item.idle_since < self.idle_timeout and not item.reader.eof:
+                return item, True
+            await self._close(item)
+
+        conn = self._factory()
+        await conn.open()
+        return _PooledConnection(conn, StreamReader(conn)), False
+
+    async def aclose(self) -> None:
+        """Closes all the idle connections in the pool."""
+        while self._idle:
+            await self._close(self._idle.pop())
+
+    async def discard(self, item: _PooledConnection) -> None:
+        """Closes a connection acquired from the pool without returning it."""
+        await self._close(item)
+
+    async def release(self, item: _PooledConnection) -> None:
+        """Returns a connection acquired from the pool so it can be reused."""
+        if len(self._idle) >= self.max_idle or item.reader.has_buffered_data:
+            await self._close(item)
+        else:
+            item.idle_since = monotonic()
+            self._idle.append(item)
+
+    async def _close(self, item: _PooledConnection) -> None:
+        try:
+            await item.conn.close()
+        except Exception:
+            log.exception("Error while closing connection to local server")
+
+
+@dataclass
+class _Head:
+    """Parsed start line and headers of an HTTP message."""
+
+    raw: bytes
+    start_line: list[bytes]
+    headers: HTTPMessage
+
+    @classmethod
+    def parse(cls, raw: bytes):
+        start_line, _, headers = raw.partition(CRLF)
+        parts = start_line.split(b" ", 2)
+        if len(parts) < 3:
+            raise ProtocolError(f"Invalid HTTP start line: {start_line!r}")
+        return cls(raw, parts, parse_headers(BytesIO(headers)))
+
+    @property
+    def connection_tokens(self) -> set[str]:
+        tokens = set()
+        for value in self.headers.get_all("connection") or ():
+            tokens.update(token.strip().lower() for token in value.split(","))
+        return tokens
+
+    @property
+    def content_length(self) -> Optional[int]:
+        value = self.headers.get("content-length")
+        if value is None:
+            return None
+
+        try:
+            length = int(value)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ProtocolError(f"Invalid Content-Length header: {value!r}")
+        return length
+
+    @property
+    def is_chunked(self) -> bool:
+        value = self.headers.get("transfer-encoding") or ""
+        return value.lower().rstrip().endswith("chunked")
+
+    def is_persistent(self, version: bytes) -> bool:
+        tokens = self.connection_tokens
+        if version == b"HTTP/1.1":
+            return "close" not in tokens
+        else:
+            return "keep-alive" in tokens
+
+
+class HTTPRelay:
+    """Relay that forwards the HTTP requests arriving on a single remote
+    connection to the local Skybrush server and relays the responses back.
+
+    HTTP/1.0 and HTTP/1.1 are supported, including persistent connections,
+    chunked bodies and protocol upgrades.
+    """
+
+    _pool: LocalConnectionPool
+    _remote: StreamConnection
+    _remote_reader: StreamReader
+
+    statistics: RelayStatistics
+    """Traffic and latency counters of the remote connection."""
+
+    def __init__(
+        self,
+        remote: StreamConnection,
+        pool: LocalConnectionPool,
+        statistics: Optional[RelayStatistics] = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            remote: the remote connection that the requests arrive on
+            pool: the pool of connections to the local server
+            statistics: the statistics object to update; a new one is created
+                if omitted
+        """
+        self.statistics = statistics or RelayStatistics()
+
+        self._pool = pool
+        self._remote = remote
+        self._remote_reader = StreamReader(remote, self.statistics.add_received)
+
+    async def run(self) -> None:
+        """Relays requests and responses until the remote connection is
+        closed or it cannot be used for further requests.
+        """
+        while await self._handle_request():
+            pass
+
+    async def _handle_request(self) -> bool:
+        """Handles a single request from the remote connection.
+
+        Returns:
+            whether the remote connection may be used for further requests
+        """
+        raw = await self._remote_reader.read_until(CRLFCRLF)
+        if raw is None:
+            return False
+
+        request = _Head.parse(raw)
+        method, target, version = request.start_line
+        log.info(
+            target.decode("ascii", "replace"), extra={"id": method.decode("ascii")}
+        )
+
+        if request.is_chunked:
+            body_length = None
+        else:
+            body_length = request.content_length or 0
+
+        # Requests with a body always get a fresh local connection. Requests
+        # without a body may use a pooled one and can be retried safely if the
+        # local server turns out to have closed it in the meanwhile
+        while True:
+            try:
+                local, reused = await self._pool.acquire(reuse=body_length == 0)
+            except OSError:
+                log.exception("Cannot connect to local server")
+                await self._write_remote(BAD_GATEWAY_RESPONSE)
+                return False
+
+            started_at = monotonic()
+            if body_length != 0:
+                response_raw = None
+                break
+
+            try:
+                await local.conn.write(raw)
+                response_raw = await local.reader.read_until(CRLFCRLF)
+            except (BrokenResourceError, ClosedResourceError, OSError):
+                response_raw = None
+
+            if response_raw is None:
+                await self._pool.discard(local)
+                if reused:
+                    continue
+
+                await self._write_remote(BAD_GATEWAY_RESPONSE)
+                return False
+
+            break
+
+        try:
+            if body_length != 0:
+                keep_remote, keep_local = await self._relay_exchange(
+                    request, local, body_length, started_at
+                )
+            else:
+                keep_remote, keep_local = await self._relay_response(
+                    request, local, response_raw, started_at
+                )
+        except BaseException:
+            with CancelScope(shield=True):
+                await self._pool.discard(local)
+            raise
+
+        if reused:
+            self.statistics.num_reused_connections += 1
+
+        if keep_local:
+            await self._pool.release(local)
+        else:
+            await self._pool.discard(local)
+
+        return keep_remote
+
+    async def _relay_exchange(
+        self,
+        request: _Head,
+        local: _PooledConnection,
+        body_length: Optional[int],
+        started_at: float,
+    ) -> tuple[bool, bool]:
+        """Streams the body of a request to the local server while relaying
+        the response concurrently, so the local server may respond early
+        (e.g., with ``100 Continue``).
+        """
+        body_sent = False
+
+        async def forward_body() -> None:
+            nonlocal body_sent
+
+            await local.conn.write(request.raw)
+            if body_length is None:
+                await self._relay_chunked_body(self._remote_reader, local.conn.write)
+            else:
+                await self._relay_body(
+                    self._remote_reader, local.conn.write, body_length
+                )
+            body_sent = True
+
+        async with open_nursery() as nursery:
+            nursery.start_soon(forward_body)
+            response_raw = await local.reader.read_until(CRLFCRLF)
+            keep_remote, keep_local = await self._relay_response(
+                request, local, response_raw, started_at
+            )
+            if not keep_remote:
+                # The remote connection will not be used any more so there
+                # is no need to wait for the rest of the request body
+                nursery.cancel_scope.cancel()
+
+        # The local connection cannot be reused if the local server responded
+        # before it received the entire request body
+        return keep_remote and body_sent, keep_local and body_sent
+
+    async def _relay_response(
+        self,
+        request: _Head,
+        local: _PooledConnection,
+        response_raw: Optional[bytes],
+        started_at: float,
+    ) -> tuple[bool, bool]:
+        """Relays a response from the local server to the remote connection.
+
+        Returns:
+            whether the remote connection and the local connection may be
+            used for further requests
+        """
+        if response_raw is None:
+            raise ProtocolError("Local server closed the connection unexpectedly")
+
+        self.statistics.add_latency(monotonic() - started_at)
+
+        while True:
+            response = _Head.parse(response_raw)
+            version, status, _ = response.start_line
+            try:
+                status_code = int(status)
+            except ValueError:
+                raise ProtocolError(f"Invalid HTTP status code: {status!r}") from None
+
+            await self._write_remote(response_raw)
+
+            if status_code == 101:
+                await self._tunnel(local)
+                return False, False
+
+            if status_code >= 200:
+                break
+
+            # Interim response (e.g., 100 Continue); the final one follows
+            response_raw = await local.reader.read_until(CRLFCRLF)
+            if response_raw is None:
+                raise ProtocolError("Local server closed the connection unexpectedly")
+
+        framed = True
+        if request.start_line[0] == b"HEAD" or status_code in NO_BODY_STATUS_CODES:
+            pass
+        elif response.is_chunked:
+            await self._relay_chunked_body(local.reader, self._write_remote)
+        elif (length := response.content_length) is not None:
+            await self._relay_body(local.reader, self._write_remote, length)
+        else:
+            # Body is delimited by the closure of the connection
+            await self._relay_body(local.reader, self._write_remote, None)
+            framed = False
+
+        keep_local = framed and response.is_persistent(version)
+        keep_remote = keep_local and request.is_persistent(request.start_line[2])
+        return keep_remote, keep_local
+
+    async def _relay_body(
+        self,
+        reader: StreamReader,
+        write: Callable[[bytes], Awaitable[None]],
+        length: Optional[int],
+    ) -> None:
+        """Relays a body with the given length, or until the end of the stream
+        if the length is `None`.
+        """
+        remaining = length
+        while remaining is None or remaining > 0:
+            max_bytes = CHUNK_SIZE if remaining is None else min(remaining, CHUNK_SIZE)
+            data = await reader.read_some(max_bytes)
+            if not data:
+                if remaining is None:
+                    return
+                raise ProtocolError("Connection closed in the middle of a body")
+
+            await write(data)
+            if remaining is not None:
+                remaining -= len(data)
+
+    async def _relay_chunked_body(
+        self, reader: StreamReader, write: Callable[[bytes], Awaitable[None]]
+    ) -> None:
+        """Relays a body with chunked transfer encoding verbatim, including
+        the chunk headers and the trailers.
+        """
+        while True:
+            line = await reader.read_until(CRLF)
+            if line is None:
+                raise ProtocolError("Connection closed in the middle of a body")
+
+            await write(line)
+
+            size, _, _ = line.partition(b";")
+            try:
+                chunk_size = int(size.strip(), 16)
+            except ValueError:
+                raise ProtocolError(f"Invalid chunk header: {line!r}") from None
+
+            if chunk_size == 0:
+                break
+
+            # Chunk data is followed by a CRLF
+            await self._relay_body(reader, write, chunk_size + 2)
+
+        # Trailers, terminated by an empty line
+        while True:
+            line = await reader.read_until(CRLF)
+            if line is None:
+                raise ProtocolError("Connection closed in the middle of a body")
+
+            await write(line)
+            if line == CRLF:
+                break
+
+    async def _tunnel(self, local: _PooledConnection) -> None:
+        """Turns the remote connection and the local connection into a
+        transparent, full-duplex tunnel until either side closes it.
+        """
+        async with open_nursery() as nursery:
+
+            async def pump(
+                reader: StreamReader, write: Callable[[bytes], Awaitable[None]]
+            ) -> None:
+                try:
+                    await self._relay_body(reader, write, None)
+                except (BrokenResourceError, ClosedResourceError):
+                    pass
+                nursery.cancel_scope.cancel()
+
+            nursery.start_soon(pump, self._remote_reader, local.conn.write)
+            nursery.start_soon(pump, local.reader, self._write_remote)
+
+    async def _write_remote(self, data: bytes) -> None:
+        await self._remote.write(data)
+        self.statistics.add_sent(len(data))
@@ -1 +1,3 @@
-from .Camera_Control import main
+from .gimbal import GimbalAttitude, GimbalSession, GimbalSessionManager
+
+__all__ = ("GimbalAttitude", "GimbalSession", "GimbalSessionManager")
@@ -0,0 +1,435 @@
+"""Long-lived control sessions for SIYI gimbals.
+
+Each gimbal is controlled by a session that keeps a UDP socket open towards
+the camera for as long as the server is running. Jog commands from the
+clients are turned into absolute attitude setpoints; setpoints that arrive
+while a previous one is still in flight are coalesced so the gimbal always
+receives the latest one only. The attitude reported by the gimbal is cached
+in the session, and the session keeps on polling the gimbal when idle so it
+can detect when the camera goes away and reconnect when it comes back.
+
+The wire format follows the SIYI gimbal camera external SDK protocol.
+"""
+
+from __future__ import annotations
+
+import trio.socket
+
+from dataclasses import dataclass
+from struct import Struct
+from trio import (
+    Event,
+    Nursery,
+    TooSlowError,
+    fail_after,
+    move_on_after,
+    open_nursery,
+    sleep,
+    sleep_forever,
+)
+from typing import Any, Optional
+
+from flockwave.server.logger import log as base_log
+
+__all__ = (
+    "GimbalAttitude",
+    "GimbalSession",
+    "GimbalSessionManager",
+    "decode_siyi_packet",
+    "encode_siyi_packet",
+    "parse_gimbal_address",
+)
+
+log = base_log.getChild("gimbal")
+
+SIYI_PORT = 37260
+"""Default UDP port of the SDK interface of SIYI cameras."""
+
+SIYI_HEADER = Struct("<2sBHHB")
+"""Header of SIYI SDK packets: magic bytes, control byte, payload length,
+sequence number and command ID.
+"""
+
+SIYI_MAGIC = b"\x55\x66"
+
+CMD_ACQUIRE_GIMBAL_ATTITUDE = 0x0D
+"""Command ID of the SIYI command that queries the attitude of the gimbal."""
+
+CMD_SET_GIMBAL_ATTITUDE = 0x0E
+"""Command ID of the SIYI command that sets the attitude of the gimbal."""
+
+_ANGLES = Struct("<hhh")
+_SETPOINT = Struct("<hh")
+_CRC = Struct("<H")
+
+
+def _crc16(data: bytes) -> int:
+    """CRC-16/XMODEM checksum used by the SIYI protocol."""
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+            crc &= 0xFFFF
+    return crc
+
+
+def encode_siyi_packet(cmd_id: int, payload: bytes = b"", *, seq: int = 0) -> bytes:
+    """Encodes a packet of the SIYI SDK protocol.
+
+    Parameters:
+        cmd_id: the command ID of the packet
+        payload: the payload of the packet
+        seq: the sequence number of the packet
+
+    Returns:
+        the encoded packet, including the checksum
+    """
+    packet = (
+        SIYI_HEADER.pack(SIYI_MAGIC, 1, len(payload), seq & 0xFFFF, cmd_id) + payload
+    )
+    return packet + _CRC.pack(_crc16(packet))
+
+
+def decode_siyi_packet(data: bytes) -> tuple[int, bytes]:
+    """Decodes a packet of the SIYI SDK protocol.
+
+    Returns:
+        the command ID and the payload of the packet
+
+    Raises:
+        ValueError: if the packet is malformed or its checksum is invalid
+    """
+    if len(data) < SIYI_HEADER.size + _CRC.size:
+        raise ValueError("packet too short")
+
+    magic, _, length, _, cmd_id = SIYI_HEADER.unpack_from(data)
+    if magic != SIYI_MAGIC:
+        raise ValueError("invalid magic bytes")
+
+    end = SIYI_HEADER.size + length
+    if len(data) < end + _CRC.size:
+        raise ValueError("truncated packet")
+
+    (crc,) = _CRC.unpack_from(data, end)
+    if crc != _crc16(data[:end]):
+        raise ValueError("checksum mismatch")
+
+    return cmd_id, data[SIYI_HEADER.size : end]
+
+
+def parse_gimbal_address(value: Any) -> tuple[str, int]:
+    """Parses a gimbal address given as a ``host`` or ``host:port`` string or
+    as a host-port pair.
+
+    Raises:
+        ValueError: if the port is not a valid integer
+    """
+    if isinstance(value, str):
+        host, _, port = value.partition(":")
+        return host, int(port) if port else SIYI_PORT
+    else:
+        host, port = value
+        return str(host), int(port)
+
+
+@dataclass(frozen=True)
+class GimbalAttitude:
+    """Attitude of a gimbal, in degrees."""
+
+    yaw: float = 0.0
+    pitch: float = 0.0
+    roll: float = 0.0
+
+    @classmethod
+    def from_payload(cls, payload: bytes):
+        """Creates an attitude object from the payload of a SIYI attitude
+        response, which starts with the yaw, pitch and roll angles in tenths of
+        degrees.
+        """
+        yaw, pitch, roll = _ANGLES.unpack_from(payload)
+        return cls(yaw / 10, pitch / 10, roll / 10)
+
+    @property
+    def json(self) -> list[float]:
+        return [self.yaw, self.pitch, self.roll]
+
+
+class GimbalSession:
+    """Control session of a single SIYI gimbal."""
+
+    address: tuple[str, int]
+    """Address of the SDK interface of the camera."""
+
+    attitude: Optional[GimbalAttitude]
+    """The last attitude reported by the gimbal; ``None`` if the gimbal has
+    not reported its attitude yet.
+    """
+
+    connected: bool
+    """Whether the gimbal responded to the last request of the session."""
+
+    yaw_limits: tuple[float, float] = (-135.0, 135.0)
+    """Range of yaw angles that the gimbal can be commanded to, in degrees."""
+
+    pitch_limits: tuple[float, float] = (-90.0, 25.0)
+    """Range of pitch angles that the gimbal can be commanded to, in degrees."""
+
+    timeout: float = 0.5
+    """Number of seconds to wait for the response of the gimbal to a request."""
+
+    poll_interval: float = 5.0
+    """Number of seconds between consecutive attitude queries when the session
+    is idle. Also determines how quickly a lost gimbal is detected.
+    """
+
+    reconnect_delay: float = 2.0
+    """Number of seconds to wait before re-opening the socket of the session
+    after a network error.
+    """
+
+    _seq: int
+    _setpoint: Optional[tuple[float, float]]
+    _setpoint_changed: Event
+    _sock: Optional[trio.socket.SocketType]
+
+    def __init__(self, address: tuple[str, int]):
+        """Constructor.
+
+        Parameters:
+            address: the address of the SDK interface of the camera
+        """
+        self.address = address
+        self.attitude = None
+        self.connected = False
+
+        self._seq = 0
+        self._setpoint = None
+        self._setpoint_changed = Event()
+        self._sock = None
+
+    @property
+    def setpoint(self) -> Optional[tuple[float, float]]:
+        """The current yaw and pitch setpoint of the gimbal, in degrees, or
+        ``None`` if the session has not commanded the gimbal yet.
+        """
+        return self._setpoint
+
+    def center(self) -> None:
+        """Requests the gimbal to return to its neutral attitude."""
+        self.set_attitude(0.0, 0.0)
+
+    def jog(self, *, yaw: float = 0.0, pitch: float = 0.0) -> None:
+        """Requests the gimbal to rotate by the given angles, in degrees,
+        relative to its current setpoint.
+
+        The request is processed asynchronously; rapid successive requests are
+        coalesced into a single setpoint.
+        """
+        if self._setpoint is not None:
+            base_yaw, base_pitch = self._setpoint
+        elif self.attitude is not None:
+            base_yaw, base_pitch = self.attitude.yaw, self.attitude.pitch
+        else:
+            base_yaw, base_pitch = 0.0, 0.0
+        self.set_attitude(base_yaw + yaw, base_pitch + pitch)
+
+    def set_attitude(self, yaw: float, pitch: float) -> None:
+        """Requests the gimbal to rotate to the given absolute yaw and pitch
+        angles, in degrees. Angles outside the limits of the gimbal are clamped.
+
+        The request is processed asynchronously; rapid successive requests are
+        coalesced into a single setpoint.
+        """
+        yaw = min(max(yaw, self.yaw_limits[0]), self.yaw_limits[1])
+        pitch = min(max(pitch, self.pitch_limits[0]), self.pitch_limits[1])
+        self._setpoint = yaw, pitch
+        self._setpoint_changed.set()
+
+    async def run(self) -> None:
+        """Runs the session until it is cancelled."""
+        try:
+            while True:
+                try:
+                    await self._open_socket()
+                    await self._serve_requests()
+                except OSError as ex:
+                    log.warning(f"Gimbal at {self._format_address()} failed: {ex}")
+                    self._set_connected(False)
+
+                self._close_socket()
+                await sleep(self.reconnect_delay)
+        finally:
+            self._close_socket()
+
+    async def _serve_requests(self) -> None:
+        # Query the attitude first so the jog commands have a baseline
+        await self._request(CMD_ACQUIRE_GIMBAL_ATTITUDE)
+
+        while True:
+            with move_on_after(self.poll_interval):
+                await self._setpoint_changed.wait()
+
+            if self._setpoint_changed.is_set():
+                # Everything that arrived until now is coalesced into the
+                # current setpoint
+                self._setpoint_changed = Event()
+                yaw, pitch = self._setpoint  # type: ignore
+                payload = _SETPOINT.pack(round(yaw * 10), round(pitch * 10))
+                await self._request(CMD_SET_GIMBAL_ATTITUDE, payload)
+            else:
+                await self._request(CMD_ACQUIRE_GIMBAL_ATTITUDE)
+
+    async def _request(self, cmd_id: int, payload: bytes = b"") -> bool:
+        """Sends a request to the gimbal and waits for the response with the
+        same command ID, updating the cached attitude from the response.
+
+        Returns:
+            whether the gimbal responded in time
+        """
+        assert self._sock is not None
+
+        self._seq = (self._seq + 1) & 0xFFFF
+        await self._sock.send(encode_siyi_packet(cmd_id, payload, seq=self._seq))
+
+        try:
+            with fail_after(self.timeout):
+                while True:
+                    data = await self._sock.recv(1024)
+                    try:
+                        response_id, response = decode_siyi_packet(data)
+                    except ValueError:
+                        continue
+                    if response_id == cmd_id:
+                        break
+        except TooSlowError:
+            self._set_connected(False)
+            return False
+
+        if len(response) >= _ANGLES.size:
+            self.attitude = GimbalAttitude.from_payload(response)
+        self._set_connected(True)
+        return True
+
+    def _close_socket(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _format_address(self) -> str:
+        return "{0}:{1}".format(*self.address)
+
+    async def _open_socket(self) -> None:
+        self._sock = trio.socket.socket(trio.socket.AF_INET, trio.socket.SOCK_DGRAM)
+        await self._sock.connect(self.address)
+
+    def _set_connected(self, value: bool) -> None:
+        if self.connected != value:
+            self.connected = value
+            if value:
+                log.info(f"Gimbal at {self._format_address()} connected")
+            else:
+                log.warning(f"Gimbal at {self._format_address()} is not responding")
+
+
+class GimbalSessionManager:
+    """Object that manages the control sessions of multiple SIYI gimbals,
+    keyed by the addresses of the cameras.
+
+    Sessions are created on demand and live until the manager is stopped.
+    """
+
+    default_address: Optional[tuple[str, int]] = None
+    """Address of the gimbal to use when a request does not specify one."""
+
+    jog_step: float = 4.0
+    """Angle of rotation for a single jog command, in degrees."""
+
+    _nursery: Optional[Nursery]
+    _sessions: dict[tuple[str, int], GimbalSession]
+
+    def __init__(self):
+        """Constructor."""
+        self._nursery = None
+        self._sessions = {}
+
+    def configure(self, config: dict[str, Any]) -> None:
+        """Configures the manager from the ``GIMBALS`` section of the
+        configuration of the server.
+        """
+        address = config.get("default")
+        self.default_address = parse_gimbal_address(address) if address else None
+        self.jog_step = float(config.get("jog_step", 4.0))
+
+    def get(self, address: Any = None) -> GimbalSession:
+        """Returns the session of the gimbal with the given address, creating
+        and starting it if needed.
+
+        Parameters:
+            address: the address of the gimbal as a ``host`` or ``host:port``
+                string or a host-port pair; ``None`` means the default gimbal
+
+        Raises:
+            RuntimeError: if no address was given and there is no default
+                gimbal
+        """
+        if address is None:
+            if self.default_address is None:
+                raise RuntimeError("No gimbal address was specified")
+            key = self.default_address
+        else:
+            key = parse_gimbal_address(address)
+
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = GimbalSession(key)
+            if self._nursery is not None:
+                self._nursery.start_soon(session.run)
+        return session
+
+    def jog(self, direction: str, address: Any = None) -> GimbalSession:
+        """Jogs the gimbal with the given address by one step in the given
+        direction.
+
+        Parameters:
+            direction: one of ``up``, ``down``, ``left``, ``right`` or
+                ``center``
+            address: the address of the gimbal; ``None`` means the default
+                gimbal
+
+        Returns:
+            the session of the gimbal
+
+        Raises:
+            RuntimeError: if the direction is invalid or there is no gimbal
+                with the given address
+        """
+        step = self.jog_step
+        deltas = {
+            "up": (0.0, step),
+            "down": (0.0, -step),
+            "left": (-step, 0.0),
+            "right": (step, 0.0),
+        }
+
+        session = self.get(address)
+        if direction == "center":
+            session.center()
+        elif direction in deltas:
+            yaw, pitch = deltas[direction]
+            session.jog(yaw=yaw, pitch=pitch)
+        else:
+            raise RuntimeError(f"Invalid gimbal direction: {direction!r}")
+
+        return session
+
+    async def run(self) -> None:
+        """Runs the sessions of the manager until cancelled."""
+        try:
+            async with open_nursery() as nursery:
+                self._nursery = nursery
+                for session in self._sessions.values():
+                    nursery.start_soon(session.run)
+                await sleep_forever()
+        finally:
+            self._nursery = None
@@ -1,5 +1,4 @@
 from .Mission_Download import main, download_mission
 from .Skip_WayPoint import Skip_waypoint
-from .mission_basic_1 import Connect_vehicles
+from .mission_basic_1 import Connect_vehicles, create_vtol_missions
 from .Guided_mission import Guided_Mission
-from .new_left import gps_bearing
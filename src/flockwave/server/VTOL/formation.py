@@ -0,0 +1,177 @@
+"""Formation planning for the VTOL survey missions.
+
+The planner takes the path of the lead drone and computes the tracks of the
+remaining drones of the formation such that drone ``k`` flies parallel to the
+lead drone at a lateral distance of ``k`` times the spacing. At the turns of
+the path the drones are placed along the miter line of the two adjacent legs
+so the lateral distance is kept on both legs, irrespective of the direction
+and the sharpness of the turn.
+
+All drones and all waypoints are processed in a single batch in a local
+tangent plane around each waypoint of the lead drone.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+
+import numpy as np
+
+from numpy.typing import ArrayLike, NDArray
+from typing import Literal
+
+from ..utils.geodesy import EARTH_RADIUS, bearing, haversine, offset_by_meters
+
+__all__ = ("formation_offsets", "plan_formation", "write_tracks")
+
+
+FormationSide = Literal["left", "right"]
+"""Side of the lead drone where the remaining drones of the formation fly,
+relative to the direction of travel.
+"""
+
+MITER_LIMIT = 4.0
+"""Maximum length of the offset vector at a turn, relative to the spacing.
+
+Sharp turns would place the drones very far from the lead drone along the
+miter line; the offset is clamped to this length instead.
+"""
+
+
+def formation_offsets(
+    points: ArrayLike,
+    *,
+    side: FormationSide = "right",
+    miter_limit: float = MITER_LIMIT,
+) -> NDArray[np.float64]:
+    """Returns the unit lateral offset of the formation at each waypoint of the
+    path of the lead drone.
+
+    Parameters:
+        points: array of shape (N, 2) containing the latitudes and longitudes
+            of the waypoints of the lead drone
+        side: side of the lead drone where the formation is placed
+        miter_limit: maximum length of the offset vectors at turns
+
+    Returns:
+        array of shape (N, 2) containing the east and north components of the
+        offset of the next drone in the formation at each waypoint, in units
+        of the spacing between the drones
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    num_points = len(points)
+    if num_points < 2:
+        raise RuntimeError("At least two waypoints are needed to plan a formation")
+
+    lat, lon = points[:, 0], points[:, 1]
+    headings = np.radians(np.atleast_1d(bearing(lat[:-1], lon[:-1], lat[1:], lon[1:])))
+
+    # Zero-length legs have no direction; they inherit the heading of the
+    # closest preceding leg that has one (or the first such leg after them)
+    valid = np.atleast_1d(haversine(lat[:-1], lon[:-1], lat[1:], lon[1:])) > 1e-3
+    if not valid.any():
+        raise RuntimeError("All waypoints of the formation are at the same place")
+    indices = np.where(valid, np.arange(len(valid)), 0)
+    indices = np.maximum.accumulate(indices)
+    indices[: np.argmax(valid)] = np.argmax(valid)
+    headings = headings[indices]
+
+    # Unit normals of the legs, pointing towards the formation
+    normal_headings = headings + (np.pi / 2 if side == "right" else -np.pi / 2)
+    normals = np.column_stack((np.sin(normal_headings), np.cos(normal_headings)))
+
+    # Incoming and outgoing leg normals at each waypoint; the first and last
+    # waypoints have only one leg
+    incoming = np.vstack((normals[:1], normals))
+    outgoing = np.vstack((normals, normals[-1:]))
+
+    # The miter vector m = (n1 + n2) / (1 + n1 . n2) satisfies m . n1 = 1 and
+    # m . n2 = 1, i.e. it keeps unit distance from both legs. Its length is
+    # sqrt(2 / (1 + n1 . n2)), which grows without bounds for sharp turns.
+    sums = incoming + outgoing
+    denominators = 1 + np.einsum("ij,ij->i", incoming, outgoing)
+    too_sharp = denominators < 2 / miter_limit**2
+    denominators[too_sharp] = 1
+    offsets = sums / denominators[:, np.newaxis]
+
+    if too_sharp.any():
+        # Clamp the miter vector to the limit, or fall back to the normal of
+        # the incoming leg for U-turns where the miter has no direction
+        lengths = np.hypot(sums[too_sharp, 0], sums[too_sharp, 1])
+        offsets[too_sharp] = np.where(
+            (lengths > 1e-6)[:, np.newaxis],
+            sums[too_sharp] * (miter_limit / np.maximum(lengths, 1e-6))[:, np.newaxis],
+            incoming[too_sharp],
+        )
+
+    return offsets
+
+
+def plan_formation(
+    points: ArrayLike,
+    num_drones: int,
+    spacing: float,
+    *,
+    side: FormationSide = "right",
+    miter_limit: float = MITER_LIMIT,
+) -> NDArray[np.float64]:
+    """Plans the tracks of all the drones of a formation following the given
+    path of the lead drone.
+
+    Parameters:
+        points: array of shape (N, 2) containing the latitudes and longitudes
+            of the waypoints of the lead drone
+        num_drones: number of drones in the formation, including the lead drone
+        spacing: lateral distance between adjacent drones, in meters
+        side: side of the lead drone where the formation is placed
+        miter_limit: maximum length of the offset vectors at turns, relative to
+            the spacing
+
+    Returns:
+        array of shape (num_drones, N, 2) containing the latitudes and
+        longitudes of the waypoints of each drone; the first track is the path
+        of the lead drone
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    offsets = formation_offsets(points, side=side, miter_limit=miter_limit)
+
+    # Offsets of all drones at all waypoints, in meters, shape (K, N, 2)
+    ranks = np.arange(num_drones, dtype=float)[:, np.newaxis, np.newaxis]
+    offsets = ranks * spacing * offsets[np.newaxis, :, :]
+
+    lat, lon = offset_by_meters(
+        points[:, 0],
+        points[:, 1],
+        offsets[..., 1],
+        offsets[..., 0],
+        radius=EARTH_RADIUS,
+    )
+    return np.stack((lat, lon), axis=-1)
+
+
+def write_tracks(
+    tracks: NDArray[np.float64],
+    folder: str,
+    *,
+    forward: str = "forward",
+    reverse: str = "reverse",
+) -> None:
+    """Writes the tracks of the drones of a formation into CSV files, one for
+    the forward and one for the reverse direction of each drone.
+
+    The files are named ``{forward}-drone-{i}.csv`` and
+    ``{reverse}-drone-{i}.csv`` where ``i`` is the one-based index of the
+    drone in the formation.
+
+    Parameters:
+        tracks: array of shape (K, N, 2) as returned from `plan_formation()`
+        folder: the folder to write the files into
+        forward: prefix of the names of the files of the forward tracks
+        reverse: prefix of the names of the files of the reverse tracks
+    """
+    for index, track in enumerate(tracks.tolist(), 1):
+        for prefix, rows in ((forward, track), (reverse, track[::-1])):
+            path = os.path.join(folder, f"{prefix}-drone-{index}.csv")
+            with open(path, "w", newline="") as fp:
+                csv.writer(fp).writerows(rows)
@@ -9,16 +9,13 @@ Full documentation is provided at https://dronekit-python.readthedocs.io/en/late
 """
 from __future__ import print_function
 
-from dronekit import (
-    connect,
-    LocationGlobalRelative,
-    LocationGlobal,
-    Command,
-)
-import time
-import math, csv, subprocess, os
-from pymavlink import mavutil
+from dronekit import connect, LocationGlobal
+import subprocess, os
+
+from ..ext.mavlink.enums import MAVCommand
+from ..ext.mavlink.mission import MissionItem
 from ..logger import log
+from ..utils.geodesy import haversine, load_waypoints, offset_by_meters
 
 
 def get_location_metres(original_location, dNorth, dEast):
@@ -26,35 +23,18 @@ def get_location_metres(original_location, dNorth, dEast):
     Returns a LocationGlobal object containing the latitude/longitude `dNorth` and `dEast` metres from the
     specified `original_location`. The returned Location has the same `alt` value
     as `original_location`.
-
-    The function is useful when you want to move the vehicle around specifying locations relative to
-    the current vehicle position.
-    The algorithm is relatively accurate over small distances (10m within 1km) except close to the poles.
-    For more information see:
-    http://gis.stackexchange.com/questions/2951/algorithm-for-offsetting-a-latitude-longitude-by-some-amount-of-meters
     """
-    earth_radius = 6378137.0  # Radius of "spherical" earth
-    # Coordinate offsets in radians
-    dLat = dNorth / earth_radius
-    dLon = dEast / (earth_radius * math.cos(math.pi * original_location.lat / 180))
-
-    # New position in decimal degrees
-    newlat = original_location.lat + (dLat * 180 / math.pi)
-    newlon = original_location.lon + (dLon * 180 / math.pi)
-    return LocationGlobal(newlat, newlon, original_location.alt)
+    lat, lon = offset_by_meters(
+        original_location.lat, original_location.lon, dNorth, dEast
+    )
+    return LocationGlobal(lat, lon, original_location.alt)
 
 
 def get_distance_metres(aLocation1, aLocation2):
     """
     Returns the ground distance in metres between two LocationGlobal objects.
-
-    This method is an approximation, and will not be accurate over large distances and close to the
-    earth's poles. It comes from the ArduPilot test code:
-    https://github.com/diydrones/ardupilot/blob/master/Tools/autotest/common.py
     """
-    dlat = aLocation2.lat - aLocation1.lat
-    dlong = aLocation2.lon - aLocation1.lon
-    return math.sqrt((dlat * dlat) + (dlong * dlong)) * 1.113195e5
+    return haversine(aLocation1.lat, aLocation1.lon, aLocation2.lat, aLocation2.lon)
 
 
 def distance_to_current_waypoint(vehicle):
@@ -66,349 +46,50 @@ def distance_to_current_waypoint(vehicle):
     if nextwaypoint == 0:
         return None
     missionitem = vehicle.commands[nextwaypoint - 1]  # commands are zero indexed
-    lat = missionitem.x
-    lon = missionitem.y
-    alt = missionitem.z
-    targetWaypointLocation = LocationGlobalRelative(lat, lon, alt)
-    distancetopoint = get_distance_metres(
-        vehicle.location.global_frame, targetWaypointLocation
-    )
-    return distancetopoint
+    return get_distance_metres(vehicle.location.global_frame, missionitem)
 
 
-def adds_square_mission(vehicle, i, altitude):
-    """
-    Adds a takeoff command and four waypoint commands to the current mission.
-    The waypoints are positioned to form a square of side length 2*aSize around the specified LocationGlobal (aLocation).
+CSV_FOLDER = "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/csvs"
+"""Folder containing the CSV files with the waypoints of the forward, search
+and reverse legs of the missions of the drones.
+"""
 
-    The function assumes vehicle.commands matches the vehicle mission state
-    (you must have called download at least once in the session and after clearing the mission)
-    """
 
-    cmds = vehicle.commands
+def read_waypoints(leg, i):
+    """Reads the waypoints of the given leg of the mission of the drone with
+    the given (zero-based) index.
+    """
+    return load_waypoints(os.path.join(CSV_FOLDER, f"{leg}-drone-{i + 1}.csv"))
 
-    # cmds.clear()
 
-    # flag = 0
-    # prev_lat, prev_lon = 0, 0
-    # cmds.add(
-    #     Command(
-    #         0,
-    #         0,
-    #         0,
-    #         mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-    #         mavutil.mavlink.MAV_CMD_NAV_VTOL_TAKEOFF,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         30,
-    #     )
-    # )
-    # cmds.add(
-    #     Command(
-    #         0,
-    #         0,
-    #         0,
-    #         mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-    #         mavutil.mavlink.MAV_CMD_NAV_VTOL_TAKEOFF,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         0,
-    #         30,
-    #     )
-    # )
-    # with open(
-    #     "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/csvs/forward-drone-"
-    #     + str(i + 1)
-    #     + ".csv",
-    #     "r",
-    # ) as f:
-    #     csvreader = csv.reader(f)
-    #     for row in csvreader:
-    #         lat = float(row[0])
-    #         lon = float(row[1])
-    #         if not flag:
-    #             cmds.add(
-    #                 Command(
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-    #                     mavutil.mavlink.MAV_CMD_NAV_WAYPOINT,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     lat,
-    #                     lon,
-    #                     altitude,
-    #                 )
-    #             )
-    #             cmds.add(
-    #                 Command(
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-    #                     mavutil.mavlink.MAV_CMD_NAV_LOITER_UNLIM,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     lat,
-    #                     lon,
-    #                     altitude,
-    #                 )
-    #             )
-    #         else:
-    #             cmds.add(
-    #                 Command(
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-    #                     mavutil.mavlink.MAV_CMD_NAV_WAYPOINT,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     0,
-    #                     lat,
-    #                     lon,
-    #                     altitude,
-    #                 )
-    #             )
-    #         prev_lat = lat
-    #         prev_lon = lon
-    #         flag = 1
-    #     cmds.add(
-    #         Command(
-    #             0,
-    #             0,
-    #             0,
-    #             mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-    #             mavutil.mavlink.MAV_CMD_NAV_LOITER_UNLIM,
-    #             0,
-    #             0,
-    #             0,
-    #             0,
-    #             0,
-    #             0,
-    #             prev_lat,
-    #             prev_lon,
-    #             altitude,
-    #         )
-    #     )
-    print(" Clear any existing commands")
-    cmds.clear()
+def create_vtol_mission(i, altitude):
+    """Creates the mission items of the drone with the given (zero-based)
+    index: a VTOL takeoff, the forward leg with a loiter at its first
+    waypoint, the search leg and the reverse leg, each of the latter two
+    ending with an unlimited loiter at their last waypoint.
 
-    print(" Define/add new commands.")
-    flag = 0
-    prev_lat, prev_lon = 0, 0
-    cmds.add(
-        Command(
-            0,
-            0,
-            0,
-            mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-            mavutil.mavlink.MAV_CMD_NAV_VTOL_TAKEOFF,
-            0,
-            0,
-            0,
-            0,
-            0,
-            0,
-            0,
-            0,
-            30,
+    The first item is a placeholder for the home position that ArduPilot
+    ignores; the takeoff is the second item.
+    """
+    takeoff = MissionItem(MAVCommand.NAV_VTOL_TAKEOFF, alt=30)
+    items = [takeoff, takeoff]
+
+    for index, (lat, lon) in enumerate(read_waypoints("forward", i)):
+        items.append(MissionItem.waypoint(lat, lon, altitude))
+        if index == 0:
+            items.append(MissionItem(MAVCommand.NAV_LOITER_UNLIM, lat, lon, altitude))
+
+    for leg in ("search", "reverse"):
+        items.extend(
+            MissionItem.waypoint(lat, lon, altitude)
+            for lat, lon in read_waypoints(leg, i)
         )
-    )
-    with open(
-        "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/csvs/forward-drone-"
-        + str(i + 1)
-        + ".csv",
-        "r",
-    ) as f:
-        csvreader = csv.reader(f)
-        for row in csvreader:
-            print(row)
-            lat = float(row[0])
-            lon = float(row[1])
-            if not flag:
-                cmds.add(
-                    Command(
-                        0,
-                        0,
-                        0,
-                        mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-                        mavutil.mavlink.MAV_CMD_NAV_WAYPOINT,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0,
-                        lat,
-                        lon,
-                        altitude,
-                    )
-                )
-                cmds.add(
-                    Command(
-                        0,
-                        0,
-                        0,
-                        mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-                        mavutil.mavlink.MAV_CMD_NAV_LOITER_UNLIM,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0,
-                        lat,
-                        lon,
-                        altitude,
-                    )
-                )
-            else:
-                cmds.add(
-                    Command(
-                        0,
-                        0,
-                        0,
-                        mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-                        mavutil.mavlink.MAV_CMD_NAV_WAYPOINT,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0,
-                        0,
-                        lat,
-                        lon,
-                        altitude,
-                    )
-                )
-            prev_lat = lat
-            prev_lon = lon
-            flag = 1
-    with open(
-        "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/csvs/search-drone-"
-        + str(i + 1)
-        + ".csv",
-        "r",
-    ) as f:
-        csvreader = csv.reader(f)
-        for row in csvreader:
-            print(row)
-            lat = float(row[0])
-            lon = float(row[1])
-            cmds.add(
-                Command(
-                    0,
-                    0,
-                    0,
-                    mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-                    mavutil.mavlink.MAV_CMD_NAV_WAYPOINT,
-                    0,
-                    0,
-                    0,
-                    0,
-                    0,
-                    0,
-                    lat,
-                    lon,
-                    altitude,
-                )
-            )
-            prev_lat = lat
-            prev_lon = lon
-    cmds.add(
-        Command(
-            0,
-            0,
-            0,
-            mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-            mavutil.mavlink.MAV_CMD_NAV_LOITER_UNLIM,
-            0,
-            0,
-            0,
-            0,
-            0,
-            0,
-            prev_lat,
-            prev_lon,
-            altitude,
+        last = items[-1]
+        items.append(
+            MissionItem(MAVCommand.NAV_LOITER_UNLIM, last.lat, last.lon, altitude)
         )
-    )
 
-    with open(
-        "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/csvs/reverse-drone-"
-        + str(i + 1)
-        + ".csv",
-        "r",
-    ) as f:
-        csvreader = csv.reader(f)
-        for row in csvreader:
-            print(row)
-            lat = float(row[0])
-            lon = float(row[1])
-            cmds.add(
-                Command(
-                    0,
-                    0,
-                    0,
-                    mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-                    mavutil.mavlink.MAV_CMD_NAV_WAYPOINT,
-                    0,
-                    0,
-                    0,
-                    0,
-                    0,
-                    0,
-                    lat,
-                    lon,
-                    altitude,
-                )
-            )
-            prev_lat = lat
-            prev_lon = lon
-    cmds.add(
-        Command(
-            0,
-            0,
-            0,
-            mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,
-            mavutil.mavlink.MAV_CMD_NAV_LOITER_UNLIM,
-            0,
-            0,
-            0,
-            0,
-            0,
-            0,
-            prev_lat,
-            prev_lon,
-            altitude,
-        )
-    )
-    cmds.upload()
-    vehicle.close()
+    return items
 
 
 def ping(self, host):
@@ -441,13 +122,10 @@ def Connect_vehicles():
     return vehicles
 
 
-def main():
-    from ..socket.globalVariable import get_vehicle
-
-    vehicles = get_vehicle()
-    index = 0
-    alt = 100
-    for vehicle in vehicles:
-        adds_square_mission(vehicle, index, alt)
-        index += 1
-        alt += 25
+def create_vtol_missions(num_drones, altitude=100, altitude_step=25):
+    """Creates the missions of the given number of drones. Each drone flies
+    at a different altitude so their paths do not cross at the same height.
+    """
+    return [
+        create_vtol_mission(i, altitude + i * altitude_step) for i in range(num_drones)
+    ]
@@ -1,59 +1,8 @@
-import math
-from scipy import interpolate
 import simplekml
 import xml.etree.ElementTree as ET
-import csv
-import os
-import math
-from scipy import interpolate
-from .mission_basic_1 import main as MB
 
-
-def destination_location(homeLattitude, homeLongitude, distance, bearing):
-    R = 6371e3  # Radius of earth in metres
-    rlat1 = homeLattitude * (math.pi / 180)
-    rlon1 = homeLongitude * (math.pi / 180)
-    d = distance
-    bearing = bearing * (math.pi / 180)  # Converting bearing to radians
-    rlat2 = math.asin(
-        (math.sin(rlat1) * math.cos(d / R))
-        + (math.cos(rlat1) * math.sin(d / R) * math.cos(bearing))
-    )
-    rlon2 = rlon1 + math.atan2(
-        (math.sin(bearing) * math.sin(d / R) * math.cos(rlat1)),
-        (math.cos(d / R) - (math.sin(rlat1) * math.sin(rlat2))),
-    )
-    rlat2 = rlat2 * (180 / math.pi)  # Converting to degrees
-    rlon2 = rlon2 * (180 / math.pi)  # converting to degrees
-    location = [rlat2, rlon2]
-    return location
-
-
-def gps_bearing(
-    homeLattitude, homeLongitude, destinationLattitude, destinationLongitude
-):
-    R = 6371e3  # Radius of earth in metres
-    rlat1 = homeLattitude * (math.pi / 180)
-    rlat2 = destinationLattitude * (math.pi / 180)
-    rlon1 = homeLongitude * (math.pi / 180)
-    rlon2 = destinationLongitude * (math.pi / 180)
-    dlat = (destinationLattitude - homeLattitude) * (math.pi / 180)
-    dlon = (destinationLongitude - homeLongitude) * (math.pi / 180)
-    # haversine formula to find distance
-    a = (math.sin(dlat / 2) * math.sin(dlat / 2)) + (
-        math.cos(rlat1) * math.cos(rlat2) * (math.sin(dlon / 2) * math.sin(dlon / 2))
-    )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c  # distance in metres
-    # formula for bearing
-    y = math.sin(rlon2 - rlon1) * math.cos(rlat2)
-    x = math.cos(rlat1) * math.sin(rlat2) - math.sin(rlat1) * math.cos(
-        rlat2
-    ) * math.cos(rlon2 - rlon1)
-    bearing = math.atan2(y, x)  # bearing in radians
-    bearingDegrees = bearing * (180 / math.pi)
-    out = [distance, bearingDegrees]
-    return out
+from .formation import plan_formation, write_tracks
+from .mission_basic_1 import CSV_FOLDER
 
 
 def extract_data_from_kml(kml_file_path):
@@ -98,210 +47,9 @@ def kml_read(kml_file_path):
     return result_array
 
 
-def cartToGeo(origin, endDistance, cartLocation):
-    # The initial point of rectangle in (x,y) is (0,0) so considering the current
-    # location as origin and retreiving the latitude and longitude from the GPS
-    # origin = (12.948048, 80.139742) Format
-
-    # Calculating the hypot end point for interpolating the latitudes and longitudes
-    rEndDistance = math.sqrt(2 * (endDistance**2))
-
-    # The bearing for the hypot angle is 45 degrees considering coverage area as square
-    bearing = 45
-
-    # Determining the Latitude and Longitude of Middle point of the sqaure area
-    # and hypot end point of square area for interpolating latitude and longitude
-    lEnd, rEnd = destination_location(
-        origin[0], origin[1], rEndDistance, 180 + bearing
-    ), destination_location(origin[0], origin[1], rEndDistance, bearing)
-
-    # Array of (x,y)
-    x_cart, y_cart = [-endDistance, 0, endDistance], [-endDistance, 0, endDistance]
-
-    # Array of (latitude, longitude)
-    x_lon, y_lat = [lEnd[1], origin[1], rEnd[1]], [lEnd[0], origin[0], rEnd[0]]
-
-    # Latitude interpolation function
-    f_lat = interpolate.interp1d(y_cart, y_lat)
-
-    # Longitude interpolation function
-    f_lon = interpolate.interp1d(x_cart, x_lon)
-
-    # Converting (latitude, longitude) to (x,y) using interpolation function
-    lat, lon = f_lat(cartLocation[1]), f_lon(cartLocation[0])
-    return (lat, lon)
-
-
-def generate_XY_Positions(numOfDrones, x, y, origin):
-    endDistance = 10000
-    Initial_x, Initial_y = x, y
-    XY_values = []
-    lat, lon = cartToGeo(origin, endDistance, [0, 0])
-    XY_values.append([lat, lon])
-    for i in range(numOfDrones - 1):
-        lat, lon = cartToGeo(origin, endDistance, [Initial_x, Initial_y])
-        XY_values.append([lat, lon])
-        Initial_x += x
-        Initial_y += y
-    return XY_values
-
-
 def main(Drones):
-
     result = kml_read(
         "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/Forward-Mission.kml"
     )
-
-    numOfDrones = Drones
-
-    bearing = 0
-    prev_bearing = 0
-
-    x = 0
-    y = -60
-
-    lat_lons = [[], [], [], [], [], [], [], [], []]
-
-    prev_bearing = abs(
-        gps_bearing(result[0][0], result[0][1], result[1][0], result[1][1])[1]
-    )
-
-    flag = 0
-    print(result)
-
-    for index in range(len(result) - 1):
-        bearing = gps_bearing(
-            result[index][0],
-            result[index][1],
-            result[index + 1][0],
-            result[index + 1][1],
-        )[1]
-
-        # with open(
-        #     "C:/Users/mspac/Documents/sundar/vtol_code/mission_basic/bearing.csv",
-        #     "a",
-        #     newline="",
-        # ) as f:
-        #     csvwriter = csv.writer(f)
-        #     csvwriter.writerow([1, [x, y], prev_bearing, bearing])
-        if (
-            prev_bearing >= -30
-            and prev_bearing <= 30
-            and bearing >= 50
-            and bearing <= 125
-        ):
-            x = 60
-            y = 60
-        elif (
-            prev_bearing >= 50
-            and prev_bearing <= 125
-            and bearing >= 150
-            and bearing <= 210
-        ):
-            x = 60
-            y = -60
-        elif (
-            prev_bearing >= 150
-            and prev_bearing <= 210
-            and bearing >= 50
-            and bearing <= 125
-        ):
-            x = -60
-            y = -60
-        elif (
-            prev_bearing >= 50
-            and prev_bearing <= 125
-            and bearing >= -30
-            and bearing <= 30
-        ):
-            x = 60
-            y = -60
-        elif (
-            prev_bearing >= -30
-            and prev_bearing <= 30
-            and bearing >= -125
-            and bearing <= -50
-        ):
-            x = 60
-            y = 60
-        elif (
-            prev_bearing >= -125
-            and prev_bearing <= -50
-            and bearing >= -210
-            and bearing <= -150
-        ):
-            x = -60
-            y = 60
-        elif (
-            prev_bearing >= -210
-            and prev_bearing <= -150
-            and bearing >= 50
-            and bearing <= 125
-        ):
-            x = -60
-            y = -60
-        elif (
-            prev_bearing >= -125
-            and prev_bearing <= -50
-            and bearing >= 150
-            and bearing <= 215
-        ):
-            x = -60
-            y = 60
-        prev_bearing = bearing
-        res = generate_XY_Positions(numOfDrones, x, y, result[index])
-
-        for i in range(len(res)):
-            lat_lons[i].append(res[i])
-
-    bearing = gps_bearing(
-        result[len(result) - 2][0],
-        result[len(result) - 2][1],
-        result[len(result) - 1][0],
-        result[len(result) - 1][1],
-    )[1]
-
-    if bearing >= -30 and bearing <= 30:
-        x = 60
-        y = 0
-    elif bearing >= -210 and bearing <= -150:
-        x = -60
-        y = 0
-    elif bearing >= -125 and bearing <= -50:
-        x = -60
-        y = 0
-    elif bearing >= 50 and bearing <= 125:
-        x = 0
-        y = -60
-
-    res = generate_XY_Positions(numOfDrones, x, y, result[len(result) - 1])
-
-    for i in range(len(res)):
-        lat_lons[i].append(res[i])
-
-    for i in range(numOfDrones):
-        with open(
-            "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/csvs/forward-drone-"
-            + str(i + 1)
-            + ".csv",
-            "w",
-            newline="",
-        ) as f:
-            csvwriter = csv.writer(f)
-            for j in range(len(lat_lons[i])):
-
-                csvwriter.writerow([lat_lons[i][j][0], lat_lons[i][j][1]])
-
-    for i in range(numOfDrones):
-        lat_lons[i] = lat_lons[i].reverse()
-        with open(
-            "C:/Users/vshar/OneDrive/Documents/fullstack/skybrush-server/src/flockwave/server/VTOL/csvs/reverse-drone-"
-            + str(i + 1)
-            + ".csv",
-            "w",
-            newline="",
-        ) as f:
-            csvwriter = csv.writer(f)
-            for j in range(len(lat_lons[i])):
-                csvwriter.writerow([lat_lons[i][j][0], lat_lons[i][j][1]])
-    MB()
+    tracks = plan_formation(result, Drones, spacing=60, side="right")
+    write_tracks(tracks, CSV_FOLDER)
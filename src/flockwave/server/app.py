@@ -3,13 +3,14 @@
 from appdirs import AppDirs
 from collections import defaultdict
 from inspect import isawaitable, isasyncgen
-from os import environ, listdir, path
+from os import environ, path
 from trio import (
     BrokenResourceError,
     move_on_after,
 )
 from typing import (
     Any,
+    Callable,
     Iterable,
     Optional,
     Sequence,
@@ -28,8 +29,8 @@ from flockwave.server.utils.system_time import (
     get_system_time_msec,
     set_system_time_msec_async,
 )
-import threading
 
+from .Cam_Control import GimbalSessionManager
 from .commands import CommandExecutionManager, CommandExecutionStatus
 from .errors import NotSupportedError
 from .logger import log
@@ -39,6 +40,7 @@ from .message_hub import (
     MessageHub,
     RateLimiters,
     UAVMessageRateLimiter,
+    UAVStatusDeltaRateLimiter,
 )
 from .message_handlers import MessageBodyTransformationSpec, transform_message_body
 from .model.client import Client
@@ -60,43 +62,16 @@ from .registries import (
     find_in_registry,
 )
 from .version import __version__ as server_version
-from .swarm import *
-from .socket.listen_sock import run_socket
-from .socket.globalVariable import (
-    get_logCounter,
-    update_log_file_path,
-    update_logCounter,
-)
-
-from dronekit import LocationGlobalRelative, VehicleMode
-
-# from .cameraActions import stop_capture, start_camera
+from .swarm import SwarmCommandDispatcher, fetch_file_content
+from .socket.globalVariable import swarm_state
+from .socket.listen_sock import SwarmTelemetryListener
+from .socket.state import JSON_FIELDS, SwarmState, SwarmStateSnapshot
 
 __all__ = ("app",)
 
 PACKAGE_NAME = __name__.rpartition(".")[0]
 
 
-# if get_logCounter() == 0:
-#     sample_name = "log_"
-#     folder_path = "C:/Users/vshar/OneDrive/Documents/mspace-server/log"
-#     log_list = listdir(folder_path)
-#     num_log = len(log_list) + 1
-#     file_name = sample_name+str(num_log)+str(".txt")
-#     file_path = path.join(folder_path,file_name)
-#     update_log_file_path(file_path)
-#     try:
-#         # Try to open the file in exclusive creation mode ('x')
-#         with open(file_path, 'x') as file:
-#             # If the file doesn't exist, it will be created
-#             print(f"File created: {file_path}")
-#         update_logCounter()
-#     except FileExistsError:
-#         # If the file already exists, print a message
-#         print(f"File already exists: {file_path}")
-
-# threading.Thread(target=run_socket,daemon=True).start()
-
 #: Table that describes the handlers of several UAV-related command requests
 UAV_COMMAND_HANDLERS: dict[str, tuple[str, MessageBodyTransformationSpec]] = {
     "LOG-DATA": ("get_log", rename_keys({"logId": "log_id"})),
@@ -168,12 +143,25 @@ class SkybrushServer(DaemonApp):
     channels of the UAV.
     """
 
+    gimbals: GimbalSessionManager
+    """Object that manages the control sessions of the SIYI camera gimbals."""
+
     message_hub: MessageHub
     """Central messaging hub via which one can send Flockwave messages."""
 
     object_registry: ObjectRegistry
     """Central registry for the objects known to the server."""
 
+    swarm: SwarmCommandDispatcher
+    """Object that dispatches plain-text commands to the onboard companion
+    computers of the drones in the swarm.
+    """
+
+    swarm_listener: SwarmTelemetryListener
+    """Object that receives the status datagrams sent by the onboard
+    companion computers of the drones in the swarm.
+    """
+
     uav_driver_registry: UAVDriverRegistry
     """Registry for UAV drivers that are currently registered in the server."""
 
@@ -446,6 +434,34 @@ class SkybrushServer(DaemonApp):
         body = {"items": list(messages), "type": "SYS-MSG"}
         return self.message_hub.create_response_or_notification(body=body)
 
+    def create_SWARM_INF_message_for(
+        self,
+        fields: Iterable[str] = JSON_FIELDS,
+        in_response_to: Optional[FlockwaveMessage] = None,
+    ):
+        """Creates an X-SWARM-INF message that contains the given fields of
+        the current state of the swarm mission.
+
+        Parameters:
+            fields: names of the fields of the state to include
+            in_response_to: the message that the constructed message will
+                respond to. ``None`` means that the constructed message will be
+                a notification.
+
+        Returns:
+            FlockwaveMessage: the X-SWARM-INF message with the requested fields
+                of the state of the swarm mission
+        """
+        snapshot = swarm_state.snapshot
+        body = {
+            "type": "X-SWARM-INF",
+            "version": snapshot.version,
+            "state": snapshot.to_json(set(fields)),
+        }
+        return self.message_hub.create_response_or_notification(
+            body=body, in_response_to=in_response_to
+        )
+
     def create_UAV_INF_message_for(
         self, uav_ids: Iterable[str], in_response_to: Optional[FlockwaveMessage] = None
     ):
@@ -483,9 +499,9 @@ class SkybrushServer(DaemonApp):
         for uav_id in uav_ids:
             uav = self.find_uav_by_id(uav_id, response)
             if uav:
-                status = dict(uav.status.json)
-                status["airspeed"] = uav.status.airspeed
-                statuses[uav_id] = status  # type: ignore
+                # Fragments are cached in the status objects and rebuilt only
+                # for UAVs whose status changed since the last UAV-INF message
+                statuses[uav_id] = uav.status.to_json_fragment()  # type: ignore
 
         return response
 
@@ -610,59 +626,6 @@ class SkybrushServer(DaemonApp):
 
         return response
 
-    async def camera_actions(
-        self, message: FlockwaveMessage, sender: Client, *, id_property: str = "id"
-    ) -> FlockwaveMessage:
-        response = self.message_hub.create_response_or_notification(
-            body={}, in_response_to=message
-        )
-        parameters = dict(message.body)
-        msg = parameters["message"].lower()
-
-        # if msg == "test":
-        #     result = "test"
-
-        # if msg == "start_capture":
-        #     result = await start_camera()
-
-        # if msg == "stop_capture":
-        #     result = await stop_capture()
-
-        # response.body["message"] = result
-        # response.body["method"] = msg
-
-        return response
-
-    def simple_go_to(self, target, vehicle):
-        from .VTOL import gps_bearing
-
-        for point in target:
-            location = LocationGlobalRelative(
-                lat=point[0],
-                lon=point[1],
-                alt=100,
-            )
-            vehicle.simple_goto(location)
-            print(point)
-            while True:
-                lat, lon = (
-                    vehicle.location.global_frame.lat,
-                    vehicle.location.global_frame.lon,
-                )
-                [dis, bearing] = gps_bearing(
-                    homeLattitude=lat,
-                    homeLongitude=lon,
-                    destinationLattitude=point[0],
-                    destinationLongitude=point[1],
-                )
-                print(dis)
-                if dis < 200:
-                    break
-        vehicle.mode = VehicleMode("AUTO")
-        time.sleep(0.5)
-        vehicle.mode = VehicleMode("AUTO")
-        print("mode")
-
     async def CameraControl_swarm(
         self, message: FlockwaveMessage, sender: Client, *, id_property: str = "id"
     ) -> FlockwaveMessage:
@@ -672,26 +635,17 @@ class SkybrushServer(DaemonApp):
         parameters = dict(message.body)
         msg = parameters["message"].lower()
 
-        print(msg)
-
-        if msg == "left":
-            from .Cam_Control import main
-
-            main(0, 0, 0, 1)
-        if msg == "right":
-            from .Cam_Control import main
-
-            main(0, 0, 1, 0)
-        if msg == "up":
-            from .Cam_Control import main
-
-            main(1, 0, 0, 0)
-        if msg == "down":
-            from .Cam_Control import main
-
-            main(0, 1, 0, 0)
+        try:
+            session = self.gimbals.jog(msg, parameters.get("camera"))
+        except (RuntimeError, ValueError) as ex:
+            response.body["message"] = False
+            response.body["error"] = str(ex)
+        else:
+            attitude = session.attitude
+            response.body["message"] = True
+            response.body["attitude"] = attitude.json if attitude else None
 
-        response.body["message"] = True
+        return response
 
     async def vtol_swarm(
         self, message: FlockwaveMessage, sender: Client, *, id_property: str = "id"
@@ -704,34 +658,32 @@ class SkybrushServer(DaemonApp):
 
         if msg == "target":
             from .VTOL import Guided_Mission
-            from .socket.globalVariable import get_vehicle
 
             res_latlon = Guided_Mission(
                 float(parameters.pop("lat")), float(parameters.pop("lon"))
             )
-            vehicle = get_vehicle()[int(parameters.pop("uavid"))]
-            if vehicle == 0:
-                result = "No vehicle Connected"
-                return response
-            vehicle.mode = VehicleMode("GUIDED")
-            time.sleep(0.5)
-            vehicle.mode = VehicleMode("GUIDED")
-            threading.Thread(
-                target=self.simple_go_to, args=(res_latlon, vehicle), daemon=True
-            ).start()
-            new_lat_lon = []
-            for lat_lon in res_latlon:
-                new_lat_lon.append([lat_lon[1], lat_lon[0]])
-            print(new_lat_lon)
-            result = new_lat_lon
+            # "uavid" is the zero-based index of the drone in the swarm
+            uav_id = str(int(parameters.pop("uavid")) + 1)
+            waypoints = [
+                GPSCoordinate(lat=lat, lon=lon, ahl=100) for lat, lon in res_latlon
+            ]
+            # Mode 10 is AUTO on ArduPlane; the drone resumes its mission after
+            # flying through the target
+            self.start_guided_flights(
+                {uav_id: waypoints}, response, sender, mode_after=10
+            )
+            result = [[lon, lat] for lat, lon in res_latlon]
 
         if msg == "uploadmission":
-            from .VTOL import main
+            from .VTOL import create_vtol_missions, main
 
-            result = main(
-                parameters.pop("turn"),
-                int(parameters.pop("numofdrone")),
-            )
+            num_drones = int(parameters.pop("numofdrone"))
+            uav_ids = parameters.pop("uavs", None) or [
+                str(i + 1) for i in range(num_drones)
+            ]
+            result = main(parameters.pop("turn"), num_drones)
+            missions = create_vtol_missions(num_drones)
+            self.start_mission_uploads(dict(zip(uav_ids, missions)), response, sender)
 
         if msg == "skipwaypoint":
             from .socket.globalVariable import get_vehicle
@@ -767,93 +719,114 @@ class SkybrushServer(DaemonApp):
         # vehicle, csv_file_path, altitude
 
         if msg == "sparedrones":
-            from .spareDrone.spareDrone import adds_square_mission
-
-            data = [
-                {
-                    "mission": int(parameters.pop("mission")),
-                    "uav": int(parameters.pop("uav")),
-                    "alt": int(parameters.pop("alt")),
-                }
-            ]
-            # fields = ["mission", "uav", "alt"]
-            adds_square_mission(
-                data[0]["mission"],
-                data[0]["uav"],
-                data[0]["alt"],
-            )
+            from .spareDrone.spareDrone import create_square_mission
 
+            items = create_square_mission(
+                int(parameters.pop("mission")), int(parameters.pop("alt"))
+            )
+            self.start_mission_uploads(
+                {str(int(parameters.pop("uav"))): items}, response, sender
+            )
             result = True
 
-        if msg == "master":
-            result = master(int(parameters["uav"]))
+        swarm = self.swarm
+        results: Optional[dict[int, str]] = None
 
-        if msg == "coverage":
-            result = get_coverage_time()
+        try:
+            if msg == "master":
+                master_id = int(parameters["uav"])
+                results = await swarm.send(f"master-{master_id}", port="control")
+                await swarm.set_mavlink_output(master_id, True)
+
+            if msg == "coverage":
+                result = get_coverage_time()
+
+            if msg == "start":
+                results = await swarm.send("start")
+
+            if msg == "stop":
+                results = await swarm.send("stop", port="control")
+
+            if msg == "home_lock":
+                results = await swarm.send("home_lock")
+
+            if msg == "home":
+                results = await swarm.send("home")
+
+            if msg == "share_data":
+                snapshot = swarm_state.snapshot
+                results = await swarm.share_data(
+                    {
+                        "goal_table": snapshot.goal_table,
+                        "return_goal_table": snapshot.return_goal_table,
+                        "grid_path_table": snapshot.grid_path_table,
+                    }
+                )
 
-        if msg == "start":
-            result = start_socket()
+            if msg == "disperse":
+                results = await swarm.send("disperse")
 
-        if msg == "stop":
-            result = stop_socket()
+            if msg == "search":
+                results = await swarm.send("search")
 
-        if msg == "home_lock":
-            result = home_lock()
+            if msg == "aggregate":
+                results = await swarm.send("aggregate")
 
-        if msg == "home":
-            result = home_socket()
+            if msg == "different":  # TODO
+                results = await swarm.send(
+                    f"different,{parameters['alt']},{parameters['alt_diff']}"
+                )
 
-        if msg == "share_data":
-            result = share_data_func()
+            if msg == "same":  # TODO
+                results = await swarm.send(f"same,{parameters['same_alt']}")
 
-        if msg == "disperse":
-            result = disperse_socket()
+            if msg == "clear_csv":
+                results = await swarm.send("clear_csv")
 
-        if msg == "search":
-            result = search_socket()
+            if msg == "return":
+                results = await swarm.send("return")
 
-        if msg == "aggregate":
-            result = aggregate_socket()
+            if msg == "specific_bot_goal":
+                results = await swarm.send(
+                    f"specific_bot_goal,{parameters['uav']},{parameters['goal']}"
+                )
 
-        if msg == "different":  # TODO
-            result = different_alt_socket(parameters["alt"], parameters["alt_diff"])
+            if msg == "goal":
+                results = await swarm.send(f"goal,{parameters['goal']}")
 
-        if msg == "same":  # TODO
-            result = same_alt_socket(parameters["same_alt"])
+            if msg == "home_goto":
+                results = await swarm.send("home_goto")
 
-        if msg == "clear_csv":
-            result = clear_csv()
+            if msg == "plot":
+                filename = (
+                    parameters["location"].capitalize()
+                    + "_"
+                    + parameters["runwayName"].lower()
+                )
+                results = await swarm.send(filename, port="file", ack=False)
 
-        if msg == "return":
-            result = return_socket()
+            if msg == "log":
+                result = fetch_file_content(get_log_file_path())
 
-        if msg == "specific_bot_goal":
-            result = specific_bot_goal_socket(parameters["uav"], parameters["goal"])
+            if msg == "remove_link":
+                results = await swarm.set_mavlink_output(int(parameters["uav"]), False)
 
-        if msg == "goal":
-            result = goal_socket(parameters["goal"])
+            if msg == "add_link":
+                results = await swarm.set_mavlink_output(int(parameters["uav"]), True)
 
-        if msg == "home_goto":
-            result = home_goto_socket()
+            if msg == "remove_uav":
+                results = await swarm.send(f"remove_bot,{int(parameters['uav'])}")
+        except RuntimeError as ex:
+            response.body["error"] = str(ex)
+            result = False
 
-        if msg == "plot":
-            result = airport_selection(
-                parameters["location"].capitalize()
-                + str("_")
-                + parameters["runwayName"].lower()
+        if results is not None:
+            result = bool(results) and all(
+                status in ("ack", "sent") for status in results.values()
             )
-
-        if msg == "log":
-            result = fetch_file_content(get_log_file_path())
-
-        if msg == "remove_link":
-            result = mavlink_remove(int(parameters["uav"]))
-
-        if msg == "add_link":
-            result = mavlink_add(int(parameters["uav"]))
-
-        if msg == "remove_uav":
-            result = bot_remove(int(parameters["uav"]))
+            response.body["results"] = {
+                str(drone_id): status for drone_id, status in results.items()
+            }
 
         response.body["message"] = result
         response.body["method"] = msg
@@ -979,6 +952,99 @@ class SkybrushServer(DaemonApp):
                             response.add_result(uav.id, result)
         return response
 
+    def start_guided_flights(
+        self,
+        routes: dict[str, list[GPSCoordinate]],
+        response: Union[FlockwaveResponse, FlockwaveNotification],
+        sender: Client,
+        *,
+        acceptance_radius: float = 200,
+        mode_after: Optional[Union[int, str]] = None,
+    ) -> None:
+        """Starts flying the given UAVs through sequences of waypoints in guided
+        mode via their own drivers, and registers a receipt for each UAV in the
+        given response.
+
+        Each sequence runs as an asynchronous operation in the command
+        execution manager, so it can be cancelled with an ASYNC-CANCEL message.
+
+        Parameters:
+            routes: mapping from UAV IDs to the waypoints to fly through
+            response: the response in which the receipts and the failures are
+                registered
+            sender: the client to notify about the progress of the flights
+            acceptance_radius: the distance from a waypoint, in meters, below
+                which the waypoint is considered to be reached
+            mode_after: the flight mode to switch the UAVs to after they have
+                reached their last waypoints
+        """
+        for uav_id, waypoints in routes.items():
+            uav = self.find_uav_by_id(uav_id, response)
+            if uav is not None:
+                self._start_async_operation(
+                    uav,
+                    uav.driver.fly_through,
+                    response,
+                    sender,
+                    waypoints,
+                    acceptance_radius=acceptance_radius,
+                    mode_after=mode_after,
+                )
+
+    def start_mission_uploads(
+        self,
+        missions: dict[str, list[Any]],
+        response: Union[FlockwaveResponse, FlockwaveNotification],
+        sender: Client,
+    ) -> None:
+        """Starts uploading missions to the given UAVs via their own drivers,
+        and registers a receipt for each upload in the given response.
+
+        The uploads run concurrently in the command execution manager, which
+        reports the progress of each upload to the client separately.
+
+        Parameters:
+            missions: mapping from UAV IDs to the mission items to upload
+            response: the response in which the receipts and the failures are
+                registered
+            sender: the client to notify about the progress of the uploads
+        """
+        for uav_id, items in missions.items():
+            uav = self.find_uav_by_id(uav_id, response)
+            if uav is not None:
+                self._start_async_operation(
+                    uav, uav.driver.upload_mission, response, sender, items
+                )
+
+    def _start_async_operation(
+        self,
+        uav: UAV,
+        func: Callable[..., dict[UAV, Any]],
+        response: Union[FlockwaveResponse, FlockwaveNotification],
+        sender: Client,
+        *args,
+        **kwds,
+    ) -> None:
+        """Calls a request dispatcher method of the driver of a UAV and
+        registers its outcome in the given response, either as an error or as
+        a receipt of an asynchronous operation managed by the command execution
+        manager.
+        """
+        try:
+            outcome = func([uav], *args, **kwds).get(uav)
+        except Exception as ex:
+            outcome = ex
+
+        if isinstance(outcome, Exception):
+            response.add_error(uav.id, str(outcome))
+        else:
+            cmd_manager = self.command_execution_manager
+            receipt = cmd_manager.new(client_to_notify=sender.id)
+            response.add_receipt(uav.id, receipt)
+            response.when_sent(
+                cmd_manager.mark_as_clients_notified, receipt.id, outcome
+            )
+
     def find_uav_by_id(
         self,
         uav_id: str,
@@ -1091,12 +1157,17 @@ class SkybrushServer(DaemonApp):
         Parameters:
             uav_ids: list of UAV IDs
         """
+        uav_ids = list(uav_ids)
         self.rate_limiters.request_to_send("UAV-INF", uav_ids)
+        self.rate_limiters.request_to_send("X-UAV-INF-DELTA", uav_ids)
 
     async def run(self) -> None:
         self.run_in_background(self.command_execution_manager.run)
         self.run_in_background(self.message_hub.run)
         self.run_in_background(self.rate_limiters.run)
+        self.run_in_background(self.swarm.run)
+        self.run_in_background(self.swarm_listener.run)
+        self.run_in_background(self.gimbals.run)
         return await super().run()
 
     def sort_uavs_by_drivers(
@@ -1146,6 +1217,9 @@ class SkybrushServer(DaemonApp):
         self.client_registry.count_changed.connect(
             self._on_client_count_changed, sender=self.client_registry
         )
+        self.client_registry.removed.connect(
+            self._on_client_removed, sender=self.client_registry
+        )
 
         # Create an object that keeps track of commands being executed
         # asynchronously on remote UAVs
@@ -1200,6 +1274,23 @@ class SkybrushServer(DaemonApp):
         self.rate_limiters.register(
             "UAV-INF", UAVMessageRateLimiter(self.create_UAV_INF_message_for)
         )
+        self.rate_limiters.register(
+            "X-SWARM-INF",
+            BatchMessageRateLimiter(self.create_SWARM_INF_message_for, delay=0.5),
+        )
+
+        # Clients subscribed to delta-compressed UAV status notifications
+        # receive only the fields that changed since the last notification,
+        # and no regular UAV-INF broadcasts
+        self.uav_status_deltas = UAVStatusDeltaRateLimiter(
+            self._get_UAV_status_fragments,
+            lambda: self.object_registry.ids_by_type(UAV),
+            self.message_hub.create_notification,
+        )
+        self.rate_limiters.register("X-UAV-INF-DELTA", self.uav_status_deltas)
+        self.message_hub.register_response_middleware(
+            self.uav_status_deltas.filter_response
+        )
 
         # Create an object to hold information about all the objects that
         # the server knows about
@@ -1208,6 +1299,18 @@ class SkybrushServer(DaemonApp):
             self._on_object_removed, sender=self.object_registry
         )
 
+        # Create an object that dispatches commands to the drones of the
+        # swarm over UDP
+        self.swarm = SwarmCommandDispatcher()
+        self.swarm_listener = SwarmTelemetryListener(
+            on_datagram=self.swarm.notify_datagram
+        )
+        swarm_state.changed.connect(self._on_swarm_state_changed, sender=swarm_state)
+
+        # Create an object that keeps the connections to the camera gimbals
+        # alive
+        self.gimbals = GimbalSessionManager()
+
         # Create the global world object
         self.world = World()
 
@@ -1277,6 +1380,23 @@ class SkybrushServer(DaemonApp):
             failure_reason="No such object",
         )
 
+    def _get_UAV_status_fragments(
+        self, uav_ids: Iterable[str]
+    ) -> dict[str, dict[str, Any]]:
+        """Returns the cached JSON representations of the statuses of the UAVs
+        with the given IDs. UAVs that do not exist are omitted.
+        """
+        result = {}
+        for uav_id in uav_ids:
+            uav = self.find_uav_by_id(uav_id)
+            if uav is not None:
+                result[uav_id] = uav.status.to_json_fragment()
+        return result
+
+    def _on_client_removed(self, sender: ClientRegistry, client: Client) -> None:
+        """Handler called when a client disconnected from the server."""
+        self.uav_status_deltas.unsubscribe(client.id)
+
     def _on_client_count_changed(self, sender: ClientRegistry) -> None:
         """Handler called when the number of clients attached to the server
         has changed.
@@ -1448,11 +1568,47 @@ class SkybrushServer(DaemonApp):
             extra={"id": name},
         )
 
+    def _on_swarm_state_changed(
+        self,
+        sender: SwarmState,
+        snapshot: SwarmStateSnapshot,
+        fields: Iterable[str],
+    ) -> None:
+        """Handler called when the shared state of the swarm mission has
+        changed. Dispatches an appropriate rate-limited ``X-SWARM-INF``
+        message.
+
+        Parameters:
+            sender: the state store of the swarm mission
+            snapshot: the new snapshot of the state
+            fields: names of the fields that have changed
+        """
+        for name in fields:
+            if name in JSON_FIELDS:
+                self.rate_limiters.request_to_send("X-SWARM-INF", name)
+
     def _process_configuration(self, config: Configuration) -> Optional[int]:
         # Process the configuration options
         cfg = config.get("COMMAND_EXECUTION_MANAGER", {})
         self.command_execution_manager.timeout = cfg.get("timeout", 90)
 
+        # Configure the roster of the swarm and the listener for the status
+        # messages of the drones
+        cfg = config.get("SWARM", {})
+        self.swarm.configure(cfg)
+        self.swarm_listener.port = int(cfg.get("listen_port", 12009))
+        self.swarm_listener.log_dir = cfg.get(
+            "log_dir", path.join(self.dirs.user_log_dir, "swarm")
+        )
+
+        # Configure the camera gimbals
+        self.gimbals.configure(config.get("GIMBALS", {}))
+
+        # Configure the channel types whose clients are trusted to send
+        # valid messages
+        cfg = config.get("MESSAGE_HUB", {})
+        self.message_hub.trusted_channel_types = cfg.get("trusted_channels", ())
+
         # Override the base port if needed
         port_from_env: Optional[str] = environ.get("PORT")
         port: Optional[int] = config.get("PORT")
@@ -1592,11 +1748,35 @@ def handle_UAV_INF(message: FlockwaveMessage, sender: Client, hub: MessageHub):
     return app.create_UAV_INF_message_for(message.get_ids(), in_response_to=message)
 
 
+@app.message_hub.on("X-UAV-INF-SUB")
+def handle_UAV_INF_SUB(message: FlockwaveMessage, sender: Client, hub: MessageHub):
+    if not message.body.get("enabled", True):
+        app.uav_status_deltas.unsubscribe(sender.id)
+        return hub.acknowledge(message)
+
+    try:
+        app.uav_status_deltas.subscribe(
+            sender.id,
+            fields=message.body.get("fields"),
+            max_rate=message.body.get("maxRate"),
+            keyframe_interval=message.body.get("keyframeInterval"),
+        )
+    except (TypeError, ValueError) as ex:
+        return hub.acknowledge(message, outcome=False, reason=str(ex))
+
+    return hub.acknowledge(message)
+
+
 @app.message_hub.on("UAV-LIST")
 def handle_UAV_LIST(message: FlockwaveMessage, sender: Client, hub: MessageHub):
     return {"ids": list(app.object_registry.ids_by_type(UAV))}
 
 
+@app.message_hub.on("X-SWARM-INF")
+def handle_SWARM_INF(message: FlockwaveMessage, sender: Client, hub: MessageHub):
+    return app.create_SWARM_INF_message_for(in_response_to=message)
+
+
 @app.message_hub.on("LOG-DATA")
 async def handle_single_uav_operations(
     message: FlockwaveMessage, sender: Client, hub: MessageHub
@@ -1654,11 +1834,4 @@ async def handleCameraMission(
     return await app.CameraControl_swarm(message, sender)
 
 
-# @app.message_hub.on("X-CAMERA")
-# async def handleCameraActions(
-#     message: FlockwaveMessage, sender: Client, hub: MessageHub
-# ):
-#     return await app.camera_actions(message, sender)
-
-
 # ######################################################################## #
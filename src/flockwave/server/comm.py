@@ -3,13 +3,20 @@ communication between UAVs and a ground station via some communication
 link (e.g., standard 802.11 wifi).
 """
 
-from collections import defaultdict
+from collections import defaultdict, deque
 from contextlib import contextmanager
 from dataclasses import dataclass
+from enum import Enum
 from errno import ENETDOWN, ENETUNREACH
 from functools import partial
 from logging import Logger
-from trio import BrokenResourceError, open_memory_channel, sleep, WouldBlock
+from trio import BrokenResourceError, open_memory_channel, open_nursery, sleep
+from trio.lowlevel import (
+    ParkingLot,
+    cancel_shielded_checkpoint,
+    checkpoint,
+    checkpoint_if_cancelled,
+)
 from trio_util import wait_all
 from typing import (
     Any,
@@ -21,6 +28,7 @@ from typing import (
     Iterable,
     Iterator,
     Optional,
+    Sequence,
     TypeVar,
 )
 
@@ -30,7 +38,17 @@ from flockwave.connections import Connection
 from .types import Disposer
 
 
-__all__ = ("BROADCAST", "CommunicationManager")
+__all__ = (
+    "BROADCAST",
+    "BULK_LANE",
+    "COMMAND_LANE",
+    "STREAM_LANE",
+    "CommunicationManager",
+    "DropPolicy",
+    "OutboundLane",
+    "OutboundLaneStatistics",
+    "OutboundQueue",
+)
 
 
 #: Type variable representing the type of addresses used by a CommunicationManager
@@ -39,6 +57,9 @@ AddressType = TypeVar("AddressType")
 #: Type variable representing the type of packets handled by a CommunicationManager
 PacketType = TypeVar("PacketType")
 
+#: Type variable representing the type of items in an OutboundQueue
+T = TypeVar("T")
+
 #: Marker object used to denote packets that should be broadcast over a
 #: communication channel with no specific destination address
 BROADCAST = object()
@@ -51,6 +72,212 @@ WSAENETDOWN = 10050
 WSAENETUNREACH = 10051
 WSAESERVERUNREACH = 10065
 
+#: Name of the outbound lane for packets that the sender waits for, such as
+#: commands. This lane has the highest priority.
+COMMAND_LANE = "command"
+
+#: Name of the outbound lane for streams where only the most recent packets
+#: matter, such as RTK corrections and RC overrides
+STREAM_LANE = "stream"
+
+#: Name of the outbound lane for bulk transfers. This lane has the lowest
+#: priority.
+BULK_LANE = "bulk"
+
+
+class DropPolicy(Enum):
+    """Policy that decides what happens when a packet is submitted to a full
+    lane of an outbound queue.
+    """
+
+    BLOCK = "block"
+    """The sender waits until there is space in the lane. Packets submitted
+    without waiting are dropped.
+    """
+
+    DROP_OLDEST = "dropOldest"
+    """The oldest packet in the lane is dropped to make space for the new one."""
+
+
+@dataclass(frozen=True)
+class OutboundLane:
+    """Specification of a single priority lane in the outbound queue of a
+    link.
+    """
+
+    name: str
+    """Name of the lane."""
+
+    capacity: int
+    """Maximum number of packets waiting in the lane."""
+
+    drop_policy: DropPolicy = DropPolicy.BLOCK
+    """Specifies what happens when a packet is submitted to the lane while it
+    is full.
+    """
+
+    def __post_init__(self) -> None:
+        if self.capacity < 1:
+            raise ValueError("lane capacity must be positive")
+
+
+#: Default lanes of the outbound queues, in decreasing order of priority
+DEFAULT_OUTBOUND_LANES = (
+    OutboundLane(COMMAND_LANE, 64),
+    # ephemeris RTK streams send messages in bursts so it's better to have
+    # a relatively large queue here
+    OutboundLane(STREAM_LANE, 128, DropPolicy.DROP_OLDEST),
+    OutboundLane(BULK_LANE, 16),
+)
+
+
+@dataclass
+class OutboundLaneStatistics:
+    """Queue depth and packet counters of a single lane in the outbound queue
+    of a link.
+    """
+
+    depth: int = 0
+    """Number of packets currently waiting in the lane."""
+
+    max_depth: int = 0
+    """Largest number of packets that were waiting in the lane at the same
+    time.
+    """
+
+    num_sent: int = 0
+    """Number of packets from the lane that were sent successfully."""
+
+    num_dropped: int = 0
+    """Number of packets that were dropped because the lane was full."""
+
+    num_failed: int = 0
+    """Number of packets from the lane that could not be sent, either because
+    of an error or because the link was closed while the packet was waiting.
+    """
+
+
+class OutboundQueue(Generic[T]):
+    """Outbound queue of a single link, consisting of multiple lanes with
+    different priorities.
+
+    Items are always taken from the lane with the highest priority that is not
+    empty, so items in a lane overtake the items waiting in the lanes with
+    lower priority. Each lane has its own capacity and drop policy.
+    """
+
+    lanes: tuple[OutboundLane, ...]
+    """The lanes of the queue, in decreasing order of priority."""
+
+    statistics: dict[str, OutboundLaneStatistics]
+    """Queue depth and packet counters of the lanes, keyed by lane names."""
+
+    def __init__(self, lanes: Iterable[OutboundLane] = DEFAULT_OUTBOUND_LANES):
+        """Constructor.
+
+        Parameters:
+            lanes: the lanes of the queue, in decreasing order of priority
+
+        Raises:
+            ValueError: if no lanes were given or if two lanes have the same
+                name
+        """
+        self.lanes = tuple(lanes)
+        self.statistics = {lane.name: OutboundLaneStatistics() for lane in self.lanes}
+
+        if not self.lanes:
+            raise ValueError("outbound queue needs at least one lane")
+        if len(self.statistics) != len(self.lanes):
+            raise ValueError("lane names must be unique")
+
+        self._indices = {lane.name: index for index, lane in enumerate(self.lanes)}
+        self._items: list[deque[T]] = [deque() for _ in self.lanes]
+        self._not_empty = ParkingLot()
+        self._not_full = [ParkingLot() for _ in self.lanes]
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._items)
+
+    async def get(self) -> tuple[str, T]:
+        """Waits until there is an item in the queue and removes it.
+
+        Returns:
+            the name of the lane that the item was taken from, and the item
+        """
+        await checkpoint_if_cancelled()
+
+        while True:
+            for index, items in enumerate(self._items):
+                if items:
+                    item = items.popleft()
+                    lane = self.lanes[index]
+                    self.statistics[lane.name].depth = len(items)
+                    self._not_full[index].unpark()
+                    await cancel_shielded_checkpoint()
+                    return lane.name, item
+
+            await self._not_empty.park()
+
+    async def put(self, item: T, lane: str) -> None:
+        """Adds an item to the given lane of the queue. Waits until there is
+        space in the lane if the lane is full and its drop policy is
+        `DropPolicy.BLOCK`.
+
+        Parameters:
+            item: the item to add
+            lane: the name of the lane
+        """
+        await checkpoint_if_cancelled()
+
+        index = self._indices[lane]
+        spec = self.lanes[index]
+        if spec.drop_policy is DropPolicy.BLOCK:
+            while len(self._items[index]) >= spec.capacity:
+                await self._not_full[index].park()
+
+        self._append(index, item)
+        await cancel_shielded_checkpoint()
+
+    def put_nowait(self, item: T, lane: str) -> bool:
+        """Adds an item to the given lane of the queue without waiting.
+
+        Parameters:
+            item: the item to add
+            lane: the name of the lane
+
+        Returns:
+            whether the item was added. Items are not added if the lane is full
+            and its drop policy is `DropPolicy.BLOCK`.
+        """
+        index = self._indices[lane]
+        spec = self.lanes[index]
+        if (
+            spec.drop_policy is DropPolicy.BLOCK
+            and len(self._items[index]) >= spec.capacity
+        ):
+            self.statistics[spec.name].num_dropped += 1
+            return False
+
+        self._append(index, item)
+        return True
+
+    def _append(self, index: int, item: T) -> None:
+        spec = self.lanes[index]
+        items = self._items[index]
+        stats = self.statistics[spec.name]
+
+        if len(items) >= spec.capacity:
+            items.popleft()
+            stats.num_dropped += 1
+
+        items.append(item)
+
+        stats.depth = len(items)
+        if stats.depth > stats.max_depth:
+            stats.max_depth = stats.depth
+
+        self._not_empty.unpark()
+
 
 class CommunicationManager(Generic[PacketType, AddressType]):
     """Reusable communication manager class for drone driver extensions, with
@@ -65,6 +292,9 @@ class CommunicationManager(Generic[PacketType, AddressType]):
     - provides a method that can be used to send a message on any of the
       currently open connections
 
+    - keeps a separate outbound queue and sender task for each connection so
+      a slow connection does not delay the messages sent on the others
+
     - provides facilities for adding aliases to connections and for mapping
       a single alias to multiple connections
     """
@@ -88,6 +318,19 @@ class CommunicationManager(Generic[PacketType, AddressType]):
     RTK corrections. Typically you should leave this at zero.
     """
 
+    outbound_lanes: Sequence[OutboundLane] = DEFAULT_OUTBOUND_LANES
+    """The lanes of the outbound queue of each connection, in decreasing order
+    of priority. Must contain the command and the stream lanes.
+    """
+
+    classify_packet: Optional[Callable[[PacketType], str]] = None
+    """Callable that takes a packet submitted with `send_packet()` or
+    `broadcast_packet()` and returns the name of the outbound lane that the
+    packet should be placed in. `None` means to use the command lane for all
+    such packets. Packets submitted with `enqueue_packet()` or
+    `enqueue_broadcast_packet()` always use the stream lane.
+    """
+
     log: Logger
 
     BROADCAST: ClassVar[object]
@@ -111,6 +354,7 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         name: str
         can_send: bool = True
         channel: Optional[MessageChannel] = None
+        outbound: Optional[OutboundQueue] = None
 
         @property
         def is_open(self) -> bool:
@@ -146,7 +390,7 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         self._aliases = {}
         self._entries_by_name = defaultdict(list)
         self._running = False
-        self._outbound_tx_queue = None
+        self._outbound_open = False
 
     def add(self, connection, *, name: str, can_send: Optional[bool] = None):
         """Adds the given connection to the list of connections managed by
@@ -196,14 +440,15 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         packet to all destinations, or to the broadcast address of a single
         destination.
 
-        Blocks until the packet is enqueued in the outbound queue, allowing
-        other tasks to run.
+        Blocks until the packet is enqueued in the outbound queue of the
+        connection, allowing other tasks to run. Broadcasts to all
+        destinations never wait for a single connection; connections with a
+        full outbound queue drop the packet instead.
 
         Parameters:
             packet: the packet to send
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._outbound_open:
             if not allow_failure:
                 raise BrokenResourceError("Outbound message queue is closed")
             else:
@@ -211,7 +456,7 @@ class CommunicationManager(Generic[PacketType, AddressType]):
 
         address = BROADCAST if destination is None else (destination, BROADCAST)
 
-        await queue.send((packet, address))
+        await self._submit(packet, address, self._get_lane_for(packet))
 
     def enqueue_broadcast_packet(
         self,
@@ -223,13 +468,13 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         """Requests the communication manager to broadcast the given message
         packet to all destinations and return immediately.
 
-        The packet may be dropped if the outbound queue is currently full.
+        The packet is placed in the stream lane of the outbound queue; the
+        oldest packets in the lane are dropped if the lane is full.
 
         Parameters:
             packet: the packet to send
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._outbound_open:
             if not allow_failure:
                 raise BrokenResourceError("Outbound message queue is closed")
             else:
@@ -237,36 +482,24 @@ class CommunicationManager(Generic[PacketType, AddressType]):
 
         address = BROADCAST if destination is None else (destination, BROADCAST)
 
-        try:
-            queue.send_nowait((packet, address))
-        except WouldBlock:
-            if self.log:
-                self.log.warning(
-                    "Dropping outbound broadcast packet; outbound message queue is full"
-                )
+        self._submit_nowait(packet, address, STREAM_LANE)
 
     def enqueue_packet(self, packet: PacketType, destination: tuple[str, AddressType]):
         """Requests the communication manager to send the given message packet
         to the given destination and return immediately.
 
-        The packet may be dropped if the outbound queue is currently full.
+        The packet is placed in the stream lane of the outbound queue; the
+        oldest packets in the lane are dropped if the lane is full.
 
         Parameters:
             packet: the packet to send
             destination: the name of the communication channel and the address
                 on that communication channel to send the packet to.
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._outbound_open:
             raise BrokenResourceError("Outbound message queue is closed")
 
-        try:
-            queue.send_nowait((packet, destination))
-        except WouldBlock:
-            if self.log:
-                self.log.warning(
-                    "Dropping outbound packet; outbound message queue is full"
-                )
+        self._submit_nowait(packet, destination, STREAM_LANE)
 
     def is_channel_open(self, name: str) -> bool:
         """Returns whether the channel with the given name is currently up and
@@ -275,6 +508,26 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         entries = self._entries_by_name.get(name)
         return any(entry.is_open for entry in entries) if entries else False
 
+    @property
+    def outbound_statistics(
+        self,
+    ) -> dict[str, list[dict[str, OutboundLaneStatistics]]]:
+        """Queue depths and packet counters of the outbound queues of the
+        connections in the current or the last run of the manager.
+
+        The keys of the dictionary are the names of the connections. Each name
+        is mapped to a list with one item for each connection with that name;
+        the items map the names of the outbound lanes to their statistics.
+        """
+        return {
+            name: [
+                entry.outbound.statistics
+                for entry in entries
+                if entry.outbound is not None
+            ]
+            for name, entries in self._entries_by_name.items()
+        }
+
     def open_channels(self) -> Iterator[MessageChannel]:
         """Returns an iterator that iterates over the list of open message
         channels corresponding to this network.
@@ -328,19 +581,18 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         """Requests the communication manager to send the given message packet
         to the given destination.
 
-        Blocks until the packet is enqueued in the outbound queue, allowing
-        other tasks to run.
+        Blocks until the packet is enqueued in the outbound queue of the
+        connection, allowing other tasks to run.
 
         Parameters:
             packet: the packet to send
             destination: the name of the communication channel and the address
                 on that communication channel to send the packet to.
         """
-        queue = self._outbound_tx_queue
-        if not queue:
+        if not self._outbound_open:
             raise BrokenResourceError("Outbound message queue is closed")
 
-        await queue.send((packet, destination))
+        await self._submit(packet, destination, self._get_lane_for(packet))
 
     @contextmanager
     def with_alias(self, alias: str, *, targets: Iterable[str]):
@@ -353,6 +605,78 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         finally:
             disposer()
 
+    def _find_targets(self, destination) -> list[tuple[Entry, Any, bool]]:
+        """Finds the connections that a packet with the given destination
+        should be sent on.
+
+        Returns:
+            the entries of the connections, each with the address to send the
+            packet to on the connection and whether the address is a broadcast
+            address
+        """
+        if destination is BROADCAST:
+            result = []
+            for entry in self._iter_entries():
+                address = getattr(
+                    entry.channel, "broadcast_address", NO_BROADCAST_ADDRESS
+                )
+                if address is not NO_BROADCAST_ADDRESS:
+                    result.append((entry, address, True))
+            return result
+
+        name, address = destination
+
+        entries = self._entries_by_name.get(name)
+        if not entries:
+            # try with an alias
+            targets = self._aliases.get(name)
+            if not targets:
+                return []
+            elif len(targets) == 1:
+                name = targets[0]
+                entries = self._entries_by_name.get(name)
+            else:
+                result = []
+                for target in targets:
+                    if target in self._entries_by_name:
+                        result.extend(self._find_targets((target, address)))
+                return result
+
+        is_broadcast = address is BROADCAST
+
+        if entries:
+            for entry in entries:
+                if entry.is_open and entry.can_send:
+                    if is_broadcast:
+                        # This message should be broadcast on this channel;
+                        # let's check if the channel has a broadcast address
+                        broadcast_address = getattr(
+                            entry.channel, "broadcast_address", NO_BROADCAST_ADDRESS
+                        )
+                        if broadcast_address is not NO_BROADCAST_ADDRESS:
+                            return [(entry, broadcast_address, True)]
+                    else:
+                        return [(entry, address, False)]
+
+        if not is_broadcast:
+            if entries:
+                self.log.warning(
+                    f"Dropping outbound message, all channels broken for: {name!r}"
+                )
+            else:
+                self.log.warning(
+                    f"Dropping outbound message, no such channel: {name!r}"
+                )
+
+        return []
+
+    def _get_lane_for(self, packet: PacketType) -> str:
+        """Returns the name of the outbound lane for a packet submitted with
+        `send_packet()` or `broadcast_packet()`.
+        """
+        classify = self.classify_packet
+        return classify(packet) if classify else COMMAND_LANE
+
     def _iter_entries(self) -> Generator["Entry", None, None]:
         for _, entries in self._entries_by_name.items():
             yield from entries
@@ -378,6 +702,9 @@ class CommunicationManager(Generic[PacketType, AddressType]):
         tasks.append(partial(consumer, rx_queue))
         tasks.append(self._run_outbound_links)
 
+        for entry in self._iter_entries():
+            entry.outbound = OutboundQueue(self.outbound_lanes)
+
         async with tx_queue, rx_queue:
             await wait_all(*tasks)
 
@@ -432,118 +759,101 @@ class CommunicationManager(Generic[PacketType, AddressType]):
                     self.log.info("Connection closed", extra=log_extra)
 
     async def _run_outbound_links(self):
-        # ephemeris RTK streams send messages in bursts so it's better to have
-        # a relatively large queue here
-        tx_queue, rx_queue = open_memory_channel(128)
-        async with tx_queue, rx_queue:
-            try:
-                self._outbound_tx_queue = tx_queue
-                await self._run_outbound_links_inner(rx_queue)
-            finally:
-                self._outbound_tx_queue = None
-
-    async def _run_outbound_links_inner(self, queue):
-        # TODO(ntamas): a slow outbound link may block sending messages on other
-        # outbound links; revise if this causes a problem
-        async for message, destination in queue:
-            if destination is BROADCAST:
-                await self._send_message_to_all_channels(message)
-            else:
-                await self._send_message_to_single_channel(message, destination)
-
-    async def _send_message_to_all_channels(self, message):
-        for entries in self._entries_by_name.values():
-            for _index, entry in enumerate(entries):
-                channel = entry.channel
-                address = getattr(channel, "broadcast_address", NO_BROADCAST_ADDRESS)
-                if address is not NO_BROADCAST_ADDRESS:
-                    assert channel is not None
-                    try:
-                        await channel.send((message, address))
-                    except Exception:
-                        # we are going to try all channels so it does not matter
-                        # if a few of them fail for whatever reason
-                        pass
-
-    async def _send_message_to_single_channel(self, message, destination):
-        name, address = destination
-
-        entries = self._entries_by_name.get(name)
-        if not entries:
-            # try with an alias
-            targets = self._aliases.get(name)
-            if not targets:
-                return
-            elif len(targets) == 1:
-                name = targets[0]
-                entries = self._entries_by_name.get(name)
-            else:
-                for target in targets:
-                    if target in self._entries_by_name:
-                        await self._send_message_to_single_channel(
-                            message, (target, address)
+        # Each connection has its own outbound queue and sender task so a slow
+        # connection does not block sending messages on the other ones
+        try:
+            self._outbound_open = True
+            async with open_nursery() as nursery:
+                for name, entries in self._entries_by_name.items():
+                    for index, entry in enumerate(entries):
+                        nursery.start_soon(
+                            self._run_outbound_link, entry, f"{name}[{index}]"
                         )
-                return
+        finally:
+            self._outbound_open = False
 
-        sent = False
-        is_broadcast = address is BROADCAST
+    async def _run_outbound_link(self, entry: Entry, label: str) -> None:
+        queue = entry.outbound
+        assert queue is not None
 
-        if entries:
-            for index, entry in enumerate(entries):
-                if entry.is_open and entry.can_send:
-                    try:
-                        if is_broadcast:
-                            # This message should be broadcast on this channel;
-                            # let's check if the channel has a broadcast address
-                            address = getattr(
-                                entry.channel,
-                                "broadcast_address",
-                                NO_BROADCAST_ADDRESS,
-                            )
-                            is_broadcast = True
-                            if address is not NO_BROADCAST_ADDRESS:
-                                assert entry.channel is not None
-                                await entry.channel.send((message, address))
-                                if self.broadcast_delay > 0:
-                                    await sleep(self.broadcast_delay)
-                                sent = True
-                        else:
-                            await entry.channel.send((message, address))
-                            sent = True
-                        if sent:
-                            break
-                    except OSError as ex:
-                        if ex.errno in (
-                            ENETDOWN,
-                            ENETUNREACH,
-                            WSAENETDOWN,
-                            WSAENETUNREACH,
-                            WSAESERVERUNREACH,
-                        ):
-                            # This is okay
-                            self.log.error(
-                                "Network is down or unreachable",
-                                extra={"id": name or "", "telemetry": "ignore"},
-                            )
-                        else:
-                            self.log.exception(
-                                f"Error while sending message on channel {name}[{index}]",
-                                extra={"id": name or ""},
-                            )
-                    except Exception:
-                        self.log.exception(
-                            f"Error while sending message on channel {name}[{index}]",
-                            extra={"id": name or ""},
-                        )
+        name = entry.name
+        while True:
+            lane, (message, address, is_broadcast) = await queue.get()
+            stats = queue.statistics[lane]
 
-        if not sent and not is_broadcast:
-            if entries:
-                self.log.warning(
-                    f"Dropping outbound message, all channels broken for: {name!r}"
+            channel = entry.channel
+            if channel is None:
+                # Connection was closed while the message was waiting
+                stats.num_failed += 1
+                continue
+
+            try:
+                await channel.send((message, address))
+            except OSError as ex:
+                stats.num_failed += 1
+                if ex.errno in (
+                    ENETDOWN,
+                    ENETUNREACH,
+                    WSAENETDOWN,
+                    WSAENETUNREACH,
+                    WSAESERVERUNREACH,
+                ):
+                    # This is okay
+                    self.log.error(
+                        "Network is down or unreachable",
+                        extra={"id": name or "", "telemetry": "ignore"},
+                    )
+                else:
+                    self.log.exception(
+                        f"Error while sending message on channel {label}",
+                        extra={"id": name or ""},
+                    )
+            except Exception:
+                stats.num_failed += 1
+                self.log.exception(
+                    f"Error while sending message on channel {label}",
+                    extra={"id": name or ""},
                 )
             else:
+                stats.num_sent += 1
+                if is_broadcast and self.broadcast_delay > 0:
+                    await sleep(self.broadcast_delay)
+
+    async def _submit(self, message, destination, lane: str) -> None:
+        """Places a message in the outbound queues of the connections that it
+        should be sent on, waiting for space in the queue if there is only a
+        single such connection.
+        """
+        targets = self._find_targets(destination)
+        if len(targets) == 1:
+            entry, address, is_broadcast = targets[0]
+            assert entry.outbound is not None
+            await entry.outbound.put((message, address, is_broadcast), lane)
+        else:
+            # Never wait for a single slow connection when sending to multiple
+            # connections
+            for entry, address, is_broadcast in targets:
+                self._submit_to_entry_nowait(
+                    entry, message, address, is_broadcast, lane
+                )
+            await checkpoint()
+
+    def _submit_nowait(self, message, destination, lane: str) -> None:
+        """Places a message in the outbound queues of the connections that it
+        should be sent on without waiting.
+        """
+        for entry, address, is_broadcast in self._find_targets(destination):
+            self._submit_to_entry_nowait(entry, message, address, is_broadcast, lane)
+
+    def _submit_to_entry_nowait(
+        self, entry: Entry, message, address, is_broadcast: bool, lane: str
+    ) -> None:
+        assert entry.outbound is not None
+        if not entry.outbound.put_nowait((message, address, is_broadcast), lane):
+            if self.log:
                 self.log.warning(
-                    f"Dropping outbound message, no such channel: {name!r}"
+                    "Dropping outbound packet; outbound message queue is full",
+                    extra={"id": entry.name or ""},
                 )
 
 
@@ -19,12 +19,52 @@ PORT = 5000
 # Configure the command execution manager
 COMMAND_EXECUTION_MANAGER = {"timeout": 90}
 
+# Configure the roster of the swarm and the UDP ports of the services running
+# on the onboard companion computers of the drones
+SWARM = {
+    "drones": [
+        {"id": 3, "host": "192.168.6.153"},
+        {"id": 5, "host": "192.168.6.155"},
+        {"id": 10, "host": "192.168.6.160"},
+    ],
+    "ports": {"command": 12008, "control": 12002, "file": 12003, "mavlink": 12045},
+    "mavlink_base_port": 14550,
+    "listen_port": 12009,  # port where the drones send their status messages
+    # "log_dir": "/path/to/swarm/logs",
+    "ack_timeout": 1,  # seconds to wait for acknowledgments; 0 to disable
+    "stagger": 0,  # optional delay between consecutive drones, in seconds
+    # "binary" sends per-drone deltas, but only newer firmware understands it
+    "share_data_format": "text",
+}
+
+# Configuration of the SIYI camera gimbals controlled by the camera commands
+GIMBALS = {
+    "default": "192.168.6.141:37260",  # gimbal to use when none is specified
+    "jog_step": 4,  # degrees per up / down / left / right command
+}
+
+# Configure the message hub. Messages from clients connected via one of the
+# trusted channel types (e.g., "unix") are not validated against the Flockwave
+# message schema. Add local channels only, whose clients are authenticated by
+# other means
+MESSAGE_HUB = {"trusted_channels": []}
+
 # Declare the list of extensions to load
 EXTENSIONS = {
     "audit_log": {"enabled": "avoid"},
     "auth": {},
     "auth_basic": {"enabled": False},
     "beacon": {},
+    "camera_fleet": {
+        "cameras": {
+            "1": "http://192.168.6.153:8000/",
+            "2": "http://192.168.6.155:8000/",
+            "3": "http://192.168.6.156:8000/",
+            "4": "http://192.168.6.160:8000/",
+            "5": "http://192.168.6.161:8000/",
+        },
+        "timeout": 5,  # seconds to wait for the response of a single camera
+    },
     "console_status": {},
     "crazyflie": {
         "id_format": "{0:02}",
@@ -15,7 +15,7 @@ from math import inf
 from pathlib import Path
 from textwrap import dedent
 from time import time
-from trio import move_on_after, sleep, to_thread
+from trio import CapacityLimiter, move_on_after, open_nursery, sleep, to_thread
 from trio.lowlevel import ParkingLot
 from typing import (
     Any,
@@ -34,7 +34,7 @@ from flockwave.server.utils import constant
 from .base import Extension
 
 if TYPE_CHECKING:
-    from sqlite3 import Connection
+    from sqlite3 import Connection, Cursor
 
 
 MAX_BUFFER_SIZE = 1024
@@ -42,6 +42,31 @@ MAX_BUFFER_SIZE = 1024
 to the underlying data store before it starts to drop entries.
 """
 
+FLUSH_BATCH_SIZE = 256
+"""Number of buffered entries that triggers an immediate flush to the
+underlying data store.
+"""
+
+FLUSH_INTERVAL = 0.5
+"""Maximum number of seconds that the extension waits for more entries to
+arrive before it flushes the buffered entries to the underlying data store.
+"""
+
+PRUNE_CHUNK_SIZE = 4096
+"""Maximum number of entries to remove from the data store in a single
+transaction while pruning old entries.
+"""
+
+PRUNE_INTERVAL = 86400
+"""Number of seconds between consecutive attempts to prune old entries from
+the data store.
+"""
+
+QUERY_BATCH_SIZE = 512
+"""Number of entries to fetch from the data store at once when streaming the
+results of a query.
+"""
+
 
 def days_ago(age: float) -> float:
     """Helper function that returns the timestamp the given number of dayds
@@ -85,6 +110,30 @@ class Entry:
 class Storage(ABC):
     """Interface specification for storage backends of the audit log."""
 
+    async def iter_query(
+        self,
+        component: Union[str, Iterable[str], None] = None,
+        *,
+        min_date: Union[datetime, float, None] = None,
+        max_date: Union[datetime, float, None] = None,
+    ) -> AsyncIterator[Entry]:
+        """Retrieves all entries from the storage backend that match the given
+        search criteria, yielding them one by one.
+
+        The default implementation materializes the result of `query()`;
+        backends that can stream their results should override it.
+        """
+        for entry in await self.query(component, min_date=min_date, max_date=max_date):
+            yield entry
+
+    async def optimize(self) -> None:
+        """Performs optional, potentially slow maintenance tasks on the storage
+        backend that speed up subsequent queries, such as creating indexes.
+
+        The default implementation does nothing.
+        """
+        pass
+
     @abstractmethod
     async def prune(self, threshold: float) -> Optional[int]:
         """Removes all the entries from the storage backend whose timestamp
@@ -194,22 +243,88 @@ class InMemoryStorage(Storage):
 
 
 class DbStorage(Storage):
-    """Storage backend backed by an on-disk SQLite database."""
+    """Storage backend backed by an on-disk SQLite database.
+
+    The database is used in write-ahead logging mode. Writes go through a
+    dedicated connection and queries through a separate read-only connection
+    so long-running reporting queries do not block the insertion of new
+    entries.
+    """
 
     _conn: Optional[Connection] = None
-    """Connection to the underlying SQLite database."""
+    """Connection to the underlying SQLite database, used for writing."""
 
     _path: Path
     """Path to the SQLite database that the backend writes to."""
 
+    _read_conn: Optional[Connection] = None
+    """Read-only connection to the underlying SQLite database, used for
+    queries.
+    """
+
+    _read_limiter: CapacityLimiter
+    """Limiter that ensures that the read connection is used from at most one
+    worker thread at a time.
+    """
+
+    _write_limiter: CapacityLimiter
+    """Limiter that ensures that the write connection is used from at most one
+    worker thread at a time.
+    """
+
     def __init__(self, path: Union[str, Path]):
         self._path = Path(path)
+        self._read_limiter = CapacityLimiter(1)
+        self._write_limiter = CapacityLimiter(1)
+
+    async def iter_query(
+        self,
+        component: Union[str, Iterable[str], None] = None,
+        *,
+        min_date: Union[datetime, float, None] = None,
+        max_date: Union[datetime, float, None] = None,
+    ) -> AsyncIterator[Entry]:
+        if not self._read_conn:
+            return
+
+        query, args = self._build_query(component, min_date, max_date)
+        cursor: Cursor = await to_thread.run_sync(
+            self._read_conn.execute, query, args, limiter=self._read_limiter
+        )
+        try:
+            while True:
+                rows = await to_thread.run_sync(
+                    cursor.fetchmany, QUERY_BATCH_SIZE, limiter=self._read_limiter
+                )
+                if not rows:
+                    break
+
+                for row in rows:
+                    yield Entry(*row)
+        finally:
+            cursor.close()
+
+    async def optimize(self) -> None:
+        await to_thread.run_sync(self._create_indexes, limiter=self._write_limiter)
 
     async def prune(self, threshold: float) -> int:
-        return await to_thread.run_sync(self._prune_sync, threshold)
+        # Entries are removed in chunks, oldest first, with a separate
+        # transaction for each chunk so we never hold the write lock for long
+        # and pending inserts can go through between chunks
+        count = 0
+        while True:
+            removed = await to_thread.run_sync(
+                self._prune_chunk_sync,
+                threshold,
+                PRUNE_CHUNK_SIZE,
+                limiter=self._write_limiter,
+            )
+            count += removed
+            if removed < PRUNE_CHUNK_SIZE:
+                return count
 
     async def put(self, entries: Sequence[Entry]) -> None:
-        await to_thread.run_sync(self._put_sync, entries)
+        await to_thread.run_sync(self._put_sync, entries, limiter=self._write_limiter)
 
     async def query(
         self,
@@ -218,21 +333,92 @@ class DbStorage(Storage):
         min_date: Union[datetime, float, None] = None,
         max_date: Union[datetime, float, None] = None,
     ) -> Iterable[Entry]:
-        return await to_thread.run_sync(self._query_sync, component, min_date, max_date)
+        return await to_thread.run_sync(
+            self._query_sync,
+            component,
+            min_date,
+            max_date,
+            limiter=self._read_limiter,
+        )
+
+    def _build_query(
+        self,
+        component: Union[str, Iterable[str], None] = None,
+        min_date: Union[datetime, float, None] = None,
+        max_date: Union[datetime, float, None] = None,
+    ) -> tuple[str, list[Any]]:
+        """Builds the SQL query that retrieves the entries matching the given
+        search criteria, along with its arguments.
+        """
+        query = "SELECT timestamp, component, type, data FROM entries"
+        conditions: list[str] = []
+        args: list[Any] = []
+
+        if component is not None:
+            components = (component,) if isinstance(component, str) else list(component)
+
+            if len(components) == 0:
+                condition = "FALSE"
+            elif len(components) == 1:
+                condition = "component = ?"
+            else:
+                qmarks = ", ".join("?" for _ in components)
+                condition = f"component IN ({qmarks})"
+
+            conditions.append(condition)
+            args.extend(components)
+
+        min_timestamp = to_timestamp(min_date)
+        max_timestamp = to_timestamp(max_date)
+
+        if min_timestamp is not None:
+            conditions.append("timestamp >= ?")
+            args.append(min_timestamp)
+
+        if max_timestamp is not None:
+            conditions.append("timestamp < ?")
+            args.append(max_timestamp)
+
+        if conditions:
+            conditions_joined = " AND ".join(conditions)
+            query = f"{query} WHERE {conditions_joined}"
+
+        return query, args
+
+    def _create_indexes(self) -> None:
+        """Creates the indexes that speed up queries and pruning if they do
+        not exist yet.
 
-    def _prune_sync(self, threshold: float) -> int:
+        Creating the indexes on a large, unindexed database may take a while,
+        so this function is not called when the schema is prepared but from
+        a background task later.
+        """
         if self._conn:
             with self._conn:
-                with closing(self._conn.cursor()) as cur:
-                    cur.execute(
-                        "SELECT COUNT(*) FROM entries WHERE timestamp < ?", (threshold,)
-                    )
-                    (count,) = cur.fetchone()
-                if count > 0:
-                    self._conn.execute(
-                        "DELETE FROM entries WHERE timestamp < ?", (threshold,)
+                self._conn.executescript(
+                    dedent(
+                        """\
+                        CREATE INDEX IF NOT EXISTS entries_by_timestamp
+                        ON entries (timestamp);
+
+                        CREATE INDEX IF NOT EXISTS entries_by_component
+                        ON entries (component, timestamp);
+                        """
                     )
-            return count
+                )
+            self._conn.execute("PRAGMA optimize")
+
+    def _prune_chunk_sync(self, threshold: float, limit: int) -> int:
+        if self._conn:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE id IN ("
+                    "SELECT id FROM entries WHERE timestamp < ? "
+                    "ORDER BY timestamp LIMIT ?"
+                    ")",
+                    (threshold, limit),
+                )
+                return cursor.rowcount
         else:
             return 0
 
@@ -253,45 +439,10 @@ class DbStorage(Storage):
     ) -> Iterable[Entry]:
         result: list[Entry] = []
 
-        if self._conn:
-            query = "SELECT timestamp, component, type, data FROM entries"
-            conditions: list[str] = []
-            args: list[Any] = []
-
-            if component is not None:
-                components = (
-                    (component,) if isinstance(component, str) else list(component)
-                )
-
-                if len(components) == 0:
-                    condition = "FALSE"
-                elif len(components) == 1:
-                    condition = "component = ?"
-                else:
-                    qmarks = ", ".join("?" for _ in components)
-                    condition = f"component IN ({qmarks})"
-
-                conditions.append(condition)
-                args.extend(components)
-
-            min_timestamp = to_timestamp(min_date)
-            max_timestamp = to_timestamp(max_date)
-
-            if min_timestamp is not None:
-                conditions.append("timestamp >= ?")
-                args.append(min_timestamp)
-
-            if max_timestamp is not None:
-                conditions.append("timestamp < ?")
-                args.append(max_timestamp)
-
-            if conditions:
-                conditions_joined = " AND ".join(conditions)
-                query = f"{query} WHERE {conditions_joined}"
-
-            with self._conn:
-                with closing(self._conn.cursor()) as cur:
-                    result.extend(Entry(*row) for row in cur.execute(query, args))
+        if self._read_conn:
+            query, args = self._build_query(component, min_date, max_date)
+            with closing(self._read_conn.cursor()) as cur:
+                result.extend(Entry(*row) for row in cur.execute(query, args))
 
         return result
 
@@ -305,18 +456,34 @@ class DbStorage(Storage):
         log.info(f"Saving audit log to {str(self._path)!r}")
 
         self._conn = Connection(self._path, check_same_thread=False)
-        await to_thread.run_sync(self._prepare_schema)
         try:
-            yield
+            await to_thread.run_sync(self._prepare_schema)
+            self._read_conn = Connection(self._path, check_same_thread=False)
+            self._read_conn.execute("PRAGMA query_only = ON")
+            try:
+                yield
+            finally:
+                read_conn, self._read_conn = self._read_conn, None
+                await to_thread.run_sync(read_conn.close, limiter=self._read_limiter)
         finally:
-            await to_thread.run_sync(self._conn.close)
+            conn, self._conn = self._conn, None
+            await to_thread.run_sync(conn.close, limiter=self._write_limiter)
 
     def _prepare_schema(self) -> None:
-        """Prepares the schema of the audit log database."""
+        """Prepares the schema of the audit log database.
+
+        Indexes are not created here; see `_create_indexes()` for more details.
+        """
         assert self._conn is not None
+
+        # Write-ahead logging lets readers proceed while new entries are
+        # being written. Synchronous commits are not needed in WAL mode to
+        # avoid corruption; at worst we lose the last few entries on a
+        # power loss
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+
         with self._conn:
-            # No indexing as we assume frequent inserts and only occasional
-            # SELECT() queries for reporting purposes
             self._conn.executescript(
                 dedent(
                     """\
@@ -358,6 +525,11 @@ class AuditLogExtension(Extension):
     _entries: deque[Entry]
     """The entries waiting to be flushed to the storage backend."""
 
+    _num_dropped: int
+    """Number of entries dropped since the last flush because the buffer was
+    full.
+    """
+
     _storage: Storage
     """Storage backend used by the extension."""
 
@@ -366,6 +538,7 @@ class AuditLogExtension(Extension):
     def __init__(self):
         super().__init__()
         self._entries = deque(maxlen=MAX_BUFFER_SIZE)
+        self._num_dropped = 0
         self._parking_lot = ParkingLot()
         self._storage = NullStorage()
         self.max_age = 0
@@ -380,8 +553,16 @@ class AuditLogExtension(Extension):
         if isinstance(data, str):
             data = data.encode("utf-8")
 
+        if len(self._entries) == MAX_BUFFER_SIZE:
+            self._num_dropped += 1
+
         self._entries.append(Entry(time(), component, type, data))
-        self._parking_lot.unpark()
+
+        # Wake up the writer task when the first entry arrives so it can start
+        # the flush timer, and when there are enough entries for a full batch
+        num_entries = len(self._entries)
+        if num_entries == 1 or num_entries >= FLUSH_BATCH_SIZE:
+            self._parking_lot.unpark()
 
     def configure(self, configuration: dict[str, Any]) -> None:
         db_path = self.get_data_dir() / "log.db"
@@ -402,7 +583,12 @@ class AuditLogExtension(Extension):
         self._storage = DbStorage(db_path)
 
     def exports(self) -> dict[str, Any]:
-        return {"append": self.append, "flush": self.flush, "query": self.query}
+        return {
+            "append": self.append,
+            "flush": self.flush,
+            "iter_query": self.iter_query,
+            "query": self.query,
+        }
 
     async def flush(self) -> None:
         """Flushes all pending entries to the audit log."""
@@ -418,6 +604,31 @@ class AuditLogExtension(Extension):
         """
         return partial(self.append, component)
 
+    async def iter_query(
+        self,
+        component: Union[str, Iterable[str], None] = None,
+        *,
+        min_date: Union[datetime, float, None] = None,
+        max_date: Union[datetime, float, None] = None,
+    ) -> AsyncIterator[Entry]:
+        """Retrieves all entries from the audit log that match the given search
+        criteria, yielding them one by one without loading all of them into
+        memory first.
+
+        Use `contextlib.aclosing()` if you do not intend to consume the whole
+        iterator so the underlying database cursor is released in time.
+
+        Args:
+            component: the component or components that the log entries must
+                belong to
+            min_date: the earliest date of the matched log entries, inclusive
+            max_date: the latest date of the matched log entries, _exclusive_
+        """
+        async for entry in self._storage.iter_query(
+            component, min_date=min_date, max_date=max_date
+        ):
+            yield entry
+
     async def query(
         self,
         component: Union[str, Iterable[str], None] = None,
@@ -448,23 +659,9 @@ class AuditLogExtension(Extension):
 
         async with self._storage.use(self.log):
             try:
-                if self.max_age_days > 0:
-                    count = await self._storage.prune(days_ago(self.max_age_days))
-                    if count is not None:
-                        if count > 1:
-                            self.log.info(f"Pruned {count} entries from the audit log")
-                        elif count == 1:
-                            self.log.info("Pruned one entry from the audit log")
-
-                while True:
-                    while self._entries:
-                        await self.flush()
-                        await sleep(0.5)
-
-                    # At this point there are no more entries waiting in the queue,
-                    # so suspend ourselves and wait until some more entries appear
-                    # in the queue
-                    await self._parking_lot.park()
+                async with open_nursery() as nursery:
+                    nursery.start_soon(self._run_maintenance)
+                    await self._run_writer()
             finally:
                 # Make sure that self.flush() still goes through even though
                 # the nursery is cancelled
@@ -474,6 +671,57 @@ class AuditLogExtension(Extension):
                     await self.flush()
                     self.log.info("Audit log closed")
 
+    async def _prune(self) -> None:
+        """Removes the entries older than the maximum allowed age from the
+        storage backend.
+        """
+        assert self.log is not None
+
+        count = await self._storage.prune(days_ago(self.max_age_days))
+        if count is not None:
+            if count > 1:
+                self.log.info(f"Pruned {count} entries from the audit log")
+            elif count == 1:
+                self.log.info("Pruned one entry from the audit log")
+
+    async def _run_maintenance(self) -> None:
+        """Background task that optimizes the storage backend and prunes old
+        entries periodically.
+        """
+        await self._storage.optimize()
+
+        if self.max_age_days > 0:
+            while True:
+                await self._prune()
+                await sleep(PRUNE_INTERVAL)
+
+    async def _run_writer(self) -> None:
+        """Background task that flushes the buffered entries to the storage
+        backend when a full batch has accumulated or when the oldest buffered
+        entry has been waiting for long enough.
+        """
+        assert self.log is not None
+
+        while True:
+            # Wait until the first entry appears in the buffer
+            while not self._entries:
+                await self._parking_lot.park()
+
+            # Wait until the batch is full or the flush interval has passed
+            if len(self._entries) < FLUSH_BATCH_SIZE:
+                with move_on_after(FLUSH_INTERVAL):
+                    while len(self._entries) < FLUSH_BATCH_SIZE:
+                        await self._parking_lot.park()
+
+            if self._num_dropped:
+                self.log.warning(
+                    f"Audit log buffer overflowed, {self._num_dropped} entries "
+                    f"were dropped"
+                )
+                self._num_dropped = 0
+
+            await self.flush()
+
 
 construct = AuditLogExtension
 description = "Audit log provider for other extensions"
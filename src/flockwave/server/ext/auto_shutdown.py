@@ -18,6 +18,11 @@ def on_client_count_changed(cancel_scope, timeout, sender, client=None):
 async def run(app, configuration, logger):
     timeout = float(configuration.get("timeout", 300))
 
+    # Separate timeout for the period before the first client connects. Useful
+    # for servers that are started in advance and handed out to users later
+    initial_timeout = configuration.get("initial_timeout")
+    initial_timeout = timeout if initial_timeout is None else float(initial_timeout)
+
     logger.warn(
         f"Server will shut down after {timeout} seconds if there are "
         + "no connected clients"
@@ -31,6 +36,8 @@ async def run(app, configuration, logger):
         stack.enter_context(app.client_registry.removed.connected_to(handler))
 
         handler(app.client_registry)
+        if app.client_registry.num_entries == 0:
+            cancel_scope.deadline = current_time() + initial_timeout
 
         await sleep_forever()
 
@@ -0,0 +1,226 @@
+"""Extension that controls the onboard cameras of the drones in the swarm over
+HTTP.
+
+Each camera runs a small HTTP server that starts or stops capturing images
+when its ``start_capture`` or ``stop_capture`` endpoint is requested. The
+extension keeps a pooled HTTP client for each camera host so consecutive
+commands reuse the existing connections, and it sends the requests to all the
+selected cameras concurrently, with a separate timeout for each camera.
+"""
+
+from __future__ import annotations
+
+import httpx
+
+from trio import CancelScope, fail_after, open_nursery, sleep_forever, TooSlowError
+from typing import Any, Iterable, Optional, Union
+
+from flockwave.server.message_hub import MessageHub
+from flockwave.server.model.client import Client
+from flockwave.server.model.messages import FlockwaveMessage, FlockwaveResponse
+
+__all__ = ("CameraFleet",)
+
+ACTIONS = ("start_capture", "stop_capture")
+"""Actions supported by the cameras."""
+
+CameraResult = tuple[bool, Any]
+"""Type alias for the result of a request sent to a single camera: whether
+the request succeeded, and the response of the camera or the reason of the
+failure.
+"""
+
+
+class CameraFleet:
+    """Object that sends HTTP requests to a fleet of cameras concurrently."""
+
+    cameras: dict[str, str]
+    """Mapping from camera IDs to the base URLs of the cameras."""
+
+    timeout: float
+    """Number of seconds to wait for the response of a single camera."""
+
+    _clients: dict[tuple[str, str, Optional[int]], httpx.AsyncClient]
+    """Pooled HTTP clients, keyed by the scheme, host and port of the cameras."""
+
+    _transport: Optional[httpx.AsyncBaseTransport]
+    """Transport to use for the HTTP clients; ``None`` means the default."""
+
+    def __init__(
+        self,
+        cameras: Union[dict[str, str], Iterable[str]] = (),
+        *,
+        timeout: float = 5,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            cameras: mapping from camera IDs to the base URLs of the cameras,
+                or a list of base URLs, in which case the cameras get
+                consecutive numeric IDs starting from 1
+            timeout: number of seconds to wait for the response of a single
+                camera
+            transport: transport to use for the HTTP clients; used for testing
+        """
+        if isinstance(cameras, dict):
+            items = [(str(key), str(url)) for key, url in cameras.items()]
+        else:
+            items = [(str(i), str(url)) for i, url in enumerate(cameras, 1)]
+
+        # Action names are resolved relative to the base URLs so they need
+        # to end with a slash
+        self.cameras = {
+            key: url if url.endswith("/") else url + "/" for key, url in items
+        }
+
+        self.timeout = timeout
+
+        self._clients = {}
+        self._transport = transport
+
+    async def aclose(self) -> None:
+        """Closes the HTTP clients of the fleet."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    async def send(
+        self, action: str, ids: Optional[Iterable[str]] = None
+    ) -> dict[str, CameraResult]:
+        """Sends the given action to the cameras with the given IDs
+        concurrently.
+
+        Parameters:
+            action: the action to send; must be one of the supported actions
+            ids: the IDs of the cameras to send the action to; ``None`` means
+                all the cameras
+
+        Returns:
+            mapping from camera IDs to the results of the requests
+
+        Raises:
+            RuntimeError: if the action is not supported
+        """
+        if action not in ACTIONS:
+            raise RuntimeError(f"Unsupported camera action: {action!r}")
+
+        results: dict[str, CameraResult] = {}
+        ids = list(self.cameras) if ids is None else [str(id) for id in ids]
+
+        async with open_nursery() as nursery:
+            for id in ids:
+                url = self.cameras.get(id)
+                if url is None:
+                    results[id] = (False, "No such camera")
+                else:
+                    nursery.start_soon(self._send_to, id, url, action, results)
+
+        return results
+
+    def _get_client(self, url: httpx.URL) -> httpx.AsyncClient:
+        key = url.scheme, url.host, url.port
+        client = self._clients.get(key)
+        if client is None:
+            if self._transport is not None:
+                client = httpx.AsyncClient(transport=self._transport)
+            else:
+                client = httpx.AsyncClient()
+            self._clients[key] = client
+        return client
+
+    async def _send_to(
+        self, id: str, url: str, action: str, results: dict[str, CameraResult]
+    ) -> None:
+        endpoint = httpx.URL(url).join(action)
+        client = self._get_client(endpoint)
+
+        try:
+            with fail_after(self.timeout):
+                response = await client.get(endpoint)
+                response.raise_for_status()
+        except TooSlowError:
+            results[id] = (False, "Camera did not respond in time")
+            return
+        except httpx.HTTPError as ex:
+            results[id] = (False, str(ex) or ex.__class__.__name__)
+            return
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = response.text
+        results[id] = (True, data)
+
+
+############################################################################
+
+fleet: Optional[CameraFleet] = None
+
+
+async def handle_X_CAMERA(
+    message: FlockwaveMessage, sender: Client, hub: MessageHub
+) -> FlockwaveResponse:
+    action = str(message.body.get("message", "")).lower()
+    ids = message.body.get("ids")
+
+    response = hub.create_response_or_notification(
+        body={"method": action}, in_response_to=message
+    )
+
+    assert fleet is not None
+
+    try:
+        results = await fleet.send(action, ids)
+    except RuntimeError as ex:
+        response.body["error"] = str(ex)
+        return response
+
+    for id, (success, value) in results.items():
+        if success:
+            response.add_result(id, value)
+        else:
+            response.add_error(id, value)
+
+    return response
+
+
+async def run(app, configuration, logger):
+    global fleet
+
+    fleet = CameraFleet(
+        configuration.get("cameras", ()),
+        timeout=float(configuration.get("timeout", 5)),
+    )
+
+    try:
+        with app.message_hub.use_message_handlers({"X-CAMERA": handle_X_CAMERA}):
+            await sleep_forever()
+    finally:
+        with CancelScope(shield=True):
+            await fleet.aclose()
+        fleet = None
+
+
+description = "Start and stop image capture on the onboard cameras of the drones"
+schema = {
+    "properties": {
+        "cameras": {
+            "type": "object",
+            "title": "Cameras",
+            "description": (
+                "Mapping from camera IDs to the base URLs of the HTTP "
+                "interfaces of the cameras"
+            ),
+            "additionalProperties": {"type": "string"},
+        },
+        "timeout": {
+            "type": "number",
+            "title": "Timeout",
+            "description": "Number of seconds to wait for the response of a camera",
+            "default": 5,
+            "minimum": 0,
+        },
+    }
+}
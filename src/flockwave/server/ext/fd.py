@@ -12,7 +12,7 @@ from trio.lowlevel import FdStream
 from flockwave.channels import ParserChannel
 from flockwave.encoders.json import create_json_encoder
 from flockwave.parsers.json import create_json_parser
-from flockwave.server.model import CommunicationChannel
+from flockwave.server.model import CommunicationChannel, EncodedMessage
 from flockwave.server.utils import overridden
 
 
@@ -58,12 +58,19 @@ class FDChannel(CommunicationChannel):
 
     async def send(self, message):
         """Inherited."""
+        await self._send_bytes(encoder(message))
+
+    async def send_encoded(self, message: EncodedMessage) -> None:
+        """Inherited."""
+        await self._send_bytes(message.json)
+
+    async def _send_bytes(self, data: bytes) -> None:
         async with self._lock:
             # Locking is needed, otherwise we could be running into problems
             # if a message was sent only partially but the message hub is
             # already trying to send another one (since the message hub
             # dispatches each message in a separate task)
-            await self.out_fp.write(encoder(message))
+            await self.out_fp.write(data)
             await self.out_fp.flush()
 
     async def serve(self, handler):
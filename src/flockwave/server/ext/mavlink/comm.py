@@ -14,7 +14,12 @@ from flockwave.connections import Connection, StreamConnectionBase
 from flockwave.logger import Logger
 from flockwave.networking import format_socket_address
 
-from flockwave.server.comm import NO_BROADCAST_ADDRESS, CommunicationManager
+from flockwave.server.comm import (
+    BULK_LANE,
+    COMMAND_LANE,
+    NO_BROADCAST_ADDRESS,
+    CommunicationManager,
+)
 
 from .enums import MAVComponent
 from .signing import MAVLinkSigningConfiguration
@@ -168,6 +173,7 @@ def create_communication_manager(
         channel_factory=channel_factory,
         format_address=format_mavlink_channel_address,
     )
+    manager.classify_packet = get_outbound_lane_for_mavlink_message
 
     if use_broadcast_rate_limiting:
         manager.broadcast_delay = 0.005
@@ -175,6 +181,16 @@ def create_communication_manager(
     return manager
 
 
+def get_outbound_lane_for_mavlink_message(spec: MAVLinkMessageSpecification) -> str:
+    """Returns the name of the outbound lane of the communication manager that
+    a MAVLink message with the given specification should be sent in.
+
+    FTP messages are bulk traffic; commands sent to the same UAV may overtake
+    them.
+    """
+    return BULK_LANE if spec[0] == "FILE_TRANSFER_PROTOCOL" else COMMAND_LANE
+
+
 def create_mavlink_message(link, _type: str, *args, **kwds) -> MAVLinkMessage:
     """Creates a MAVLink message from the methods of a MAVLink object received
     from the low-level `pymavlink` library.
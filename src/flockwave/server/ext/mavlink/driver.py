@@ -4,15 +4,35 @@ from __future__ import annotations
 
 from collections import defaultdict
 from colour import Color
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from functools import partial
 from logging import Logger
 from math import inf, isfinite
 from time import monotonic
-from trio import fail_after, move_on_after, sleep, TooSlowError
-from typing import Any, AsyncIterator, Callable, Optional, Union
+from trio import (
+    CancelScope,
+    CapacityLimiter,
+    Event,
+    current_time,
+    fail_after,
+    move_on_after,
+    open_nursery,
+    sleep,
+    TooSlowError,
+)
+from trio_util import RepeatedEvent
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    Optional,
+    Sequence,
+    Union,
+)
 
 from flockwave.gps.time import datetime_to_gps_time_of_week, gps_time_of_week_to_utc
 from flockwave.gps.vectors import GPSCoordinate, VelocityNED
@@ -37,18 +57,15 @@ from flockwave.server.model.safety import SafetyConfigurationRequest
 from flockwave.server.model.transport import TransportOptions
 from flockwave.server.model.uav import VersionInfo, UAVBase, UAVDriver
 from flockwave.server.utils import color_to_rgb8_triplet, to_uppercase_string
+from flockwave.server.utils.geodesy import haversine
 from flockwave.spec.errors import FlockwaveErrorCode
 
 from flockwave.server.show import (
     get_altitude_reference_from_show_specification,
     get_coordinate_system_from_show_specification,
     get_geofence_configuration_from_show_specification,
-    get_light_program_from_show_specification,
-    get_rth_plan_from_show_specification,
-    get_trajectory_from_show_specification,
-    get_yaw_setpoints_from_show_specification,
+    ShowEncodingCache,
 )
-from flockwave.server.show.formats import SkybrushBinaryShowFile
 
 from .accelerometer import AccelerometerCalibration
 from .autopilots import ArduPilot, Autopilot, UnknownAutopilot
@@ -71,8 +88,9 @@ from .enums import (
     MotorTestThrottleType,
     PositionTargetTypemask,
 )
-from .ftp import MAVFTP
+from .ftp import MAVFTP, MAVFTPSwarmUploader
 from .log_download import MAVLinkLogDownloader
+from .mission import MissionItem, MissionManager
 from .packets import create_led_control_packet, DroneShowExecutionStage, DroneShowStatus
 from .types import MAVLinkMessage, PacketBroadcasterFn, PacketSenderFn, spec
 from .utils import (
@@ -95,6 +113,9 @@ FORCE_MAGIC = 21196
 #: value
 nan = float("nan")
 
+#: Remote path of the show file on the drones
+SHOW_FILE_PATH = "/collmot/show.skyb"
+
 
 def transport_options_to_channel(options: Optional[TransportOptions]) -> str:
     """Converts a transport options object sent by the user to a specific
@@ -135,9 +156,29 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
     run_in_background: Callable[[Callable], None]
     send_packet: PacketSenderFn
 
+    ftp_window: int = 8
+    """Maximum number of MAVFTP read or write requests that may be in flight
+    at the same time during a file transfer to a single drone.
+    """
+
     gps_fix_hysteresis: float = 0.0
     """GPS fix hysteresis time, in seconds."""
 
+    mission_upload_limiter: CapacityLimiter
+    """Capacity limiter that bounds the number of mission uploads running
+    concurrently on the MAVLink networks of the driver.
+    """
+
+    show_cache: ShowEncodingCache
+    """Cache of the encoded show files of the drones, keyed by the hash of
+    the show specification of each drone.
+    """
+
+    show_upload_limiter: CapacityLimiter
+    """Capacity limiter that bounds the number of show file uploads running
+    concurrently on the MAVLink networks of the driver.
+    """
+
     def __init__(self, app=None):
         """Constructor.
 
@@ -152,8 +193,11 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         self.create_device_tree_mutator = None  # type: ignore
         self.log = None  # type: ignore
         self.mandatory_custom_mode = None
+        self.mission_upload_limiter = CapacityLimiter(16)
         self.run_in_background = None  # type: ignore
         self.send_packet = None  # type: ignore
+        self.show_cache = ShowEncodingCache()
+        self.show_upload_limiter = CapacityLimiter(8)
 
         self._default_timeout = 2
         self._default_retries = 5
@@ -326,8 +370,13 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         else:
             raise RuntimeError(f"Unknown subcommand: {command!r}")
 
-    async def handle_command___show_upload(self, uav: "MAVLinkUAV", *, show):
-        """Handles a drone show upload request for the given UAV.
+    def handle_multi_command___show_upload(self, uavs: list["MAVLinkUAV"], *, show):
+        """Handles a drone show upload request for the given UAVs.
+
+        The show is uploaded to all the UAVs in a single batch in the
+        background. The command of each UAV finishes when the upload to that
+        UAV has finished, and reports the aggregate progress of the batch in
+        the meanwhile.
 
         This is a temporary solution until we figure out something that is
         more sustainable in the long run.
@@ -335,14 +384,72 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         Parameters:
             show: the show data
         """
-        try:
-            await uav.upload_show(show)
-        except TooSlowError as ex:
-            self.log.error(str(ex))
-            raise
-        except Exception as ex:
-            self.log.error(str(ex))
-            raise
+        batch = ShowUploadBatch()
+        self.run_in_background(batch.run, partial(self.upload_show, uavs, show))
+        return {uav: batch.wait_for(uav) for uav in uavs}
+
+    async def upload_show(
+        self,
+        uavs: Sequence["MAVLinkUAV"],
+        show,
+        *,
+        on_progress: Optional[Callable[[Progress], None]] = None,
+    ) -> dict["MAVLinkUAV", Optional[Exception]]:
+        """Uploads the given show to the given UAVs and configures the show
+        origin, orientation and geofence on them.
+
+        The show file is uploaded to all the UAVs concurrently; the show
+        upload limiter of the driver bounds the number of uploads running at
+        the same time. The upload is skipped for UAVs that already have the
+        same show file.
+
+        Parameters:
+            uavs: the UAVs to upload the show to
+            show: the show data
+            on_progress: optional function to call with the aggregate progress
+                of the show file uploads
+
+        Returns:
+            mapping from UAVs to the errors that happened while uploading the
+            show to them, or ``None`` for successful uploads
+        """
+        coordinate_system = get_coordinate_system_from_show_specification(show)
+        if coordinate_system.type != "nwu":
+            raise RuntimeError("Only NWU coordinate systems are supported")
+
+        # Encoding happens in a worker thread, and shows that were encoded
+        # recently are served from the cache
+        show_file = await self.show_cache.encode(show)
+
+        uploader = MAVFTPSwarmUploader(
+            partial(MAVFTP.for_uav, window=self.ftp_window),
+            limiter=self.show_upload_limiter,
+        )
+        results = await uploader.upload(
+            dict.fromkeys(uavs, show_file.data),
+            SHOW_FILE_PATH,
+            skip_unchanged=True,
+            on_progress=on_progress,
+        )
+
+        async def configure(uav: "MAVLinkUAV") -> None:
+            try:
+                await uav.configure_show(show)
+            except Exception as ex:
+                results[uav] = ex
+
+        async with open_nursery() as nursery:
+            for uav in uavs:
+                if results[uav] is None:
+                    nursery.start_soon(configure, uav)
+
+        for uav, error in results.items():
+            if error is not None:
+                self.log.error(
+                    f"Failed to upload show: {error}", extra={"id": log_id_for_uav(uav)}
+                )
+
+        return results
 
     async def send_command_int(
         self,
@@ -700,6 +807,22 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
         ):
             raise RuntimeError("Failed to request low-power mode from autopilot")
 
+    async def _fly_through_single(
+        self,
+        uav: "MAVLinkUAV",
+        *,
+        waypoints: list[GPSCoordinate],
+        acceptance_radius: float,
+        mode_after: Optional[Union[int, str]],
+    ) -> AsyncIterator[Progress]:
+        async with aclosing(
+            uav.fly_through(
+                waypoints, acceptance_radius=acceptance_radius, mode_after=mode_after
+            )
+        ) as gen:
+            async for progress in gen:
+                yield progress
+
     async def get_log(
         self, uav: "MAVLinkUAV", log_id: str
     ) -> AsyncIterator[Union[Progress, Optional[FlightLog]]]:
@@ -1003,6 +1126,16 @@ class MAVLinkDriver(UAVDriver["MAVLinkUAV"]):
             raise RuntimeError("parameter value must be numeric") from None
         await uav.set_parameter(name, value_as_float)
 
+    async def _upload_mission_single(
+        self, uav: "MAVLinkUAV", *, items: list[MissionItem]
+    ) -> AsyncIterator[Progress]:
+        # Uploads to different UAVs run concurrently as separate async
+        # operations; the limiter bounds how many of them talk to the
+        # network at the same time
+        async with self.mission_upload_limiter:
+            async for progress in uav.upload_mission(items):
+                yield progress
+
 
 @dataclass
 class MAVLinkMessageRecord:
@@ -1026,6 +1159,84 @@ class MAVLinkMessageRecord:
         self.timestamp = monotonic()
 
 
+class ShowUploadBatch:
+    """Show upload to multiple UAVs that runs in a single background task and
+    whose aggregate progress is reported separately for each UAV.
+    """
+
+    progress: Progress
+    """The aggregate progress of the upload."""
+
+    _done: Event
+    """Event that is set when the upload has finished."""
+
+    _error: Optional[Exception]
+    """Error that prevented the upload from starting, if any."""
+
+    _results: dict[Any, Optional[Exception]]
+    """Mapping from UAVs to the errors that happened while uploading the show
+    to them, or ``None`` for successful uploads.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.progress = Progress(percentage=0, message="Waiting to start upload")
+
+        self._done = Event()
+        self._error = None
+        self._results = {}
+
+    async def run(
+        self,
+        upload: Callable[..., Awaitable[dict[Any, Optional[Exception]]]],
+    ) -> None:
+        """Runs the upload.
+
+        Parameters:
+            upload: async function that performs the upload when called with
+                an `on_progress` keyword argument, and that returns a mapping
+                from UAVs to the errors that happened while uploading the show
+                to them
+        """
+        try:
+            self._results = await upload(on_progress=self._set_progress)
+        except Exception as ex:
+            self._error = ex
+        finally:
+            self._done.set()
+
+    async def wait_for(self, uav, *, interval: float = 1) -> AsyncIterator[Progress]:
+        """Waits for the upload to the given UAV to finish, yielding the
+        aggregate progress of the upload periodically in the meanwhile.
+
+        Parameters:
+            uav: the UAV to wait for
+            interval: number of seconds between consecutive progress reports
+
+        Raises:
+            RuntimeError: if the upload was cancelled before it finished
+            Exception: the error that happened while uploading the show to the
+                UAV
+        """
+        while not self._done.is_set():
+            yield self.progress
+            with move_on_after(interval):
+                await self._done.wait()
+
+        if self._error is not None:
+            raise self._error
+
+        if uav not in self._results:
+            raise RuntimeError("Show upload was cancelled")
+
+        error = self._results[uav]
+        if error is not None:
+            raise error
+
+    def _set_progress(self, progress: Progress) -> None:
+        self.progress = progress
+
+
 class MAVLinkUAV(UAVBase):
     """Subclass for UAVs created by the driver for MAVLink-based drones."""
 
@@ -1095,6 +1306,10 @@ class MAVLinkUAV(UAVBase):
         #: used to prevent a "probably rebooted warning" for the first connection
         self._first_connection = True
 
+        #: Functions to call with each FILE_TRANSFER_PROTOCOL message received
+        #: from the drone; used by bursted MAVFTP reads
+        self._ftp_message_handlers = []
+
         #: Current GPS fix status of the drone
         self._gps_fix = GPSFix()
 
@@ -1121,6 +1336,10 @@ class MAVLinkUAV(UAVBase):
         #: Current global position of the drone
         self._position = GPSCoordinate()
 
+        #: Event that is set whenever a new global position is received from
+        #: the drone
+        self._position_updated = RepeatedEvent()
+
         #: Scheduled takeoff time of the drone, as a UNIX timestamp, in seconds
         self._scheduled_takeoff_time = None
 
@@ -1330,6 +1549,82 @@ class MAVLinkUAV(UAVBase):
             # Implementation of fly_to() with a guided mode command
             await self._fly_to_in_guided_mode(target)
 
+    async def fly_through(
+        self,
+        waypoints: Sequence[GPSCoordinate],
+        *,
+        acceptance_radius: float = 200,
+        mode_after: Optional[Union[int, str]] = None,
+    ) -> AsyncIterator[Progress]:
+        """Flies the UAV through the given waypoints one by one in guided mode.
+
+        The UAV is sent to the next waypoint when it gets closer to the
+        current one than the acceptance radius, based on the position updates
+        that it streams to us. The distance to the current waypoint is
+        reported periodically so long legs do not time out.
+
+        Cancelling the iteration stops the sequencing. The UAV is switched to
+        the mode given in `mode_after` also when the iteration is cancelled or
+        fails; without `mode_after`, it stays in guided mode, flying towards
+        its current waypoint.
+
+        Parameters:
+            waypoints: the waypoints to fly through
+            acceptance_radius: the distance from a waypoint, in meters, below
+                which the waypoint is considered to be reached
+            mode_after: the flight mode to switch the UAV to after it reached
+                the last waypoint; `None` to stay in guided mode
+
+        Yields:
+            events describing the progress of the operation
+        """
+        num_waypoints = len(waypoints)
+        if not num_waypoints:
+            raise RuntimeError("No waypoints to fly through")
+
+        await self.set_mode("guided")
+
+        try:
+            for index, waypoint in enumerate(waypoints):
+                message = f"Flying to waypoint {index + 1} of {num_waypoints}"
+                yield Progress(
+                    percentage=100 * index // num_waypoints, message=message
+                )
+
+                await self.fly_to(waypoint)
+
+                initial_distance = None
+                async with aclosing(
+                    self.wait_until_near(waypoint, acceptance_radius)
+                ) as distances:
+                    async for distance in distances:
+                        if initial_distance is None:
+                            initial_distance = distance
+                        ratio = (
+                            max(0.0, 1 - distance / initial_distance)
+                            if initial_distance > 0
+                            else 0.0
+                        )
+                        yield Progress(
+                            percentage=int(100 * (index + ratio) / num_waypoints),
+                            message=f"{message}, {distance:.0f} m away",
+                        )
+        finally:
+            if mode_after is not None:
+                # Switch modes even if the command was cancelled, but do not
+                # hang forever if the UAV does not respond
+                with CancelScope(shield=True), move_on_after(10):
+                    try:
+                        await self.set_mode(mode_after)
+                    except Exception:
+                        self.driver.log.warning(
+                            f"Failed to switch to mode {mode_after!r} after "
+                            "flying through waypoints",
+                            extra={"id": log_id_for_uav(self)},
+                        )
+
+        yield Progress.done("All waypoints reached")
+
     async def _fly_to_in_guided_mode(self, target: GPSCoordinate) -> None:
         """Implementation of `fly_to()` using a MAVLink
         SET_POSITION_TARGET_GLOBAL_INT guided mode message.
@@ -1580,6 +1875,10 @@ class MAVLinkUAV(UAVBase):
         self.update_status(light=data.light, gps=self._gps_fix, debug=debug)
         self.notify_updated()
 
+    def handle_message_file_transfer_protocol(self, message: MAVLinkMessage):
+        for handler in self._ftp_message_handlers:
+            handler(message)
+
     def handle_message_heartbeat(self, message: MAVLinkMessage):
         """Handles an incoming MAVLink HEARTBEAT message targeted at this UAV."""
         if self._mavlink_version < 2 and message.get_msgbuf()[0] == 253:
@@ -1663,6 +1962,7 @@ class MAVLinkUAV(UAVBase):
             position=self._position, velocity=self._velocity, heading=heading
         )
         self.notify_updated()
+        self._position_updated.set()
 
     def handle_message_gps_raw_int(self, message: MAVLinkMessage):
         num_sats = message.satellites_visible
@@ -2049,31 +2349,26 @@ class MAVLinkUAV(UAVBase):
                     extra={"id": log_id_for_uav(self)},
                 )
 
-    async def upload_show(self, show) -> None:
-        coordinate_system = get_coordinate_system_from_show_specification(show)
-        if coordinate_system.type != "nwu":
-            raise RuntimeError("Only NWU coordinate systems are supported")
+    async def upload_mission(self, items: list[MissionItem]) -> AsyncIterator[Progress]:
+        """Uploads the given mission items to the UAV using the
+        MISSION_ITEM_INT protocol, replacing the current mission.
 
+        Yields:
+            events describing the progress of the upload
+        """
+        manager = MissionManager.for_uav(self)
+        async with aclosing(manager.upload_mission(items)) as gen:
+            async for progress in gen:
+                yield progress
+
+    async def configure_show(self, show) -> None:
+        """Configures the origin, the orientation, the altitude reference and
+        the geofence of the given show on the UAV, and asks the UAV to reload
+        the show file that was uploaded to it.
+        """
+        coordinate_system = get_coordinate_system_from_show_specification(show)
         altitude_reference = get_altitude_reference_from_show_specification(show)
-        light_program = get_light_program_from_show_specification(show)
-        trajectory = get_trajectory_from_show_specification(show)
         geofence = get_geofence_configuration_from_show_specification(show)
-        rth_plan = get_rth_plan_from_show_specification(show)
-        yaw_setpoints = get_yaw_setpoints_from_show_specification(show)
-
-        async with SkybrushBinaryShowFile.create_in_memory() as show_file:
-            await show_file.add_trajectory(trajectory)
-            await show_file.add_light_program(light_program)
-            if rth_plan:
-                await show_file.add_rth_plan(rth_plan)
-            if yaw_setpoints:
-                await show_file.add_yaw_setpoints(yaw_setpoints)
-            await show_file.finalize()
-            data = show_file.get_contents()
-
-        # Upload show file
-        async with aclosing(MAVFTP.for_uav(self)) as ftp:
-            await ftp.put(data, "/collmot/show.skyb")
 
         # We give some time for the filesystem to flush caches etc before
         # asking the drone to reload the show file. There were some reports
@@ -2134,6 +2429,57 @@ class MAVLinkUAV(UAVBase):
         # else
         await self.reload_show()
 
+    @contextmanager
+    def use_ftp_message_handler(
+        self, handler: Callable[[MAVLinkMessage], None]
+    ) -> Iterator[None]:
+        """Context manager that registers a function to call with each
+        FILE_TRANSFER_PROTOCOL message received from the drone while the
+        context is active.
+        """
+        self._ftp_message_handlers.append(handler)
+        try:
+            yield
+        finally:
+            self._ftp_message_handlers.remove(handler)
+
+    async def wait_until_near(
+        self, target: GPSCoordinate, radius: float, *, interval: float = 5
+    ) -> AsyncIterator[float]:
+        """Waits until the horizontal distance of the UAV from the given target
+        drops below the given radius, based on the position updates received
+        from the UAV.
+
+        The iteration ends when the target is reached. Distances are reported
+        only while position updates keep arriving from the UAV.
+
+        Parameters:
+            target: the target to wait for
+            radius: the distance from the target, in meters, below which the
+                target is considered to be reached
+            interval: minimum number of seconds between consecutive distance
+                reports
+
+        Yields:
+            the current distance of the UAV from the target, in meters, at
+            most once every `interval` seconds
+        """
+        last_reported_at = -inf
+        async for _ in self._position_updated.events(repeat_last=True):
+            position = self._position
+            if position.lat == 0 and position.lon == 0:
+                # No GPS fix yet
+                continue
+
+            distance = haversine(position.lat, position.lon, target.lat, target.lon)
+            if distance < radius:
+                return
+
+            now = current_time()
+            if now - last_reported_at >= interval:
+                last_reported_at = now
+                yield distance
+
     def _configure_data_streams_soon(self, force: bool = False) -> None:
         """Schedules a call to configure the data streams that we want to receive
         from the UAV, as soon as possible.
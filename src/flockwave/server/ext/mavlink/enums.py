@@ -60,9 +60,11 @@ class MAVCommand(IntEnum):
     """
 
     NAV_WAYPOINT = 16
+    NAV_LOITER_UNLIM = 17
     NAV_RETURN_TO_LAUNCH = 20
     NAV_LAND = 21
     NAV_TAKEOFF = 22
+    NAV_VTOL_TAKEOFF = 84
     DO_SET_MODE = 176
     DO_REPOSITION = 192
     DO_MOTOR_TEST = 209
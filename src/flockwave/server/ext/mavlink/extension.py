@@ -79,11 +79,21 @@ class MAVLinkDronesExtension(UAVExtension[MAVLinkDriver]):
         """
         driver.broadcast_packet = self._broadcast_packet
         driver.create_device_tree_mutator = self.create_device_tree_mutation_context
+        driver.ftp_window = max(int(configuration.get("ftp_window", 8)), 1)
         driver.gps_fix_hysteresis = float(configuration.get("gps_fix_hysteresis", 0.0))
         driver.log = self.log
         driver.mandatory_custom_mode = optional_int(configuration.get("custom_mode"))
+        driver.mission_upload_limiter.total_tokens = max(
+            int(configuration.get("mission_upload_concurrency", 16)), 1
+        )
         driver.run_in_background = self.run_in_background
         driver.send_packet = self._send_packet
+        driver.show_cache.max_size = max(
+            int(configuration.get("show_cache_size", 64 * 1024 * 1024)), 0
+        )
+        driver.show_upload_limiter.total_tokens = max(
+            int(configuration.get("show_upload_concurrency", 8)), 1
+        )
 
     async def run(self, app, configuration):
         networks = OrderedDict(
@@ -623,7 +633,11 @@ schema = {
             "propertyOrder": 5000,
         },
         # Advanced settings not included here:
+        # - ftp_window
         # - gps_fix_hysteresis
+        # - mission_upload_concurrency
         # - packet_loss
+        # - show_cache_size
+        # - show_upload_concurrency
     }
 }
@@ -9,32 +9,60 @@ from itertools import cycle, islice
 from pathlib import PurePosixPath
 from random import randint
 from struct import Struct
-from trio import fail_after, move_on_after, TooSlowError, wrap_file
+from trio import (
+    CapacityLimiter,
+    Semaphore,
+    TooSlowError,
+    WouldBlock,
+    fail_after,
+    move_on_after,
+    open_memory_channel,
+    open_nursery,
+    wrap_file,
+)
 from typing import (
+    Any,
     AsyncIterable,
     AsyncIterator,
     Awaitable,
     Callable,
+    ContextManager,
     Iterable,
     Iterator,
+    Mapping,
     Optional,
     Union,
 )
 
 from flockwave.concurrency import aclosing
+from flockwave.server.model.commands import Progress
 from flockwave.server.show.utils import crc32_mavftp as crc32
 
 from .types import MAVLinkMessage, spec
+from .utils import ChunkAssembler, ChunkAssemblerRange
 
-__all__ = ("MAVFTP",)
+__all__ = ("MAVFTP", "MAVFTPSwarmUploader")
 
 
 #: Type specification for FTP paths that are accepted by MAVFTP
 FTPPath = Union[str, bytes]
 
+#: Type specification for functions that can be called with the number of
+#: bytes transferred so far and the total number of bytes to transfer (if known)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+#: Type specification for functions that register a handler for all the raw
+#: MAVLink FILE_TRANSFER_PROTOCOL messages received from the UAV, for the
+#: duration of a context
+MessageListener = Callable[[Callable[[MAVLinkMessage], None]], ContextManager[None]]
+
 #: Maximum number of bytes allowed in a single read/write operation
 _MAVFTP_CHUNK_SIZE = 239
 
+#: Number of seconds to wait for the next packet of a bursted read before
+#: considering the burst finished
+_MAVFTP_BURST_TIMEOUT = 0.5
+
 
 class MAVFTPOpCode(IntEnum):
     """Opcodes for the MAVFTP sub-protocol of MAVLink."""
@@ -172,6 +200,8 @@ class MAVFTPMessage:
     offset: int = 0
     data: bytes = b""
     size: Optional[int] = None
+    req_opcode: int = 0
+    burst_complete: bool = False
 
     @classmethod
     def decode(cls, payload: bytes, expected_seq_no: Optional[int] = None):
@@ -206,28 +236,12 @@ class MAVFTPMessage:
                 offset=offset,
                 data=bytes(data[:size]),
                 size=size,
+                req_opcode=req_opcode,
+                burst_complete=bool(burst_complete),
             )
         else:
             raise SequenceNumberMismatch()
 
-    @classmethod
-    def matches_sequence_no(cls, seq_no: int, message: MAVLinkMessage) -> bool:
-        """Returns whether the payload of the given raw MAVLink
-        FILE_TRANSFER_PROTOCOL message contains the given sequence number.
-
-        Parameters:
-            seq_no: the sequence number to expect in the payload
-            message: the message to decode
-
-        Returns:
-            whether the message is a MAVLink FILE_TRANSFER_PROTOCOL message with
-            the given expected sequence number
-        """
-        payload = message.payload
-        return len(payload) >= _MAVFTPMessageStruct.size and (
-            payload[0] + (payload[1] << 8) == seq_no
-        )
-
     def encode(self, seq_no: int) -> bytes:
         """Encodes the message in a format that is suitable to be sent over a
         MAVLink connection, given its MAVFTP sequence number.
@@ -240,7 +254,13 @@ class MAVFTPMessage:
         size = self.size if self.size is not None else len(self.data)
         return (
             _MAVFTPMessageStruct.pack(
-                seq_no, self.session_id, self.opcode, size, 0, 0, self.offset
+                seq_no,
+                self.session_id,
+                self.opcode,
+                size,
+                self.req_opcode,
+                int(self.burst_complete),
+                self.offset,
             )
             + self.data
         )
@@ -318,6 +338,11 @@ class MAVFTPSession:
         finally:
             self._closing = False
 
+    @property
+    def id(self) -> int:
+        """The ID of the session."""
+        return self._session_id
+
     async def _aclose(self) -> None:
         message = MAVFTPMessage(
             MAVFTPOpCode.TERMINATE_SESSION,
@@ -396,6 +421,12 @@ class MAVFTP:
     _closing: bool
     """Stores whether the MAVFTP connection is being closed."""
 
+    _listener: Optional[MessageListener]
+    """A function that can be called to receive all the FILE_TRANSFER_PROTOCOL
+    messages of the UAV for the duration of a context; used by bursted reads.
+    ``None`` if bursted reads are not supported by the connection.
+    """
+
     _sender: Callable[[MAVFTPMessage], Awaitable[None]]
     """A function that can be called to send a MAVFTP message associated to
     this MAVFTP object.
@@ -404,21 +435,50 @@ class MAVFTP:
     _seq: Iterator[int]
     """An iterator yielding sequence numbers for the connection."""
 
+    window: int
+    """Maximum number of read or write requests that may be in flight at the
+    same time during a file transfer. 1 means that every chunk is acknowledged
+    before the next one is sent.
+    """
+
     @classmethod
-    def for_uav(cls, uav):
-        """Constructs a MAVFTP connection object to the given UAV."""
+    def for_uav(cls, uav, **kwds):
+        """Constructs a MAVFTP connection object to the given UAV.
+
+        Additional keyword arguments are forwarded to the constructor.
+        """
         sender = partial(uav.driver.send_packet, target=uav)
-        return cls(sender)
+        return cls(sender, listener=uav.use_ftp_message_handler, **kwds)
 
-    def __init__(self, sender: Callable[[MAVFTPMessage], Awaitable[None]]):
-        """Constructor."""
+    def __init__(
+        self,
+        sender: Callable[[MAVFTPMessage], Awaitable[None]],
+        *,
+        listener: Optional[MessageListener] = None,
+        window: int = 8,
+    ):
+        """Constructor.
+
+        Parameters:
+            sender: function that sends a MAVLink message to the UAV and waits
+                for the matching response, API-compatible with the
+                `send_packet()` method of the driver
+            listener: function that registers a handler for all the raw
+                FILE_TRANSFER_PROTOCOL messages from the UAV for the duration
+                of a context; bursted reads are disabled when it is ``None``
+            window: maximum number of read or write requests that may be in
+                flight at the same time during a file transfer
+        """
         self._closed = False
         self._closing = False
 
+        self._listener = listener
         self._path = PurePosixPath("/")
         self._seq = islice(cycle(range(65536)), randint(0, 65535), None)
         self._sender = sender
 
+        self.window = max(int(window), 1)
+
     async def aclose(self) -> None:
         """Closes the MAVFTP connection and instructs the PixHawk to close
         all open file handles.
@@ -447,14 +507,33 @@ class MAVFTP:
         reply = await self._send_and_wait(message)
         return int.from_bytes(reply.data, byteorder="little")
 
-    async def get(self, remote_path: FTPPath, fp=None) -> Optional[bytes]:
+    async def get(
+        self,
+        remote_path: FTPPath,
+        fp=None,
+        *,
+        burst: bool = True,
+        verify_crc: bool = False,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Optional[bytes]:
         """Downloads a file at a given remote path.
 
+        When the size of the file is known, the file is fetched with bursted
+        reads (if supported) and the chunks lost during the bursts are
+        re-requested with pipelined reads, keeping at most `window` requests
+        in flight.
+
         Parameters:
             path: remote path where the file is located
             fp: optional async file-like object to write the downloaded file to.
                 When it is None, the file will be downloaded into memory and
                 returned
+            burst: whether to use bursted reads when the connection supports
+                them
+            verify_crc: whether to compare the CRC32 checksum of the
+                downloaded data with the checksum of the file on the UAV
+            on_progress: optional function to call with the number of bytes
+                downloaded so far and the size of the file (if known)
 
         Returns:
             the contents of the downloaded file if `fp` was not `None`, `None`
@@ -464,33 +543,50 @@ class MAVFTP:
 
         if fp is None:
             buffer = BytesIO()
-            await self.get(remote_path, wrap_file(buffer))
+            await self.get(
+                remote_path,
+                wrap_file(buffer),
+                burst=burst,
+                verify_crc=verify_crc,
+                on_progress=on_progress,
+            )
             return buffer.getvalue()
 
         message = MAVFTPMessage(MAVFTPOpCode.OPEN_FILE_RO, data=remote_path)
         reply = await self._send_and_wait(message)
 
-        async with self._open_session(reply.session_id) as session:
-            offset = 0
-            got_eof = False
-            while not got_eof:
-                bytes_requested = _MAVFTP_CHUNK_SIZE
-                try:
-                    chunk = await session.read(offset=offset, size=bytes_requested)
-                except OperationNotAcknowledgedError as ex:
-                    if ex.code == MAVFTPErrorCode.EOF:
-                        chunk = b""
-                    else:
-                        raise
+        # ArduPilot and PX4 both send the size of the file in the reply
+        size = (
+            int.from_bytes(reply.data[:4], byteorder="little")
+            if len(reply.data) >= 4
+            else None
+        )
 
-                if chunk:
-                    await fp.write(chunk)
-                    offset += len(chunk)
-                else:
-                    got_eof = True
+        observed_crc = 0
+        num_written = 0
+
+        async def write(data: bytes) -> None:
+            nonlocal observed_crc, num_written
+            await fp.write(data)
+            observed_crc = crc32(data, observed_crc)
+            num_written += len(data)
+            if on_progress:
+                on_progress(num_written, size)
 
-                if len(chunk) < bytes_requested:
-                    got_eof = True
+        async with self._open_session(reply.session_id) as session:
+            if size is None:
+                await self._get_sequential(session, write)
+            else:
+                await self._get_chunked(session, size, write, burst=burst)
+
+        if verify_crc:
+            expected_crc = await self.crc32(remote_path)
+            if observed_crc != expected_crc:
+                raise RuntimeError(
+                    "CRC mismatch, expected {0:08X}, got {1:08X}".format(
+                        expected_crc, observed_crc
+                    )
+                )
 
     async def ls(self, path: FTPPath = ".") -> AsyncIterable[ListingEntry]:
         """Lists the contents of a directory on the PixHawk.
@@ -538,17 +634,36 @@ class MAVFTP:
             else:
                 raise
 
-    async def put(self, fp, remote_path: FTPPath, parents: bool = False) -> None:
+    async def put(
+        self,
+        fp,
+        remote_path: FTPPath,
+        parents: bool = False,
+        *,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> None:
         """Uploads a file at a local path to the given remote path.
 
+        Chunks are written with pipelined requests, keeping at most `window`
+        writes in flight. Lost chunks are re-sent individually when their
+        acknowledgment does not arrive in time. The CRC32 checksum of the
+        uploaded data is calculated on the fly and compared with the checksum
+        of the remote file at the end.
+
         Parameters:
             fp: async file-like object containing the data to be uploaded, or a
                 raw bytes object
             remote_path: remote folder where the file should be uploaded
             parents: whether to create any parent directories automatically
+            on_progress: optional function to call with the number of bytes
+                acknowledged by the UAV so far and the total number of bytes
+                to upload (if known)
         """
         if isinstance(fp, bytes):
+            total: Optional[int] = len(fp)
             fp = wrap_file(BytesIO(fp))
+        else:
+            total = None
 
         remote_path = self._resolve(remote_path)
         if parents:
@@ -561,15 +676,33 @@ class MAVFTP:
         reply = await self._send_and_wait(message)
 
         expected_crc = 0
+        num_written = 0
+        window = Semaphore(self.window)
+
+        async def write_chunk(session: MAVFTPSession, data: bytes, offset: int) -> None:
+            nonlocal num_written
+            try:
+                await session.write(data=data, offset=offset)
+            finally:
+                window.release()
+
+            num_written += len(data)
+            if on_progress:
+                on_progress(num_written, total)
+
         async with self._open_session(reply.session_id) as session:
-            offset = 0
-            while True:
-                data = await fp.read(_MAVFTP_CHUNK_SIZE)
-                if data:
-                    offset += await session.write(data=data, offset=offset)
+            async with open_nursery() as nursery:
+                offset = 0
+                while True:
+                    await window.acquire()
+                    data = await fp.read(_MAVFTP_CHUNK_SIZE)
+                    if not data:
+                        window.release()
+                        break
+
                     expected_crc = crc32(data, expected_crc)
-                else:
-                    break
+                    nursery.start_soon(write_chunk, session, data, offset)
+                    offset += len(data)
 
         observed_crc = await self.crc32(remote_path)
         if observed_crc != expected_crc:
@@ -594,6 +727,184 @@ class MAVFTP:
         async with aclosing(session):
             yield session
 
+    async def _get_chunked(
+        self,
+        session: MAVFTPSession,
+        size: int,
+        write: Callable[[bytes], Awaitable[None]],
+        *,
+        burst: bool = True,
+    ) -> None:
+        """Downloads a file of known size from an open session, using bursted
+        reads to fetch the tail of the file and pipelined reads to fill the
+        gaps left by lost packets.
+        """
+        chunks = ChunkAssembler(size)
+
+        # Number of bursts in a row that did not extend the downloaded data;
+        # we fall back to pipelined reads when the UAV stops making progress
+        # with bursts
+        failed_bursts = 0
+        use_burst = burst and self._listener is not None
+
+        while not chunks.done:
+            next_range = chunks.get_next_range()
+            if use_burst and next_range.end >= chunks.size:
+                num_flushed = chunks.num_flushed_and_queued
+                try:
+                    await self._burst_read(session, next_range.offset, chunks, write)
+                except OperationNotAcknowledgedError as ex:
+                    if ex.code != MAVFTPErrorCode.UNKNOWN_COMMAND:
+                        raise
+                    use_burst = False
+
+                if chunks.num_flushed_and_queued > num_flushed:
+                    failed_bursts = 0
+                else:
+                    failed_bursts += 1
+                    use_burst = use_burst and failed_bursts < 3
+            else:
+                # Limit the size of the range to keep the memory footprint of
+                # the chunks waiting to be written bounded
+                next_range = chunks.get_next_range(
+                    max_size=16 * self.window * _MAVFTP_CHUNK_SIZE
+                )
+                for data in await self._read_range(session, next_range, chunks):
+                    await write(data)
+
+    async def _get_sequential(
+        self, session: MAVFTPSession, write: Callable[[bytes], Awaitable[None]]
+    ) -> None:
+        """Downloads a file of unknown size from an open session, one chunk
+        at a time, until the end of the file.
+        """
+        offset = 0
+        got_eof = False
+        while not got_eof:
+            bytes_requested = _MAVFTP_CHUNK_SIZE
+            try:
+                chunk = await session.read(offset=offset, size=bytes_requested)
+            except OperationNotAcknowledgedError as ex:
+                if ex.code == MAVFTPErrorCode.EOF:
+                    chunk = b""
+                else:
+                    raise
+
+            if chunk:
+                await write(chunk)
+                offset += len(chunk)
+            else:
+                got_eof = True
+
+            if len(chunk) < bytes_requested:
+                got_eof = True
+
+    async def _burst_read(
+        self,
+        session: MAVFTPSession,
+        offset: int,
+        chunks: ChunkAssembler,
+        write: Callable[[bytes], Awaitable[None]],
+    ) -> None:
+        """Requests a bursted read from the given offset of an open session
+        and feeds the received packets into the given chunk assembler until
+        the UAV signals the end of the burst or stops sending packets.
+        """
+        assert self._listener is not None
+
+        tx, rx = open_memory_channel(256)
+
+        def handle_message(message: MAVLinkMessage) -> None:
+            try:
+                tx.send_nowait(message)
+            except WouldBlock:
+                # Dropped packets are treated as lost and fetched again later
+                pass
+
+        with self._listener(handle_message):
+            message = MAVFTPMessage(
+                MAVFTPOpCode.BURST_READ_FILE,
+                session_id=session.id,
+                offset=offset,
+                size=_MAVFTP_CHUNK_SIZE,
+            )
+
+            # The first packet of the burst arrives both as the reply to the
+            # request and via the listener; we process it from the latter
+            reply = await self._send_and_wait(message, allow_nak=True)
+            if reply.is_nak:
+                if reply.error_code == MAVFTPErrorCode.EOF:
+                    chunks.shorten_to(offset)
+                    return
+                reply.raise_error()
+
+            while not chunks.done:
+                packet = None
+                with move_on_after(_MAVFTP_BURST_TIMEOUT):
+                    packet = await rx.receive()
+                if packet is None:
+                    break
+
+                reply = MAVFTPMessage.decode(packet.payload)
+                if (
+                    reply.req_opcode != MAVFTPOpCode.BURST_READ_FILE
+                    or reply.session_id != session.id
+                ):
+                    continue
+
+                if reply.is_nak:
+                    if reply.error_code == MAVFTPErrorCode.EOF:
+                        chunks.shorten_to(max(reply.offset, chunks.num_flushed))
+                    break
+
+                data = chunks.add_chunk(reply.offset, reply.data)
+                if data:
+                    await write(data)
+
+                if reply.burst_complete:
+                    break
+
+    async def _read_range(
+        self,
+        session: MAVFTPSession,
+        chunk_range: ChunkAssemblerRange,
+        chunks: ChunkAssembler,
+    ) -> list[bytes]:
+        """Reads the given range of an open session with pipelined requests
+        and feeds the results into the given chunk assembler.
+
+        Returns:
+            the data that became ready to be written, in order
+        """
+        result: list[bytes] = []
+        window = CapacityLimiter(self.window)
+
+        async def read_chunk(offset: int, size: int) -> None:
+            async with window:
+                try:
+                    data = await session.read(offset=offset, size=size)
+                except OperationNotAcknowledgedError as ex:
+                    if ex.code == MAVFTPErrorCode.EOF:
+                        data = b""
+                    else:
+                        raise
+
+            if len(data) < size and offset + len(data) < chunks.size:
+                # File is shorter than announced
+                chunks.shorten_to(max(offset + len(data), chunks.num_flushed))
+
+            to_flush = chunks.add_chunk(offset, data)
+            if to_flush:
+                result.append(to_flush)
+
+        async with open_nursery() as nursery:
+            end = chunk_range.end
+            for offset in range(chunk_range.start, end, _MAVFTP_CHUNK_SIZE):
+                size = min(_MAVFTP_CHUNK_SIZE, end - offset)
+                nursery.start_soon(read_chunk, offset, size)
+
+        return result
+
     def _parents_of(self, path: FTPPath) -> Iterable[FTPPath]:
         path_as_str = path if isinstance(path, str) else path.decode("utf-8")
         for parent_path in reversed(PurePosixPath(path_as_str).parents):
@@ -649,8 +960,10 @@ class MAVFTP:
                         spec.file_transfer_protocol(
                             target_network=0, payload=encoded_message
                         ),
+                        # seq_no is the sequence number in the payload; the
+                        # matcher registry of the network indexes it
                         wait_for_response=spec.file_transfer_protocol(
-                            partial(MAVFTPMessage.matches_sequence_no, expected_seq_no)
+                            seq_no=expected_seq_no
                         ),
                     )
             except TooSlowError:
@@ -675,3 +988,135 @@ class MAVFTP:
 
     def _to_ftp_path(self, posix_path: PurePosixPath) -> bytes:
         return (str(posix_path)[1:] or ".").encode("utf-8")
+
+
+class MAVFTPSwarmUploader:
+    """Uploads files to multiple UAVs over MAVFTP concurrently, with a bound
+    on the number of uploads running at the same time, and reports the
+    aggregate progress of the uploads.
+    """
+
+    max_parallel: int
+    """Maximum number of uploads running at the same time. Ignored if the
+    uploader was constructed with a capacity limiter.
+    """
+
+    _ftp_factory: Callable[[Any], MAVFTP]
+    """Function that creates a MAVFTP connection object to a UAV."""
+
+    _limiter: Optional[CapacityLimiter]
+    """Capacity limiter that is shared with other uploads, if any."""
+
+    def __init__(
+        self,
+        ftp_factory: Callable[[Any], MAVFTP] = MAVFTP.for_uav,
+        *,
+        max_parallel: int = 8,
+        limiter: Optional[CapacityLimiter] = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            ftp_factory: function that creates a MAVFTP connection object to
+                a UAV
+            max_parallel: maximum number of uploads running at the same time
+            limiter: capacity limiter that bounds the number of uploads
+                running at the same time, shared with other uploads; overrides
+                `max_parallel` when given
+        """
+        self._ftp_factory = ftp_factory
+        self._limiter = limiter
+        self.max_parallel = max(int(max_parallel), 1)
+
+    async def upload(
+        self,
+        files: Mapping[Any, bytes],
+        remote_path: FTPPath,
+        *,
+        parents: bool = False,
+        skip_unchanged: bool = False,
+        on_progress: Optional[Callable[[Progress], None]] = None,
+    ) -> dict[Any, Optional[Exception]]:
+        """Uploads files to multiple UAVs concurrently.
+
+        Use ``dict.fromkeys(uavs, data)`` to upload the same file to all the
+        UAVs.
+
+        Parameters:
+            files: mapping from UAVs to the contents of the file to upload to
+                the UAV
+            remote_path: remote path where the file should be uploaded on each
+                UAV
+            parents: whether to create any parent directories automatically
+            skip_unchanged: whether to skip the upload to UAVs that already
+                have a file with the same CRC32 checksum at the remote path
+            on_progress: optional function to call with a progress object
+                whenever the aggregate progress of the uploads changes
+
+        Returns:
+            mapping from UAVs to the errors that happened during their uploads,
+            or ``None`` for successful uploads
+        """
+        limiter = self._limiter or CapacityLimiter(self.max_parallel)
+        results: dict[Any, Optional[Exception]] = {}
+
+        total = sum(len(data) for data in files.values())
+        num_written = 0
+        written_per_uav = dict.fromkeys(files, 0)
+        last_percentage = -1
+
+        def report() -> None:
+            nonlocal last_percentage
+            if not on_progress:
+                return
+
+            percentage = int(100 * num_written / total) if total else 100
+            if len(results) < len(files):
+                percentage = min(percentage, 99)
+            if percentage != last_percentage:
+                last_percentage = percentage
+                on_progress(
+                    Progress(
+                        percentage=percentage,
+                        message=f"{len(results)}/{len(files)} uploads finished",
+                    )
+                )
+
+        def update(uav, count: int) -> None:
+            nonlocal num_written
+            num_written += count - written_per_uav[uav]
+            written_per_uav[uav] = count
+            report()
+
+        async def upload_single(uav, data: bytes) -> None:
+            async with limiter:
+                try:
+                    async with aclosing(self._ftp_factory(uav)) as ftp:
+                        if skip_unchanged:
+                            try:
+                                remote_crc = await ftp.crc32(remote_path)
+                            except OperationNotAcknowledgedError:
+                                # Most likely there is no such file yet
+                                remote_crc = None
+                            if remote_crc == crc32(data):
+                                results[uav] = None
+                                return
+
+                        await ftp.put(
+                            data,
+                            remote_path,
+                            parents=parents,
+                            on_progress=lambda count, _: update(uav, count),
+                        )
+                except Exception as ex:
+                    results[uav] = ex
+                else:
+                    results[uav] = None
+                finally:
+                    update(uav, len(data))
+
+        async with open_nursery() as nursery:
+            for uav, data in files.items():
+                nursery.start_soon(upload_single, uav, data)
+
+        return results
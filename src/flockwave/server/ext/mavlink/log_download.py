@@ -1,12 +1,19 @@
 """Implementation of downloading logs via a MAVLink connection."""
 
+import os
+
+from dataclasses import dataclass
 from functools import partial
+from mmap import ACCESS_READ, mmap
+from tempfile import mkstemp
 from trio import (
     current_time,
     fail_after,
     move_on_after,
+    open_file,
     open_memory_channel,
     TooSlowError,
+    WouldBlock,
 )
 from trio.abc import ReceiveChannel, SendChannel
 from typing import AsyncIterator, Callable, Optional, Union
@@ -26,6 +33,13 @@ from .utils import ChunkAssembler
 __all__ = ("MAVLinkLogDownloader",)
 
 
+#: Number of bytes in the payload of a single LOG_DATA message
+LOG_DATA_CHUNK_SIZE = 90
+
+#: Maximum number of partially downloaded logs to keep on the disk per drone
+MAX_PARTIAL_DOWNLOADS = 4
+
+
 def create_log_metadata_from_mavlink_message(
     message: MAVLinkMessage,
 ) -> FlightLogMetadata:
@@ -39,9 +53,109 @@ def create_log_metadata_from_mavlink_message(
     )
 
 
+class LogDownloadWindow:
+    """Adaptive request window of a log download.
+
+    The window grows additively after each request that was served without
+    losing packets and shrinks to half of its size when packets are lost. The
+    time to wait for the next packet of a request is derived from the observed
+    round-trip time and the interval between consecutive packets.
+    """
+
+    min_size: int = 8 * LOG_DATA_CHUNK_SIZE
+    """Minimum size of the window, in bytes."""
+
+    max_size: int = 512 * LOG_DATA_CHUNK_SIZE
+    """Maximum size of the window, in bytes. Requesting more than 512
+    LOG_DATA messages at once has caused timeout problems with mavesp8266.
+    """
+
+    size: int
+    """Current size of the window, in bytes."""
+
+    _interval: Optional[float] = None
+    """Smoothed interval between consecutive LOG_DATA messages, in seconds."""
+
+    _rtt: Optional[float] = None
+    """Smoothed time between a request and its first LOG_DATA message, in
+    seconds.
+    """
+
+    def __init__(self, size: int = 64 * LOG_DATA_CHUNK_SIZE):
+        """Constructor.
+
+        Parameters:
+            size: the initial size of the window, in bytes
+        """
+        self.size = min(max(size, self.min_size), self.max_size)
+
+    @property
+    def timeout(self) -> float:
+        """Number of seconds to wait for the next LOG_DATA message before
+        considering the remaining messages of the request lost.
+        """
+        if self._rtt is None or self._interval is None:
+            return 3.0
+        return min(max(2 * self._rtt, 8 * self._interval, 0.25), 3.0)
+
+    def observe_interval(self, interval: float) -> None:
+        """Records the time elapsed between two consecutive LOG_DATA
+        messages.
+        """
+        self._interval = _smooth(self._interval, interval)
+
+    def observe_rtt(self, rtt: float) -> None:
+        """Records the time elapsed between a request and its first LOG_DATA
+        message.
+        """
+        self._rtt = _smooth(self._rtt, rtt)
+
+    def on_lost(self) -> None:
+        """Notifies the window that some packets of the last request were
+        lost.
+        """
+        self.size = max(self.size // 2, self.min_size)
+
+    def on_success(self) -> None:
+        """Notifies the window that the last request was served without
+        losing packets.
+        """
+        self.size = min(self.size + 32 * LOG_DATA_CHUNK_SIZE, self.max_size)
+
+
+def _smooth(current: Optional[float], value: float, alpha: float = 0.25) -> float:
+    return value if current is None else current + alpha * (value - current)
+
+
+@dataclass
+class PartialLogDownload:
+    """State of a log download that was interrupted before completion."""
+
+    path: str
+    """Path of the temporary file containing the downloaded part of the log."""
+
+    num_flushed: int = 0
+    """Number of bytes at the start of the log that were written to the
+    temporary file.
+    """
+
+    def remove(self) -> None:
+        """Removes the temporary file of the download."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
 class MAVLinkLogDownloader:
     """Object that can be used to download logs from a MAVLink drone via a
     MAVLink connection.
+
+    Downloaded chunks are streamed to a temporary file. Downloads that are
+    interrupted, e.g., because the connection to the drone was lost, are
+    resumed from where they stopped when the same log is requested again.
+    Each drone has its own downloader so logs of different drones can be
+    downloaded in parallel.
     """
 
     _sender: Callable
@@ -66,6 +180,16 @@ class MAVLinkLogDownloader:
     MAVLink messages to process.
     """
 
+    _partial_downloads: dict[tuple[int, int, Optional[int]], PartialLogDownload]
+    """Interrupted log downloads, keyed by the ID, size and timestamp of the
+    log.
+    """
+
+    _window: LogDownloadWindow
+    """Adaptive request window; kept between downloads so the next download
+    starts with a window that suits the link.
+    """
+
     @classmethod
     def for_uav(cls, uav):
         """Constructs a MAVFTP connection object to the given UAV."""
@@ -77,6 +201,8 @@ class MAVLinkLogDownloader:
         self._sender = sender
         self._log = log
         self._retries = 5
+        self._partial_downloads = {}
+        self._window = LogDownloadWindow()
 
     async def get_log(
         self, log_id: int
@@ -91,7 +217,7 @@ class MAVLinkLogDownloader:
             )
 
         self._log_being_downloaded = log_id
-        self._message_channel, rx = open_memory_channel(128)
+        self._message_channel, rx = open_memory_channel(1024)
         try:
             async with aclosing(self._get_log_inner(log_id, rx)) as it:
                 async for item in it:
@@ -126,7 +252,11 @@ class MAVLinkLogDownloader:
 
     def handle_message_log_data(self, message: MAVLinkMessage):
         if self._message_channel:
-            self._message_channel.send_nowait(message)  # type: ignore
+            try:
+                self._message_channel.send_nowait(message)  # type: ignore
+            except WouldBlock:
+                # Dropped chunks are requested again later
+                pass
 
     def handle_message_log_entry(self, message: MAVLinkMessage):
         if self._message_channel:
@@ -136,66 +266,78 @@ class MAVLinkLogDownloader:
         self, log_id: int, rx: ReceiveChannel[MAVLinkMessage]
     ) -> AsyncIterator[Union[Progress, Optional[FlightLog]]]:
         last_progress_at = current_time()
+        window = self._window
 
-        # We are requesting at most 512 LOG_DATA messages at once to let the
-        # wifi module also take care of other things while doing the download.
-        # Requesting the entire log at once has caused timeout problems with
-        # mavesp8266. The strategy adopted here is identical to what
-        # QGroundControl is doing
-        MAX_CHUNK_SIZE = 512 * 90
+        # Get the size of the log first
+        metadata = await self._get_single_log_metadata(log_id, rx)
+        if not metadata:
+            yield None
+            return
 
-        try:
-            # Get the size of the log first and create a chunk assembler
-            metadata = await self._get_single_log_metadata(log_id, rx)
-            if not metadata:
-                yield None
-                return
-
-            if metadata.size is None:
-                raise RuntimeError("unknown log size")
-
-            chunks = ChunkAssembler(metadata.size)
-            log_data: list[bytes] = []
-            while not chunks.done:
-                next_range = chunks.get_next_range(max_size=MAX_CHUNK_SIZE)
-                response: Optional[MAVLinkMessage] = await self._send_and_wait(
-                    spec.log_request_data(
-                        id=log_id, ofs=next_range.offset, count=next_range.size
-                    ),
-                    spec.log_data(),
-                )
+        if metadata.size is None:
+            raise RuntimeError("unknown log size")
 
-                # Process the response, and start processing any other LOG_DATA messages
-                # that we receive via the channel
-                while response is not None:
-                    if response.get_type() == "LOG_DATA":
-                        if response.id != log_id:
-                            # ignore
-                            pass
-
-                        to_flush = chunks.add_chunk(
-                            response.ofs, bytes(response.data[: response.count])
-                        )
-                        if to_flush:
-                            log_data.append(to_flush)
+        download = self._get_partial_download(metadata)
 
-                    response = None
-                    if not chunks.done_with(next_range):
-                        with move_on_after(3):
-                            response = await rx.receive()
-
-                    now = current_time()
-                    if now - last_progress_at > 0.1:
-                        yield Progress(
-                            percentage=round(chunks.percentage),
-                            message="Downloading log...",
-                        )
-                        last_progress_at = current_time()
+        try:
+            async with await open_file(download.path, "r+b") as fp:
+                # Throw away anything beyond the part that we know is valid
+                await fp.truncate(download.num_flushed)
+                await fp.seek(download.num_flushed)
+
+                chunks = ChunkAssembler(metadata.size, start=download.num_flushed)
+                while not chunks.done:
+                    next_range = chunks.get_next_range(max_size=window.size)
+                    requested_at = current_time()
+                    response: Optional[MAVLinkMessage] = await self._send_and_wait(
+                        spec.log_request_data(
+                            id=log_id, ofs=next_range.offset, count=next_range.size
+                        ),
+                        spec.log_data(),
+                    )
+                    last_packet_at = current_time()
+                    window.observe_rtt(last_packet_at - requested_at)
+
+                    # Process the response, and start processing any other
+                    # LOG_DATA messages that we receive via the channel
+                    lost = False
+                    while response is not None:
+                        if response.get_type() == "LOG_DATA" and response.id == log_id:
+                            to_flush = chunks.add_chunk(
+                                response.ofs, bytes(response.data[: response.count])
+                            )
+                            if to_flush:
+                                await fp.write(to_flush)
+                                download.num_flushed = chunks.num_flushed
+
+                        response = None
+                        if not chunks.done_with(next_range):
+                            with move_on_after(window.timeout):
+                                response = await rx.receive()
+                                now = current_time()
+                                window.observe_interval(now - last_packet_at)
+                                last_packet_at = now
+                            lost = response is None
+
+                        now = current_time()
+                        if now - last_progress_at > 0.1:
+                            yield Progress(
+                                percentage=round(chunks.percentage),
+                                message="Downloading log...",
+                            )
+                            last_progress_at = current_time()
+
+                    if lost:
+                        window.on_lost()
+                    else:
+                        window.on_success()
 
         finally:
             await self._sender(spec.log_request_end())
 
-        yield FlightLog.create_from_metadata(metadata, body=b"".join(log_data))
+        log = self._create_log_from_file(metadata, download.path)
+        self._forget_partial_download(metadata)
+        yield log
 
     async def _get_log_list_inner(
         self, rx: ReceiveChannel[MAVLinkMessage]
@@ -255,6 +397,52 @@ class MAVLinkLogDownloader:
         else:
             return None
 
+    @staticmethod
+    def _create_log_from_file(metadata: FlightLogMetadata, path: str) -> FlightLog:
+        """Creates a flight log object from the given metadata and the
+        downloaded log in the file at the given path.
+        """
+        with open(path, "rb") as fp:
+            if not os.fstat(fp.fileno()).st_size:
+                return FlightLog.create_from_metadata(metadata, body=b"")
+
+            # Map the file into memory so the log is not copied into a bytes
+            # object before it is encoded
+            with mmap(fp.fileno(), 0, access=ACCESS_READ) as mapped:
+                with memoryview(mapped) as body:
+                    return FlightLog.create_from_metadata(metadata, body=body)
+
+    def _forget_partial_download(self, metadata: FlightLogMetadata) -> None:
+        key = (metadata.id, metadata.size, metadata.timestamp)
+        download = self._partial_downloads.pop(key, None)  # type: ignore
+        if download:
+            download.remove()
+
+    def _get_partial_download(self, metadata: FlightLogMetadata) -> PartialLogDownload:
+        """Returns the state of the interrupted download of the given log, or
+        starts a new download if there is no such download.
+        """
+        key = (metadata.id, metadata.size, metadata.timestamp)
+        download = self._partial_downloads.get(key)  # type: ignore
+        if download is not None and os.path.exists(download.path):
+            if self._log:
+                self._log.info(
+                    f"Resuming download of log {metadata.id} from byte "
+                    f"{download.num_flushed}"
+                )
+            return download
+
+        while len(self._partial_downloads) >= MAX_PARTIAL_DOWNLOADS:
+            oldest = next(iter(self._partial_downloads))
+            self._partial_downloads.pop(oldest).remove()
+
+        handle, path = mkstemp(prefix="skybrush-log-", suffix=".bin")
+        os.close(handle)
+
+        download = PartialLogDownload(path)
+        self._partial_downloads[key] = download  # type: ignore
+        return download
+
     async def _send_and_wait(
         self,
         message: MAVLinkMessageSpecification,
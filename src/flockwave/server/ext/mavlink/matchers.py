@@ -0,0 +1,229 @@
+"""Registry of pending MAVLink message matchers, indexed by message type,
+source system ID and the key field of the message type.
+
+Inbound messages are dispatched to the futures waiting for them with a
+constant number of dictionary lookups, independently of the number of
+in-flight requests.
+"""
+
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Any, Callable, Hashable, Optional, TYPE_CHECKING
+
+from .types import MAVLinkMessage, MAVLinkMessageMatcher
+
+if TYPE_CHECKING:
+    from flockwave.concurrency import Future
+
+__all__ = ("MAVLinkMessageMatcherRegistry",)
+
+
+def _get_ftp_sequence_number(message: MAVLinkMessage) -> Optional[int]:
+    payload = message.payload
+    return payload[0] + (payload[1] << 8) if len(payload) >= 2 else None
+
+
+KEY_FIELDS: dict[str, tuple[str, Callable[[MAVLinkMessage], Any]]] = {
+    "COMMAND_ACK": ("command", attrgetter("command")),
+    "FILE_TRANSFER_PROTOCOL": ("seq_no", _get_ftp_sequence_number),
+    "PARAM_VALUE": ("param_id", attrgetter("param_id")),
+}
+"""Dictionary mapping MAVLink message types to the name of the field that
+matchers of the given type are indexed by, and a function that extracts the
+value of the field from a message.
+
+``seq_no`` is not a real field of ``FILE_TRANSFER_PROTOCOL`` messages; it
+refers to the sequence number in the first two bytes of the payload.
+"""
+
+_ANY = object()
+"""Marker object used as the key of matchers that do not constrain the key
+field of the message type.
+"""
+
+
+class _Entry:
+    """A single matcher in the registry."""
+
+    __slots__ = ("future", "params")
+
+    future: Future[MAVLinkMessage]
+    """The future to resolve when a matching message arrives."""
+
+    params: MAVLinkMessageMatcher
+    """Additional matching criterion to check on the message, _excluding_ the
+    key field that the entry is indexed by.
+    """
+
+    def __init__(self, params: MAVLinkMessageMatcher, future: Future):
+        self.params = params
+        self.future = future
+
+    def matches(self, message: MAVLinkMessage) -> bool:
+        params = self.params
+        if params is None:
+            return True
+        elif callable(params):
+            return params(message)
+        else:
+            return all(
+                getattr(message, name, None) == value for name, value in params.items()
+            )
+
+
+_Bucket = dict[_Entry, None]
+"""Type alias for an insertion-ordered set of matchers sharing the same index
+key.
+"""
+
+
+class MAVLinkMessageMatcherRegistry:
+    """Registry of futures waiting for MAVLink messages matching certain
+    criteria.
+
+    Matchers are indexed by the MAVLink message type, the system ID of the
+    sender and, for the message types in ``KEY_FIELDS``, the value of the key
+    field of the message (e.g., the command in a ``COMMAND_ACK``), provided
+    that the matcher is a dictionary that constrains the key field.
+    Registering and removing a matcher takes constant time, and so does
+    dispatching an inbound message.
+    """
+
+    num_expired: int
+    """Number of matchers that were removed from the registry without being
+    matched.
+    """
+
+    num_matched: int
+    """Number of matchers that were resolved with a matching message."""
+
+    _buckets: dict[tuple[str, Optional[int], Any], _Bucket]
+    """Dictionary mapping (message type, system ID, key) triplets to the
+    matchers registered for them. The system ID is ``None`` for matchers that
+    match any system ID; the key is ``_ANY`` for matchers that do not constrain
+    the key field.
+    """
+
+    _types: dict[str, int]
+    """Dictionary mapping message types to the number of matchers registered
+    for them; used to skip dispatching quickly for messages that nobody waits
+    for.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.num_expired = 0
+        self.num_matched = 0
+        self._buckets = {}
+        self._types = {}
+
+    @property
+    def num_pending(self) -> int:
+        """Number of matchers currently registered."""
+        return sum(self._types.values())
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Counters of pending, matched and expired matchers."""
+        return {
+            "pending": self.num_pending,
+            "matched": self.num_matched,
+            "expired": self.num_expired,
+        }
+
+    def add(
+        self,
+        type: str,
+        params: MAVLinkMessageMatcher,
+        system_id: Optional[int],
+        future: Future[MAVLinkMessage],
+    ) -> Callable[[], None]:
+        """Registers a future that is to be resolved with the next MAVLink
+        message of the given type that matches the given criterion.
+
+        Parameters:
+            type: the type of the MAVLink message to wait for
+            params: ``None`` to match all messages of the given type, a
+                dictionary mapping field names to their expected values, or a
+                callable that returns whether a message matches
+            system_id: the system ID of the sender of the message; ``None``
+                means any system ID
+            future: the future to resolve
+
+        Returns:
+            a function that removes the matcher from the registry when called
+        """
+        key = _ANY
+        key_field = KEY_FIELDS.get(type)
+        if key_field and isinstance(params, dict):
+            value = params.get(key_field[0])
+            if value is not None and isinstance(value, Hashable):
+                key = value
+                params = {k: v for k, v in params.items() if k != key_field[0]}
+                params = params or None
+
+        entry = _Entry(params, future)
+        index = (type, system_id, key)
+        bucket = self._buckets.get(index)
+        if bucket is None:
+            self._buckets[index] = bucket = {}
+        bucket[entry] = None
+        self._types[type] = self._types.get(type, 0) + 1
+
+        def remove() -> None:
+            if not future.done():
+                self.num_expired += 1
+            del bucket[entry]
+            if not bucket and self._buckets.get(index) is bucket:
+                del self._buckets[index]
+            self._types[type] -= 1
+
+        return remove
+
+    def cancel_all(self) -> None:
+        """Cancels all the futures in the registry."""
+        for bucket in self._buckets.values():
+            for entry in bucket:
+                entry.future.cancel()
+
+    def dispatch(self, type: str, message: MAVLinkMessage) -> None:
+        """Resolves the futures that are waiting for the given message.
+
+        Parameters:
+            type: the type of the message
+            message: the message to dispatch
+        """
+        if not self._types.get(type):
+            return
+
+        system_id = message.get_srcSystem()
+        indices = [(type, system_id, _ANY), (type, None, _ANY)]
+
+        key_field = KEY_FIELDS.get(type)
+        if key_field:
+            try:
+                key = key_field[1](message)
+            except Exception:
+                key = None
+            if key is not None:
+                indices.append((type, system_id, key))
+                indices.append((type, None, key))
+
+        buckets = self._buckets
+        for index in indices:
+            bucket = buckets.get(index)
+            if not bucket:
+                continue
+
+            for entry in bucket:
+                if entry.future.done():
+                    # This may happen if we get multiple matching messages in
+                    # quick succession before the task waiting for the result
+                    # gets a chance of responding to them; in this case, we
+                    # have to ignore the message, otherwise we would be
+                    # resolving the future twice
+                    continue
+                if entry.matches(message):
+                    entry.future.set_result(message)
+                    self.num_matched += 1
@@ -0,0 +1,216 @@
+"""Mission-related data structures and functions for the MAVLink protocol."""
+
+from dataclasses import dataclass
+from functools import partial
+from trio import fail_after, TooSlowError
+from typing import AsyncIterator, Callable, Optional, Sequence
+
+from flockwave.logger import Logger
+from flockwave.server.model.commands import Progress
+
+from .enums import MAVCommand, MAVFrame, MAVMissionResult, MAVMissionType
+from .types import MAVLinkMessage, MAVLinkMessageSpecification, spec
+
+__all__ = ("MissionItem", "MissionManager")
+
+
+@dataclass(frozen=True)
+class MissionItem:
+    """A single item of a MAVLink mission, to be uploaded with the
+    MISSION_ITEM_INT protocol.
+    """
+
+    command: int
+    """The MAVLink command of the mission item (``MAV_CMD``)."""
+
+    lat: float = 0.0
+    """Latitude of the mission item, in degrees."""
+
+    lon: float = 0.0
+    """Longitude of the mission item, in degrees."""
+
+    alt: float = 0.0
+    """Altitude of the mission item, in meters, interpreted according to the
+    frame of the item.
+    """
+
+    frame: int = MAVFrame.GLOBAL_RELATIVE_ALT
+    """Coordinate frame of the mission item (``MAV_FRAME``)."""
+
+    param1: float = 0.0
+    param2: float = 0.0
+    param3: float = 0.0
+    param4: float = 0.0
+
+    @classmethod
+    def waypoint(cls, lat: float, lon: float, alt: float):
+        """Creates a waypoint mission item."""
+        return cls(MAVCommand.NAV_WAYPOINT, lat, lon, alt)
+
+    def to_message(
+        self, seq: int, mission_type: int = MAVMissionType.MISSION
+    ) -> MAVLinkMessageSpecification:
+        """Returns the MISSION_ITEM_INT message specification that uploads
+        this item with the given sequence number.
+        """
+        return spec.mission_item_int(
+            seq=seq,
+            frame=self.frame,
+            command=self.command,
+            current=0,
+            autocontinue=1,
+            param1=self.param1,
+            param2=self.param2,
+            param3=self.param3,
+            param4=self.param4,
+            x=int(round(self.lat * 1e7)),
+            y=int(round(self.lon * 1e7)),
+            z=self.alt,
+            mission_type=mission_type,
+        )
+
+
+class MissionManager:
+    """Class responsible for uploading missions to a MAVLink connection."""
+
+    _sender: Callable
+    """A function that can be called to send a MAVLink message over the
+    connection associated to this manager.
+
+    It must be API-compatible with the `send_packet()` method of the MAVLinkUAV_
+    object.
+    """
+
+    _log: Optional[Logger]
+    """Logger that the manager object can use to log messages."""
+
+    @classmethod
+    def for_uav(cls, uav):
+        """Constructs a mission manager object for the given UAV."""
+        sender = partial(uav.driver.send_packet, target=uav)
+        log = uav.driver.log
+        return cls(sender, log=log)
+
+    def __init__(self, sender: Callable, log: Optional[Logger] = None):
+        """Constructor.
+
+        Parameters:
+            sender: a function that can be called to send a MAVLink message and
+                wait for an appropriate reply
+            log: optional logger to use for logging messages
+        """
+        self._sender = sender
+        self._log = log
+
+    async def upload_mission(
+        self,
+        items: Sequence[MissionItem],
+        *,
+        mission_type: MAVMissionType = MAVMissionType.MISSION,
+    ) -> AsyncIterator[Progress]:
+        """Uploads the given mission items to the MAVLink connection, replacing
+        the current mission.
+
+        Note that ArduPilot treats the item with sequence number zero as the
+        home position and ignores its contents.
+
+        Parameters:
+            items: the mission items to upload
+            mission_type: type of the mission to upload
+
+        Yields:
+            events describing the progress of the upload
+
+        Raises:
+            TooSlowError: if the UAV failed to respond in time
+            RuntimeError: if the UAV rejected the mission
+        """
+        num_items = len(items)
+        if not num_items:
+            raise RuntimeError("Mission is empty")
+
+        yield Progress(percentage=0, message="Uploading mission")
+
+        index: Optional[int] = None
+        num_sent = 0
+        while True:
+            if index is None:
+                # We need to let the drone know how many items there will be
+                message = spec.mission_count(count=num_items, mission_type=mission_type)
+                should_resend = True
+            else:
+                # We need to send the item with the given index to the drone
+                if index < 0 or index >= num_items:
+                    raise RuntimeError(f"Invalid mission item requested: {index}")
+                message = items[index].to_message(index, mission_type)
+                should_resend = False
+
+            # Same policy as for geofence uploads: the initial message is
+            # re-sent if it got lost; subsequent items are never re-sent as it
+            # is the responsibility of the drone to request them again.
+            reply = await self._send_and_wait(
+                mission_type,
+                message,
+                timeout=1.5 if should_resend else 5,
+                retries=5 if should_resend else 0,
+            )
+            if reply is None:
+                break
+
+            index = reply.seq
+            if index >= num_sent:
+                num_sent = index + 1
+                yield Progress(percentage=100 * index // num_items)
+
+        yield Progress.done("Mission uploaded")
+
+    async def _send_and_wait(
+        self,
+        mission_type: MAVMissionType,
+        message: MAVLinkMessageSpecification,
+        *,
+        timeout: float = 1.5,
+        retries: int = 5,
+    ) -> Optional[MAVLinkMessage]:
+        """Sends a message according to the given MAVLink message specification
+        to the drone and waits for the drone to request the next mission item
+        or to acknowledge the upload, re-sending the message as needed a given
+        number of times before timing out.
+
+        Returns:
+            the MISSION_REQUEST or MISSION_REQUEST_INT message sent by the UAV
+            in response, or ``None`` if the UAV accepted the mission
+
+        Raises:
+            TooSlowError: if the UAV failed to respond in time
+            RuntimeError: if the UAV rejected the mission
+        """
+        # Newer autopilots request the items with MISSION_REQUEST_INT, older
+        # ones with MISSION_REQUEST; we need to handle both
+        replies = {
+            "request_int": spec.mission_request_int(mission_type=mission_type),
+            "request": spec.mission_request(mission_type=mission_type),
+            "ack": spec.mission_ack(mission_type=mission_type),
+        }
+
+        while True:
+            try:
+                with fail_after(timeout):
+                    key, response = await self._sender(message, wait_for_one_of=replies)
+            except TooSlowError:
+                if retries > 0:
+                    retries -= 1
+                    continue
+                else:
+                    raise TooSlowError("MAVLink mission upload timed out") from None
+
+            if key != "ack":
+                return response
+            elif response.type == MAVMissionResult.ACCEPTED:
+                return None
+            else:
+                try:
+                    reason = MAVMissionResult(response.type).name
+                except ValueError:
+                    reason = f"code {response.type}"
+                raise RuntimeError(f"Mission rejected by UAV: {reason}")
@@ -42,6 +42,7 @@ from .comm import (
 from .driver import MAVLinkDriver, MAVLinkUAV
 from .enums import MAVAutopilot, MAVComponent, MAVMessageType, MAVState, MAVType
 from .led_lights import MAVLinkLEDLightConfigurationManager
+from .matchers import MAVLinkMessageMatcherRegistry
 from .packets import DroneShowStatus
 from .rtk import RTKCorrectionPacketEncoder
 from .signing import MAVLinkSigningConfiguration
@@ -74,9 +75,6 @@ HEARTBEAT_SPEC = (
 )
 
 
-Matchers = dict[str, list[tuple[Optional[int], MAVLinkMessageMatcher, Future]]]
-
-
 class MAVLinkNetwork:
     """Representation of a MAVLink network."""
 
@@ -97,12 +95,10 @@ class MAVLinkNetwork:
     Skybrush.
     """
 
-    _matchers: Matchers
-    """Dictionary mapping MAVLink message types to lists of tuples consisting
-    of an optional MAVLink system ID, a MAVLink message matching criterion and a
-    future that will be resolved when a MAVLink message matching the criterion
-    is received from the given MAVLink system ID (or any system ID if no
-    system ID was specified).
+    _matchers: MAVLinkMessageMatcherRegistry
+    """Registry of futures waiting for MAVLink messages matching certain
+    criteria, indexed by message type, source system ID and the key field of
+    the message type.
     """
 
     _routing: dict[str, list[int]]
@@ -269,14 +265,11 @@ class MAVLinkNetwork:
                         pass
 
         future = Future()
-        item = (system_id, params, future)
-        matchers = self._matchers[type_str]
-
-        matchers.append(item)
+        remove = self._matchers.add(type_str, params, system_id, future)
         try:
             yield future
         finally:
-            matchers.pop(matchers.index(item))
+            remove()
 
     @property
     def id(self) -> str:
@@ -378,10 +371,9 @@ class MAVLinkNetwork:
             # Register the connection aliases
             self._register_connection_aliases(manager, connection_names, stack, log=log)
 
-            # Set up a dictionary that will map from MAVLink message types that
-            # we are waiting for to lists of corresponding (predicate, future)
-            # pairs
-            matchers: Matchers = defaultdict(list)
+            # Set up a registry for the futures waiting for MAVLink messages
+            # matching certain criteria
+            matchers = MAVLinkMessageMatcherRegistry()
 
             # Override some of our properties with the values we were called with
             stack.enter_context(
@@ -412,9 +404,7 @@ class MAVLinkNetwork:
                         tasks=[self._generate_heartbeats],
                     )
                 finally:
-                    for matcher in matchers.values():
-                        for _, _, future in matcher:
-                            future.cancel()
+                    matchers.cancel_all()
 
                 # Cancel all tasks in this nursery as we are about to shut down
                 nursery.cancel_scope.cancel()
@@ -674,7 +664,7 @@ class MAVLinkNetwork:
             "COMMAND_LONG": self._handle_message_command_long,
             "DATA16": self._handle_message_data16,
             "FENCE_STATUS": nop,
-            "FILE_TRANSFER_PROTOCOL": nop,
+            "FILE_TRANSFER_PROTOCOL": self._handle_message_file_transfer_protocol,
             "GLOBAL_POSITION_INT": self._handle_message_global_position_int,
             "GPS_GLOBAL_ORIGIN": nop,
             "GPS_RAW_INT": self._handle_message_gps_raw_int,
@@ -692,6 +682,7 @@ class MAVLinkNetwork:
             "MISSION_CURRENT": nop,  # maybe later?
             "MISSION_ITEM_INT": nop,  # used for mission and geofence download / upload
             "MISSION_REQUEST": nop,  # used for mission and geofence download / upload
+            "MISSION_REQUEST_INT": nop,  # used for mission upload
             "NAV_CONTROLLER_OUTPUT": nop,
             "PARAM_VALUE": nop,
             "POSITION_TARGET_GLOBAL_INT": nop,
@@ -745,29 +736,7 @@ class MAVLinkNetwork:
                 broadcast_address_updated[connection_id] = True
 
             # Resolve all futures that are waiting for this message
-            for system_id, params, future in self._matchers[type]:
-                # Check system ID early on and skip if it does not match
-                if system_id is not None and message.get_srcSystem() != system_id:
-                    continue
-
-                if future.done():
-                    # This may happen if we get multiple matching messages in
-                    # quick succession before the task waiting for the result
-                    # gets a chance of responding to them; in this case, we
-                    # have to ignore the message, otherwise we would be resolving
-                    # the future twice
-                    continue
-                elif callable(params):
-                    matched = params(message)
-                elif params is None:
-                    matched = True
-                else:
-                    matched = all(
-                        getattr(message, param_name, None) == param_value
-                        for param_name, param_value in params.items()
-                    )
-                if matched:
-                    future.set_result(message)
+            self._matchers.dispatch(type, message)
 
             # Call the message handler if we have one
             handler = handlers.get(type)
@@ -813,6 +782,14 @@ class MAVLinkNetwork:
             if uav:
                 uav.handle_message_drone_show_status(message)
 
+    def _handle_message_file_transfer_protocol(
+        self, message: MAVLinkMessage, *, connection_id: str, address: Any
+    ):
+        """Handles an incoming MAVLink FILE_TRANSFER_PROTOCOL message."""
+        uav = self._find_uav_from_message(message, address)
+        if uav:
+            uav.handle_message_file_transfer_protocol(message)
+
     def _handle_message_global_position_int(
         self, message: MAVLinkMessage, *, connection_id: str, address: Any
     ):
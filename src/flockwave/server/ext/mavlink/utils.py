@@ -219,8 +219,8 @@ class ChunkAssemblerRange(NamedTuple):
 
 class ChunkAssembler:
     """Helper object to assemble a downloaded file from its chunks. This class
-    is used by the log downloader at the moment and may be used with the MAVFTP
-    downloader in the future if we implement bursty reads.
+    is used by the log downloader and the bursted reads of the MAVFTP
+    downloader.
     """
 
     # NOTE: this class has a copy in `cmtool`. If you fix a bug here, consider
@@ -242,11 +242,17 @@ class ChunkAssembler:
     because there are gaps in front of them.
     """
 
-    def __init__(self, size: int):
-        """Constructor."""
+    def __init__(self, size: int, start: int = 0):
+        """Constructor.
+
+        Parameters:
+            size: the size of the file being downloaded
+            start: number of bytes at the start of the file that were
+                already downloaded earlier; used when resuming a download
+        """
         self._size = size
         self._pending = []
-        self._num_flushed = 0
+        self._num_flushed = min(max(start, 0), size)
         self._num_pending = 0
 
     def add_chunk(self, offset: int, data: bytes) -> Optional[bytes]:
@@ -355,6 +361,11 @@ class ChunkAssembler:
         """
         return self._num_flushed + self._num_pending
 
+    @property
+    def size(self) -> int:
+        """Returns the expected size of the file being downloaded."""
+        return self._size
+
     @property
     def percentage(self) -> float:
         """Returns the percentage of the expected data that has already been
@@ -23,7 +23,7 @@ from typing import (
 from urllib.parse import parse_qs
 
 from flockwave.encoders.json import create_json_encoder
-from flockwave.server.model import Client, CommunicationChannel
+from flockwave.server.model import Client, CommunicationChannel, EncodedMessage
 from flockwave.networking import format_socket_address
 
 from .vendor.socketio_v4 import TrioServer as TrioServerForSocketIOV4
@@ -74,6 +74,11 @@ class SocketIOChannel(CommunicationChannel):
             "fw", message, room=self._socketio_session_id, namespace="/"
         )
 
+    async def send_encoded(self, message: EncodedMessage) -> None:
+        """Inherited."""
+        # JSONEncoder splices the cached JSON representation into the packet
+        await self.send(message)
+
 
 ############################################################################
 
@@ -84,6 +89,21 @@ class JSONEncoder:
         self.parser = JSONDecoder()
 
     def dumps(self, obj, *args, **kwds):
+        # Event packets are encoded as lists where the first item is the name
+        # of the event. Messages that are already encoded are inserted
+        # verbatim from their cache
+        if isinstance(obj, list) and any(
+            isinstance(item, EncodedMessage) for item in obj
+        ):
+            parts = [
+                item.json_str if isinstance(item, EncodedMessage) else self._dumps(item)
+                for item in obj
+            ]
+            return "[" + ",".join(parts) + "]"
+
+        return self._dumps(obj)
+
+    def _dumps(self, obj) -> str:
         # There is an unnecessary back-and-forth UTF-8 encoding here because
         # create_json_encoder() and create_json_parser() return raw bytes,
         # but TrioServer needs strings
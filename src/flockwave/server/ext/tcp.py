@@ -25,7 +25,7 @@ from typing import Any, Optional
 from flockwave.channels import ParserChannel
 from flockwave.encoders.json import create_json_encoder
 from flockwave.parsers.json import create_json_parser
-from flockwave.server.model import Client, CommunicationChannel
+from flockwave.server.model import Client, CommunicationChannel, EncodedMessage
 from flockwave.server.ports import get_port_number_for_service
 from flockwave.networking import format_socket_address, get_socket_address
 from flockwave.server.utils import overridden
@@ -80,6 +80,13 @@ class TCPChannel(CommunicationChannel):
 
     async def send(self, message):
         """Inherited."""
+        await self._send_bytes(encoder(message))
+
+    async def send_encoded(self, message: EncodedMessage) -> None:
+        """Inherited."""
+        await self._send_bytes(message.json)
+
+    async def _send_bytes(self, data: bytes) -> None:
         if self.stream is None:
             self.stream = self.client_ref().stream
             self.client_ref = None
@@ -89,7 +96,7 @@ class TCPChannel(CommunicationChannel):
             # if a message was sent only partially but the message hub is
             # already trying to send another one (since the message hub
             # dispatches each message in a separate task)
-            await self.stream.send_all(encoder(message))
+            await self.stream.send_all(data)
 
     def _erase_stream(self, ref) -> None:
         self.stream = None
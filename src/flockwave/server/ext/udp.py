@@ -20,7 +20,7 @@ from flockwave.networking import (
     format_socket_address,
     get_socket_address,
 )
-from flockwave.server.model import CommunicationChannel
+from flockwave.server.model import CommunicationChannel, EncodedMessage
 from flockwave.server.ports import get_port_number_for_service
 from flockwave.server.utils import overridden
 
@@ -68,6 +68,10 @@ class UDPChannel(CommunicationChannel):
         """Inherited."""
         await self.sock.sendto(encoder(message), self.address)
 
+    async def send_encoded(self, message: EncodedMessage) -> None:
+        """Inherited."""
+        await self.sock.sendto(message.json, self.address)
+
 
 ############################################################################
 
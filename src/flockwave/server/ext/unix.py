@@ -18,7 +18,7 @@ from flockwave.channels import ParserChannel
 from flockwave.connections import serve_unix
 from flockwave.encoders.json import create_json_encoder
 from flockwave.parsers.json import create_json_parser
-from flockwave.server.model import CommunicationChannel
+from flockwave.server.model import CommunicationChannel, EncodedMessage
 from flockwave.server.utils import overridden
 
 
@@ -65,6 +65,13 @@ class UnixDomainSocketChannel(CommunicationChannel):
 
     async def send(self, message):
         """Inherited."""
+        await self._send_bytes(encoder(message))
+
+    async def send_encoded(self, message: EncodedMessage) -> None:
+        """Inherited."""
+        await self._send_bytes(message.json)
+
+    async def _send_bytes(self, data: bytes) -> None:
         if self.stream is None:
             self.stream = self.client_ref().stream
             self.client_ref = None
@@ -74,7 +81,7 @@ class UnixDomainSocketChannel(CommunicationChannel):
             # if a message was sent only partially but the message hub is
             # already trying to send another one (since the message hub
             # dispatches each message in a separate task)
-            await self.stream.send_all(encoder(message))
+            await self.stream.send_all(data)
 
     def _erase_stream(self, ref):
         self.stream = None
@@ -5,14 +5,10 @@ from __future__ import annotations
 from colour import Color
 from enum import Enum
 from hashlib import sha1 as firmware_hash
-from math import atan2, cos, hypot, sin
 from random import random, randint, choice
-from time import monotonic
-from trio import CancelScope, sleep
-from trio_util import periodic
+from trio import sleep
 from typing import Any, Callable, NoReturn, Optional, Union
 
-from flockwave.concurrency import delayed
 from flockwave.ext.manager import ExtensionAPIProxy
 from flockwave.gps.vectors import (
     FlatEarthCoordinate,
@@ -46,6 +42,7 @@ from flockwave.spec.errors import FlockwaveErrorCode
 from .battery import VirtualBattery
 from .fw_upload import FIRMWARE_UPDATE_TARGET_ID
 from .lights import DefaultLightController
+from .simulation import VirtualUAVSimulation
 
 
 __all__ = ("VirtualUAVDriver",)
@@ -88,24 +85,28 @@ class VirtualUAV(UAVBase):
     _mission_started_at: Optional[float]
     _motors_running: bool
     _parameters: dict[str, str]
-    _position_xyz: Vector3D
     _position_flat: FlatEarthCoordinate
     _request_shutdown: Optional[Callable[[], None]]
     _shutdown_reason: Optional[str]
     _trajectory_transformation: Optional[FlatEarthToGPSCoordinateTransformation]
     _trans: FlatEarthToGPSCoordinateTransformation
-    _velocity_xyz: Vector3D
     _velocity_ned: VelocityNED
 
+    _row: int
+    """Index of the row of the UAV in the kinematic state buffers of the
+    simulation. The position, velocity and target of the UAV in topocentric
+    coordinates are stored there.
+    """
+
+    _simulation: VirtualUAVSimulation
+    """The simulation engine that steps the UAV."""
+
     _state: VirtualUAVState
     """The state of the UAV."""
 
     _target: Optional[GPSCoordinate]
     """The target coordinates of the UAV, in geodetic coordinates."""
 
-    _target_xyz: Optional[Vector3D]
-    """The target coordinates of the UAV, in topocentric coordinates."""
-
     _user_defined_error: Optional[int]
     """User defined simulated error code, if any."""
 
@@ -123,28 +124,6 @@ class VirtualUAV(UAVBase):
     errors: list[int]
     """List of simulated error codes of the UAV."""
 
-    max_acceleration_xy: float
-    """The maximum acceleration of the UAV in the X-Y plane (parallel to the
-    surface of the Earth), in m/s/s. To simplify the simulation a bit, the
-    virtual UAVs are capable of infinite deceleration.
-    """
-
-    max_acceleration_z: float
-    """The maximum acceleration of the UAV in the Z direction (perpendicular to
-    the surface of the Earth), in m/s/s. To simplify the simulation a bit, the
-    virtual UAVs are capable of infinite deceleration.
-    """
-
-    max_velocity_xy: float
-    """The maximum velocity of the UAV along the X-Y plane (parallel to the
-    surface of the Earth), in m/s.
-    """
-
-    max_velocity_z: float
-    """The maximum velocity of the UAV along the Z direction (perpendicular to
-    the surface of the Earth), in m/s.
-    """
-
     takeoff_altitude: float
 
     use_battery_percentage: bool
@@ -163,14 +142,16 @@ class VirtualUAV(UAVBase):
         self._armed = True  # will be disarmed when booting if needed
         self._autopilot_initializing = False
         self._home_amsl = None
-        self._light_controller = DefaultLightController(self)
+        self._simulation = self.driver.simulation
+        self._row = self._simulation.kinematics.allocate()
+        self._light_controller = DefaultLightController(
+            self, clock=self._simulation.clock
+        )
         self._mission_started_at = None
         self._motors_running = False
         self._parameters = {}
-        self._position_xyz = Vector3D()
         self._position_flat = FlatEarthCoordinate()
         self._state = None  # type: ignore
-        self._target_xyz = None
         self._trajectory = None
         self._trajectory_player = None
         self._trajectory_transformation = None
@@ -178,7 +159,6 @@ class VirtualUAV(UAVBase):
             origin=GPSCoordinate(lat=0, lon=0)
         )
         self._user_defined_error = None
-        self._velocity_xyz = Vector3D()
         self._velocity_ned = VelocityNED()
 
         self._request_shutdown = None
@@ -261,7 +241,7 @@ class VirtualUAV(UAVBase):
         mission (trajectory) or `None` if no mission is running yet.
         """
         return (
-            monotonic() - self._mission_started_at
+            self._simulation.clock() - self._mission_started_at
             if self._mission_started_at is not None
             else None
         )
@@ -317,6 +297,53 @@ class VirtualUAV(UAVBase):
         if value.amsl is not None:
             self._home_amsl = float(value.amsl)
 
+    @property
+    def max_acceleration_xy(self) -> float:
+        """The maximum acceleration of the UAV in the X-Y plane (parallel to
+        the surface of the Earth), in m/s/s. To simplify the simulation a bit,
+        the virtual UAVs are capable of infinite deceleration.
+        """
+        return float(self._simulation.kinematics.max_acceleration_xy[self._row])
+
+    @max_acceleration_xy.setter
+    def max_acceleration_xy(self, value: float) -> None:
+        self._simulation.kinematics.max_acceleration_xy[self._row] = value
+
+    @property
+    def max_acceleration_z(self) -> float:
+        """The maximum acceleration of the UAV in the Z direction
+        (perpendicular to the surface of the Earth), in m/s/s. To simplify the
+        simulation a bit, the virtual UAVs are capable of infinite
+        deceleration.
+        """
+        return float(self._simulation.kinematics.max_acceleration_z[self._row])
+
+    @max_acceleration_z.setter
+    def max_acceleration_z(self, value: float) -> None:
+        self._simulation.kinematics.max_acceleration_z[self._row] = value
+
+    @property
+    def max_velocity_xy(self) -> float:
+        """The maximum velocity of the UAV along the X-Y plane (parallel to
+        the surface of the Earth), in m/s.
+        """
+        return float(self._simulation.kinematics.max_velocity_xy[self._row])
+
+    @max_velocity_xy.setter
+    def max_velocity_xy(self, value: float) -> None:
+        self._simulation.kinematics.max_velocity_xy[self._row] = value
+
+    @property
+    def max_velocity_z(self) -> float:
+        """The maximum velocity of the UAV along the Z direction
+        (perpendicular to the surface of the Earth), in m/s.
+        """
+        return float(self._simulation.kinematics.max_velocity_z[self._row])
+
+    @max_velocity_z.setter
+    def max_velocity_z(self, value: float) -> None:
+        self._simulation.kinematics.max_velocity_z[self._row] = value
+
     @property
     def motors_running(self) -> bool:
         """Returns whether motors of the drone are running."""
@@ -394,12 +421,12 @@ class VirtualUAV(UAVBase):
         self.ensure_error(FlockwaveErrorCode.RETURN_TO_HOME, present=False)
 
         if value is None:
-            self._target_xyz = None
+            self._clear_target_xyz()
         else:
             # Calculate the real altitude component of the target
             if value.ahl is None:
                 if value.amsl is None or self._home_amsl is None:
-                    new_altitude = self._position_xyz.z
+                    new_altitude = float(self._position_xyz[2])
                 else:
                     new_altitude = value.amsl - self._home_amsl
             else:
@@ -409,14 +436,18 @@ class VirtualUAV(UAVBase):
             assert self._target is not None
             self._target.update(ahl=new_altitude)
             flat = self._trans.to_flat_earth(value)
-            self._target_xyz = Vector3D(x=flat.x, y=flat.y, z=new_altitude)
+            self._set_target_xyz(flat.x, flat.y, new_altitude)
 
     @property
     def target_xyz(self) -> Optional[Vector3D]:
         """The target coordinates of the UAV in flat Earth coordinates around
         its home.
         """
-        return self._target_xyz
+        if not self._simulation.kinematics.has_target[self._row]:
+            return None
+
+        x, y, z = self._target_xyz.tolist()
+        return Vector3D(x=x, y=y, z=z)
 
     @target_xyz.setter
     def target_xyz(self, value):
@@ -535,7 +566,7 @@ class VirtualUAV(UAVBase):
 
         self.stop_trajectory()
 
-        self._target_xyz = self._position_xyz.copy()
+        self._set_target_xyz(*self._position_xyz)
         self.state = VirtualUAVState.AIRBORNE
 
     def land(self) -> None:
@@ -543,9 +574,8 @@ class VirtualUAV(UAVBase):
         if self.state != VirtualUAVState.AIRBORNE:
             return
 
-        if self._target_xyz is None:
-            self._target_xyz = self._position_xyz.copy()
-        self._target_xyz.z = 0
+        x, y, _ = self._target_xyz if self._has_target else self._position_xyz
+        self._set_target_xyz(x, y, 0)
         self.state = VirtualUAVState.LANDING
 
     def set_led_color(self, color: Optional[Color]) -> None:
@@ -558,54 +588,6 @@ class VirtualUAV(UAVBase):
             self._shutdown_reason = "reset"
             self._request_shutdown()
 
-    async def run_single_boot(
-        self,
-        delay: float,
-        *,
-        mutate: Callable,
-        notify: Callable[[], None],
-        spawn: Callable,
-    ) -> str:
-        """Simulates a single boot session of the virtual UAV.
-
-        Parameters:
-            delay: number of seconds to wait between consecutive status updates
-            notify: function to call when new status information should be
-                dispatched about the UAV
-            spawn: function to call when the UAV wishes to spawn a background
-                task
-
-        Returns:
-            `"shutdown"` if the user requested the UAV to shut down;
-            `"reset"` if the user requested the UAV to reset itself.
-        """
-        # Booting takes a bit of time; we simulate this with a random delay
-        await sleep(random() + 1)
-
-        # Now we enter the main control loop of the UAV. We assume that the
-        # autopilot initialization takes about 2 seconds.
-        self._notify_booted()
-        spawn(
-            delayed(
-                random() * 0.5 + 2,
-                self._notify_autopilot_initialized,
-                ensure_async=True,
-            )
-        )
-
-        try:
-            with CancelScope() as scope:
-                self._request_shutdown = scope.cancel
-                async for _ in periodic(delay):
-                    with mutate() as mutator:
-                        self.step(mutator=mutator, dt=delay)
-
-                    notify()
-
-            return self._shutdown_reason or "shutdown"
-        finally:
-            self._notify_shutdown()
-
     def shutdown(self) -> None:
         """Requests the UAV to shutdown if it is currently running."""
         if self._request_shutdown:
@@ -627,88 +609,105 @@ class VirtualUAV(UAVBase):
         """Simulates a single step of the trajectory of the virtual UAV based
         on its state and the amount of time that has passed.
 
+        The simulation engine steps all the running UAVs together; this method
+        steps a single UAV only.
+
         Parameters:
             dt (float): the time that has passed, in seconds.
             mutator (DeviceTreeMutator): the mutator object that should be
                 used by the UAV to update its channel nodes
         """
-        state = self._state
+        move_xy, move_z = self._prepare_step()
+        dist_xy, dist_z = self._simulation.kinematics.step(
+            [self._row], dt, [move_xy], [move_z]
+        )
+        self._finish_step(dt, float(dist_xy[0]), float(dist_z[0]), mutator)
 
-        # Update the target of the drone if it is currently following a
-        # predefined trajectory and it is not landing or landed
-        if state is VirtualUAVState.TAKEOFF or state is VirtualUAVState.AIRBORNE:
-            if self._trajectory_player and self._mission_started_at is not None:
-                self._update_target_from_trajectory()
+    def stop_trajectory(self) -> None:
+        """Prevents the UAV from following its pre-defined trajectory if it is
+        currently following one. No-op if the UAV is not following a predefined
+        trajectory.
 
-        # Do we have a target?
-        if self._target_xyz is not None:
-            # We aim for the target in the XY plane only if we are airborne
-            if state is VirtualUAVState.AIRBORNE:
-                dx = self._target_xyz.x - self._position_xyz.x
-                dy = self._target_xyz.y - self._position_xyz.y
-            else:
-                dx, dy = 0, 0
-
-            # During the takeoff phase, if we are flying a mission and the
-            # takeoff time has not been reached yet, we are not allowed to
-            # move in the Z direction either
-            dz = self._target_xyz.z - self._position_xyz.z
-            if state is VirtualUAVState.TAKEOFF and self._trajectory_player:
-                t = self.elapsed_time_in_mission
-                if t is not None and self._trajectory_player.is_before_takeoff(t):
-                    dz = 0
-
-            angle = atan2(dy, dx)
-            dist_xy = hypot(dx, dy)
-            if dist_xy < 1e-6:
-                dist_xy = 0
-
-            dist_z = abs(dz)
-
-            reachable_velocity_xy = min(
-                hypot(self._velocity_xyz.x, self._velocity_xyz.y)
-                + self.max_acceleration_xy * dt,
-                self.max_velocity_xy,
-            )
-            displacement_xy = min(dist_xy, dt * reachable_velocity_xy)
+        Also makes the UAV "forget" its current trajectory.
+        """
+        if self._trajectory_player:
+            self._trajectory = None
+            self._trajectory_player = None
+            self._trajectory_transformation = None
 
-            displacement_x = cos(angle) * displacement_xy
-            displacement_y = sin(angle) * displacement_xy
+    def takeoff(self) -> None:
+        """Starts a simulated take-off with the virtual UAV."""
+        if self.state != VirtualUAVState.LANDED:
+            return
 
-            if dz < 0:
-                # Descending
-                reachable_velocity_z = max(
-                    self._velocity_xyz.z - self.max_acceleration_z * dt,
-                    -self.max_velocity_z,
-                )
-                displacement_z = max(
-                    dz, dt * reachable_velocity_z, -self._position_xyz.z
-                )
-            elif dz == 0:
-                displacement_z = 0
-            else:
-                # Ascending
-                reachable_velocity_z = min(
-                    self._velocity_xyz.z + self.max_acceleration_z * dt,
-                    self.max_velocity_z,
-                )
-                displacement_z = min(dz, dt * reachable_velocity_z)
+        if not self.armed:
+            return
+
+        self._mission_started_at = self._simulation.clock()
+
+        x, y, _ = self._target_xyz if self._has_target else self._position_xyz
+        self._set_target_xyz(x, y, self.takeoff_altitude)
+
+        self.state = VirtualUAVState.TAKEOFF
+
+    @property
+    def _has_target(self) -> bool:
+        """Whether the UAV has a target in topocentric coordinates."""
+        return bool(self._simulation.kinematics.has_target[self._row])
 
-            self._velocity_xyz.x = displacement_x / dt if dt > 0 else 0.0
-            self._velocity_xyz.y = displacement_y / dt if dt > 0 else 0.0
-            self._velocity_xyz.z = displacement_z / dt if dt > 0 else 0.0
+    @property
+    def _position_xyz(self):
+        """View into the simulation state holding the position of the UAV in
+        topocentric coordinates.
+        """
+        return self._simulation.kinematics.position[self._row]
 
-            self._position_xyz.x += displacement_x
-            self._position_xyz.y += displacement_y
-            self._position_xyz.z += displacement_z
+    @property
+    def _target_xyz(self):
+        """View into the simulation state holding the target of the UAV in
+        topocentric coordinates; valid only if the UAV has a target.
+        """
+        return self._simulation.kinematics.target[self._row]
 
+    @property
+    def _velocity_xyz(self):
+        """View into the simulation state holding the velocity of the UAV in
+        topocentric coordinates.
+        """
+        return self._simulation.kinematics.velocity[self._row]
+
+    def _clear_target_xyz(self) -> None:
+        """Clears the target of the UAV in topocentric coordinates."""
+        self._simulation.kinematics.has_target[self._row] = False
+
+    def _finish_step(
+        self, dt: float, dist_xy: float, dist_z: float, mutator=None
+    ) -> None:
+        """Finishes a single simulation step of the virtual UAV after its
+        position and velocity were updated by the simulation engine.
+
+        Updates the state of the UAV, its geodetic coordinates, its battery
+        and its sensors, and posts a status update.
+
+        Parameters:
+            dt: the time that has passed, in seconds
+            dist_xy: the horizontal distance of the UAV from its target before
+                the step
+            dist_z: the vertical distance of the UAV from its target before
+                the step
+            mutator (DeviceTreeMutator): the mutator object that should be
+                used by the UAV to update its channel nodes
+        """
+        state = self._state
+
+        if self._has_target:
             # If we are above the takeoff altitude minus some threshold and
             # we are in the TAKEOFF stage, move to being airborne. Also, if
             # we are landing and we are very close to the ground, consider
             # ourselves as landed.
             eps = 0.2
             if state is VirtualUAVState.TAKEOFF:
-                if self._position_xyz.z > max(eps, self.takeoff_altitude - eps):
+                if self._position_xyz[2] > max(eps, self.takeoff_altitude - eps):
                     self.state = VirtualUAVState.AIRBORNE
             elif state is VirtualUAVState.LANDING:
                 if dist_z < eps * 0.5:
@@ -721,13 +720,12 @@ class VirtualUAV(UAVBase):
                     self.target = None
 
         # Calculate our coordinates in flat Earth
-        self._position_flat.x = self._position_xyz.x
-        self._position_flat.y = self._position_xyz.y
-        self._position_flat.ahl = self._position_xyz.z
+        x, y, z = self._position_xyz.tolist()
+        self._position_flat.x = x
+        self._position_flat.y = y
+        self._position_flat.ahl = z
         self._position_flat.amsl = (
-            self._position_xyz.z + self._home_amsl
-            if self._home_amsl is not None
-            else None
+            z + self._home_amsl if self._home_amsl is not None else None
         )
 
         # Transform the flat Earth coordinates to GPS around our
@@ -736,7 +734,7 @@ class VirtualUAV(UAVBase):
 
         # Calculate the velocity in NED
         # TODO(ntamas): update the North/East components as well
-        self._velocity_ned.update(down=-self._velocity_xyz.z)
+        self._velocity_ned.update(down=-float(self._velocity_xyz[2]))
 
         # Discharge the battery
         load = 0.01 if self.state is VirtualUAVState.LANDED else 1.0
@@ -770,14 +768,16 @@ class VirtualUAV(UAVBase):
             "velocity": self._velocity_ned,
             "errors": self.errors,
             "battery": self.battery.status,
-            "light": color_to_rgb565(self._light_controller.evaluate(monotonic())),
+            "light": color_to_rgb565(
+                self._light_controller.evaluate(self._simulation.clock())
+            ),
         }
         self.update_status(**updates)
 
         # Measure radiation if possible
         # TODO(ntamas): calculate radiation halfway between the current
         # position and the previous one instead
-        if self.radiation_ext is not None and self.radiation_ext.loaded:
+        if self.radiation_ext is not None and self.radiation_ext.loaded and dt > 0:
             observed_count = self.radiation_ext.measure_at(position, seconds=dt)
             # Okay, now we extrapolate from the observed count to the
             # per-second intensity. This should be made smarter; for
@@ -807,34 +807,6 @@ class VirtualUAV(UAVBase):
                 {"lat": position.lat, "lon": position.lon, "value": observed_count},
             )
 
-    def stop_trajectory(self) -> None:
-        """Prevents the UAV from following its pre-defined trajectory if it is
-        currently following one. No-op if the UAV is not following a predefined
-        trajectory.
-
-        Also makes the UAV "forget" its current trajectory.
-        """
-        if self._trajectory_player:
-            self._trajectory = None
-            self._trajectory_player = None
-            self._trajectory_transformation = None
-
-    def takeoff(self) -> None:
-        """Starts a simulated take-off with the virtual UAV."""
-        if self.state != VirtualUAVState.LANDED:
-            return
-
-        if not self.armed:
-            return
-
-        self._mission_started_at = monotonic()
-
-        if self._target_xyz is None:
-            self._target_xyz = self._position_xyz.copy()
-        self._target_xyz.z = self.takeoff_altitude
-
-        self.state = VirtualUAVState.TAKEOFF
-
     def _initialize_device_tree_node(self, node: ObjectNode) -> None:
         self.battery = VirtualBattery(report_percentage=self.use_battery_percentage)
         self.battery.register_in_device_tree(node)
@@ -879,6 +851,44 @@ class VirtualUAV(UAVBase):
 
         self.autopilot_initializing = False
 
+    def _prepare_step(self) -> tuple[bool, bool]:
+        """Prepares the virtual UAV for the next simulation step.
+
+        Updates the target of the UAV if it is following a predefined
+        trajectory and decides along which axes it may approach its target.
+
+        Returns:
+            whether the UAV may move towards its target in the X-Y plane and
+            along the Z axis
+        """
+        state = self._state
+
+        # Update the target of the drone if it is currently following a
+        # predefined trajectory and it is not landing or landed
+        if state is VirtualUAVState.TAKEOFF or state is VirtualUAVState.AIRBORNE:
+            if self._trajectory_player and self._mission_started_at is not None:
+                self._update_target_from_trajectory()
+
+        # We aim for the target in the XY plane only if we are airborne
+        move_xy = state is VirtualUAVState.AIRBORNE
+
+        # During the takeoff phase, if we are flying a mission and the
+        # takeoff time has not been reached yet, we are not allowed to
+        # move in the Z direction either
+        move_z = True
+        if state is VirtualUAVState.TAKEOFF and self._trajectory_player:
+            t = self.elapsed_time_in_mission
+            if t is not None and self._trajectory_player.is_before_takeoff(t):
+                move_z = False
+
+        return move_xy, move_z
+
+    def _set_target_xyz(self, x: float, y: float, z: float) -> None:
+        """Sets the target of the UAV in topocentric coordinates."""
+        kinematics = self._simulation.kinematics
+        kinematics.target[self._row] = (x, y, z)
+        kinematics.has_target[self._row] = True
+
     def _update_target_from_trajectory(self) -> None:
         """Updates the target of the UAV based on the time elapsed since takeoff
         and the trajectory that it needs to follow.
@@ -925,11 +935,15 @@ class VirtualUAVDriver(UAVDriver[VirtualUAV]):
     extension.
     """
 
+    simulation: VirtualUAVSimulation
+    """The simulation engine that steps the UAVs managed by this driver."""
+
     uavs_armed_after_boot: bool
     use_battery_percentages: bool
 
     def __init__(self, *args, **kwds):
         super().__init__(*args, **kwds)
+        self.simulation = VirtualUAVSimulation()
         self.uavs_armed_after_boot = False
         self.use_battery_percentages = False
 
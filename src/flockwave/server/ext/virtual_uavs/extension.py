@@ -2,17 +2,15 @@ from __future__ import annotations
 
 from colour import Color
 from contextlib import contextmanager
-from functools import partial
 from random import uniform
-from trio import open_nursery, sleep, sleep_forever
-from typing import Callable, Iterator
+from trio import sleep_forever
+from typing import Iterator
 
 from flockwave.gps.vectors import (
     FlatEarthCoordinate,
     FlatEarthToGPSCoordinateTransformation,
 )
 from flockwave.spec.ids import make_valid_object_id
-from flockwave.server.registries.errors import RegistryFull
 
 from ..base import UAVExtension
 
@@ -34,6 +32,9 @@ class VirtualUAVProviderExtension(UAVExtension[VirtualUAVDriver]):
     simulated status updates to the UAVs.
     """
 
+    _speed: float = 1
+    """Number of simulated seconds per one second of wall clock time."""
+
     uavs: list["VirtualUAV"]
     """The list of virtual UAVs managed by this extension."""
 
@@ -60,6 +61,9 @@ class VirtualUAVProviderExtension(UAVExtension[VirtualUAVDriver]):
         # Set the status updater thread frequency
         self.delay = configuration.get("delay", 1)
 
+        # Set the speed of the simulation relative to wall clock time
+        self.speed = configuration.get("speed", 1)
+
         # Get the center of the home positions
         if "origin" not in configuration and "center" in configuration:
             if self.log:
@@ -145,41 +149,19 @@ class VirtualUAVProviderExtension(UAVExtension[VirtualUAVDriver]):
     def delay(self, value):
         self._delay = max(float(value), 0)
 
-    async def simulate_uav(self, uav: VirtualUAV, spawn: Callable):
-        """Simulates the behaviour of a single UAV in the application.
-
-        Parameters:
-            uav: the virtual UAV to simulate
-            spawn: function to call when the UAV wishes to spawn a background
-                task
+    @property
+    def speed(self):
+        """Number of simulated seconds per one second of wall clock time.
+        Values larger than 1 make the simulation run faster than real time.
         """
-        try:
-            await self._simulate_uav(uav, spawn)
-        except RegistryFull:
-            # This is okay
-            pass
-
-    async def _simulate_uav(self, uav: VirtualUAV, spawn: Callable):
-        assert self.app is not None
-
-        updater = partial(self.app.request_to_send_UAV_INF_message_for, [uav.id])
-
-        with self.app.object_registry.use(uav):
-            while True:
-                # Simulate the UAV behaviour from boot time
-                shutdown_reason = await uav.run_single_boot(
-                    self._delay,
-                    mutate=self.create_device_tree_mutation_context,
-                    notify=updater,
-                    spawn=spawn,
-                )
+        return self._speed
 
-                # If we need to restart, let's restart after a short delay.
-                # Otherwise let's stop the loop.
-                if shutdown_reason == "shutdown":
-                    break
-                else:
-                    await sleep(0.2)
+    @speed.setter
+    def speed(self, value):
+        value = float(value)
+        if value <= 0:
+            raise ValueError("simulation speed must be positive")
+        self._speed = value
 
     async def run(self):
         assert self.app is not None
@@ -203,10 +185,20 @@ class VirtualUAVProviderExtension(UAVExtension[VirtualUAVDriver]):
     async def worker(self, app, configuration, logger):
         """Main background task of the extension that updates the state of
         the UAVs periodically.
+
+        All the UAVs are simulated in a single task; each tick steps the entire
+        fleet at once, applies all the device tree updates in a single
+        mutation context and requests a single UAV-INF message for all the
+        UAVs that were updated.
         """
-        async with open_nursery() as nursery:
-            for uav in self.uavs:
-                nursery.start_soon(self.simulate_uav, uav, nursery.start_soon)
+        await self._driver.simulation.run(
+            self.uavs,
+            self._delay,
+            registry=app.object_registry,
+            mutate=self.create_device_tree_mutation_context,
+            notify=app.request_to_send_UAV_INF_message_for,
+            speed=self._speed,
+        )
 
     def _on_lights_updated(self, sender, config):
         color = config.color if str(config.effect.value) == "solid" else None
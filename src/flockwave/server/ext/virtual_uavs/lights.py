@@ -94,6 +94,7 @@ class DefaultLightController(ModularLightController):
     for a virtual UAV.
     """
 
+    _clock: Callable[[], float]
     _light_program_player: Optional[LightPlayer]
     _light_program_start_time: Optional[float]
 
@@ -102,11 +103,20 @@ class DefaultLightController(ModularLightController):
 
     _override: Optional[Color]
 
-    def __init__(self, owner=None):
+    def __init__(self, owner=None, clock: Callable[[], float] = monotonic):
+        """Constructor.
+
+        Parameters:
+            owner: the UAV that owns the light controller
+            clock: function that returns the current time; used to timestamp
+                the start of light programs and 'where are you' signals
+        """
         super().__init__(self._create_default_modules())
 
         self.owner = owner
 
+        self._clock = clock
+
         self._light_program_player = None
         self._light_program_start_time = None
 
@@ -142,7 +152,7 @@ class DefaultLightController(ModularLightController):
         This function is a no-op if there is no light program loaded.
         """
         if self._light_program_player is not None:
-            self._light_program_start_time = monotonic()
+            self._light_program_start_time = self._clock()
 
     def stop_light_program(self) -> None:
         """Stops playing the current light program.
@@ -168,7 +178,7 @@ class DefaultLightController(ModularLightController):
         Parameters:
             duration: duration of the light signal in seconds
         """
-        self._where_are_you_start_time = monotonic()
+        self._where_are_you_start_time = self._clock()
         self._where_are_you_duration_ms = duration * 1000
 
     def _error_module(self, timestamp: float, color: Color) -> Color:
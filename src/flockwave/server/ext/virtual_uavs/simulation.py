@@ -0,0 +1,427 @@
+"""Simulation engine that steps all the virtual UAVs of the extension in a
+single task.
+
+The kinematic state of the virtual UAVs is stored in structure-of-arrays NumPy
+buffers so the motion of the entire fleet can be simulated in one vectorized
+step per tick. The engine also drives the boot and shutdown cycle of each UAV
+and batches device tree updates and UAV-INF requests so there is only one of
+each per tick, no matter how many UAVs are simulated.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from enum import Enum
+from numpy.typing import ArrayLike, NDArray
+from random import random
+from time import monotonic
+from trio_util import periodic
+from typing import Callable, ContextManager, Iterable, Optional, TYPE_CHECKING
+
+from flockwave.server.registries.errors import RegistryFull
+
+if TYPE_CHECKING:
+    from flockwave.server.model.devices import DeviceTreeMutator
+    from flockwave.server.registries.objects import ObjectRegistry
+
+    from .driver import VirtualUAV
+
+__all__ = ("FleetKinematics", "SimulationClock", "VirtualUAVSimulation")
+
+
+class SimulationClock:
+    """Clock of the simulated world that advances only when the simulation
+    is stepped.
+
+    The clock starts from the current reading of the monotonic clock of the
+    system so its readings match ``time.monotonic()`` as long as the
+    simulation runs in real time.
+    """
+
+    _now: float
+
+    def __init__(self, start: Optional[float] = None):
+        """Constructor.
+
+        Parameters:
+            start: the initial reading of the clock; ``None`` means the
+                current reading of the monotonic clock of the system
+        """
+        self._now = monotonic() if start is None else float(start)
+
+    def __call__(self) -> float:
+        """Returns the current reading of the clock."""
+        return self._now
+
+    def advance(self, dt: float) -> None:
+        """Advances the clock by the given number of seconds."""
+        self._now += dt
+
+
+class FleetKinematics:
+    """Structure-of-arrays buffers holding the kinematic state of a fleet of
+    virtual UAVs, and the vectorized step function that updates them.
+
+    Each UAV is assigned a row in the buffers when it is created. Coordinates
+    are in the flat Earth coordinate system of each UAV, centered on its home
+    position. Note that the buffers are reallocated when they grow, so views
+    into them must not be kept across calls to `allocate()`.
+    """
+
+    position: NDArray[np.float64]
+    """Positions of the UAVs, in metres."""
+
+    velocity: NDArray[np.float64]
+    """Velocities of the UAVs, in m/s."""
+
+    target: NDArray[np.float64]
+    """Target positions of the UAVs; valid only in rows where `has_target`
+    is set.
+    """
+
+    has_target: NDArray[np.bool_]
+    """Whether each UAV has a target position."""
+
+    max_acceleration_xy: NDArray[np.float64]
+    """Maximum acceleration of each UAV in the X-Y plane, in m/s/s."""
+
+    max_acceleration_z: NDArray[np.float64]
+    """Maximum acceleration of each UAV along the Z axis, in m/s/s."""
+
+    max_velocity_xy: NDArray[np.float64]
+    """Maximum velocity of each UAV in the X-Y plane, in m/s."""
+
+    max_velocity_z: NDArray[np.float64]
+    """Maximum velocity of each UAV along the Z axis, in m/s."""
+
+    _size: int
+    """Number of rows allocated so far."""
+
+    def __init__(self, capacity: int = 16):
+        """Constructor.
+
+        Parameters:
+            capacity: initial number of rows in the buffers; the buffers are
+                grown as needed
+        """
+        capacity = max(capacity, 1)
+
+        self.position = np.zeros((capacity, 3))
+        self.velocity = np.zeros((capacity, 3))
+        self.target = np.zeros((capacity, 3))
+        self.has_target = np.zeros(capacity, dtype=bool)
+        self.max_acceleration_xy = np.zeros(capacity)
+        self.max_acceleration_z = np.zeros(capacity)
+        self.max_velocity_xy = np.zeros(capacity)
+        self.max_velocity_z = np.zeros(capacity)
+
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def allocate(self) -> int:
+        """Allocates a new, zeroed row in the buffers and returns its index."""
+        if self._size >= len(self.has_target):
+            self._grow(2 * len(self.has_target))
+
+        row = self._size
+        self._size += 1
+        return row
+
+    def step(
+        self, rows: ArrayLike, dt: float, move_xy: ArrayLike, move_z: ArrayLike
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """Moves the UAVs in the given rows towards their targets.
+
+        Each UAV approaches its target with a bounded acceleration and
+        velocity, separately in the X-Y plane and along the Z axis; descending
+        UAVs never go below the ground. UAVs without a target are left intact.
+
+        Parameters:
+            rows: indices of the rows to step
+            dt: the time that has passed, in seconds
+            move_xy: whether each UAV may move towards its target in the X-Y
+                plane; a single boolean applies to all the UAVs
+            move_z: whether each UAV may move towards its target along the Z
+                axis; a single boolean applies to all the UAVs
+
+        Returns:
+            the horizontal and vertical distances of each UAV from its target
+            _before_ the step; zero for UAVs without a target
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        move_xy = np.broadcast_to(np.asarray(move_xy, dtype=bool), rows.shape)
+        move_z = np.broadcast_to(np.asarray(move_z, dtype=bool), rows.shape)
+
+        dist_xy = np.zeros(len(rows))
+        dist_z = np.zeros(len(rows))
+
+        selector = self.has_target[rows]
+        if not selector.any():
+            return dist_xy, dist_z
+
+        active = rows[selector]
+        position = self.position[active]
+        velocity = self.velocity[active]
+        diff = self.target[active] - position
+
+        diff[~move_xy[selector], :2] = 0
+        diff[~move_z[selector], 2] = 0
+        dx, dy, dz = diff.T
+
+        angle = np.arctan2(dy, dx)
+        distance_xy = np.hypot(dx, dy)
+        distance_xy[distance_xy < 1e-6] = 0
+        distance_z = np.abs(dz)
+
+        reachable_velocity_xy = np.minimum(
+            np.hypot(velocity[:, 0], velocity[:, 1])
+            + self.max_acceleration_xy[active] * dt,
+            self.max_velocity_xy[active],
+        )
+        displacement_xy = np.minimum(distance_xy, dt * reachable_velocity_xy)
+
+        max_acceleration_z = self.max_acceleration_z[active] * dt
+        max_velocity_z = self.max_velocity_z[active]
+        descent = np.maximum.reduce(
+            [
+                dz,
+                dt * np.maximum(velocity[:, 2] - max_acceleration_z, -max_velocity_z),
+                -position[:, 2],
+            ]
+        )
+        ascent = np.minimum(
+            dz, dt * np.minimum(velocity[:, 2] + max_acceleration_z, max_velocity_z)
+        )
+
+        displacement = np.empty_like(position)
+        displacement[:, 0] = np.cos(angle) * displacement_xy
+        displacement[:, 1] = np.sin(angle) * displacement_xy
+        displacement[:, 2] = np.where(dz < 0, descent, np.where(dz > 0, ascent, 0.0))
+
+        self.velocity[active] = displacement / dt if dt > 0 else 0.0
+        self.position[active] = position + displacement
+
+        dist_xy[selector] = distance_xy
+        dist_z[selector] = distance_z
+        return dist_xy, dist_z
+
+    def _grow(self, capacity: int) -> None:
+        for name in (
+            "position",
+            "velocity",
+            "target",
+            "has_target",
+            "max_acceleration_xy",
+            "max_acceleration_z",
+            "max_velocity_xy",
+            "max_velocity_z",
+        ):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            setattr(self, name, grown)
+
+
+class PowerState(Enum):
+    """Power state of a simulated UAV that is switched on."""
+
+    BOOTING = "booting"
+    RUNNING = "running"
+
+
+class VirtualUAVSimulation:
+    """Simulation engine that steps all the virtual UAVs in a single task.
+
+    The engine keeps track of the power state of each UAV, advances the
+    simulation clock and steps the running UAVs in a single vectorized tick.
+    Trajectory following, coordinate conversions and status updates remain
+    per-UAV operations that are invoked from the tick.
+    """
+
+    clock: SimulationClock
+    """The clock of the simulated world."""
+
+    kinematics: FleetKinematics
+    """The kinematic state of the simulated UAVs."""
+
+    _autopilot_ready_at: dict[VirtualUAV, float]
+    """Simulated times when the autopilots of the UAVs that have booted
+    recently finish their initialization.
+    """
+
+    _boot_at: dict[VirtualUAV, float]
+    """Simulated times when the booting UAVs finish booting."""
+
+    _power: dict[VirtualUAV, PowerState]
+    """Power state of the UAVs that are switched on."""
+
+    _shutdown_requests: dict[VirtualUAV, None]
+    """UAVs that were requested to shut down or reset since the last tick."""
+
+    def __init__(self):
+        """Constructor."""
+        self.clock = SimulationClock()
+        self.kinematics = FleetKinematics()
+
+        self._autopilot_ready_at = {}
+        self._boot_at = {}
+        self._power = {}
+        self._shutdown_requests = {}
+
+    def is_powered(self, uav: VirtualUAV) -> bool:
+        """Returns whether the given UAV is switched on (booting or running)."""
+        return uav in self._power
+
+    def power_on(self, uav: VirtualUAV, delay: float = 0) -> None:
+        """Switches on the given UAV. The UAV starts booting after the given
+        delay and joins the simulation when the boot process finishes.
+        """
+        # Booting takes a bit of time; we simulate this with a random delay
+        self._power[uav] = PowerState.BOOTING
+        self._boot_at[uav] = self.clock() + delay + random() + 1
+
+    def power_off(self, uav: VirtualUAV) -> None:
+        """Switches off the given UAV, removing it from the simulation."""
+        state = self._power.pop(uav, None)
+        self._autopilot_ready_at.pop(uav, None)
+        self._boot_at.pop(uav, None)
+        self._shutdown_requests.pop(uav, None)
+        if state is PowerState.RUNNING:
+            uav._notify_shutdown()
+
+    def tick(self, dt: float, mutator: Optional[DeviceTreeMutator] = None) -> list[str]:
+        """Advances the simulation clock and steps all the running UAVs.
+
+        Parameters:
+            dt: the amount of simulated time that has passed, in seconds
+            mutator: the mutator object that should be used by the UAVs to
+                update their channel nodes
+
+        Returns:
+            the IDs of the UAVs that were stepped in this tick
+        """
+        self.clock.advance(dt)
+        now = self.clock()
+
+        if self._shutdown_requests:
+            self._process_shutdown_requests()
+        self._process_boot_events(now)
+
+        uavs = [
+            uav for uav, state in self._power.items() if state is PowerState.RUNNING
+        ]
+        if not uavs:
+            return []
+
+        rows = np.empty(len(uavs), dtype=np.intp)
+        move_xy = np.empty(len(uavs), dtype=bool)
+        move_z = np.empty(len(uavs), dtype=bool)
+        for index, uav in enumerate(uavs):
+            rows[index] = uav._row
+            move_xy[index], move_z[index] = uav._prepare_step()
+
+        dist_xy, dist_z = self.kinematics.step(rows, dt, move_xy, move_z)
+
+        for uav, xy, z in zip(uavs, dist_xy.tolist(), dist_z.tolist()):
+            uav._finish_step(dt, xy, z, mutator)
+
+        return [uav.id for uav in uavs]
+
+    async def run(
+        self,
+        uavs: Iterable[VirtualUAV],
+        delay: float,
+        *,
+        registry: ObjectRegistry,
+        mutate: Callable[[], ContextManager[DeviceTreeMutator]],
+        notify: Callable[[list[str]], None],
+        speed: float = 1,
+    ) -> None:
+        """Simulates the given UAVs from boot time until all of them are shut
+        down or the task is cancelled.
+
+        UAVs are added to the object registry when they are switched on and
+        removed when they are shut down. Resets keep the UAV in the registry.
+
+        Parameters:
+            uavs: the UAVs to simulate
+            delay: number of seconds to wait between consecutive ticks
+            registry: the object registry to add the UAVs to
+            mutate: function that returns a context manager that provides a
+                device tree mutator object to use in a single tick
+            notify: function to call with the IDs of the UAVs for which new
+                status information should be dispatched
+            speed: number of simulated seconds per one second of wall clock
+                time; values larger than 1 make the simulation run faster
+                than real time
+        """
+        registered: list[VirtualUAV] = []
+
+        try:
+            for uav in uavs:
+                try:
+                    registry.add(uav)
+                except RegistryFull:
+                    # This is okay, we simply do not simulate this UAV
+                    continue
+
+                registered.append(uav)
+                self.power_on(uav)
+
+            async for _ in periodic(delay):
+                with mutate() as mutator:
+                    updated = self.tick(delay * speed, mutator=mutator)
+
+                if updated:
+                    notify(updated)
+
+                if len(self._power) < len(registered):
+                    for uav in registered:
+                        if not self.is_powered(uav):
+                            registry.remove(uav)
+                    registered = [uav for uav in registered if self.is_powered(uav)]
+
+                if not registered:
+                    break
+        finally:
+            for uav in registered:
+                self.power_off(uav)
+                registry.remove(uav)
+
+    def _create_shutdown_request_handler(self, uav: VirtualUAV) -> Callable[[], None]:
+        def request_shutdown() -> None:
+            self._shutdown_requests[uav] = None
+
+        return request_shutdown
+
+    def _process_boot_events(self, now: float) -> None:
+        for uav, boot_at in list(self._boot_at.items()):
+            if boot_at <= now:
+                del self._boot_at[uav]
+                self._power[uav] = PowerState.RUNNING
+                uav._notify_booted()
+                uav._request_shutdown = self._create_shutdown_request_handler(uav)
+
+                # We assume that the autopilot initialization takes about 2
+                # seconds
+                self._autopilot_ready_at[uav] = now + random() * 0.5 + 2
+
+        for uav, ready_at in list(self._autopilot_ready_at.items()):
+            if ready_at <= now:
+                del self._autopilot_ready_at[uav]
+                uav._notify_autopilot_initialized()
+
+    def _process_shutdown_requests(self) -> None:
+        uavs = list(self._shutdown_requests)
+        self._shutdown_requests.clear()
+
+        for uav in uavs:
+            reason = uav._shutdown_reason or "shutdown"
+            self.power_off(uav)
+
+            # If we need to restart, let's restart after a short delay
+            if reason != "shutdown":
+                self.power_on(uav, delay=0.2)
@@ -14,14 +14,18 @@ from jsonschema import ValidationError
 from time import monotonic
 from trio import (
     BrokenResourceError,
+    CancelScope,
     ClosedResourceError,
+    current_time,
     Event,
     MemoryReceiveChannel,
     MemorySendChannel,
     move_on_after,
+    move_on_at,
     open_memory_channel,
     open_nursery,
     sleep,
+    sleep_forever,
 )
 from typing import (
     Any,
@@ -40,12 +44,15 @@ from typing import (
 
 from flockwave.connections import ConnectionState
 from flockwave.concurrency import AsyncBundler
+from flockwave.spec.schema import get_message_schema
 
 from .logger import log as base_log
+from .message_validator import MessageValidator
 from .middleware import RequestMiddleware, ResponseMiddleware
 from .middleware.logging import RequestLogMiddleware, ResponseLogMiddleware
 from .model import (
     Client,
+    EncodedMessage,
     FlockwaveMessage,
     FlockwaveMessageBuilder,
     FlockwaveNotification,
@@ -62,12 +69,15 @@ from .message_handlers import (
 )
 
 __all__ = (
+    "BroadcastStatistics",
     "ConnectionStatusMessageRateLimiter",
     "UAVMessageRateLimiter",
     "MessageHandler",
     "MessageHandlerResponse",
     "MessageHub",
     "RateLimiters",
+    "UAVStatusDeltaRateLimiter",
+    "UAVStatusSubscription",
     "create_generic_INF_or_PROPS_message_factory",
     "create_multi_object_message_handler",
 )
@@ -93,6 +103,48 @@ handled by the handler or not, or a dictionary that is turned into a message).
 T = TypeVar("T")
 
 
+@dataclass
+class BroadcastStatistics:
+    """Statistics about the time spent on encoding the messages broadcast by
+    the message hub.
+    """
+
+    num_messages: int = 0
+    """Number of messages broadcast so far."""
+
+    num_encodings: int = 0
+    """Number of times a broadcast message had to be encoded into a wire
+    format. Each message is encoded once per wire format, no matter how many
+    clients it is sent to.
+    """
+
+    total_encoding_time: float = 0.0
+    """Total time spent on encoding broadcast messages, in seconds."""
+
+    max_encoding_time: float = 0.0
+    """Longest time spent on encoding a single broadcast message, in seconds."""
+
+    @property
+    def mean_encoding_time(self) -> float:
+        """Average time spent on encoding a single broadcast message, in
+        seconds.
+        """
+        if self.num_messages:
+            return self.total_encoding_time / self.num_messages
+        else:
+            return 0.0
+
+    def add(self, message: EncodedMessage) -> None:
+        """Updates the statistics with the encoding time of the given
+        broadcast message.
+        """
+        self.num_messages += 1
+        self.num_encodings += message.num_encodings
+        self.total_encoding_time += message.encoding_time
+        if message.encoding_time > self.max_encoding_time:
+            self.max_encoding_time = message.encoding_time
+
+
 class MessageValidationError(RuntimeError):
     """Error that is thrown by the MessageHub_ class internally when it
     fails to validate an incoming message against the Flockwave schema.
@@ -174,27 +226,33 @@ class MessageHub:
     assuming that it is equal to the type of the incoming message.
     """
 
-    _broadcast_methods: Optional[list[Callable[[FlockwaveMessage], Awaitable[None]]]]
+    _broadcast_methods: Optional[list[Callable[[EncodedMessage], Awaitable[None]]]]
+    _broadcast_statistics: BroadcastStatistics
     _channel_type_registry: Optional[ChannelTypeRegistry]
     _client_registry: Optional[ClientRegistry]
     _handlers_by_type: defaultdict[Optional[str], list[MessageHandler]]
     _log_messages: bool
     _message_builder: FlockwaveMessageBuilder
+    _message_validator: Optional[MessageValidator]
     _request_middleware: list[RequestMiddleware]
     _response_middleware: list[ResponseMiddleware]
     _queue_rx: MemoryReceiveChannel
     _queue_tx: MemorySendChannel
+    _trusted_channel_types: frozenset[str]
 
     def __init__(self):
         """Constructor."""
         self._handlers_by_type = defaultdict(list)
         self._message_builder = FlockwaveMessageBuilder()
+        self._message_validator = None
         self._request_middleware = []
         self._response_middleware = []
         self._broadcast_methods = None
+        self._broadcast_statistics = BroadcastStatistics()
         self._channel_type_registry = None
         self._client_registry = None
         self._log_messages = False
+        self._trusted_channel_types = frozenset()
 
         self._queue_tx, self._queue_rx = open_memory_channel(4096)
 
@@ -249,6 +307,11 @@ class MessageHub:
         await self._queue_tx.send(request)  # type: ignore
         return request
 
+    @property
+    def broadcast_statistics(self) -> BroadcastStatistics:
+        """Statistics about the time spent on encoding broadcast messages."""
+        return self._broadcast_statistics
+
     @property
     def channel_type_registry(self) -> Optional[ChannelTypeRegistry]:
         """Registry that keeps track of the different channel types that the
@@ -310,6 +373,21 @@ class MessageHub:
                 self._invalidate_broadcast_methods, sender=self._client_registry
             )
 
+    @property
+    def trusted_channel_types(self) -> frozenset[str]:
+        """IDs of the channel types whose clients are trusted to send valid
+        messages. Messages from these clients are not validated against the
+        Flockwave message schema.
+
+        Use this only for local channels where the other end is authenticated
+        by other means, e.g., by the permissions of a Unix domain socket.
+        """
+        return self._trusted_channel_types
+
+    @trusted_channel_types.setter
+    def trusted_channel_types(self, value: Iterable[str]) -> None:
+        self._trusted_channel_types = frozenset(value)
+
     def create_notification(self, body: Any = None) -> FlockwaveNotification:
         """Creates a new Flockwave notification to be sent by the server.
 
@@ -448,7 +526,9 @@ class MessageHub:
                 or internally by the hub itself
         """
         try:
-            decoded_message = self._decode_incoming_message(message)
+            decoded_message = self._decode_incoming_message(
+                message, trusted=self._is_trusted(sender)
+            )
         except MessageValidationError as ex:
             reason = str(ex)
             log.error(
@@ -539,7 +619,7 @@ class MessageHub:
 
     def _commit_broadcast_methods(
         self,
-    ) -> list[Callable[[FlockwaveMessage], Awaitable[None]]]:
+    ) -> list[Callable[[EncodedMessage], Awaitable[None]]]:
         """Calculates the list of methods to call when the message hub
         wishes to broadcast a message to all the connected clients.
         """
@@ -559,7 +639,7 @@ class MessageHub:
             broadcaster = descriptor.broadcaster
             if broadcaster:
                 if has_clients_for(descriptor.id):
-                    result.append(broadcaster)
+                    result.append(partial(_broadcast_with, broadcaster))
             else:
                 clients = clients_for(descriptor.id)
                 for client_id in clients:
@@ -962,7 +1042,9 @@ class MessageHub:
         finally:
             disposer()
 
-    def _decode_incoming_message(self, message: dict[str, Any]) -> FlockwaveMessage:
+    def _decode_incoming_message(
+        self, message: dict[str, Any], trusted: bool = False
+    ) -> FlockwaveMessage:
         """Decodes an incoming, raw JSON message that has already been
         decoded from the string representation into a dictionary on the
         Python side, but that has not been validated against the Flockwave
@@ -970,6 +1052,9 @@ class MessageHub:
 
         Parameters:
             message: the incoming, raw message
+            trusted: whether the message comes from a trusted client. Only
+                the basic structure of messages from trusted clients is
+                checked; they are not validated against the schema.
 
         Returns:
             the validated message as a Python FlockwaveMessage_ object
@@ -977,8 +1062,15 @@ class MessageHub:
         Raises:
             MessageValidationError: if the message could not have been decoded
         """
+        if self._message_validator is None:
+            self._message_validator = MessageValidator(get_message_schema())
+
         try:
-            return FlockwaveMessage.from_json(message)  # type: ignore
+            if trusted:
+                self._message_validator.validate_envelope(message)
+            else:
+                self._message_validator.validate(message)
+            return FlockwaveMessage.from_json(message, validate=False)  # type: ignore
         except ValidationError:
             # We should not re-raise directly from here because on Python 3.x
             # we would get a very long stack trace that includes the original
@@ -1019,11 +1111,14 @@ class MessageHub:
                     break
                 message = next_message  # type: ignore
             else:
-                # Message passed through all middleware
+                # Message passed through all middleware. Wrap it so it is
+                # encoded only once per wire format, no matter how many
+                # clients we send it to
+                encoded = EncodedMessage(message)
                 failures = 0
                 for func in self._broadcast_methods:
                     try:
-                        await func(message)
+                        await func(encoded)
                     except (BrokenResourceError, ClosedResourceError):
                         # client is probably gone; no problem
                         pass
@@ -1035,15 +1130,32 @@ class MessageHub:
                         f"Error while broadcasting message to {failures} client(s)"
                     )
 
+                self._broadcast_statistics.add(encoded)
+
         done()
 
+    def _is_trusted(self, client: Client) -> bool:
+        """Returns whether the given client is connected via a trusted
+        channel type.
+        """
+        if not self._trusted_channel_types or self._client_registry is None:
+            return False
+
+        channel_type = self._client_registry.get_channel_type(client.id)
+        return channel_type in self._trusted_channel_types
+
     async def _send_message(
         self,
-        message: FlockwaveMessage,
+        message: Union[FlockwaveMessage, EncodedMessage],
         to: Union[str, Client],
         in_response_to: Optional[FlockwaveMessage] = None,
         done: Optional[Callable[[], None]] = None,
     ):
+        if isinstance(message, EncodedMessage):
+            encoded, message = message, message.message
+        else:
+            encoded = None
+
         assert (
             self._client_registry is not None
         ), "message hub does not have a client registry yet"
@@ -1072,9 +1184,13 @@ class MessageHub:
                 break
             message = next_message
         else:
-            # Message passed through all middleware
+            # Message passed through all middleware. Use the cached encoded
+            # representations unless the middleware replaced the message
             try:
-                await client.channel.send(message)
+                if encoded is not None and encoded.message is message:
+                    await client.channel.send_encoded(encoded)
+                else:
+                    await client.channel.send(message)
             except (BrokenResourceError, ClosedResourceError):
                 log.warning(
                     "Client is gone; not sending message", extra={"id": client.id}
@@ -1126,6 +1242,16 @@ class MessageHub:
         return response
 
 
+async def _broadcast_with(
+    broadcaster: Callable[[FlockwaveMessage], Awaitable[None]],
+    message: EncodedMessage,
+) -> None:
+    """Broadcasts an encoded message with a broadcaster function of a channel
+    type that expects the original message.
+    """
+    await broadcaster(message.message)
+
+
 ##############################################################################
 
 
@@ -1343,6 +1469,337 @@ class ConnectionStatusMessageRateLimiter(RateLimiter):
                     await dispatch_tx_queue.send(connection_id)
 
 
+@dataclass
+class UAVStatusSubscription:
+    """Subscription of a single client to delta-compressed UAV status
+    notifications. See UAVStatusDeltaRateLimiter_ for more details.
+    """
+
+    fields: Optional[frozenset[str]] = None
+    """Names of the UAV status fields that the client is interested in;
+    ``None`` means all the fields.
+    """
+
+    delay: float = 0.1
+    """Minimum number of seconds between consecutive notifications."""
+
+    keyframe_interval: float = 10.0
+    """Number of seconds between consecutive keyframes that contain the full
+    status of all the UAVs.
+    """
+
+    last_sent: dict[str, dict[str, Any]] = field(default_factory=dict)
+    """Mapping from UAV IDs to the status fragments of the UAVs at the time
+    when the last notification about them was sent to the client.
+    """
+
+    pending: set[str] = field(default_factory=set)
+    """IDs of the UAVs whose status may have changed since the last
+    notification sent to the client.
+    """
+
+    cancel_scope: CancelScope = field(default_factory=CancelScope)
+    """Cancel scope of the task that sends the notifications to the client."""
+
+    _changed: Event = field(default_factory=Event)
+
+    def diff(self, uav_id: str, current: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """Returns the fields of the given UAV status fragment that the client
+        is interested in and that changed since the last notification sent
+        to the client. Updates the last sent state of the UAV to the given
+        fragment.
+
+        Returns:
+            the changed fields or ``None`` if no field has changed
+        """
+        previous = self.last_sent.get(uav_id)
+        if previous is current:
+            return None
+
+        self.last_sent[uav_id] = current
+
+        fields = self.fields
+        if previous is None:
+            if fields is None:
+                return current
+            result = {key: current[key] for key in fields if key in current}
+        else:
+            items = (
+                current.items()
+                if fields is None
+                else ((key, current[key]) for key in fields if key in current)
+            )
+            result = {
+                key: value
+                for key, value in items
+                if key not in previous or previous[key] != value
+            }
+
+        return result or None
+
+    def notify_changed(self, uav_ids: Iterable[str]) -> None:
+        """Notifies the subscription that the status of the UAVs with the
+        given IDs may have changed.
+        """
+        self.pending.update(uav_ids)
+        self._changed.set()
+
+    async def wait_for_changes(self) -> None:
+        """Waits until there is at least one UAV whose status may have changed
+        since the last notification.
+        """
+        if not self.pending:
+            await self._changed.wait()
+        self._changed = Event()
+
+
+class UAVStatusDeltaRateLimiter(RateLimiter):
+    """Rate limiter for UAV status notifications that keeps track of the
+    last status sent to each subscribed client and sends only the fields
+    that have changed since then.
+
+    Clients have to subscribe explicitly to receive these notifications; each
+    subscription may restrict the set of fields to send and the maximum rate
+    of notifications. Notifications are sent in ``X-UAV-INF-DELTA`` messages
+    with the following body::
+
+        {
+            "type": "X-UAV-INF-DELTA",
+            "keyframe": false,
+            "status": {"01": {"position": [...], "timestamp": ...}},
+            "removed": ["02"]
+        }
+
+    Keyframes are sent periodically and right after a client subscribes. A
+    keyframe contains all the subscribed fields of all the UAVs that the
+    server knows about and replaces the state that the client has built from
+    earlier notifications. ``removed`` lists the UAVs that have disappeared
+    since the last notification; it is omitted when empty.
+
+    Subscribed clients should not receive regular UAV-INF broadcasts; use
+    `filter_response()` as a response middleware in the message hub to
+    suppress them.
+    """
+
+    name: Optional[str] = None
+
+    delay: float
+    """Minimum number of seconds between consecutive notifications to the
+    same client.
+    """
+
+    keyframe_interval: float
+    """Default number of seconds between consecutive keyframes."""
+
+    def __init__(
+        self,
+        status_getter: Callable[[Iterable[str]], dict[str, dict[str, Any]]],
+        uav_ids_getter: Callable[[], Iterable[str]],
+        factory: Callable[[dict[str, Any]], FlockwaveMessage],
+        *,
+        delay: float = 0.1,
+        keyframe_interval: float = 10.0,
+    ):
+        """Constructor.
+
+        Parameters:
+            status_getter: function that takes an iterable of UAV IDs and
+                returns a mapping from UAV IDs to the JSON representations of
+                the statuses of the UAVs. UAVs that do not exist must be
+                omitted. The returned representations must not be modified
+                later; a new object must be returned when a status changes.
+            uav_ids_getter: function that returns the IDs of all the UAVs
+            factory: function that creates a notification from its body
+            delay: minimum number of seconds between consecutive
+                notifications to the same client
+            keyframe_interval: default number of seconds between consecutive
+                keyframes
+        """
+        self.delay = delay
+        self.keyframe_interval = keyframe_interval
+
+        self._status_getter = status_getter
+        self._uav_ids_getter = uav_ids_getter
+        self._factory = factory
+
+        self._dispatcher = None
+        self._nursery = None
+        self._subscriptions: dict[str, UAVStatusSubscription] = {}
+
+    def add_request(self, uav_ids: Iterable[str]) -> None:
+        """Notifies the subscribed clients that the status of the UAVs with
+        the given IDs may have changed.
+        """
+        if self._subscriptions:
+            uav_ids = list(uav_ids)
+            for subscription in self._subscriptions.values():
+                subscription.notify_changed(uav_ids)
+
+    def filter_response(
+        self,
+        message: FlockwaveMessage,
+        client: Optional[Client],
+        in_response_to: Optional[FlockwaveMessage],
+    ) -> Optional[FlockwaveMessage]:
+        """Response middleware that drops UAV-INF notifications addressed to
+        clients that are subscribed to delta-compressed notifications.
+        Responses to explicit UAV-INF requests are let through.
+        """
+        if (
+            client is not None
+            and in_response_to is None
+            and client.id in self._subscriptions
+            and message.get_type() == "UAV-INF"
+        ):
+            return None
+        return message
+
+    def is_subscribed(self, client_id: str) -> bool:
+        """Returns whether the client with the given ID is subscribed to
+        delta-compressed notifications.
+        """
+        return client_id in self._subscriptions
+
+    async def run(self, dispatcher, nursery):
+        self._dispatcher = dispatcher
+        self._nursery = nursery
+        try:
+            for client_id, subscription in self._subscriptions.items():
+                nursery.start_soon(self._serve, client_id, subscription)
+            await sleep_forever()
+        finally:
+            self._dispatcher = None
+            self._nursery = None
+
+    def subscribe(
+        self,
+        client_id: str,
+        fields: Optional[Iterable[str]] = None,
+        max_rate: Optional[float] = None,
+        keyframe_interval: Optional[float] = None,
+    ) -> UAVStatusSubscription:
+        """Subscribes the client with the given ID to delta-compressed UAV
+        status notifications, replacing its existing subscription if there
+        is one.
+
+        Parameters:
+            client_id: the ID of the client
+            fields: names of the status fields to send to the client; ``None``
+                means all the fields
+            max_rate: maximum number of notifications per second; ``None``
+                means to use the default rate of the rate limiter
+            keyframe_interval: number of seconds between consecutive
+                keyframes; ``None`` means to use the default interval
+
+        Returns:
+            the new subscription
+
+        Raises:
+            ValueError: if any of the parameters is invalid
+        """
+        if fields is not None:
+            if isinstance(fields, str):
+                raise ValueError("fields must be a list of strings")
+            fields = frozenset(fields)
+            if not all(isinstance(item, str) for item in fields):
+                raise ValueError("fields must be a list of strings")
+
+        delay = self.delay
+        if max_rate is not None:
+            max_rate = float(max_rate)
+            if max_rate <= 0:
+                raise ValueError("maximum rate must be positive")
+            delay = max(delay, 1 / max_rate)
+
+        if keyframe_interval is None:
+            keyframe_interval = self.keyframe_interval
+        else:
+            keyframe_interval = float(keyframe_interval)
+            if keyframe_interval <= 0:
+                raise ValueError("keyframe interval must be positive")
+
+        self.unsubscribe(client_id)
+
+        self._subscriptions[client_id] = subscription = UAVStatusSubscription(
+            fields=fields,  # type: ignore
+            delay=delay,
+            keyframe_interval=max(keyframe_interval, delay),
+        )
+        if self._nursery is not None:
+            self._nursery.start_soon(self._serve, client_id, subscription)
+
+        return subscription
+
+    def unsubscribe(self, client_id: str) -> None:
+        """Cancels the subscription of the client with the given ID. No-op if
+        the client is not subscribed.
+        """
+        subscription = self._subscriptions.pop(client_id, None)
+        if subscription is not None:
+            subscription.cancel_scope.cancel()
+
+    def _create_message(
+        self, subscription: UAVStatusSubscription, keyframe: bool
+    ) -> Optional[FlockwaveMessage]:
+        """Creates the next notification to send to the client with the given
+        subscription, or returns ``None`` if there is nothing to send.
+        """
+        if keyframe:
+            uav_ids = set(self._uav_ids_getter())
+            subscription.last_sent.clear()
+        else:
+            uav_ids = subscription.pending
+
+        subscription.pending = set()
+
+        statuses = self._status_getter(uav_ids)
+        changes = {}
+        for uav_id, current in statuses.items():
+            changed = subscription.diff(uav_id, current)
+            if changed is not None:
+                changes[uav_id] = changed
+
+        removed = [
+            uav_id
+            for uav_id in uav_ids
+            if uav_id not in statuses
+            and subscription.last_sent.pop(uav_id, None) is not None
+        ]
+
+        if not keyframe and not changes and not removed:
+            return None
+
+        body = {"type": "X-UAV-INF-DELTA", "keyframe": keyframe, "status": changes}
+        if removed:
+            body["removed"] = removed
+
+        return self._factory(body)
+
+    async def _serve(self, client_id: str, subscription: UAVStatusSubscription):
+        """Task that sends the notifications to a single subscribed client."""
+        with subscription.cancel_scope:
+            keyframe_due_at = current_time()
+            while True:
+                with move_on_at(keyframe_due_at):
+                    await subscription.wait_for_changes()
+
+                now = current_time()
+                keyframe = now >= keyframe_due_at
+                if keyframe:
+                    keyframe_due_at = now + subscription.keyframe_interval
+
+                try:
+                    message = self._create_message(subscription, keyframe)
+                    if message is not None and self._dispatcher is not None:
+                        await self._dispatcher(message, to=client_id)
+                except Exception:
+                    log.exception(
+                        f"Error while dispatching messages from {self.name} factory"
+                    )
+
+                await sleep(subscription.delay)
+
+
 class RateLimiters:
     """Helper object for managing the dispatch of rate-limited messages.
 
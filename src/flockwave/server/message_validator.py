@@ -0,0 +1,207 @@
+"""Schema validation for incoming Flockwave messages, with validators prepared
+separately for each message type.
+
+The Flockwave message schema describes the body of a message as a union of
+one subschema per message type. A generic JSON schema validator has to try
+the branches of the union one by one until it finds a matching one, which
+dominates the cost of validating a message. The validator in this module
+selects the branch up-front based on the ``type`` key of the message body and
+validates the message against a schema that contains that branch only.
+"""
+
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
+from typing import Any, Callable, Optional
+
+__all__ = ("MessageValidator",)
+
+
+Validator = Callable[[Any], None]
+"""Type specification for validator functions that raise a ValidationError_
+if the object they are called with does not match the schema of the
+validator.
+"""
+
+
+def _create_validator(schema: Any) -> Validator:
+    """Creates a validator function for the given JSON schema."""
+    return validator_for(schema)(schema).validate
+
+
+def _resolve(root: Any, schema: Any) -> Any:
+    """Resolves local JSON references in the given subschema of the given root
+    schema until it finds a subschema that is not a reference.
+    """
+    for _ in range(32):
+        if not isinstance(schema, dict):
+            break
+
+        ref = schema.get("$ref")
+        if not isinstance(ref, str) or not ref.startswith("#"):
+            break
+
+        schema = root
+        for part in ref[1:].split("/"):
+            if part:
+                part = part.replace("~1", "/").replace("~0", "~")
+                schema = schema[int(part) if isinstance(schema, list) else part]
+
+    return schema
+
+
+def _find_message_types(root: Any, schema: Any) -> Optional[set[str]]:
+    """Returns the set of message types that a branch of the union of message
+    bodies accepts, or ``None`` if the set of types cannot be determined.
+    """
+    schema = _resolve(root, schema)
+    if not isinstance(schema, dict):
+        return None
+
+    properties = schema.get("properties")
+    if isinstance(properties, dict) and "type" in properties:
+        type_schema = _resolve(root, properties["type"])
+        if isinstance(type_schema, dict):
+            if "const" in type_schema:
+                return {type_schema["const"]}
+            if isinstance(type_schema.get("enum"), list):
+                return set(type_schema["enum"])
+
+    for subschema in schema.get("allOf", ()):
+        result = _find_message_types(root, subschema)
+        if result is not None:
+            return result
+
+    return None
+
+
+class MessageValidator:
+    """Validates incoming Flockwave messages against the Flockwave message
+    schema.
+
+    Validators are created lazily for each message type when a message of
+    the given type is validated for the first time, and they are reused
+    afterwards. Messages with unknown types are validated against the entire
+    schema.
+    """
+
+    def __init__(self, schema: Any):
+        """Constructor.
+
+        Parameters:
+            schema: the JSON schema of Flockwave messages
+        """
+        self._schema = schema
+        self._full_validator: Optional[Validator] = None
+        self._validators: dict[str, Validator] = {}
+
+        self._body_schema: Optional[dict[str, Any]] = None
+        self._body_union_keyword: Optional[str] = None
+        self._branches_by_type: dict[str, list[Any]] = {}
+        self._generic_branches: list[Any] = []
+
+        self._find_body_branches()
+
+    @property
+    def message_types(self) -> list[str]:
+        """The message types that have a dedicated validator."""
+        return sorted(self._branches_by_type)
+
+    def validate(self, message: Any) -> None:
+        """Validates the given message against the schema.
+
+        Parameters:
+            message: the raw JSON representation of the message
+
+        Raises:
+            ValidationError: if the message does not match the schema
+        """
+        body = message.get("body") if isinstance(message, dict) else None
+        type = body.get("type") if isinstance(body, dict) else None
+
+        validator = None
+        if isinstance(type, str):
+            validator = self._validators.get(type)
+            if validator is None and type in self._branches_by_type:
+                validator = self._create_validator_for(type)
+                self._validators[type] = validator
+
+        if validator is None:
+            validator = self._get_full_validator()
+
+        validator(message)
+
+    @staticmethod
+    def validate_envelope(message: Any) -> None:
+        """Performs a minimal structural check on the given message without
+        validating it against the schema. Used for messages from trusted
+        clients.
+
+        Parameters:
+            message: the raw JSON representation of the message
+
+        Raises:
+            ValidationError: if the message is not a JSON object with a body
+                that has a message type
+        """
+        if not isinstance(message, dict):
+            raise ValidationError("message must be an object")
+
+        body = message.get("body")
+        if not isinstance(body, dict) or not isinstance(body.get("type"), str):
+            raise ValidationError("message body must be an object with a type")
+
+    def _create_validator_for(self, type: str) -> Validator:
+        """Creates a validator for messages of the given type by replacing the
+        union of message bodies in the schema with the branches that accept
+        the given type.
+        """
+        assert self._body_schema is not None
+        assert self._body_union_keyword is not None
+
+        body_schema = {
+            key: value
+            for key, value in self._body_schema.items()
+            if key not in ("anyOf", "oneOf")
+        }
+        body_schema[self._body_union_keyword] = (
+            self._branches_by_type[type] + self._generic_branches
+        )
+
+        schema = dict(self._schema)
+        schema["properties"] = {**schema["properties"], "body": body_schema}
+        return _create_validator(schema)
+
+    def _find_body_branches(self) -> None:
+        """Finds the branches of the union of message bodies in the schema and
+        groups them by the message types they accept.
+        """
+        root = self._schema
+        properties = root.get("properties") if isinstance(root, dict) else None
+        if not isinstance(properties, dict) or "body" not in properties:
+            return
+
+        body_schema = _resolve(root, properties["body"])
+        if not isinstance(body_schema, dict):
+            return
+
+        for keyword in ("oneOf", "anyOf"):
+            if isinstance(body_schema.get(keyword), list):
+                break
+        else:
+            return
+
+        self._body_schema = body_schema
+        self._body_union_keyword = keyword
+
+        for branch in body_schema[keyword]:
+            types = _find_message_types(root, branch)
+            if types is None:
+                self._generic_branches.append(branch)
+            else:
+                for type in types:
+                    self._branches_by_type.setdefault(type, []).append(branch)
+
+    def _get_full_validator(self) -> Validator:
+        if self._full_validator is None:
+            self._full_validator = _create_validator(self._schema)
+        return self._full_validator
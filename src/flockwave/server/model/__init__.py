@@ -19,7 +19,12 @@ from .devices import (
 )
 from .errors import ClientNotSubscribedError, NoSuchPathError
 from .identifiers import default_id_generator
-from .messages import FlockwaveMessage, FlockwaveNotification, FlockwaveResponse
+from .messages import (
+    EncodedMessage,
+    FlockwaveMessage,
+    FlockwaveNotification,
+    FlockwaveResponse,
+)
 from .object import ModelObject
 from .uav import PassiveUAVDriver, UAVStatusInfo, UAVDriver, UAV, UAVBase
 from .weather import Weather
@@ -28,6 +33,7 @@ from .world import World
 
 __all__ = (
     "default_id_generator",
+    "EncodedMessage",
     "FlockwaveMessage",
     "FlockwaveMessageBuilder",
     "FlockwaveNotification",
@@ -12,6 +12,7 @@ from typing import Generic, TYPE_CHECKING, TypeVar
 
 if TYPE_CHECKING:
     from .client import Client
+    from .messages import EncodedMessage
 
 __all__ = ("CommunicationChannel",)
 
@@ -48,3 +49,14 @@ class CommunicationChannel(Generic[T], metaclass=ABCMeta):
     async def send(self, message: T) -> None:
         """Sends the given message over the communication channel."""
         raise NotImplementedError
+
+    async def send_encoded(self, message: "EncodedMessage") -> None:
+        """Sends a message whose encoded representations are cached in an
+        EncodedMessage_ wrapper. Used when the same message is broadcast to
+        multiple clients.
+
+        The default implementation sends the wrapped message with `send()`.
+        Channels that transmit JSON should override this method and send the
+        cached representation instead.
+        """
+        await self.send(message.message)  # type: ignore
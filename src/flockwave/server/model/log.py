@@ -126,15 +126,18 @@ class FlightLog(metaclass=ModelMeta):
 
     @classmethod
     def create_from_metadata(cls, metadata: FlightLogMetadata, body: Any = ""):
+        # Bytes-like bodies (e.g., a memory-mapped log file) are accepted so
+        # large logs do not need to be copied before encoding
+        is_bytes = isinstance(body, (bytes, bytearray, memoryview))
         encoded_body = (
             b64encode(body).decode("ascii")
-            if isinstance(body, bytes) and metadata.kind.is_binary
+            if is_bytes and metadata.kind.is_binary
             else body
         )
         return cls.create(
             id=metadata.id,
             kind=metadata.kind,
-            size=len(body) if isinstance(body, (str, bytes)) else metadata.size,
+            size=len(body) if is_bytes or isinstance(body, str) else metadata.size,
             timestamp=metadata.timestamp,
             body=encoded_body,
         )
@@ -1,13 +1,23 @@
 """Flockwave message model classes."""
 
+from flockwave.encoders.json import create_json_encoder
 from flockwave.spec.schema import get_message_schema
+from time import perf_counter
 from typing import Any, Iterable, Optional, Sequence, Union
+from zlib import compress
 
 from .commands import CommandExecutionStatus
 from .metamagic import ModelMeta
 
 
-__all__ = ("FlockwaveMessage", "FlockwaveNotification", "FlockwaveResponse")
+__all__ = (
+    "EncodedMessage",
+    "FlockwaveMessage",
+    "FlockwaveNotification",
+    "FlockwaveResponse",
+)
+
+_encoder = create_json_encoder()
 
 
 class FlockwaveMessage(metaclass=ModelMeta):
@@ -196,3 +206,77 @@ class FlockwaveResponse(FlockwaveMessage):
         """
         for func, args, kwds in self._on_sent:
             func(*args, **kwds)
+
+
+class EncodedMessage:
+    """Wrapper around a Flockwave message that encodes the message lazily in
+    the wire formats requested by the communication channels and caches the
+    results. A message that is broadcast to many clients is therefore encoded
+    only once per wire format.
+
+    The wrapped message must not be modified after the first encoded
+    representation was requested.
+    """
+
+    __slots__ = (
+        "message",
+        "encoding_time",
+        "num_encodings",
+        "_compressed",
+        "_json",
+        "_json_str",
+    )
+
+    message: FlockwaveMessage
+    """The wrapped message."""
+
+    encoding_time: float
+    """Total time spent on encoding the message so far, in seconds."""
+
+    num_encodings: int
+    """Number of wire formats that the message was encoded into so far."""
+
+    def __init__(self, message: FlockwaveMessage):
+        self.message = message
+        self.encoding_time = 0.0
+        self.num_encodings = 0
+
+        self._compressed: Optional[bytes] = None
+        self._json: Optional[bytes] = None
+        self._json_str: Optional[str] = None
+
+    @property
+    def compressed(self) -> bytes:
+        """The JSON representation of the message, compressed with zlib."""
+        if self._compressed is None:
+            data = self.json
+            start = perf_counter()
+            self._compressed = compress(data)
+            self._add_encoding_time(perf_counter() - start)
+        return self._compressed
+
+    @property
+    def json(self) -> bytes:
+        """The JSON representation of the message as raw bytes, in the same
+        format as the output of the default JSON encoder of the Flockwave
+        protocol, including the message separator.
+        """
+        if self._json is None:
+            start = perf_counter()
+            self._json = _encoder(self.message)
+            self._add_encoding_time(perf_counter() - start)
+        return self._json
+
+    @property
+    def json_str(self) -> str:
+        """The JSON representation of the message as a string."""
+        if self._json_str is None:
+            data = self.json
+            start = perf_counter()
+            self._json_str = data.decode("utf-8")
+            self._add_encoding_time(perf_counter() - start)
+        return self._json_str
+
+    def _add_encoding_time(self, duration: float) -> None:
+        self.encoding_time += duration
+        self.num_encodings += 1
@@ -77,6 +77,21 @@ class UAVStatusInfo(TimestampMixin, metaclass=ModelMeta):
     rssi: list[int]
     airspeed: float
 
+    _revision: int
+    """Counter that is incremented whenever the timestamp of the status is
+    updated. Used to decide whether the cached JSON fragment is stale.
+    """
+
+    _fragment: Optional[dict[str, Any]]
+    """Cached JSON representation of the status, as returned from
+    `to_json_fragment()`.
+    """
+
+    _fragment_key: Optional[tuple[int, dict[str, Any]]]
+    """Revision number and the raw JSON object of the status at the time when
+    the cached JSON fragment was created.
+    """
+
     def __init__(
         self, id: Optional[str] = None, timestamp: Optional[TimestampLike] = None
     ):
@@ -88,6 +103,10 @@ class UAVStatusInfo(TimestampMixin, metaclass=ModelMeta):
                 means to use the current date and time. Integers represent
                 milliseconds elapsed since the UNIX epoch.
         """
+        self._revision = 0
+        self._fragment = None
+        self._fragment_key = None
+
         TimestampMixin.__init__(self, timestamp)
 
         self.debug = b""
@@ -122,6 +141,57 @@ class UAVStatusInfo(TimestampMixin, metaclass=ModelMeta):
     def velocity_xyz(self, value: Optional[VelocityXYZ]) -> None:
         self.velocityXYZ = value
 
+    def to_json_fragment(self) -> dict[str, Any]:
+        """Returns the JSON representation of the status as it appears in
+        UAV-INF messages, with nested model objects already converted to
+        their JSON representations.
+
+        The result is cached and rebuilt only if the status was updated since
+        the last call; updates are detected by the changes of the timestamp,
+        so code that modifies the status must call `update_timestamp()`
+        afterwards. The returned object must not be modified.
+
+        Lists and dictionaries in the status (such as the error codes and the
+        RSSI values) are modified in place by the UAVs, so the fragment holds
+        copies of them. This ensures that earlier fragments can be compared
+        to later ones.
+        """
+        key = self._revision, self._json
+        if self._fragment is None or self._fragment_key != key:
+            fragment = {
+                name: _to_json_fragment_value(value)
+                for name, value in self._json.items()
+            }
+            fragment["airspeed"] = self.airspeed
+            self._fragment = fragment
+            self._fragment_key = key
+        return self._fragment
+
+    def update_timestamp(self, timestamp: Optional[TimestampLike] = None) -> None:
+        """Updates the timestamp of the status information and marks the cached
+        JSON representation as stale.
+
+        Parameters:
+            timestamp: the new timestamp; ``None`` means to use the current date
+                and time.
+        """
+        TimestampMixin.update_timestamp(self, timestamp)
+        self._revision += 1
+
+
+def _to_json_fragment_value(value: Any) -> Any:
+    """Converts a value of a UAV status object to its representation in the
+    JSON fragment of the status, copying mutable containers.
+    """
+    if hasattr(value, "json"):
+        return value.json
+    elif isinstance(value, list):
+        return list(value)
+    elif isinstance(value, dict):
+        return dict(value)
+    else:
+        return value
+
 
 @register("uav")
 class UAV(ModelObject, metaclass=ABCMeta):
@@ -493,6 +563,44 @@ class UAVDriver(Generic[TUAV], metaclass=ABCMeta):
             transport=transport,
         )
 
+    def fly_through(
+        self,
+        uavs: list[TUAV],
+        waypoints: list[GPSCoordinate],
+        *,
+        acceptance_radius: float = 200,
+        mode_after: Optional[Union[int, str]] = None,
+    ):
+        """Asks the driver to fly the given UAVs through a sequence of
+        waypoints in guided mode, advancing to the next waypoint when a UAV
+        gets closer to its current waypoint than the acceptance radius.
+
+        Typically, you don't need to override this method when implementing
+        a driver; override ``_fly_through_single()`` instead.
+
+        Parameters:
+            uavs: the UAVs to address with this request
+            waypoints: the waypoints to fly through
+            acceptance_radius: the distance from a waypoint, in meters, below
+                which the waypoint is considered to be reached
+            mode_after: the flight mode to switch the UAVs to after they have
+                reached the last waypoint; `None` to stay in guided mode
+
+        Returns:
+            dict mapping UAVs to the corresponding results (which may also be
+            errors, awaitables or async generators yielding progress
+            information; it is the responsibility of the caller to evaluate
+            errors and wait for awaitables)
+        """
+        return self._dispatch_request(
+            uavs,
+            "waypoint sequence",
+            self._fly_through_single,
+            waypoints=waypoints,
+            acceptance_radius=acceptance_radius,
+            mode_after=mode_after,
+        )
+
     def get_log(self, uav: TUAV, log_id: str) -> FlightLog:
         """Asks the driver to retrieve the log with the given ID from the
         given UAV.
@@ -1036,6 +1144,27 @@ class UAVDriver(Generic[TUAV], metaclass=ABCMeta):
             value=value,
         )
 
+    def upload_mission(self, uavs: list[TUAV], items: list[Any]):
+        """Asks the driver to upload a mission to the given UAVs, replacing
+        their current missions.
+
+        Typically, you don't need to override this method when implementing
+        a driver; override ``_upload_mission_single()`` instead.
+
+        Parameters:
+            uavs: the UAVs to address with this request
+            items: the items of the mission, in a driver-specific format
+
+        Returns:
+            dict mapping UAVs to the corresponding results (which may also be
+            errors, awaitables or async generators yielding progress
+            information; it is the responsibility of the caller to evaluate
+            errors and wait for awaitables)
+        """
+        return self._dispatch_request(
+            uavs, "mission upload", self._upload_mission_single, items=items
+        )
+
     def validate_command(self, command: str, args, kwds) -> Optional[str]:
         """Checks whether the driver could execute the command on the UAVs
         _in principle_, without knowing which UAVs the command will be sent to.
@@ -1183,6 +1312,35 @@ class UAVDriver(Generic[TUAV], metaclass=ABCMeta):
         # to support low-power mode
         raise NotSupportedError
 
+    def _fly_through_single(
+        self,
+        uav: TUAV,
+        *,
+        waypoints: list[GPSCoordinate],
+        acceptance_radius: float,
+        mode_after: Optional[Union[int, str]],
+    ) -> None:
+        """Asks the driver to fly a single UAV managed by this driver through
+        a sequence of waypoints.
+
+        May return an awaitable or an async generator yielding Progress_
+        objects; the latter is preferred as the operation typically takes a
+        long time. Cancelling the operation must stop the sequencing but may
+        leave the UAV in guided mode at its current waypoint.
+
+        The function follows the "samurai principle", i.e. "return victorious,
+        or not at all". It means that if it returns, the operation succeeded.
+        Raise an exception if the operation cannot be executed for any reason;
+        a RuntimeError is typically sufficient.
+
+        Raises:
+            NotImplementedError: if the operation is not supported by the
+                driver yet, but there are plans to implement it
+            NotSupportedError: if the operation is not supported by the
+                driver and will not be supported in the future either
+        """
+        raise NotImplementedError
+
     def _get_log_list_single(self, uav: TUAV) -> list[FlightLogMetadata]:
         """Asks the driver to retrieve the list of flight logs from a single
         UAV managed by this driver.
@@ -1579,6 +1737,26 @@ class UAVDriver(Generic[TUAV], metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def _upload_mission_single(self, uav: TUAV, *, items: list[Any]) -> None:
+        """Asks the driver to upload a mission to a single UAV managed by this
+        driver.
+
+        May return an awaitable or an async generator yielding Progress_
+        objects if the upload takes a longer time.
+
+        The function follows the "samurai principle", i.e. "return victorious,
+        or not at all". It means that if it returns, the operation succeeded.
+        Raise an exception if the operation cannot be executed for any reason;
+        a RuntimeError is typically sufficient.
+
+        Raises:
+            NotImplementedError: if the operation is not supported by the
+                driver yet, but there are plans to implement it
+            NotSupportedError: if the operation is not supported by the
+                driver and will not be supported in the future either
+        """
+        raise NotImplementedError
+
 
 class PassiveUAV(UAVBase):
     pass
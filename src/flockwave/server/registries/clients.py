@@ -5,7 +5,7 @@ server is currently connected to.
 from blinker import Signal
 from collections import defaultdict
 from contextlib import contextmanager
-from typing import Iterable, Iterator
+from typing import Iterable, Iterator, Optional
 
 from flockwave.server.model.client import Client
 from flockwave.server.registries.channels import ChannelTypeRegistry
@@ -106,6 +106,19 @@ class ClientRegistry(RegistryBase[Client]):
         """
         return iter(self._entries_by_channel_type.get(channel_type, []))
 
+    def get_channel_type(self, client_id: str) -> Optional[str]:
+        """Returns the type of the communication channel that the client with
+        the given ID uses.
+
+        Arguments:
+            client_id: the ID of the client
+
+        Returns:
+            the type of the communication channel of the client, or ``None``
+            if there is no such client in the registry
+        """
+        return self._client_id_to_channel_type.get(client_id)
+
     def has_clients_for_channel_type(self, channel_type: str) -> bool:
         """Returns whether there is at least one connected client for the
         given channel type.
@@ -2,11 +2,17 @@
 Skybrush-related file formats, until we find a better place for them.
 """
 
+from .cache import ShowEncodingCache
 from .flight_area import get_flight_area_configuration_from_show_specification
 from .formats import SkybrushBinaryShowFile
 from .geofence import get_geofence_configuration_from_show_specification
 from .lights import get_light_program_from_show_specification
-from .player import LightPlayer, TrajectoryPlayer
+from .player import (
+    CompiledTrajectory,
+    LightPlayer,
+    TrajectoryFleet,
+    TrajectoryPlayer,
+)
 from .rth_plan import get_rth_plan_from_show_specification
 from .safety import get_safety_configuration_from_show_specification
 from .specification import (
@@ -23,6 +29,7 @@ from .specification import (
 from .trajectory import TrajectorySpecification
 
 __all__ = (
+    "CompiledTrajectory",
     "get_altitude_reference_from_show_specification",
     "get_coordinate_system_from_show_specification",
     "get_drone_count_from_show_specification",
@@ -37,8 +44,10 @@ __all__ = (
     "get_yaw_setpoints_from_show_specification",
     "is_coordinate_system_in_show_specification_geodetic",
     "LightPlayer",
+    "ShowEncodingCache",
     "ShowSpecification",
     "SkybrushBinaryShowFile",
+    "TrajectoryFleet",
     "TrajectoryPlayer",
     "TrajectorySpecification",
 )
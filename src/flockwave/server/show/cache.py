@@ -0,0 +1,171 @@
+"""Cache of encoded Skybrush binary show files, keyed by the hash of the
+parts of the show specification that end up in the encoded file.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from json import dumps
+from trio import CapacityLimiter, to_thread
+
+from .formats import encode_skybrush_binary_show_file
+from .lights import get_light_program_from_show_specification
+from .rth_plan import get_rth_plan_from_show_specification
+from .specification import (
+    get_trajectory_from_show_specification,
+    get_yaw_setpoints_from_show_specification,
+    ShowSpecification,
+)
+from .utils import crc32_mavftp
+
+__all__ = ("EncodedShowFile", "ShowEncodingCache")
+
+
+ENCODED_SHOW_KEYS = ("trajectory", "lights", "rthPlan", "yawControl")
+"""Keys of the show specification that affect the contents of the encoded
+show file. Other keys (coordinate system, geofence etc) are sent to the drone
+separately and therefore they do not participate in the cache key.
+"""
+
+
+@dataclass(frozen=True)
+class EncodedShowFile:
+    """An encoded Skybrush binary show file and its checksum."""
+
+    data: bytes
+    """The contents of the show file."""
+
+    crc: int
+    """CRC32 checksum of the entire show file, calculated the same way as the
+    MAVFTP ``CALC_FILE_CRC32`` command does on the drone.
+    """
+
+    @classmethod
+    def from_show_specification(cls, show: ShowSpecification):
+        """Encodes the given show specification into a Skybrush binary show
+        file.
+
+        This function is synchronous and may take a while for long shows; it
+        is safe to call from a worker thread.
+        """
+        data = encode_skybrush_binary_show_file(
+            get_trajectory_from_show_specification(show),
+            get_light_program_from_show_specification(show),
+            get_rth_plan_from_show_specification(show),
+            get_yaw_setpoints_from_show_specification(show),
+        )
+        return cls(data=data, crc=crc32_mavftp(data))
+
+
+class ShowEncodingCache:
+    """Least-recently-used cache of encoded Skybrush binary show files with a
+    limit on the total size of the cached files.
+
+    Encoding happens in worker threads so a long show does not block the
+    event loop while it is being encoded. Uploading the same show to the same
+    drone again, or uploading a show where several drones share the same
+    trajectory and light program, reuses the already encoded file.
+    """
+
+    max_size: int
+    """Maximum total size of the cached show files, in bytes."""
+
+    num_hits: int
+    """Number of cache hits since the cache was created."""
+
+    num_misses: int
+    """Number of cache misses since the cache was created."""
+
+    _items: OrderedDict[str, EncodedShowFile]
+    """The cached show files, keyed by the hash of the show specification, in
+    the order they were last used.
+    """
+
+    _limiter: CapacityLimiter
+    """Capacity limiter that bounds the number of worker threads that encode
+    show files at the same time.
+    """
+
+    _size: int
+    """Total size of the cached show files, in bytes."""
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024, *, max_workers: int = 4):
+        """Constructor.
+
+        Parameters:
+            max_size: maximum total size of the cached show files, in bytes
+            max_workers: maximum number of worker threads that may encode
+                show files at the same time
+        """
+        self.max_size = max_size
+        self.num_hits = 0
+        self.num_misses = 0
+
+        self._items = OrderedDict()
+        self._limiter = CapacityLimiter(max_workers)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached show files, in bytes."""
+        return self._size
+
+    def clear(self) -> None:
+        """Removes all the show files from the cache."""
+        self._items.clear()
+        self._size = 0
+
+    async def encode(self, show: ShowSpecification) -> EncodedShowFile:
+        """Returns the encoded Skybrush binary show file of the given show
+        specification, encoding it in a worker thread if it is not cached yet.
+
+        Parameters:
+            show: the show specification of a single drone
+
+        Returns:
+            the encoded show file
+        """
+        key = self.get_key(show)
+
+        result = self._items.get(key)
+        if result is not None:
+            self._items.move_to_end(key)
+            self.num_hits += 1
+            return result
+
+        self.num_misses += 1
+        result = await to_thread.run_sync(
+            EncodedShowFile.from_show_specification, show, limiter=self._limiter
+        )
+        self._add(key, result)
+        return result
+
+    @staticmethod
+    def get_key(show: ShowSpecification) -> str:
+        """Returns the cache key of the given show specification.
+
+        The key is the SHA-256 hash of the canonical JSON representation of
+        the parts of the show specification that affect the encoded file.
+        """
+        parts = {key: show.get(key) for key in ENCODED_SHOW_KEYS}
+        encoded = dumps(parts, sort_keys=True, separators=(",", ":"))
+        return sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _add(self, key: str, item: EncodedShowFile) -> None:
+        size = len(item.data)
+        if size > self.max_size:
+            return
+
+        old_item = self._items.pop(key, None)
+        if old_item is not None:
+            self._size -= len(old_item.data)
+
+        self._items[key] = item
+        self._size += size
+
+        while self._size > self.max_size:
+            _, evicted = self._items.popitem(last=False)
+            self._size -= len(evicted.data)
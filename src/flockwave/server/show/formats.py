@@ -24,9 +24,10 @@ from flockwave.concurrency import aclosing
 from .rth_plan import RTHAction, RTHPlan, RTHPlanEntry
 from .trajectory import TrajectorySegment, TrajectorySpecification
 from .utils import crc32_mavftp as crc32, encode_variable_length_integer, Point
+from .vectorized import BatchSegmentEncoder, TrajectoryArrays
 from .yaw import YawSetpointList
 
-__all__ = ("SkybrushBinaryShowFile",)
+__all__ = ("SkybrushBinaryShowFile", "encode_skybrush_binary_show_file")
 
 
 _SKYBRUSH_BINARY_FILE_MARKER: bytes = b"skyb"
@@ -266,16 +267,8 @@ class SkybrushBinaryShowFile:
         Parameters:
             plan: the RTH plan to add
         """
-        scaling_factor = rth_plan.propose_scaling_factor()
-        if scaling_factor >= 128:
-            raise RuntimeError(
-                "RTH plan covers too large an area for a Skybrush binary show file"
-            )
-
-        encoder = RTHPlanEncoder(scaling_factor)
-
         return await self.add_block(
-            SkybrushBinaryFormatBlockType.RTH_PLAN, encoder.encode(rth_plan)
+            SkybrushBinaryFormatBlockType.RTH_PLAN, _encode_rth_plan(rth_plan)
         )
 
     async def add_trajectory(self, trajectory: TrajectorySpecification) -> None:
@@ -285,23 +278,8 @@ class SkybrushBinaryShowFile:
         Parameters:
             trajectory: the trajectory to add
         """
-        scaling_factor = trajectory.propose_scaling_factor()
-        if scaling_factor >= 128:
-            raise RuntimeError(
-                "Trajectory covers too large an area for a Skybrush binary show file"
-            )
-
-        chunks = [bytes([scaling_factor])]  # MSB is reserved as zero
-        encoder = SegmentEncoder(scaling_factor)
-
-        # .skyb files need absolute timestamps so we need to add a constant
-        # segment in front if the takeoff time is nonzero; that's why we have
-        # absolute=True here
-        segments = trajectory.iter_segments(max_length=65, absolute=True)
-        chunks.extend(encoder.iter_encode_multiple_segments(segments))
-
         return await self.add_block(
-            SkybrushBinaryFormatBlockType.TRAJECTORY, b"".join(chunks)
+            SkybrushBinaryFormatBlockType.TRAJECTORY, _encode_trajectory(trajectory)
         )
 
     async def add_yaw_setpoints(self, setpoints: YawSetpointList) -> None:
@@ -311,7 +289,6 @@ class SkybrushBinaryShowFile:
         Parameters:
             setpoints: the yaw setpoint list to add
         """
-
         encoder = YawSetpointEncoder()
 
         return await self.add_block(
@@ -525,6 +502,95 @@ class SkybrushBinaryShowFile:
             await self._fp.seek(position)
 
 
+def encode_skybrush_binary_show_file(
+    trajectory: TrajectorySpecification,
+    light_program: bytes,
+    rth_plan: Optional[RTHPlan] = None,
+    yaw_setpoints: Optional[YawSetpointList] = None,
+) -> bytes:
+    """Encodes a complete Skybrush binary show file with a CRC32 checksum.
+
+    This function is synchronous and does not touch the event loop, therefore
+    it can be called from a worker thread. The result is identical to the
+    contents of an in-memory SkybrushBinaryShowFile_ where the same blocks were
+    added in the same order and the file was finalized.
+
+    Parameters:
+        trajectory: the trajectory of the drone
+        light_program: the light program of the drone, encoded in Skybrush format
+        rth_plan: the optional return-to-home plan of the drone
+        yaw_setpoints: the optional yaw setpoints of the drone
+
+    Returns:
+        the encoded show file
+    """
+    blocks = [
+        (SkybrushBinaryFormatBlockType.TRAJECTORY, _encode_trajectory(trajectory)),
+        (SkybrushBinaryFormatBlockType.LIGHT_PROGRAM, light_program),
+    ]
+    if rth_plan:
+        blocks.append(
+            (SkybrushBinaryFormatBlockType.RTH_PLAN, _encode_rth_plan(rth_plan))
+        )
+    if yaw_setpoints:
+        blocks.append(
+            (
+                SkybrushBinaryFormatBlockType.YAW_CONTROL,
+                YawSetpointEncoder().encode(yaw_setpoints),
+            )
+        )
+
+    header = _SKYBRUSH_BINARY_FILE_HEADER[2]
+    block_header = SkybrushBinaryShowFile._header_struct
+    chunks = [header]
+    for type, body in blocks:
+        if len(body) >= 65536:
+            raise ValueError(
+                f"body too large; maximum allowed length is 65535 bytes, got {len(body)}"
+            )
+        chunks.append(block_header.pack(type, len(body)))
+        chunks.append(body)
+
+    # The CRC32 checksum is calculated with the checksum bytes in the header
+    # set to zero; these are the last four bytes of the header
+    result = bytearray(b"".join(chunks))
+    start_of_crc_bytes = len(header) - 4
+    result[start_of_crc_bytes : len(header)] = crc32(result).to_bytes(
+        4, "little", signed=False
+    )
+    return bytes(result)
+
+
+def _encode_rth_plan(rth_plan: RTHPlan) -> bytes:
+    """Encodes the body of an RTH plan block of a Skybrush binary show file."""
+    scaling_factor = rth_plan.propose_scaling_factor()
+    if scaling_factor >= 128:
+        raise RuntimeError(
+            "RTH plan covers too large an area for a Skybrush binary show file"
+        )
+
+    return RTHPlanEncoder(scaling_factor).encode(rth_plan)
+
+
+def _encode_trajectory(trajectory: TrajectorySpecification) -> bytes:
+    """Encodes the body of a trajectory block of a Skybrush binary show file."""
+    # .skyb files need absolute timestamps so we need to add a constant
+    # segment in front if the takeoff time is nonzero; that's why we have
+    # absolute=True here. The vectorized encoder produces the same output as
+    # SegmentEncoder, only faster for long trajectories
+    arrays = TrajectoryArrays.from_trajectory(trajectory, max_length=65, absolute=True)
+
+    scaling_factor = arrays.propose_scaling_factor()
+    if scaling_factor >= 128:
+        raise RuntimeError(
+            "Trajectory covers too large an area for a Skybrush binary show file"
+        )
+
+    # MSB of the first byte is reserved as zero
+    encoder = BatchSegmentEncoder(scaling_factor)
+    return bytes([scaling_factor]) + encoder.encode(arrays)
+
+
 class SegmentEncoder:
     """Encoder class for trajectory segments in the Skybrush binary show file
     format.
@@ -2,9 +2,12 @@
 trajectory.
 """
 
+import numpy as np
+
 from bisect import bisect
-from math import inf
-from typing import Callable, Optional
+from math import comb, inf
+from numpy.typing import ArrayLike, NDArray
+from typing import Callable, Generic, Hashable, Iterable, Optional, TypeVar, Union
 
 from pyledctrl.player import Player as LightPlayer
 
@@ -12,13 +15,16 @@ from flockwave.server.utils import constant
 
 from .trajectory import TrajectorySegment, TrajectorySpecification
 from .utils import Point
+from .vectorized import TrajectoryArrays
 
-__all__ = ("TrajectoryPlayer", "LightPlayer")
+__all__ = ("CompiledTrajectory", "TrajectoryFleet", "TrajectoryPlayer", "LightPlayer")
 
 
 ZERO = (0.0, 0.0, 0.0)
 """All-zero point to return for empty trajectories"""
 
+K = TypeVar("K", bound=Hashable)
+
 
 def create_function_for_segment(segment: TrajectorySegment) -> Callable[[float], Point]:
     """Creates a function for a trajectory segment that evaluates it at any
@@ -85,6 +91,7 @@ class TrajectoryPlayer:
     _current_segment_end_time: float
     _current_segment_length: float
 
+    _compiled: Optional["CompiledTrajectory"]
     _segments: list[TrajectorySegment]
     _start_times: list[float]
     _takeoff_time: float
@@ -97,6 +104,7 @@ class TrajectoryPlayer:
             trajectory: the trajectory specification to play back
         """
         self._trajectory = trajectory
+        self._compiled = None
 
         self._takeoff_time = self._trajectory.takeoff_time
 
@@ -149,6 +157,24 @@ class TrajectoryPlayer:
 
         return self._current_segment_func(ratio)
 
+    def positions_at(self, times: ArrayLike) -> NDArray[np.float64]:
+        """Returns the positions where the drone should be at the given
+        timestamps when flying the trajectory.
+
+        The trajectory is compiled into an array-backed representation when
+        this method is called for the first time.
+
+        Parameters:
+            times: the timestamps; a scalar or an array of any shape
+
+        Returns:
+            array holding the positions; its shape is the shape of the
+            timestamp array with an extra axis of length 3 at the end
+        """
+        if self._compiled is None:
+            self._compiled = CompiledTrajectory(self._trajectory)
+        return self._compiled.positions_at(times)
+
     def _seek_to(self, time: float) -> None:
         """Updates the state variables of the current trajectory if needed to
         ensure that its current segment includes the given time.
@@ -213,3 +239,315 @@ class TrajectoryPlayer:
             self._current_segment_func = create_function_for_segment(
                 self._current_segment
             )
+
+
+def _get_power_basis_matrix(degree: int) -> NDArray[np.float64]:
+    """Returns the matrix that converts the control points of a Bezier curve
+    of the given degree into the coefficients of the same curve in the power
+    basis, in increasing order of powers.
+    """
+    result = np.zeros((degree + 1, degree + 1))
+    for j in range(degree + 1):
+        for i in range(j + 1):
+            result[j, i] = comb(degree, j) * comb(j, i) * (-1) ** (j - i)
+    return result
+
+
+def _evaluate_polynomials(
+    coefficients: NDArray[np.float64], ratios: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """Evaluates polynomials in the power basis with Horner's method.
+
+    Parameters:
+        coefficients: array of shape (N, degree + 1, 3) holding the
+            coefficients of N polynomials, in increasing order of powers
+        ratios: array of shape (N, ) holding the point to evaluate each
+            polynomial at
+
+    Returns:
+        array of shape (N, 3) holding the values of the polynomials
+    """
+    ratios = ratios[:, None]
+    result = coefficients[:, -1, :].copy()
+    for index in range(coefficients.shape[1] - 2, -1, -1):
+        result *= ratios
+        result += coefficients[:, index, :]
+    return result
+
+
+class CompiledTrajectory:
+    """Array-backed representation of a trajectory that stores the
+    coefficients of each segment in the power basis so the trajectory can be
+    evaluated at many timestamps at once.
+
+    Positions are identical to the ones returned by TrajectoryPlayer_ up to
+    floating-point rounding errors.
+    """
+
+    boundaries: NDArray[np.float64]
+    """Start times of the segments followed by the end time of the last
+    segment, including the takeoff time. Empty trajectories have a single
+    infinite boundary so every timestamp is before their start.
+    """
+
+    coefficients: NDArray[np.float64]
+    """Array of shape (number of segments, max degree + 1, 3) holding the
+    polynomial coefficients of the segments in increasing order of powers,
+    as a function of the ratio of the elapsed time within the segment.
+    """
+
+    first_point: NDArray[np.float64]
+    """Position of the drone before the first segment."""
+
+    last_point: NDArray[np.float64]
+    """Position of the drone after the last segment."""
+
+    def __init__(self, trajectory: TrajectorySpecification):
+        """Constructor.
+
+        Parameters:
+            trajectory: the trajectory specification to compile
+        """
+        arrays = TrajectoryArrays.from_trajectory(trajectory, absolute=False)
+        takeoff_time = trajectory.takeoff_time
+
+        if arrays.is_empty:
+            self.boundaries = np.array([inf])
+            self.coefficients = np.zeros((0, 1, 3))
+            self.first_point = np.array(ZERO)
+            self.last_point = np.array(ZERO)
+            return
+
+        # Same arithmetic as in TrajectoryPlayer to get the same boundaries
+        starts = arrays.start_times + takeoff_time
+        end = (arrays.start_times[-1] + arrays.durations[-1]) + takeoff_time
+        self.boundaries = np.append(starts, end)
+
+        points, num_points = arrays.points, arrays.num_points
+        self.coefficients = np.zeros((len(points), points.shape[1], 3))
+        for count in np.unique(num_points).tolist():
+            mask = num_points == count
+            matrix = _get_power_basis_matrix(count - 1)
+            self.coefficients[mask, :count, :] = np.einsum(
+                "ji,sik->sjk", matrix, points[mask, :count, :]
+            )
+
+        self.first_point = points[0, 0].copy()
+        self.last_point = points[-1, -1].copy()
+
+    @property
+    def num_segments(self) -> int:
+        """Returns the number of segments in the trajectory."""
+        return len(self.coefficients)
+
+    def positions_at(self, times: ArrayLike) -> NDArray[np.float64]:
+        """Returns the positions where the drone should be at the given
+        timestamps when flying the trajectory.
+
+        Parameters:
+            times: the timestamps; a scalar or an array of any shape
+
+        Returns:
+            array holding the positions; its shape is the shape of the
+            timestamp array with an extra axis of length 3 at the end
+        """
+        times = np.asarray(times, dtype=np.float64)
+        flat_times = times.reshape(-1)
+        indices = self.segment_indices_at(flat_times)
+        result = self._evaluate(indices, flat_times)
+        return result.reshape(times.shape + (3,))
+
+    def segment_indices_at(self, times: NDArray[np.float64]) -> NDArray[np.intp]:
+        """Returns the indices of the segments that contain the given
+        timestamps; -1 for timestamps before the first segment and the number
+        of segments for timestamps after the last segment.
+        """
+        return np.searchsorted(self.boundaries, times, side="right") - 1
+
+    def _evaluate(
+        self, indices: NDArray[np.intp], times: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        result = np.where(
+            (indices < 0)[:, None], self.first_point[None, :], self.last_point[None, :]
+        )
+
+        inside = np.flatnonzero((indices >= 0) & (indices < self.num_segments))
+        if inside.size:
+            segments = indices[inside]
+            starts = self.boundaries[segments]
+            ends = self.boundaries[segments + 1]
+            ratios = (times[inside] - starts) / (ends - starts)
+            result[inside] = _evaluate_polynomials(self.coefficients[segments], ratios)
+
+        return result
+
+
+class TrajectoryFleet(Generic[K]):
+    """Collection of compiled trajectories of multiple drones that can tell
+    where each drone should be at a given moment in time with a constant
+    number of array operations, independently of the number of drones.
+
+    The fleet remembers the current segment of each drone between calls, so
+    evaluating the fleet at monotonically increasing timestamps (e.g., in a
+    simulation loop) needs no binary search at all in the common case.
+    """
+
+    _trajectories: dict[K, CompiledTrajectory]
+    """The compiled trajectories of the drones in the fleet."""
+
+    _state: Optional[dict[str, NDArray]]
+    """Concatenated arrays of all the trajectories in the fleet; ``None`` if
+    they need to be rebuilt because the fleet has changed.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self._trajectories = {}
+        self._state = None
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._trajectories
+
+    def __len__(self) -> int:
+        return len(self._trajectories)
+
+    def add(
+        self, key: K, trajectory: Union[TrajectorySpecification, CompiledTrajectory]
+    ) -> None:
+        """Adds a trajectory to the fleet, replacing the existing trajectory
+        with the same key.
+
+        Parameters:
+            key: the key of the drone that flies the trajectory
+            trajectory: the trajectory to add
+        """
+        if not isinstance(trajectory, CompiledTrajectory):
+            trajectory = CompiledTrajectory(trajectory)
+        self._trajectories[key] = trajectory
+        self._state = None
+
+    def clear(self) -> None:
+        """Removes all the trajectories from the fleet."""
+        self._trajectories.clear()
+        self._state = None
+
+    def keys(self) -> Iterable[K]:
+        """Returns the keys of the drones in the fleet, in the same order as
+        the rows of the array returned from positions_at().
+        """
+        return self._trajectories.keys()
+
+    def positions_at(self, time: float) -> NDArray[np.float64]:
+        """Returns the positions where the drones of the fleet should be at the
+        given timestamp.
+
+        Parameters:
+            time: the timestamp
+
+        Returns:
+            array of shape (number of drones, 3) holding the positions of the
+            drones, in the order of keys()
+        """
+        state = self._state
+        if state is None:
+            state = self._state = self._build_state()
+
+        boundaries = state["boundaries"]
+        offsets = state["boundary_offsets"]
+        counts = state["num_segments"]
+        cursors = state["cursors"]
+        if not len(cursors):
+            return np.zeros((0, 3))
+
+        stale = ~self._contains(cursors, time)
+        if stale.any():
+            # Common case in simulations: the drone moved to the next segment
+            rows = np.flatnonzero(stale)
+            cursors[rows] = np.minimum(cursors[rows] + 1, counts[rows])
+            rows = rows[~self._contains(cursors, time, rows)]
+            for row in rows.tolist():
+                start, end = offsets[row], offsets[row] + counts[row] + 1
+                cursors[row] = (
+                    np.searchsorted(boundaries[start:end], time, side="right") - 1
+                )
+
+        result = np.where(
+            (cursors < 0)[:, None], state["first_points"], state["last_points"]
+        )
+        inside = np.flatnonzero((cursors >= 0) & (cursors < counts))
+        if inside.size:
+            indices = offsets[inside] + cursors[inside]
+            starts = boundaries[indices]
+            ends = boundaries[indices + 1]
+            ratios = (time - starts) / (ends - starts)
+            segments = state["segment_offsets"][inside] + cursors[inside]
+            result[inside] = _evaluate_polynomials(
+                state["coefficients"][segments], ratios
+            )
+
+        return result
+
+    def remove(self, key: K) -> None:
+        """Removes the trajectory of the drone with the given key from the
+        fleet. No-op if the drone has no trajectory in the fleet.
+        """
+        if self._trajectories.pop(key, None) is not None:
+            self._state = None
+
+    def _build_state(self) -> dict[str, NDArray]:
+        trajectories = list(self._trajectories.values())
+        width = max((item.coefficients.shape[1] for item in trajectories), default=1)
+
+        coefficients = [
+            np.pad(
+                item.coefficients,
+                ((0, 0), (0, width - item.coefficients.shape[1]), (0, 0)),
+            )
+            for item in trajectories
+        ]
+        num_segments = np.array(
+            [item.num_segments for item in trajectories], dtype=np.intp
+        )
+        num_boundaries = num_segments + 1
+
+        return {
+            "boundaries": np.concatenate(
+                [item.boundaries for item in trajectories] or [np.zeros(0)]
+            ),
+            "boundary_offsets": np.cumsum(num_boundaries) - num_boundaries,
+            "coefficients": np.concatenate(coefficients or [np.zeros((0, width, 3))]),
+            "cursors": np.full(len(trajectories), -1, dtype=np.intp),
+            "first_points": np.array(
+                [item.first_point for item in trajectories]
+            ).reshape(-1, 3),
+            "last_points": np.array([item.last_point for item in trajectories]).reshape(
+                -1, 3
+            ),
+            "num_segments": num_segments,
+            "segment_offsets": np.cumsum(num_segments) - num_segments,
+        }
+
+    def _contains(
+        self,
+        cursors: NDArray[np.intp],
+        time: float,
+        rows: Optional[NDArray[np.intp]] = None,
+    ) -> NDArray[np.bool_]:
+        """Returns whether the segments pointed to by the given cursors contain
+        the given timestamp, optionally restricted to the given rows.
+        """
+        assert self._state is not None
+
+        boundaries = self._state["boundaries"]
+        offsets = self._state["boundary_offsets"]
+        counts = self._state["num_segments"]
+        if rows is not None:
+            cursors, offsets, counts = cursors[rows], offsets[rows], counts[rows]
+
+        lower = np.where(
+            cursors >= 0, boundaries[offsets + np.maximum(cursors, 0)], -inf
+        )
+        upper = np.where(
+            cursors < counts, boundaries[offsets + np.minimum(cursors + 1, counts)], inf
+        )
+        return (lower <= time) & (time < upper)
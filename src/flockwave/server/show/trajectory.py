@@ -255,6 +255,35 @@ class TrajectorySpecification:
 
         return bbox.get_corners()  # type: ignore
 
+    def iter_keyframes(
+        self, absolute: bool = False
+    ) -> Iterable[tuple[float, Point, list[Point]]]:
+        """Iterates over the raw keyframes of the trajectory.
+
+        Each keyframe is a triplet consisting of the timestamp of the keyframe
+        relative to the takeoff time, the coordinates of the keyframe and the
+        list of control points of the segment that _ends_ at the keyframe.
+
+        Args:
+            absolute: whether to insert a stationary keyframe at the home
+                position in front of the first keyframe if the takeoff time is
+                positive. The timestamp of the inserted keyframe is the negated
+                takeoff time so it corresponds to T=0 in absolute time.
+        """
+        points: Optional[Iterable[tuple[float, Point, list[Point]]]] = self._data.get(
+            "points"
+        )
+        if not points:
+            return iter(())
+
+        if absolute:
+            time_offset = self.takeoff_time
+            if time_offset > 0:
+                # We need to add a stationary segment
+                return chain([(-time_offset, self.home_position, [])], points)
+
+        return iter(points)
+
     def iter_segments(
         self, max_length: float = inf, absolute: bool = False
     ) -> Iterable[TrajectorySegment]:
@@ -270,24 +299,11 @@ class TrajectorySpecification:
                 constant segment will be inserted in front of the first segment
                 if the takeoff time is positive.
         """
-        point_iter: Optional[Iterable[tuple[float, Point, list[Point]]]] = (
-            self._data.get("points")
-        )
-        if not point_iter:
-            return
-
         prev_t: Optional[float] = None
         start: Optional[Point] = None
+        time_offset = self.takeoff_time if absolute else 0.0
 
-        if absolute:
-            time_offset = self.takeoff_time
-            if time_offset > 0:
-                # We need to add a stationary segment
-                point_iter = chain([(-time_offset, self.home_position, [])], point_iter)
-        else:
-            time_offset = 0.0
-
-        for point in point_iter:
+        for point in self.iter_keyframes(absolute=absolute):
             t, point, control = point
             if prev_t is None:
                 # This is the first keyframe so we simply make sure that there
@@ -0,0 +1,357 @@
+"""Vectorized encoder for trajectories in the Skybrush binary show file
+format.
+
+The encoder converts the keyframes and control points of a whole trajectory
+into NumPy arrays and then scales, classifies and packs all the segments at
+once instead of looping over the segments and their coordinates in Python.
+The output is byte-identical to the output of SegmentEncoder_, which remains
+the reference implementation.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from math import ceil, inf
+from numpy.typing import NDArray
+
+from .trajectory import TrajectorySegment, TrajectorySpecification
+from .utils import Point
+
+__all__ = ("BatchSegmentEncoder", "TrajectoryArrays")
+
+
+_FORMAT_CODES: dict[int, int] = {1: 1, 3: 2, 7: 3}
+"""Mapping from the number of encoded coordinates per axis in a non-constant
+segment to the corresponding format code in the segment header.
+"""
+
+
+class TrajectoryArrays:
+    """NumPy representation of the segments of a trajectory.
+
+    Each segment is stored as a row of a padded array of points. Rows of
+    segments with fewer points than the widest segment are padded with the
+    end point of the segment.
+    """
+
+    durations: NDArray[np.float64]
+    """Durations of the segments, in seconds."""
+
+    extent: NDArray[np.float64]
+    """All the keyframes and control points of the trajectory specification,
+    excluding the stationary keyframe inserted in front of the trajectory for
+    absolute timestamps. Used to calculate the bounding box.
+    """
+
+    num_points: NDArray[np.intp]
+    """Number of points of each segment, including the start and end point."""
+
+    points: NDArray[np.float64]
+    """Padded array of shape (number of segments, max number of points, 3)
+    holding the points of the segments, including the start and end points.
+    """
+
+    start_times: NDArray[np.float64]
+    """Start times of the segments, in seconds."""
+
+    def __init__(
+        self,
+        start_times: NDArray[np.float64],
+        durations: NDArray[np.float64],
+        num_points: NDArray[np.intp],
+        points: NDArray[np.float64],
+        extent: NDArray[np.float64],
+    ):
+        """Constructor.
+
+        Use from_trajectory() to create an instance from a trajectory
+        specification.
+        """
+        self.durations = durations
+        self.extent = extent
+        self.num_points = num_points
+        self.points = points
+        self.start_times = start_times
+
+    @classmethod
+    def from_trajectory(
+        cls,
+        trajectory: TrajectorySpecification,
+        max_length: float = inf,
+        absolute: bool = False,
+    ):
+        """Creates the array representation of the segments of a trajectory.
+
+        The segments are identical to the ones returned from
+        ``trajectory.iter_segments()`` with the same arguments, and the same
+        errors are raised for invalid trajectories.
+
+        Args:
+            trajectory: the trajectory to convert
+            max_length: maximum allowed length of a single segment, in seconds.
+                Segments longer than this will be split as needed.
+            absolute: whether to insert a stationary segment in front of the
+                first segment if the takeoff time is positive
+        """
+        keyframes = list(trajectory.iter_keyframes(absolute=absolute))
+        if absolute and trajectory.takeoff_time > 0:
+            extent_keyframes = keyframes[1:]
+        else:
+            extent_keyframes = keyframes
+
+        extent = [point for _, point, _ in extent_keyframes]
+        extent.extend(
+            control_point
+            for _, _, control in extent_keyframes
+            for control_point in control
+        )
+        extent = np.array(extent, dtype=np.float64).reshape(-1, 3)
+
+        if not keyframes:
+            return cls(
+                np.zeros(0),
+                np.zeros(0),
+                np.zeros(0, dtype=np.intp),
+                np.zeros((0, 2, 3)),
+                extent,
+            )
+
+        if keyframes[0][2]:
+            raise ValueError("first keyframe must have no control points")
+
+        # Durations are rounded to milliseconds the same way as in
+        # iter_segments(); we need the Python round() here to be exact
+        times = [t for t, _, _ in keyframes]
+        durations = np.array(
+            [round(t - prev_t, 3) for prev_t, t in zip(times, times[1:])],
+            dtype=np.float64,
+        )
+        if durations.size and durations.min() <= 0:
+            index = int(np.argmax(durations <= 0))
+            t = times[index + 1]
+            if durations[index] < 0:
+                raise ValueError(f"time should not move backwards at t = {t}")
+            else:
+                raise ValueError(f"time should not stand still at t = {t}")
+
+        # Build a padded array of points for each segment. Padding is filled
+        # with the end point of the segment so the padding never affects
+        # the detection of constant segments
+        keyframe_points = np.array(
+            [point for _, point, _ in keyframes], dtype=np.float64
+        ).reshape(-1, 3)
+        num_controls = np.array(
+            [len(control) for _, _, control in keyframes[1:]], dtype=np.intp
+        )
+        num_segments = len(keyframes) - 1
+        width = int(num_controls.max()) + 2 if num_segments else 2
+
+        points = np.empty((num_segments, width, 3), dtype=np.float64)
+        points[:, 0, :] = keyframe_points[:-1]
+        points[:, 1:, :] = keyframe_points[1:, None, :]
+
+        if num_controls.any():
+            controls = np.array(
+                [point for _, _, control in keyframes[1:] for point in control],
+                dtype=np.float64,
+            ).reshape(-1, 3)
+            segment_indices = np.repeat(np.arange(num_segments), num_controls)
+            offsets = np.cumsum(num_controls) - num_controls
+            positions = np.arange(len(controls)) - offsets[segment_indices]
+            points[segment_indices, positions + 1, :] = controls
+
+        time_offset = trajectory.takeoff_time if absolute else 0.0
+        start_times = np.array(times[:-1], dtype=np.float64) + time_offset
+
+        result = cls(start_times, durations, num_controls + 2, points, extent)
+
+        if max_length < inf and durations.size and durations.max() > max_length:
+            result._split_long_segments(max_length)
+
+        return result
+
+    @property
+    def bounding_box(self) -> tuple[Point, Point]:
+        """Returns the coordinates of the opposite corners of the axis-aligned
+        bounding box of the trajectory.
+
+        Raises:
+            ValueError: if the trajectory has no points
+        """
+        if not len(self.extent):
+            raise ValueError("the bounding box is empty")
+
+        mins = self.extent.min(axis=0)
+        maxs = self.extent.max(axis=0)
+        return tuple(mins.tolist()), tuple(maxs.tolist())  # type: ignore
+
+    @property
+    def is_empty(self) -> bool:
+        """Returns whether the trajectory has no segments."""
+        return not len(self.durations)
+
+    def propose_scaling_factor(self) -> int:
+        """Proposes a scaling factor to use in a Skybrush binary show file when
+        storing the trajectory.
+
+        See TrajectorySpecification.propose_scaling_factor() for more details.
+        """
+        if not len(self.extent):
+            return 1
+
+        extremum = ceil(float(np.abs(self.extent).max()) * 1000)
+        return ceil((extremum + 1) / 32768)
+
+    def _split_long_segments(self, max_length: float) -> None:
+        """Splits the segments longer than the given maximum length in place.
+
+        Long segments are rare so this function delegates the splitting to
+        TrajectorySegment_ to ensure that the results are identical.
+        """
+        start_times: list[float] = []
+        durations: list[float] = []
+        num_points: list[int] = []
+        rows: list[list[Point]] = []
+
+        for start_time, duration, count, row in zip(
+            self.start_times.tolist(),
+            self.durations.tolist(),
+            self.num_points.tolist(),
+            self.points.tolist(),
+        ):
+            segment = TrajectorySegment(start_time, duration, row[:count])
+            pieces = (
+                segment.split_to_max_duration(max_length)
+                if duration > max_length
+                else (segment,)
+            )
+            for piece in pieces:
+                start_times.append(piece.t)
+                durations.append(piece.duration)
+                num_points.append(len(piece.points))
+                rows.append(piece.points)
+
+        width = max(num_points)
+        points = np.empty((len(rows), width, 3), dtype=np.float64)
+        for index, row in enumerate(rows):
+            points[index, : len(row)] = row
+            points[index, len(row) :] = row[-1]
+
+        self.start_times = np.array(start_times, dtype=np.float64)
+        self.durations = np.array(durations, dtype=np.float64)
+        self.num_points = np.array(num_points, dtype=np.intp)
+        self.points = points
+
+
+class BatchSegmentEncoder:
+    """Vectorized encoder for all the segments of a trajectory in the
+    Skybrush binary show file format.
+
+    The encoder produces the same output as
+    ``SegmentEncoder.encode_multiple_segments()`` with the same scaling factor.
+    """
+
+    _scale: float
+
+    def __init__(self, scale: float = 1):
+        """Constructor.
+
+        Parameters:
+            scale: the scaling factor of the trajectory block; see
+                SegmentEncoder_ for more details
+        """
+        self._scale = 1000 / scale
+
+    def encode(self, trajectory: TrajectoryArrays) -> bytes:
+        """Encodes the start point of the first segment of the trajectory,
+        followed by each segment without its start point.
+
+        Args:
+            trajectory: the array representation of the trajectory
+
+        Returns:
+            the encoded representation of the segments
+        """
+        if trajectory.is_empty:
+            return b""
+
+        durations = self._encode_durations(trajectory.durations)
+
+        # Truncate towards zero, see SegmentEncoder._scale_point() for the
+        # explanation
+        scaled = np.trunc(trajectory.points * self._scale).astype(np.int64)
+        scaled = scaled.transpose(0, 2, 1)  # segment, axis, point
+        num_segments, _, width = scaled.shape
+
+        is_constant = (scaled == scaled[:, :, :1]).all(axis=2)
+
+        # Number of coordinates per axis after promoting quadratic segments
+        # to cubic ones. Padding already contains the end point so the third
+        # coordinate of promoted segments is correct even for narrow arrays
+        num_coords = trajectory.num_points - 1
+        is_quadratic = num_coords == 2
+        num_coords[is_quadratic] = 3
+
+        coords = scaled[:, :, 1:]
+        if coords.shape[2] < 3:
+            padding = np.repeat(coords[:, :, -1:], 3 - coords.shape[2], axis=2)
+            coords = np.concatenate([coords, padding], axis=2)
+        if is_quadratic.any():
+            first = scaled[is_quadratic, :, 0]
+            control, end = coords[is_quadratic, :, 0], coords[is_quadratic, :, 1]
+            coords[is_quadratic, :, 0] = np.rint((first + 2 * control) / 3)
+            coords[is_quadratic, :, 1] = np.rint((2 * control + end) / 3)
+
+        format_codes = np.zeros(num_segments, dtype=np.int64)
+        for count in np.unique(num_coords[~is_constant.all(axis=1)]).tolist():
+            if count not in _FORMAT_CODES:
+                raise NotImplementedError(f"{count}D curves not implemented yet")
+            format_codes[num_coords == count] = _FORMAT_CODES[count]
+
+        formats = np.where(is_constant, 0, format_codes[:, None])
+        header = formats[:, 0] | (formats[:, 1] << 2) | (formats[:, 2] << 4)
+
+        # Each segment becomes a row of a byte matrix with the header, then
+        # the X, Y and Z coordinates; a mask selects the bytes that belong to
+        # the encoded segment
+        max_coords = coords.shape[2]
+        coord_mask = (
+            np.arange(max_coords)[None, None, :] < num_coords[:, None, None]
+        ) & ~is_constant[:, :, None]
+        if (coord_mask & ((coords < -32768) | (coords > 32767))).any():
+            raise OverflowError("trajectory coordinate does not fit into 16 bits")
+
+        rows = np.empty((num_segments, 3 + 6 * max_coords), dtype=np.uint8)
+        rows[:, 0] = header
+        rows[:, 1:3] = durations.astype("<u2").view(np.uint8).reshape(-1, 2)
+        rows[:, 3:] = (
+            np.ascontiguousarray(coords, dtype="<i2")
+            .view(np.uint8)
+            .reshape(num_segments, -1)
+        )
+
+        mask = np.empty(rows.shape, dtype=bool)
+        mask[:, :3] = True
+        mask[:, 3:] = np.repeat(coord_mask, 2, axis=2).reshape(num_segments, -1)
+
+        start = self._encode_start_point(trajectory.points[0, 0])
+        return start + rows[mask].tobytes()
+
+    def _encode_durations(self, durations: NDArray[np.float64]) -> NDArray[np.int64]:
+        result = np.floor(durations * 1000).astype(np.int64)
+        invalid = (result < 0) | (result > 65535)
+        if invalid.any():
+            duration = int(result[np.argmax(invalid)])
+            raise RuntimeError(
+                f"trajectory segment must be in the range 0-65535 msec, got {duration} msec"
+            )
+        return result
+
+    def _encode_start_point(self, point: NDArray[np.float64]) -> bytes:
+        # Same as SegmentEncoder.encode_point() with zero yaw
+        scaled = np.zeros(4, dtype=np.int64)
+        scaled[:3] = np.trunc(point * self._scale)
+        if (scaled < -32768).any() or (scaled > 32767).any():
+            raise OverflowError("trajectory coordinate does not fit into 16 bits")
+        return scaled.astype("<i2").tobytes()
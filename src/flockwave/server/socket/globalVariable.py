@@ -1,142 +1,114 @@
-home_pos = []
-goal_points = []
-goal_table = []
-return_goal_table = []
-grid_path_table = []
-Takeoff_Alt = 2.5
-logCounter = 0
-log_file_path = ""
-area_covered, minutes, seconds = 0, 0, 0
-removed_uav_grid_file_name = []
-removed_uav_grid_path_length = []
-vehicles = []
-mission = []
+"""Accessors for the shared state of the swarm mission.
+
+The state itself lives in a thread-safe SwarmState_ store; the functions in
+this module are thin wrappers around the global instance of the store. The
+getters return the values from the current snapshot of the store without
+locking, so they are safe to call from any thread.
+"""
+
+from .state import SwarmState
+
+swarm_state = SwarmState()
+"""The global store holding the shared state of the swarm mission."""
 
 
 def update_vehicle(veh):
-    global vehicles
-    print("Updating Vehiclessss")
-    vehicles.extend(veh)
+    swarm_state.add_vehicles(veh)
 
 
 def get_vehicle():
-    global vehicles
-    print(vehicles)
-    return vehicles
+    return swarm_state.snapshot.vehicles
 
 
 def update_coverage_time(area_covered1, minutes1, seconds1):
-    global area_covered, minutes, seconds
-    area_covered = area_covered1
-    minutes = minutes1
-    seconds = seconds1
+    swarm_state.update(coverage=(area_covered1, minutes1, seconds1))
 
 
 def get_coverage_time():
-    return [area_covered, minutes, seconds]
+    return list(swarm_state.snapshot.coverage)
 
 
 def update_logCounter():
-    global logCounter
-    logCounter = 1
+    swarm_state.update(log_counter=1)
 
 
 def get_logCounter():
-    global logCounter
-    return logCounter
+    return swarm_state.snapshot.log_counter
 
 
 def update_log_file_path(file_path):
-    global log_file_path
-    log_file_path = file_path
+    swarm_state.update(log_file_path=file_path)
 
 
 def get_log_file_path():
-    global log_file_path
-    return log_file_path
+    return swarm_state.snapshot.log_file_path
 
 
 def update_home(home_pos_val):
-    global home_pos
-    home_pos = home_pos_val
+    swarm_state.update(home=home_pos_val)
 
 
 def get_home():
-    global home_pos
-    return home_pos
+    return swarm_state.snapshot.home
 
 
 def update_goal_points(goal_ponits_val):
-    global goal_points
-    goal_points = goal_ponits_val
+    swarm_state.update(goal_points=goal_ponits_val)
 
 
 def get_goal_points():
-    global goal_points
-    return goal_points
+    return swarm_state.snapshot.goal_points
 
 
 def update_goal_table(goal_table_val):
-    global goal_table
-    goal_table.append(goal_table_val)
+    swarm_state.add_goal(goal_table_val)
 
 
 def get_goal_table():
-    global goal_table
-    return goal_table
+    return swarm_state.snapshot.goal_table
 
 
 def update_return_goal_table(return_goal_table_val):
-    global return_goal_table
-    return_goal_table.append(return_goal_table_val)
+    swarm_state.add_return_goal(return_goal_table_val)
 
 
 def get_return_goal_table():
-    global return_goal_table
-    return return_goal_table
+    return swarm_state.snapshot.return_goal_table
 
 
 def update_grid_path_table(grid_path_table_val):
-    global grid_path_table
-    grid_path_table = grid_path_table_val
+    swarm_state.set_grid_path_table(grid_path_table_val)
 
 
 def get_grid_path_table():
-    global grid_path_table
-    return grid_path_table
+    return swarm_state.snapshot.grid_path_table
 
 
 def update_Takeoff_Alt(alt):
-    global Takeoff_Alt
-    Takeoff_Alt = alt
+    swarm_state.update(takeoff_alt=alt)
 
 
 def getTakeoffAlt():
-    global Takeoff_Alt
-    return Takeoff_Alt
+    return swarm_state.snapshot.takeoff_alt
 
 
 def update_RemovedUAVfilename(filename, grid_path_length):
-    global removed_uav_grid_file_name, removed_uav_grid_path_length
-    removed_uav_grid_file_name = filename
-    removed_uav_grid_path_length = grid_path_length
+    swarm_state.add_removed_uav_grid_path(filename, grid_path_length)
 
 
 def getRemovedUAVfilename():
-    global removed_uav_grid_file_name
-    return removed_uav_grid_file_name
+    paths = swarm_state.snapshot.removed_uav_grid_paths
+    return next(reversed(paths), "") if paths else ""
 
 
 def getRemovedUAVgridpathlength():
-    global removed_uav_grid_path_length
-    return removed_uav_grid_path_length
+    paths = swarm_state.snapshot.removed_uav_grid_paths
+    return paths[next(reversed(paths))] if paths else []
 
 
 def saveDownload(new_mission):
-    global mission
-    mission.extend(new_mission)
+    swarm_state.extend_mission(new_mission)
 
 
 def downloadMission():
-    global mission
-    return mission
+    return swarm_state.snapshot.mission
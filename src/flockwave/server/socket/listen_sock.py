@@ -1,128 +1,357 @@
-import socket, json
+"""Listener for the status datagrams that the onboard software of the drones
+in the swarm sends back to the server over UDP.
+
+The listener runs as a Trio task in the nursery of the server and is driven
+by the readiness of its socket, so it consumes no CPU when the swarm is
+silent. Incoming datagrams are routed to their handlers with a prefix-keyed
+dispatch table, and the lines to be logged are written to the log file in
+batches. Datagrams in the binary ``share_data`` protocol (see the
+``protocol`` module) are reassembled and applied to the state of the swarm.
+"""
+
+from __future__ import annotations
+
+import json
+import trio.socket
+
 from datetime import datetime
-from .globalVariable import *
+from io import TextIOWrapper
+from os import listdir, makedirs, path
+from trio import open_nursery, sleep
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from flockwave.server.logger import log as base_log
+
+from .globalVariable import get_log_file_path, swarm_state, update_log_file_path
+from .protocol import ShareDataDecoder, ShareDataMessage, is_binary_frame
+
+__all__ = ("PrefixTable", "SwarmTelemetryListener")
+
+log = base_log.getChild("swarm.listener")
+
+T = TypeVar("T")
+
+Handler = Callable[["SwarmTelemetryListener", str, str], bool]
+"""Type specification for datagram handlers. Handlers are called with the
+listener, the decoded datagram and the formatted timestamp of its arrival,
+and return whether the processing of the datagram should stop.
+"""
+
+
+class PrefixTable(dict[str, T], Generic[T]):
+    """Dictionary keyed by string prefixes that finds the entry belonging to
+    the longest registered prefix of a string.
+
+    Lookups cost one hash lookup per distinct prefix length in the table
+    instead of one ``startswith()`` call per registered prefix.
+    """
+
+    _lengths: list[int]
+
+    def __init__(self, *args, **kwds):
+        super().__init__(*args, **kwds)
+        self._update_lengths()
+
+    def __setitem__(self, key: str, value: T) -> None:
+        super().__setitem__(key, value)
+        self._update_lengths()
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self._update_lengths()
+
+    def find(self, value: str) -> Optional[T]:
+        """Returns the entry belonging to the longest registered prefix of the
+        given string, or ``None`` if no registered key is a prefix of it.
+        """
+        for length in self._lengths:
+            entry = self.get(value[:length])
+            if entry is not None:
+                return entry
+        return None
+
+    def _update_lengths(self) -> None:
+        self._lengths = sorted({len(key) for key in self}, reverse=True)
+
+
+def _handle_log_line(listener: SwarmTelemetryListener, data: str, now: str) -> bool:
+    listener.write_log_line(now, data)
+    return False
+
+
+def _handle_home_pos(listener: SwarmTelemetryListener, data: str, now: str) -> bool:
+    home_pos = json.loads(data[8:])
+    swarm_state.update(home=home_pos)
+    listener.write_log_line(now, home_pos)
+    return True
+
+
+def _handle_goal_points(listener: SwarmTelemetryListener, data: str, now: str) -> bool:
+    goal_points = json.loads(data[11:])
+    swarm_state.update(goal_points=goal_points)
+    listener.write_log_line(now, f"goal_points{goal_points}")
+    return False
+
+
+def _handle_search(listener: SwarmTelemetryListener, data: str, now: str) -> bool:
+    _, area_covered, search_time, grid_path = data.split(",", 3)
+    search_time = float(search_time)
+    swarm_state.set_grid_path_table(json.loads(grid_path))
+    swarm_state.update(
+        coverage=(area_covered, int(search_time // 60), int(search_time % 60))
+    )
+    return False
+
+
+def _handle_removed_uav_grid_path(
+    listener: SwarmTelemetryListener, data: str, now: str
+) -> bool:
+    _, file_name, grid_path_length = data.split(",")[:3]
+    swarm_state.add_removed_uav_grid_path(file_name, grid_path_length)
+    return False
+
+
+EXACT_LOG_LINES: frozenset[str] = frozenset(
+    (
+        "start",
+        "aggregate",
+        "return",
+        "same altitude",
+        "different altitude",
+        "disperse",
+        "stop",
+        "search",
+        "circle formation",
+        "rtl",
+        "goal",
+        "specific_bot_goal",
+        "CSV Cleared",
+    )
+)
+"""Status lines that are logged if they match exactly."""
+
+DATAGRAM_HANDLERS: PrefixTable[Handler] = PrefixTable(
+    {
+        # Status lines that are simply logged
+        "Drone": _handle_log_line,
+        "vehicle": _handle_log_line,
+        "Vehicle": _handle_log_line,
+        "master_num": _handle_log_line,
+        "pos_array": _handle_log_line,
+        "home": _handle_log_line,
+        "Data": _handle_log_line,
+        "remove_bot": _handle_log_line,
+        # Status lines that carry data
+        "home_pos": _handle_home_pos,
+        "goal_points": _handle_goal_points,
+        "search,": _handle_search,
+        "remove_uav_grid_path_file_name": _handle_removed_uav_grid_path,
+    }
+)
+"""Table of datagram handlers, keyed by the prefixes of the datagrams that
+they handle. The handler of the longest matching prefix is used.
+"""
+
+PATH_SUFFIX_HANDLERS: tuple[tuple[str, Callable[[int], object]], ...] = (
+    ("path", swarm_state.add_goal),
+    ("return_path", swarm_state.add_return_goal),
+    ("grid_path", swarm_state.add_grid_path),
+)
+"""Handlers of the path index markers that the drones append as the last
+comma-separated items of their datagrams, in the order they are checked.
+"""
+
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-server_address = ("", 12009)  # receive from .....rx.py
-sock.bind(server_address)
-sock.setblocking(0)
+def _changed_entries(message: ShareDataMessage, name: str) -> list[Any]:
+    return [*message.set.get(name, ()), *message.add.get(name, ())]
 
-def run_socket():
-    with open(get_log_file_path(), "a") as file:
+
+def create_log_file_path(folder: str) -> str:
+    """Returns the path of a new, numbered log file in the given folder,
+    creating the folder if needed.
+    """
+    makedirs(folder, exist_ok=True)
+    return path.join(folder, f"log_{len(listdir(folder)) + 1}.txt")
+
+
+class SwarmTelemetryListener:
+    """Trio-based listener for the status datagrams sent by the drones in the
+    swarm.
+    """
+
+    flush_interval: float
+    """Maximum number of seconds that a log line may spend in the write
+    buffer before it is written to the log file.
+    """
+
+    max_batch_size: int
+    """Maximum number of log lines to collect before they are written to the
+    log file.
+    """
+
+    log_dir: Optional[str]
+    """Folder in which a new log file is created for the session if no log
+    file was set up explicitly; ``None`` if no log file should be created.
+    """
+
+    on_datagram: Optional[Callable[[bytes, str], object]]
+    """Optional function to call with each received datagram and the IP
+    address of its sender; used to feed acknowledgments back to the swarm
+    command dispatcher.
+    """
+
+    port: int
+    """The UDP port that the listener listens on."""
+
+    _decoders: dict[str, ShareDataDecoder]
+    _file: Optional[TextIOWrapper]
+    _pending_lines: list[str]
+
+    def __init__(
+        self,
+        port: int = 12009,
+        *,
+        log_dir: Optional[str] = None,
+        on_datagram: Optional[Callable[[bytes, str], object]] = None,
+        flush_interval: float = 1,
+        max_batch_size: int = 256,
+    ):
+        """Constructor.
+
+        Parameters:
+            port: the UDP port to listen on
+            log_dir: folder in which a new log file is created for the
+                session if no log file was set up explicitly
+            on_datagram: function to call with each received datagram and the
+                IP address of its sender
+            flush_interval: maximum number of seconds that a log line may
+                spend in the write buffer
+            max_batch_size: maximum number of log lines to collect before
+                they are written to the log file
+        """
+        self.flush_interval = flush_interval
+        self.log_dir = log_dir
+        self.max_batch_size = max_batch_size
+        self.on_datagram = on_datagram
+        self.port = port
+
+        self._decoders = {}
+        self._file = None
+        self._pending_lines = []
+
+    def handle_datagram(self, data: str) -> None:
+        """Processes a single decoded datagram received from a drone."""
+        now = datetime.now().strftime("%H:%M:%S")
+
+        if data in EXACT_LOG_LINES:
+            handler = _handle_log_line
+        else:
+            handler = DATAGRAM_HANDLERS.find(data)
+            if handler is None and data.endswith("vehicle removed"):
+                handler = _handle_log_line
+
+        if handler is not None and handler(self, data, now):
+            return
+
+        head, _, tail = data.rpartition(",")
+        for prefix, update in PATH_SUFFIX_HANDLERS:
+            tail = tail.strip()
+            if tail.startswith(prefix):
+                update(int(tail[len(prefix) :]))
+                head, _, tail = head.rpartition(",")
+
+    def handle_frame(self, data: bytes, host: str) -> Optional[ShareDataMessage]:
+        """Processes a single frame of the binary ``share_data`` protocol
+        received from a drone, and applies the tables in the message to the
+        state of the swarm if the frame completed a message.
+
+        Returns:
+            the applied message, or ``None`` if the frame did not complete a
+            message that could be applied
+        """
+        decoder = self._decoders.get(host)
+        if decoder is None:
+            decoder = self._decoders[host] = ShareDataDecoder()
+
+        message = decoder.feed(data, host)
+        if message is None:
+            return None
+
+        # Only the entries in the message itself need to be looked at; the
+        # store ignores the ones that it knows already
+        for name, add in (
+            ("goal_table", swarm_state.add_goal),
+            ("return_goal_table", swarm_state.add_return_goal),
+        ):
+            for index in _changed_entries(message, name):
+                add(index)
+
+        if "grid_path_table" in message.set:
+            swarm_state.set_grid_path_table(decoder.tables["grid_path_table"])
+        else:
+            for value in message.add.get("grid_path_table", ()):
+                swarm_state.add_grid_path(value)
+
+        return message
+
+    async def run(self) -> None:
+        """Runs the listener until it is cancelled."""
+        sock = trio.socket.socket(trio.socket.AF_INET, trio.socket.SOCK_DGRAM)
+        try:
+            try:
+                await sock.bind(("", self.port))
+            except OSError as ex:
+                log.error(f"Cannot listen for swarm status on port {self.port}: {ex}")
+                return
+
+            file_path = get_log_file_path()
+            if not file_path and self.log_dir:
+                file_path = create_log_file_path(self.log_dir)
+                update_log_file_path(file_path)
+
+            self._file = open(file_path, "a") if file_path else None
+
+            async with open_nursery() as nursery:
+                nursery.start_soon(self._flush_periodically)
+                await self._receive_datagrams(sock)
+        finally:
+            sock.close()
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def write_log_line(self, timestamp: str, message: object) -> None:
+        """Schedules a line to be written to the log file of the swarm."""
+        if self._file is None:
+            return
+
+        self._pending_lines.append(f"{timestamp}\t{message}\n")
+        if len(self._pending_lines) >= self.max_batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending_lines and self._file is not None:
+            self._file.writelines(self._pending_lines)
+            self._file.flush()
+        self._pending_lines.clear()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await sleep(self.flush_interval)
+            self._flush()
+
+    async def _receive_datagrams(self, sock: trio.socket.SocketType) -> None:
         while True:
+            data, address = await sock.recvfrom(65536)
+
+            if self.on_datagram is not None:
+                self.on_datagram(data, address[0])
 
-            # #print("filepath",filepath)
             try:
-                data, address = sock.recvfrom(1024)
-                data = data.decode()
-                current_time = datetime.now().strftime("%H:%M:%S")
-                if (
-                    (data == "start")
-                    or (data == "aggregate")
-                    or (data == "return")
-                    or (data == "same altitude")
-                    or (data == "different altitude")
-                    or (data == "disperse")
-                    or (data == "stop")
-                    or (data == "search")
-                    or (data == "circle formation")
-                    or (data.startswith("Drone"))
-                    or (data.startswith("vehicle"))
-                    or (data.startswith("Vehicle"))
-                    or (data.startswith("master_num"))
-                    or (data.startswith("pos_array"))
-                    or (data.startswith("Drone"))
-                    or (data.startswith("home"))
-                    or (data.startswith("Data"))
-                    or (data == "rtl")
-                    or (data == "goal")
-                    or (data == "specific_bot_goal")
-                    or (data == "CSV Cleared")
-                    or (data.startswith("remove_bot"))
-                    or (data.endswith("vehicle removed"))
-                ):
-                    #print(str(data), " command received")
-                    file.write("{}\t{}\n".format(current_time,str(data)))
-                    file.flush()
-                    
-
-                if data.startswith("home_pos"):
-                    message_with_array = data
-                    message = message_with_array[
-                        :8
-                    ]  # Assuming "home_pos" is 8 characters long
-                    array_data = message_with_array[8:]
-                    # Deserialize the array data
-                    home_pos_data = json.loads(array_data)
-                    update_home(home_pos_data)
-                    
-                    
-                    file.write("{}\t{}\n".format(current_time,home_pos_data))
-                    file.flush()
-                    continue
-
-                if data.startswith("goal_points"):
-                    message_with_array = data
-                    array_data = message_with_array[11:]
-                    goal_points = json.loads(array_data)
-                    update_goal_points(goal_points)
-                    file.write("{}\tgoal_points{}\n".format(current_time,goal_points))
-                    file.flush()
-
-                if data.startswith("search,"):
-                    a = data.split(",")
-                    area_covered = a[1]
-                    search_time = a[2]
-                    grid_path_array_str = ",".join(a[3:])
-                    grid_path_table = json.loads(grid_path_array_str)
-                    update_grid_path_table(grid_path_table)
-                    
-                    minutes = int(float(search_time) // 60)
-                    seconds = int(float(search_time) % 60)
-                    update_coverage_time(area_covered, minutes, seconds)
-                
-                    
-                if data.startswith("remove_uav_grid_path_file_name"):
-                    a = data.split(",")
-                    file_name=(a[1])
-                    grid_path_length=(a[2])
-                    if file_name not in getRemovedUAVfilename:
-                        update_RemovedUAVfilename(file_name,grid_path_length)
-                    
-                a = data.split(",")
-                # #print('a',a[-1],type(a[-1]))
-
-                if a[-1].strip().startswith("path"):
-                    last_element = a.pop()
-                    #print("last_element", last_element, type(last_element))
-                    if last_element.strip().startswith("path"):
-                        h = int(last_element[4:])
-                        if h not in get_goal_table():
-                            update_goal_table(h)
-                if a[-1].strip().startswith("return_path"):
-                    # Remove the last element (which is "path4")
-                    last_element = a.pop()
-                    if last_element.strip().startswith("return_path"):
-                        h = int(last_element[11:])
-                        if h not in get_return_goal_table():
-
-                            update_return_goal_table(h)
-     
-                if a[-1].strip().startswith("grid_path"):
-                    last_element = a.pop()
-                    if last_element.strip().startswith("grid_path"):
-                        h = int(last_element[9:])
-                        if h not in get_grid_path_table():
-                            #print("h$$$$$$$$$$$", h)
-                            update_grid_path_table(h)
-                       
-                # a = [value.strip("{}") for value in a]  # Remove curly braces
-            except BlockingIOError:
-                pass
-            except Exception as e:
-                print(e)
-            except KeyboardInterrupt:
-                print("keyboard")
-                break
-            except:
-                pass
\ No newline at end of file
+                if is_binary_frame(data):
+                    self.handle_frame(data, address[0])
+                else:
+                    self.handle_datagram(data.decode("utf-8"))
+            except Exception as ex:
+                log.warning(f"Invalid swarm status datagram from {address[0]}: {ex}")
@@ -0,0 +1,426 @@
+"""Compact, versioned binary encoding of the tables that are shared between
+the server and the onboard software of the drones in the swarm (the goal
+table, the return goal table and the grid path table).
+
+Each message is encoded with MessagePack and split into one or more frames
+so that every frame fits into a single UDP datagram. Every frame starts with
+a fixed-size header:
+
+  - magic bytes (2 bytes, ``0xFB 0x5D``)
+  - protocol version (1 byte)
+  - flags (1 byte; bit 0 is set for delta messages)
+  - message ID (2 bytes, little endian, wraps around)
+  - index of the frame within the message (2 bytes, little endian)
+  - total number of frames in the message (2 bytes, little endian)
+
+The body of a message is a MessagePack map with the following keys:
+
+  - ``seq``: the sequence number of the message
+  - ``base``: the sequence number of the message that the delta is relative
+    to; omitted for full messages
+  - ``set``: mapping from table names to the full contents of the tables
+  - ``add``: mapping from table names to the entries appended to the tables
+    since the base message; only in delta messages
+
+The module has no dependencies on the rest of the server so the onboard
+listener of the drones can use the same encoder and decoder. Drones
+acknowledge applied messages by replying with ``share_data_ack,<seq>``; the
+server then sends the subsequent messages as deltas relative to the
+acknowledged one.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from msgpack import packb, unpackb
+from struct import Struct
+from time import monotonic
+from typing import Any, Hashable, Mapping, Optional, Sequence
+
+__all__ = (
+    "FrameAssembler",
+    "ShareDataDecoder",
+    "ShareDataEncoder",
+    "ShareDataMessage",
+    "decode_frame_header",
+    "encode_message",
+    "is_binary_frame",
+)
+
+
+MAGIC = b"\xfb\x5d"
+"""Magic bytes at the start of each frame."""
+
+PROTOCOL_VERSION = 1
+"""Version number of the protocol."""
+
+FLAG_DELTA = 0x01
+"""Flag that marks delta messages in the frame header."""
+
+HEADER = Struct("<2sBBHHH")
+"""Structure of the frame header."""
+
+DEFAULT_MTU = 1200
+"""Default maximum size of a frame, including the header. Chosen so that a
+frame fits into a single UDP datagram on all common links, even with VPN or
+tunneling overhead.
+"""
+
+Tables = Mapping[str, Sequence[Any]]
+"""Type alias for a mapping from table names to table contents."""
+
+
+@dataclass(frozen=True)
+class ShareDataMessage:
+    """A single decoded message carrying table contents or table changes."""
+
+    seq: int
+    """Sequence number of the message."""
+
+    base: Optional[int] = None
+    """Sequence number of the message that this delta is relative to;
+    ``None`` for full messages.
+    """
+
+    set: dict[str, list[Any]] = field(default_factory=dict)
+    """Tables whose contents are replaced entirely."""
+
+    add: dict[str, list[Any]] = field(default_factory=dict)
+    """Entries to append to the tables."""
+
+    @property
+    def is_delta(self) -> bool:
+        """Whether the message is a delta message."""
+        return self.base is not None
+
+
+def is_binary_frame(data: bytes) -> bool:
+    """Returns whether the given datagram is a frame of the binary protocol."""
+    return data[:2] == MAGIC
+
+
+def decode_frame_header(data: bytes) -> tuple[int, int, int, int]:
+    """Decodes the header of a frame.
+
+    Returns:
+        the flags, the message ID, the index of the frame and the number of
+        frames in the message
+
+    Raises:
+        ValueError: if the frame is invalid or uses an unsupported version of
+            the protocol
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("frame too short")
+
+    magic, version, flags, message_id, index, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("invalid magic bytes")
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"unsupported protocol version: {version}")
+    if count == 0 or index >= count:
+        raise ValueError("invalid frame index")
+
+    return flags, message_id, index, count
+
+
+def encode_message(
+    message: ShareDataMessage, *, message_id: int = 0, mtu: int = DEFAULT_MTU
+) -> list[bytes]:
+    """Encodes a message into one or more frames, each of which fits into
+    the given MTU.
+    """
+    body: dict[str, Any] = {"seq": message.seq}
+    if message.base is not None:
+        body["base"] = message.base
+    if message.set:
+        body["set"] = message.set
+    if message.add:
+        body["add"] = message.add
+
+    payload = packb(body, use_bin_type=True)
+    chunk_size = mtu - HEADER.size
+    if chunk_size <= 0:
+        raise ValueError("MTU too small")
+
+    count = max((len(payload) + chunk_size - 1) // chunk_size, 1)
+    if count > 0xFFFF:
+        raise ValueError("message too large")
+
+    flags = FLAG_DELTA if message.is_delta else 0
+    message_id &= 0xFFFF
+
+    return [
+        HEADER.pack(MAGIC, PROTOCOL_VERSION, flags, message_id, index, count)
+        + payload[index * chunk_size : (index + 1) * chunk_size]
+        for index in range(count)
+    ]
+
+
+def _decode_body(payload: bytes) -> ShareDataMessage:
+    body = unpackb(payload, raw=False, strict_map_key=False)
+    if not isinstance(body, dict) or "seq" not in body:
+        raise ValueError("invalid message body")
+    return ShareDataMessage(
+        seq=int(body["seq"]),
+        base=body.get("base"),
+        set=dict(body.get("set") or {}),
+        add=dict(body.get("add") or {}),
+    )
+
+
+class FrameAssembler:
+    """Reassembles messages from their frames, possibly arriving out of
+    order and from multiple senders at the same time.
+
+    Incomplete messages are discarded after a timeout, or when too many
+    incomplete messages are pending.
+    """
+
+    max_pending: int
+    """Maximum number of incomplete messages to keep."""
+
+    timeout: float
+    """Number of seconds after which an incomplete message is discarded."""
+
+    _pending: dict[tuple[Hashable, int], tuple[float, list[Optional[bytes]]]]
+
+    def __init__(self, *, timeout: float = 5, max_pending: int = 64):
+        """Constructor."""
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pending = {}
+
+    def feed(self, data: bytes, sender: Hashable = None) -> Optional[ShareDataMessage]:
+        """Feeds a frame into the assembler.
+
+        Parameters:
+            data: the frame
+            sender: identifier of the sender of the frame; frames from
+                different senders are never mixed
+
+        Returns:
+            the decoded message if the frame completed a message, ``None``
+            otherwise
+
+        Raises:
+            ValueError: if the frame or the message is invalid
+        """
+        _, message_id, index, count = decode_frame_header(data)
+        chunk = data[HEADER.size :]
+
+        if count == 1:
+            return _decode_body(chunk)
+
+        now = monotonic()
+        key = (sender, message_id)
+        entry = self._pending.get(key)
+        if entry is None or len(entry[1]) != count or now - entry[0] > self.timeout:
+            self._expire(now)
+            entry = (now, [None] * count)
+            self._pending[key] = entry
+
+        chunks = entry[1]
+        chunks[index] = chunk
+        if any(item is None for item in chunks):
+            return None
+
+        del self._pending[key]
+        return _decode_body(b"".join(chunks))  # type: ignore
+
+    @property
+    def num_pending(self) -> int:
+        """Number of incomplete messages in the assembler."""
+        return len(self._pending)
+
+    def _expire(self, now: float) -> None:
+        deadline = now - self.timeout
+        for key in [key for key, (t, _) in self._pending.items() if t < deadline]:
+            del self._pending[key]
+
+        while len(self._pending) >= self.max_pending:
+            del self._pending[next(iter(self._pending))]
+
+
+class ShareDataEncoder:
+    """Encoder for the tables sent to a single drone.
+
+    The encoder keeps track of the table contents in the last message that
+    the drone acknowledged, and sends only the entries appended since then
+    if delta mode is enabled. Full messages are sent when there is no
+    acknowledged message yet, when a table was changed in a way other than
+    appending to it, and periodically for resynchronization.
+    """
+
+    delta: bool
+    """Whether delta messages may be sent."""
+
+    keyframe_interval: int
+    """Number of consecutive delta messages after which a full message is sent
+    again.
+    """
+
+    mtu: int
+    """Maximum size of a frame."""
+
+    _acked_seq: Optional[int]
+    _acked_tables: dict[str, tuple[Any, ...]]
+    _num_deltas: int
+    _seq: int
+    _sent: dict[int, dict[str, tuple[Any, ...]]]
+
+    def __init__(
+        self,
+        *,
+        delta: bool = True,
+        keyframe_interval: int = 10,
+        mtu: int = DEFAULT_MTU,
+    ):
+        """Constructor."""
+        self.delta = delta
+        self.keyframe_interval = keyframe_interval
+        self.mtu = mtu
+
+        self._acked_seq = None
+        self._acked_tables = {}
+        self._num_deltas = 0
+        self._seq = 0
+        self._sent = {}
+
+    def encode(self, tables: Tables) -> list[bytes]:
+        """Encodes the given tables into a list of frames to send."""
+        tables = {name: tuple(values) for name, values in tables.items()}
+        self._seq = (self._seq + 1) & 0xFFFF
+
+        message = None
+        if (
+            self.delta
+            and self._acked_seq is not None
+            and self._num_deltas < self.keyframe_interval
+        ):
+            message = self._create_delta(tables)
+
+        if message is None:
+            message = ShareDataMessage(
+                seq=self._seq, set={name: list(v) for name, v in tables.items()}
+            )
+            self._num_deltas = 0
+        else:
+            self._num_deltas += 1
+
+        # Remember what we sent so we can use it as a base when the drone
+        # acknowledges it; keep only a few recent messages
+        self._sent[self._seq] = tables
+        while len(self._sent) > 8:
+            del self._sent[next(iter(self._sent))]
+
+        return encode_message(message, message_id=self._seq, mtu=self.mtu)
+
+    def notify_acknowledged(self, seq: int) -> None:
+        """Notifies the encoder that the drone has received and applied the
+        message with the given sequence number.
+        """
+        tables = self._sent.get(seq)
+        if tables is not None:
+            self._acked_seq = seq
+            self._acked_tables = tables
+
+    def reset(self) -> None:
+        """Forgets the acknowledged state so the next message is a full
+        message.
+        """
+        self._acked_seq = None
+        self._acked_tables = {}
+
+    def _create_delta(
+        self, tables: dict[str, tuple[Any, ...]]
+    ) -> Optional[ShareDataMessage]:
+        if set(self._acked_tables) - set(tables):
+            # A table was dropped; deltas cannot express that
+            return None
+
+        to_set: dict[str, list[Any]] = {}
+        to_add: dict[str, list[Any]] = {}
+
+        for name, values in tables.items():
+            base = self._acked_tables.get(name)
+            if base is None or values[: len(base)] != base:
+                to_set[name] = list(values)
+            elif len(values) > len(base):
+                to_add[name] = list(values[len(base) :])
+
+        return ShareDataMessage(
+            seq=self._seq, base=self._acked_seq, set=to_set, add=to_add
+        )
+
+
+class ShareDataDecoder:
+    """Decoder that reassembles incoming messages and maintains the current
+    contents of the shared tables on the receiving side.
+
+    The decoder remembers the tables after the last few applied messages so
+    it can apply a delta even if the acknowledgment of a more recent message
+    was lost and the sender still uses an older message as the base.
+    """
+
+    assembler: FrameAssembler
+    """Assembler that reassembles messages from their frames."""
+
+    history_size: int
+    """Number of recently applied messages whose tables are remembered."""
+
+    seq: Optional[int]
+    """Sequence number of the last applied message."""
+
+    tables: dict[str, list[Any]]
+    """The current contents of the shared tables."""
+
+    _history: dict[int, dict[str, list[Any]]]
+
+    def __init__(self, *, history_size: int = 8):
+        """Constructor."""
+        self.assembler = FrameAssembler()
+        self.history_size = history_size
+        self.seq = None
+        self.tables = {}
+
+        self._history = {}
+
+    def feed(self, data: bytes, sender: Hashable = None) -> Optional[ShareDataMessage]:
+        """Feeds a frame into the decoder.
+
+        Returns:
+            the message that was applied to the tables if the frame completed
+            a message that could be applied, ``None`` otherwise. Delta
+            messages that are relative to a message that was not applied
+            here recently are ignored; the sender will eventually send a full
+            message.
+
+        Raises:
+            ValueError: if the frame or the message is invalid
+        """
+        message = self.assembler.feed(data, sender)
+        if message is None:
+            return None
+
+        if message.is_delta:
+            base = self._history.get(message.base)  # type: ignore
+            if base is None:
+                return None
+            tables = {name: list(values) for name, values in base.items()}
+        else:
+            tables = {}
+
+        for name, values in message.set.items():
+            tables[name] = list(values)
+        for name, values in message.add.items():
+            tables.setdefault(name, []).extend(values)
+
+        self._history.pop(message.seq, None)
+        self._history[message.seq] = tables
+        while len(self._history) > self.history_size:
+            del self._history[next(iter(self._history))]
+
+        self.seq = message.seq
+        self.tables = tables
+        return message
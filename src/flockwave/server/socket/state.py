@@ -0,0 +1,312 @@
+"""Thread-safe store for the shared state of the swarm mission, i.e. the
+home position, the goal tables and the grid path table reported by the
+drones, the coverage statistics and the vehicles that the server is connected
+to.
+
+Writers are serialized with a lock and publish a new, immutable snapshot of
+the state after every change. Readers simply grab the current snapshot, which
+is a single attribute access, so they never wait for the writers and the
+writers never wait for the readers either.
+"""
+
+from __future__ import annotations
+
+from blinker import Signal
+from dataclasses import dataclass, field, replace
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Hashable, Iterable, Mapping
+
+__all__ = ("SwarmState", "SwarmStateSnapshot")
+
+
+JSON_FIELDS: tuple[str, ...] = (
+    "home",
+    "goal_points",
+    "goal_table",
+    "return_goal_table",
+    "grid_path_table",
+    "coverage",
+    "removed_uav_grid_paths",
+    "takeoff_alt",
+)
+"""Names of the fields of the snapshot that can be sent to clients."""
+
+
+def _to_hashable(value: Any) -> Hashable:
+    """Converts a value parsed from JSON into a hashable value that can be
+    used as a key in the indexes of the state store.
+    """
+    if isinstance(value, list):
+        return tuple(_to_hashable(item) for item in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((k, _to_hashable(v)) for k, v in value.items()))
+    else:
+        return value
+
+
+@dataclass(frozen=True)
+class SwarmStateSnapshot:
+    """Immutable snapshot of the state of the swarm mission."""
+
+    version: int = 0
+    """Version number of the snapshot; incremented by one with every change."""
+
+    home: Any = field(default_factory=list)
+    """The home positions reported by the drones."""
+
+    goal_points: Any = field(default_factory=list)
+    """The goal points reported by the drones."""
+
+    goal_table: tuple[int, ...] = ()
+    """Indices of the goal paths that were reported as completed."""
+
+    return_goal_table: tuple[int, ...] = ()
+    """Indices of the return paths that were reported as completed."""
+
+    grid_path_table: tuple[Any, ...] = ()
+    """Entries of the grid path table reported by the drones."""
+
+    coverage: tuple[Any, int, int] = (0, 0, 0)
+    """The covered area and the duration of the search (minutes and seconds)."""
+
+    removed_uav_grid_paths: Mapping[str, Any] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    """Mapping from the names of the grid path files of the removed UAVs to
+    the lengths of the corresponding grid paths, in insertion order.
+    """
+
+    takeoff_alt: float = 2.5
+    """Takeoff altitude to use for the swarm."""
+
+    log_file_path: str = ""
+    """Path of the log file of the current session."""
+
+    log_counter: int = 0
+    """Whether the log file of the current session has been set up already."""
+
+    vehicles: tuple[Any, ...] = ()
+    """The vehicles that the server is connected to via dronekit."""
+
+    mission: tuple[Any, ...] = ()
+    """The mission that was downloaded from the vehicles."""
+
+    def to_json(self, fields: Iterable[str] = JSON_FIELDS) -> dict[str, Any]:
+        """Returns a JSON representation of the given fields of the snapshot.
+
+        Fields that cannot be represented in JSON are silently skipped.
+        """
+        result: dict[str, Any] = {}
+        for name in fields:
+            if name not in JSON_FIELDS:
+                continue
+            value = getattr(self, name)
+            if isinstance(value, Mapping):
+                value = dict(value)
+            elif isinstance(value, tuple):
+                value = list(value)
+            result[name] = value
+        return result
+
+
+class SwarmState:
+    """Thread-safe store for the shared state of the swarm mission.
+
+    The store keeps set-based indexes of the goal tables and the grid path
+    table so membership checks and duplicate-free insertions take constant
+    time, and publishes immutable, versioned snapshots for lock-free reads.
+    """
+
+    changed: Signal
+    """Signal that is sent after the state has changed. The signal conveys
+    the new snapshot in the ``snapshot`` keyword argument and the names of the
+    changed fields in the ``fields`` keyword argument. Note that the signal is
+    sent from the thread that modified the state.
+    """
+
+    _goal_index: set[int]
+    _grid_path_index: set[Hashable]
+    _lock: Lock
+    _return_goal_index: set[int]
+    _snapshot: SwarmStateSnapshot
+
+    def __init__(self):
+        """Constructor."""
+        self.changed = Signal()
+
+        self._lock = Lock()
+        self._snapshot = SwarmStateSnapshot()
+
+        self._goal_index = set()
+        self._grid_path_index = set()
+        self._return_goal_index = set()
+
+    @property
+    def snapshot(self) -> SwarmStateSnapshot:
+        """The current snapshot of the state. Never blocks."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """The version number of the current snapshot."""
+        return self._snapshot.version
+
+    def add_goal(self, index: int) -> bool:
+        """Adds the index of a completed goal path to the goal table unless
+        it is there already.
+
+        Returns:
+            whether the goal table was modified
+        """
+        if index in self._goal_index:
+            return False
+
+        with self._lock:
+            if index in self._goal_index:
+                return False
+            self._goal_index.add(index)
+            snapshot = self._publish(goal_table=self._snapshot.goal_table + (index,))
+
+        self._notify(snapshot, ("goal_table",))
+        return True
+
+    def add_return_goal(self, index: int) -> bool:
+        """Adds the index of a completed return path to the return goal table
+        unless it is there already.
+
+        Returns:
+            whether the return goal table was modified
+        """
+        if index in self._return_goal_index:
+            return False
+
+        with self._lock:
+            if index in self._return_goal_index:
+                return False
+            self._return_goal_index.add(index)
+            snapshot = self._publish(
+                return_goal_table=self._snapshot.return_goal_table + (index,)
+            )
+
+        self._notify(snapshot, ("return_goal_table",))
+        return True
+
+    def add_grid_path(self, value: Any) -> bool:
+        """Adds an entry to the grid path table unless it is there already.
+
+        Returns:
+            whether the grid path table was modified
+        """
+        key = _to_hashable(value)
+        if key in self._grid_path_index:
+            return False
+
+        with self._lock:
+            if key in self._grid_path_index:
+                return False
+            self._grid_path_index.add(key)
+            snapshot = self._publish(
+                grid_path_table=self._snapshot.grid_path_table + (value,)
+            )
+
+        self._notify(snapshot, ("grid_path_table",))
+        return True
+
+    def add_removed_uav_grid_path(self, filename: str, length: Any) -> bool:
+        """Registers the grid path file of a UAV that was removed from the
+        swarm unless it has been registered already.
+
+        Returns:
+            whether the state was modified
+        """
+        if filename in self._snapshot.removed_uav_grid_paths:
+            return False
+
+        with self._lock:
+            paths = self._snapshot.removed_uav_grid_paths
+            if filename in paths:
+                return False
+            snapshot = self._publish(
+                removed_uav_grid_paths=MappingProxyType({**paths, filename: length})
+            )
+
+        self._notify(snapshot, ("removed_uav_grid_paths",))
+        return True
+
+    def add_vehicles(self, vehicles: Iterable[Any]) -> None:
+        """Adds the given vehicles to the list of connected vehicles."""
+        vehicles = tuple(vehicles)
+
+        with self._lock:
+            snapshot = self._publish(vehicles=self._snapshot.vehicles + vehicles)
+
+        self._notify(snapshot, ("vehicles",))
+
+    def extend_mission(self, items: Iterable[Any]) -> None:
+        """Appends the given items to the downloaded mission."""
+        items = tuple(items)
+
+        with self._lock:
+            snapshot = self._publish(mission=self._snapshot.mission + items)
+
+        self._notify(snapshot, ("mission",))
+
+    def has_goal(self, index: int) -> bool:
+        """Returns whether the goal path with the given index has been
+        completed.
+        """
+        return index in self._goal_index
+
+    def has_grid_path(self, value: Any) -> bool:
+        """Returns whether the given entry is in the grid path table."""
+        return _to_hashable(value) in self._grid_path_index
+
+    def has_return_goal(self, index: int) -> bool:
+        """Returns whether the return path with the given index has been
+        completed.
+        """
+        return index in self._return_goal_index
+
+    def set_grid_path_table(self, values: Iterable[Any]) -> None:
+        """Replaces the entire grid path table."""
+        values = tuple(values)
+        index = {_to_hashable(value) for value in values}
+
+        with self._lock:
+            self._grid_path_index = index
+            snapshot = self._publish(grid_path_table=values)
+
+        self._notify(snapshot, ("grid_path_table",))
+
+    def update(self, **kwds: Any) -> SwarmStateSnapshot:
+        """Updates the given fields of the state.
+
+        The goal tables and the grid path table must not be updated with this
+        method; use the dedicated methods instead so the indexes are kept in
+        sync with the tables.
+
+        Returns:
+            the new snapshot of the state
+        """
+        for name in ("goal_table", "return_goal_table", "grid_path_table"):
+            if name in kwds:
+                raise ValueError(f"{name} cannot be updated directly")
+
+        with self._lock:
+            snapshot = self._publish(**kwds)
+
+        self._notify(snapshot, tuple(kwds))
+        return snapshot
+
+    def _notify(self, snapshot: SwarmStateSnapshot, fields: tuple[str, ...]) -> None:
+        if self.changed.receivers:
+            self.changed.send(self, snapshot=snapshot, fields=fields)
+
+    def _publish(self, **kwds: Any) -> SwarmStateSnapshot:
+        """Publishes a new snapshot with the given changes. Must be called
+        with the lock held.
+        """
+        snapshot = replace(self._snapshot, version=self._snapshot.version + 1, **kwds)
+        self._snapshot = snapshot
+        return snapshot
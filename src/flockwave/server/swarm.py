@@ -1,1050 +1,484 @@
-import socket,time,csv
-from math import radians,cos,sin,sqrt,atan2
+"""Dispatcher that fans out plain-text swarm commands to the onboard
+companion computers of the drones in the swarm over UDP.
+
+The roster of drones and the UDP ports of the onboard services are read from
+the ``SWARM`` section of the server configuration instead of being hardcoded
+here. Commands are sent to all the drones concurrently from a single
+non-blocking socket; the dispatcher then waits for the acknowledgment of each
+drone (if the command has one) with a common timeout so the time needed to
+dispatch a command does not grow with the size of the fleet.
+
+Acknowledgments must match the expected reply exactly; the onboard software
+also sends telemetry (e.g., ``home_pos,...``) to the same socket, and these
+datagrams must not be mistaken for the acknowledgment of a command that starts
+with the same word.
+"""
+
+from __future__ import annotations
+
+import trio.socket
+
+from dataclasses import dataclass
+from trio import Event, move_on_after, open_nursery, sleep
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence, Union
+
+from .logger import log as base_log
+from .socket.protocol import ShareDataEncoder, is_binary_frame
+from .utils.geodesy import load_waypoints, path_length
+
+__all__ = (
+    "SwarmCommandDispatcher",
+    "SwarmDrone",
+    "create_share_data_payload",
+    "fetch_file_content",
+)
+
+log = base_log.getChild("swarm")
+
+
+DEFAULT_PORTS: dict[str, int] = {
+    "command": 12008,
+    "control": 12002,
+    "file": 12003,
+    "mavlink": 12045,
+}
+"""Default UDP ports of the services running on the onboard companion
+computers, keyed by the names used in the configuration.
+"""
+
+ACK_REPLIES: dict[str, str] = {
+    "clear_csv": "CSV Cleared",
+    "different": "different altitude",
+    "master": "master_num",
+    "same": "same altitude",
+}
+"""Mapping from command keywords to the reply that the onboard software sends
+back when it has processed the command. Commands not listed here are
+acknowledged by a datagram that consists of the keyword of the command only.
+"""
+
+SHARE_DATA_ACK = "share_data_ack,"
+"""Prefix of the reply that the onboard software sends when it has applied a
+binary ``share_data`` message; followed by the sequence number of the
+message.
+"""
+
+SwarmCommandResults = dict[int, str]
+"""Type alias for the per-drone outcome of a swarm command, keyed by the
+numeric IDs of the drones. Values are ``ack``, ``timeout``, ``sent`` (when no
+acknowledgment was expected) or an error message.
+"""
+
+
+@dataclass(frozen=True)
+class SwarmDrone:
+    """A single drone in the swarm roster."""
+
+    id: int
+    """Numeric identifier of the drone; also used to derive the port of the
+    MAVLink output that forwards its telemetry to the master drone.
+    """
+
+    host: str
+    """IP address of the onboard companion computer of the drone."""
+
+    @classmethod
+    def from_json(cls, obj: Any) -> SwarmDrone:
+        """Creates a drone entry from its representation in the configuration
+        of the server.
+        """
+        if isinstance(obj, dict):
+            return cls(id=int(obj["id"]), host=str(obj["host"]))
+        raise TypeError("drone entries must be dictionaries")
+
+
+def get_command_keyword(data: str) -> str:
+    """Returns the keyword of a plain-text swarm command, i.e. the part before
+    the first comma or dash.
+    """
+    return data.split(",", 1)[0].split("-", 1)[0].strip()
+
+
+def create_share_data_payload(goal_table: Iterable[int], grid_path_table: Any) -> str:
+    """Creates the payload of the ``share_data`` command that distributes the
+    goal table and the grid path table among the drones.
+    """
+    return f"share_data,{list(goal_table)},grid_path_table,{grid_path_table}"
+
+
+class SwarmCommandDispatcher:
+    """Object that sends plain-text commands to all the drones in the swarm
+    concurrently and collects their acknowledgments.
+    """
+
+    ack_timeout: float
+    """Number of seconds to wait for the acknowledgment of a command from each
+    drone; zero if the dispatcher should not wait for acknowledgments at all.
+    """
+
+    mavlink_base_port: int
+    """Base port number of the MAVLink outputs towards the master drone; the
+    ID of the drone is added to this number.
+    """
+
+    ports: dict[str, int]
+    """UDP ports of the onboard services, keyed by service name."""
+
+    share_data_format: str
+    """Format of the ``share_data`` command; ``text`` for the plain-text
+    format that all firmware versions understand, ``binary`` for the framed
+    binary protocol with per-drone deltas. ``share_data`` is not
+    acknowledged, so the binary format must be enabled explicitly, and only
+    for drones whose firmware supports it.
+    """
+
+    stagger: float
+    """Delay between the dispatch of a command to consecutive drones in the
+    roster, in seconds. Zero means that all drones are addressed at once.
+    """
+
+    _drones: list[SwarmDrone]
+    _pending_acks: dict[str, dict[str, list[Event]]]
+    """Events to set when the expected acknowledgments arrive, keyed by the
+    IP address of the drone and the expected reply. Each acknowledgment sets
+    the oldest event only, so concurrent commands with the same reply to the
+    same drone are acknowledged one by one.
+    """
+
+    _share_data_encoders: dict[str, ShareDataEncoder]
+    _socket: Optional[trio.socket.SocketType]
+
+    def __init__(
+        self,
+        drones: Iterable[SwarmDrone] = (),
+        *,
+        ack_timeout: float = 1,
+        stagger: float = 0,
+    ):
+        """Constructor.
+
+        Parameters:
+            drones: the initial roster of drones
+            ack_timeout: number of seconds to wait for acknowledgments
+            stagger: delay between consecutive drones when dispatching a
+                command, in seconds
+        """
+        self._drones = list(drones)
+        self._pending_acks = {}
+        self._share_data_encoders = {}
+        self._socket = None
+
+        self.ack_timeout = ack_timeout
+        self.mavlink_base_port = 14550
+        self.ports = dict(DEFAULT_PORTS)
+        self.share_data_format = "text"
+        self.stagger = stagger
+
+    def configure(self, config: dict[str, Any]) -> None:
+        """Configures the dispatcher from the ``SWARM`` section of the server
+        configuration.
+        """
+        self._drones = [SwarmDrone.from_json(item) for item in config.get("drones", ())]
+        self.ack_timeout = max(float(config.get("ack_timeout", 1)), 0.0)
+        self.mavlink_base_port = int(config.get("mavlink_base_port", 14550))
+        self.ports = {**DEFAULT_PORTS, **config.get("ports", {})}
+        self.stagger = max(float(config.get("stagger", 0)), 0.0)
+
+        share_data_format = str(config.get("share_data_format", "text"))
+        if share_data_format not in ("binary", "text"):
+            raise RuntimeError(f"Invalid share_data format: {share_data_format!r}")
+        self.share_data_format = share_data_format
+        self._share_data_encoders.clear()
+
+    @property
+    def drones(self) -> list[SwarmDrone]:
+        """The roster of drones in the swarm."""
+        return list(self._drones)
+
+    def find_drone_by_id(self, drone_id: int) -> Optional[SwarmDrone]:
+        """Returns the drone with the given numeric ID from the roster, or
+        ``None`` if there is no such drone.
+        """
+        for drone in self._drones:
+            if drone.id == drone_id:
+                return drone
+        return None
+
+    def notify_datagram(self, data: Union[bytes, str], host: str) -> bool:
+        """Notifies the dispatcher that a datagram was received from the
+        onboard software of a drone, potentially acknowledging a pending
+        command.
+
+        Parameters:
+            data: the received datagram
+            host: the IP address that the datagram was received from
+
+        Returns:
+            whether the datagram acknowledged a pending command
+        """
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", "replace")
+
+        if data.startswith(SHARE_DATA_ACK):
+            encoder = self._share_data_encoders.get(host)
+            if encoder is not None:
+                try:
+                    encoder.notify_acknowledged(int(data[len(SHARE_DATA_ACK) :]))
+                except ValueError:
+                    pass
+
+        pending = self._pending_acks.get(host)
+        if not pending:
+            return False
+
+        waiters = pending.get(data.strip())
+        if not waiters:
+            return False
+
+        waiters.pop(0).set()
+        return True
+
+    async def run(self) -> None:
+        """Runs the background task of the dispatcher that listens for
+        replies arriving to the socket that the commands were sent from.
+        """
+        sock = await self._get_socket()
+        try:
+            while True:
+                data, address = await sock.recvfrom(65536)
+                self.notify_datagram(data, address[0])
+        finally:
+            self._socket = None
+            sock.close()
+
+    async def set_mavlink_output(
+        self, master_id: int, enabled: bool
+    ) -> SwarmCommandResults:
+        """Asks the MAVLink router of each drone to add or remove an output
+        that forwards its telemetry to the given master drone.
+
+        Parameters:
+            master_id: numeric ID of the master drone
+            enabled: whether to add or remove the output
+
+        Returns:
+            the outcome of the command for each drone
+        """
+        master = self.find_drone_by_id(master_id)
+        if master is None:
+            raise RuntimeError(f"No drone with ID {master_id} in the swarm roster")
+
+        action = "add" if enabled else "remove"
+        base_port = self.mavlink_base_port
+        return await self.send_each(
+            lambda drone: f"output {action} {master.host}:{base_port + drone.id}",
+            port="mavlink",
+            ack=False,
+        )
+
+    async def share_data(
+        self,
+        tables: Mapping[str, Sequence[Any]],
+        *,
+        to: Optional[Iterable[SwarmDrone]] = None,
+    ) -> SwarmCommandResults:
+        """Distributes the goal tables and the grid path table among the
+        drones.
+
+        In binary mode, each drone receives only the entries that were added
+        since the last message that it acknowledged, with a full message
+        every now and then for resynchronization. In text mode, the goal
+        tables are merged and sent in the legacy plain-text format.
+
+        Parameters:
+            tables: the tables to share, keyed by ``goal_table``,
+                ``return_goal_table`` and ``grid_path_table``
+            to: the drones to send the tables to; ``None`` means all the
+                drones in the roster
+
+        Returns:
+            the outcome of the command for each drone
+        """
+        if self.share_data_format == "text":
+            return await self.send(
+                create_share_data_payload(
+                    tuple(tables.get("goal_table", ()))
+                    + tuple(tables.get("return_goal_table", ())),
+                    tables.get("grid_path_table", ()),
+                ),
+                ack=False,
+                to=to,
+            )
+
+        def encode(drone: SwarmDrone) -> list[bytes]:
+            encoder = self._share_data_encoders.get(drone.host)
+            if encoder is None:
+                encoder = self._share_data_encoders[drone.host] = ShareDataEncoder()
+            return encoder.encode(tables)
+
+        return await self.send_each(encode, ack=False, to=to)
+
+    async def send(
+        self,
+        data: str,
+        *,
+        port: str = "command",
+        ack: Union[bool, str] = True,
+        to: Optional[Iterable[SwarmDrone]] = None,
+    ) -> SwarmCommandResults:
+        """Sends the same command to the given drones, or to all the drones in
+        the roster.
+
+        Parameters:
+            data: the command to send
+            port: name of the onboard service to send the command to
+            ack: whether to wait for an acknowledgment from each drone. You
+                may also pass the exact expected reply here if it cannot be
+                derived from the command itself.
+            to: the drones to send the command to; ``None`` means all the
+                drones in the roster
+
+        Returns:
+            the outcome of the command for each drone
+        """
+        return await self.send_each(lambda _: data, port=port, ack=ack, to=to)
+
+    async def send_each(
+        self,
+        factory: Callable[[SwarmDrone], Union[str, bytes, Sequence[bytes]]],
+        *,
+        port: str = "command",
+        ack: Union[bool, str] = True,
+        to: Optional[Iterable[SwarmDrone]] = None,
+    ) -> SwarmCommandResults:
+        """Sends a drone-specific command to the given drones, or to all the
+        drones in the roster.
+
+        Parameters:
+            factory: function that returns the command to send to a drone.
+                It may also return raw bytes, or a sequence of datagrams that
+                are sent in order.
+            port: name of the onboard service to send the command to
+            ack: whether to wait for an acknowledgment from each drone. You
+                may also pass the exact expected reply here if it cannot be
+                derived from the command itself.
+            to: the drones to send the command to; ``None`` means all the
+                drones in the roster
+
+        Returns:
+            the outcome of the command for each drone
+        """
+        drones = self._drones if to is None else list(to)
+        port_number = self.ports[port]
+        results: SwarmCommandResults = {}
+        sock = await self._get_socket()
+
+        async def send_to(index: int, drone: SwarmDrone) -> None:
+            data = factory(drone)
+            if isinstance(data, str):
+                datagrams = [data.encode("utf-8")]
+            elif isinstance(data, bytes):
+                datagrams = [data]
+            else:
+                datagrams = list(data)
+
+            if self.stagger > 0 and index > 0:
+                await sleep(self.stagger * index)
+
+            if ack and self.ack_timeout > 0:
+                expected = (
+                    ack if isinstance(ack, str) else self._get_ack_for(datagrams[0])
+                )
+                event = Event()
+                pending = self._pending_acks.setdefault(drone.host, {})
+                pending.setdefault(expected, []).append(event)
+            else:
+                expected, event = None, None
+
+            try:
+                for datagram in datagrams:
+                    await sock.sendto(datagram, (drone.host, port_number))
+                if event is None:
+                    results[drone.id] = "sent"
+                    return
+
+                with move_on_after(self.ack_timeout):
+                    await event.wait()
+                results[drone.id] = "ack" if event.is_set() else "timeout"
+            except OSError as ex:
+                results[drone.id] = str(ex) or "error"
+                log.warning(
+                    f"Failed to send {self._describe(datagrams[0])!r} to drone "
+                    f"{drone.id}: {ex}"
+                )
+            finally:
+                if expected is not None:
+                    self._remove_pending_ack(drone.host, expected, event)
+
+        async with open_nursery() as nursery:
+            for index, drone in enumerate(drones):
+                nursery.start_soon(send_to, index, drone)
+
+        return results
+
+    @staticmethod
+    def _describe(data: bytes) -> str:
+        if is_binary_frame(data):
+            return "share_data"
+        return get_command_keyword(data.decode("utf-8", "replace"))
+
+    def _get_ack_for(self, data: bytes) -> str:
+        keyword = self._describe(data)
+        return ACK_REPLIES.get(keyword, keyword)
+
+    async def _get_socket(self) -> trio.socket.SocketType:
+        if self._socket is None:
+            sock = trio.socket.socket(trio.socket.AF_INET, trio.socket.SOCK_DGRAM)
+            await sock.bind(("", 0))
+            self._socket = sock
+        return self._socket
+
+    def _remove_pending_ack(
+        self, host: str, expected: str, event: Optional[Event]
+    ) -> None:
+        pending = self._pending_acks.get(host)
+        if not pending or expected not in pending:
+            return
+
+        waiters = pending[expected]
+        if event in waiters:
+            waiters.remove(event)
+        if not waiters:
+            del pending[expected]
+            if not pending:
+                del self._pending_acks[host]
+
 
 def fetch_file_content(file_path):
     lines = []
     try:
-        with open(file_path, 'r') as file:
-            file_content = file.read()
-            new_lines = file_content.split('\n')
-
-            # Compare new lines with existing lines and append only unique ones
-            unique_new_lines = [line for line in new_lines]
-            parsed_messages = []
-            for line in unique_new_lines:
+        with open(file_path, "r") as file:
+            for line in file.read().split("\n"):
                 if line == "":
                     continue
-                time, message = line.split("\t")
-                parsed_messages.append({'timestamp': time, 'message': message})
-
-            lines.extend(parsed_messages)
+                timestamp, message = line.split("\t", 1)
+                lines.append({"timestamp": timestamp, "message": message})
     except IOError as error:
-        print('Error reading file:', error)
+        log.error(f"Error reading file: {error}")
     return lines
 
-master_num=0
-#udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address1 = ('192.168.6.151', 12008)
-#udp_socket2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address2 = ('192.168.6.152', 12008)
-udp_socket3 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-server_address3 = ('192.168.6.153', 12008)
-#udp_socket4 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address4 = ('192.168.6.154', 12008)
-udp_socket5 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-server_address5 = ('192.168.6.155', 12008)
-#udp_socket6 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address6 = ('192.168.6.156', 12008)
-#udp_socket7 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address7 = ('192.168.6.157', 12008)
-#udp_socket8 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address8 = ('192.168.6.158', 12008)
-#udp_socket9 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address9 = ('192.168.6.159', 12008)
-udp_socket10 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-server_address10 = ('192.168.6.160', 12008)
-
-#share_data_udp_socket1 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#share_data_server_address1 = ('192.168.6.151', 12008)
-#share_data_udp_socket2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#share_data_server_address2 = ('192.168.6.152', 12008)
-share_data_udp_socket3 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-share_data_server_address3 = ('192.168.6.153', 12008)
-#share_data_udp_socket4 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#share_data_server_address4 = ('192.168.6.154', 12008)
-share_data_udp_socket5 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-share_data_server_address5 = ('192.168.6.155', 12008)
-#udp_socket6 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address6 = ('192.168.6.156', 12008)
-#share_data_udp_socket7 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#share_data_server_address7 = ('192.168.6.157', 12008)
-#udp_socket8 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address8 = ('192.168.6.158', 12008)
-#udp_socket9 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address9 = ('192.168.6.159', 12008)
-share_data_udp_socket10 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-share_data_server_address10 = ('192.168.6.160', 12008)
-
-#socket1 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address11 = ('192.168.6.151', 12002)
-#socket2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address12 = ('192.168.6.152', 12002)
-socket3 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-server_address13 = ('192.168.6.153', 12002)
-#socket4 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address14 = ('192.168.6.154', 12002)
-socket5 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-server_address15 = ('192.168.6.155', 12002)
-#socket6 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address16 = ('192.168.6.156', 12002)
-#socket7 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address17 = ('192.168.6.157', 12002)
-#socket8 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address18 = ('192.168.6.158', 12002)
-#socket9 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#server_address19 = ('192.168.6.159', 12002)
-socket10 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-server_address20 = ('192.168.6.160', 12002)
-
-#file_sock1 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#file_server_address1 = ('192.168.6.151', 12003)  
-#file_sock2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#file_server_address2 = ('192.168.6.152', 12003)
-file_sock3 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-file_server_address3 = ('192.168.6.153', 12003)
-#file_sock4 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#file_server_address4 = ('192.168.6.154', 12003)
-file_sock5 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-file_server_address5 = ('192.168.6.155', 12003)
-#file_sock6 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#file_server_address6 = ('192.168.6.156', 12003)
-#file_sock7 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#file_server_address7 = ('192.168.6.157', 12003)
-#file_sock8 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#file_server_address8 = ('192.168.6.158', 12003)
-#file_sock9 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#file_server_address9 = ('192.168.6.159', 12003)
-file_sock10 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-file_server_address10 = ('192.168.6.160', 12003)
-
-'''
-mavlink_sock1 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-mavlink_server_address1 = ('192.168.6.151', 12045)
-
-mavlink_sock2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-mavlink_server_address2 = ('192.168.6.152', 12045)
-'''
-mavlink_sock3 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-mavlink_server_address3 = ('192.168.6.153', 12045)
-
-#mavlink_sock4 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#mavlink_server_address4 = ('192.168.6.154', 12045)
-
-mavlink_sock5 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-mavlink_server_address5 = ('192.168.6.155', 12045)
-
-#mavlink_sock6 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#mavlink_server_address6 = ('192.168.6.156', 12045)
-
-#mavlink_sock7 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#mavlink_server_address7 = ('192.168.6.157', 12045)
-
-#mavlink_sock8 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#mavlink_server_address8 = ('192.168.6.158', 12045)
-
-#mavlink_sock9 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-#mavlink_server_address9 = ('192.168.0.159', 12045)
-
-mavlink_sock10 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-mavlink_server_address10 = ('192.168.6.160', 12045)
-
-def haversine(lat1, lon1, lat2, lon2):
-    """
-    Calculate the great-circle distance between two points
-    on the Earth's surface using the Haversine formula.
-
-    Parameters:
-    - lat1, lon1: Latitude and longitude of the first point (in degrees).
-    - lat2, lon2: Latitude and longitude of the second point (in degrees).
 
-    Returns:
-    - The distance between the two points (in meters).
+def calculate_flight_time(csv_files, average_speed=3):
+    """Estimates the average flight time of the drones in minutes, given a
+    mapping from drone IDs to the CSV files containing their waypoints.
     """
-    # Convert latitude and longitude from degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    distance = 6371000 * c  # Radius of Earth in meters
-
-    return distance
-
-def calculate_flight_time():
-    global flight_time_var,csv_files
-    total_distance = 0
-    num_uavs = 0
-
-    for uav, csv_path in csv_files.items():
-        lat_lon_points = []
-        with open(csv_path, 'rt') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            next(csv_reader)  # Skip the header (first row)
-            for row in csv_reader:
-                lat, lon = map(float, row)
-                lat_lon_points.append((lat, lon))
-
-        total_distance_uav = 0
-        for i in range(len(lat_lon_points) - 1):
-            lat1, lon1 = lat_lon_points[i]
-            lat2, lon2 = lat_lon_points[i + 1]
-            distance = haversine(lat1, lon1, lat2, lon2)
-            total_distance_uav += distance
-
-        total_distance += total_distance_uav
-        num_uavs += 1
-
-    average_total_distance = total_distance / num_uavs
-    average_speed = 3  # Assume average speed between 4 m/s and 5 m/s
+    if not csv_files:
+        raise RuntimeError("No waypoint files given")
+
+    total_distance = sum(
+        path_length(load_waypoints(csv_path, skip_header=True))
+        for csv_path in csv_files.values()
+    )
+    average_total_distance = total_distance / len(csv_files)
     flight_time_seconds = average_total_distance / average_speed
-    flight_time_minutes = flight_time_seconds / 60
-
-    flight_time_var.set("Flight Time = {:.2f} minutes".format(flight_time_minutes))
-
-
-def clear_csv():
-    print("!!!CSV Cleared!!")
-    global udp_socket,udp_socket2,server_address1,server_address2
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "clear_csv"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''       
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)       
-    udp_socket7.sendto(str(data).encode(), server_address7)     
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def start_socket():
-    print("!!!Start!!")
-    global udp_socket,udp_socket2,server_address1,server_address2
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "start"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-    time.sleep(0.5)
-
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    
-    return True
-
-
-def start1_socket():
-    print("Start1........")
-    global udp_socket,server_address1,server_address2,udp_socket2
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "start1"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def home_lock():
-    print("Home position Locked....!!!!")
-    global udp_socket,server_address1,server_address2,udp_socket2
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "home_lock"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def select_plot(filename):
-    if filename!="":
-    
-        '''
-        file_sock1.sendto(str(filename).encode(),file_server_address1)
-        time.sleep(0.5)
-        file_sock2.sendto(str(filename).encode(),file_server_address2)
-        time.sleep(0.5)
-        '''
-        file_sock3.sendto(str(filename).encode(),file_server_address3)
-        time.sleep(0.5)
-        '''
-        file_sock4.sendto(str(filename).encode(),file_server_address4)
-        time.sleep(0.5)
-        '''
-        file_sock5.sendto(str(filename).encode(),file_server_address5)
-        time.sleep(0.5)
-        '''
-        file_sock6.sendto(str(filename).encode(),file_server_address6)
-        time.sleep(0.5)
-
-        file_sock7.sendto(str(filename).encode(),file_server_address7)		
-        time.sleep(0.5)
-
-        file_sock8.sendto(str(filename).encode(),file_server_address8)
-        time.sleep(0.5)
-        file_sock9.sendto(str(filename).encode(),file_server_address9)
-        time.sleep(0.5)
-        '''
-        file_sock10.sendto(str(filename).encode(),file_server_address10)
-        return True
-
-def share_data_func():
-    from flockwave.server.socket.globalVariable import get_goal_table,get_return_goal_table,get_grid_path_table
-    #global goal_table,return_goal_table,filename,udp_socket,server_address1,server_address2,udp_socket2,grid_path_table
-    #goal_table=[]
-    grid_path_table = get_grid_path_table()
-    goal_table = get_goal_table()
-    
-    if get_return_goal_table() is not None:
-        combined_goal_table = get_goal_table() + get_return_goal_table() 
-        print("combined_goal_table",combined_goal_table)
-        '''
-        share_data_udp_socket1.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address1)
-        time.sleep(0.5)
-        share_data_udp_socket2.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address2)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket3.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address3)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket4.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address4)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket5.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address5)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket6.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address6)
-        time.sleep(0.5)
-
-        share_data_udp_socket7.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address7)
-
-        time.sleep(0.5)
-        share_data_udp_socket8.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address8)
-        time.sleep(0.5)
-        share_data_udp_socket9.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address9)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket10.sendto(("share_data" + "," + str(combined_goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address10)
-
-    else:
-
-        '''
-        share_data_udp_socket1.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address1)
-        time.sleep(0.5)
-        share_data_udp_socket2.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address2)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket3.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address3)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket4.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address4)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket5.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address5)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket6.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address6)
-        time.sleep(0.5)
-
-        share_data_udp_socket7.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address7)
-
-        time.sleep(0.5)
-        share_data_udp_socket8.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address8)
-        time.sleep(0.5)
-        share_data_udp_socket9.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address9)
-        time.sleep(0.5)
-        '''
-        share_data_udp_socket10.sendto(("share_data"+","+ str(goal_table)+","+"grid_path_table" +","+str( grid_path_table)).encode(), share_data_server_address10)
-    return True
-
-def disperse_socket(): 
-    global udp_socket,server_address1,server_address2,udp_socket2
-    print("Disperse!!!!!!")
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "disperse"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def takeoff_socket(alt):
-    print("Takeoff...........")
-    takeoff_alt = alt
-    global udp_socket,server_address1,server_address2,udp_socket2
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "takeoff"+","+str(takeoff_alt)
-    '''
-    sent = udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    sent = udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    sent = udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    sent = udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    sent = udp_socket5.sendto(str(data).encode(), server_address5)     
-    time.sleep(0.5)
-    '''
-    sent = udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    sent = udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    sent = udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    sent = udp_socket9.sendto(str(data).encode(), server_address9)
-
-    time.sleep(0.5)
-    '''
-    sent = udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def search_socket(): 
-    global udp_socket,server_address1,server_address2,udp_socket2
-    print("Searching........")
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "search"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)          
-    udp_socket7.sendto(str(data).encode(), server_address7) 
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)    
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def aggregate_socket():
-    print("Aggregation..!!!!")
-    data = "aggregate"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)   
-    time.sleep(0.5) 
-    '''     
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def home_socket(): 
-    print("Home....******")
-    data = "home"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-    udp_socket7.sendto(str(data).encode(), server_address7)     
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)      
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def airport_selection(filename):
-    print(filename)
-    '''
-    file_sock1.sendto(str(filename).encode(),file_server_address1)
-    time.sleep(0.5)
-    file_sock2.sendto(str(filename).encode(),file_server_address2)
-    time.sleep(0.5)
-    '''
-    file_sock3.sendto(str(filename).encode(),file_server_address3)
-    time.sleep(0.5)
-    '''
-    file_sock4.sendto(str(filename).encode(),file_server_address4)
-    time.sleep(0.5)
-    '''
-    file_sock5.sendto(str(filename).encode(),file_server_address5)
-    time.sleep(0.5)
-    '''
-    file_sock6.sendto(str(filename).encode(),file_server_address6)
-    time.sleep(0.5)
-    
-    file_sock7.sendto(str(filename).encode(),file_server_address7)		
-    time.sleep(0.5)
-    
-    file_sock8.sendto(str(filename).encode(),file_server_address8)
-    time.sleep(0.5)
-    file_sock9.sendto(str(filename).encode(),file_server_address9)
-    time.sleep(0.5)
-    '''
-    file_sock10.sendto(str(filename).encode(),file_server_address10)
-    return True
-
-def different_alt_socket(initial_alt,alt_diff):
-    data =str(initial_alt)+str(",")+str(alt_diff)
-    print(data)
-    g="different"+","+str(data)
-    print(g,"data")
-    '''
-    udp_socket.sendto(str(g).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(g).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(g).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(g).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(g).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-
-    udp_socket6.sendto(str(g).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(g).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(g).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(g).encode(), server_address9)
-
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(g).encode(), server_address10)
-    return True
-
-def same_alt_socket(alt_same):
-    print("Same_altitude")
-    data = alt_same
-    print(data,"data")
-    f="same"+","+str(data)
-    print(f,"f")
-    '''
-    udp_socket.sendto(str(f).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(f).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(f).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(f).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(f).encode(), server_address5)       
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(f).encode(), server_address6)
-    time.sleep(0.5)      
-    udp_socket7.sendto(str(f).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(f).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(f).encode(), server_address9)       
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(f).encode(), server_address10)
-    return True
-
-def home_goto_socket(): 
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "home_goto"
-    print(data)
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)      
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def rtl_socket():
-    global socket,udp_socket,server_address1,server_address2,udp_socket2
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "rtl"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)      
-    udp_socket7.sendto(str(data).encode(), server_address7)       
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)      
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def stop_socket():
-    print("STOP>>>>>>>>>>>>")
-    global socket1,udp_socket,udp_socket2,server_address1,server_address2      
-    socket1 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "stop"
-    '''
-    socket1.sendto(str(data).encode(), server_address11)
-    time.sleep(0.5)
-    socket2.sendto(str(data).encode(), server_address12)
-    time.sleep(0.5)
-    '''
-    socket3.sendto(str(data).encode(), server_address13)
-    time.sleep(0.5)
-    '''
-    socket4.sendto(str(data).encode(), server_address14)
-    time.sleep(0.5)
-    '''
-    socket5.sendto(str(data).encode(), server_address15)    
-    time.sleep(0.5)
-    '''
-    socket6.sendto(str(data).encode(), server_address16)
-    time.sleep(0.5)
-
-    socket7.sendto(str(data).encode(), server_address17)
-
-    time.sleep(0.5)
-    socket8.sendto(str(data).encode(), server_address18)
-    time.sleep(0.5)
-    socket9.sendto(str(data).encode(), server_address19)      
-    time.sleep(0.5)
-    '''
-    socket10.sendto(str(data).encode(), server_address20)
-    return True
-
-def return_socket():
-    global socket,return_flag,udp_socket,server_address1,server_address2,udp_socket2
-    #print("&&&&&")
-    print("return")
-    return_flag=True
-    #udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data = "return"
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
-
-def specific_bot_goal_socket(drone_num,goal_num): 
-    print("$$$##Specific_bot_goal###")
-    d="specific_bot_goal"+","+str(drone_num)+","+str(goal_num)
-    print("d",d)
-    '''
-    udp_socket.sendto(str(d).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(d).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(d).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(d).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(d).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(d).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(d).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(d).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(d).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(d).encode(), server_address10)
-    return True
-
-def goal_socket(goal_num):     
-    print("***Group goal*****!!!!!")
-    d="goal"+","+str(goal_num)
-    print("d",d)
-    '''
-    udp_socket.sendto(str(d).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(d).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(d).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(d).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(d).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(d).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(d).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(d).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(d).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(d).encode(), server_address10)
-    return True
-    
-def master(master_num):             
- 
-    data = "master" + "-" + str(master_num)
-    print("data",data)
-    '''
-    socket1.sendto(str(data).encode(), server_address11)
-    time.sleep(0.5)
-    socket2.sendto(str(data).encode(), server_address12)
-    time.sleep(0.5)
-    '''
-    socket3.sendto(str(data).encode(), server_address13)
-    time.sleep(0.5)
-    '''
-    socket4.sendto(str(data).encode(), server_address14)
-    time.sleep(0.5)
-    '''
-    socket5.sendto(str(data).encode(), server_address15)
-    time.sleep(0.5)
-    '''
-    socket6.sendto(str(data).encode(), server_address16)
-    time.sleep(0.5)
-
-    socket7.sendto(str(data).encode(), server_address17)
-
-    time.sleep(0.5)
-    socket8.sendto(str(data).encode(), server_address18)
-    time.sleep(0.5)
-    socket9.sendto(str(data).encode(), server_address19)
-    time.sleep(0.5)
-    '''
-    socket10.sendto(str(data).encode(), server_address20)
-    result = mavlink_add(master_num)
-    return result
-
-def mavlink_add(master_num):
-    global master_ip
-    master_ip_array=['192.168.6.151','192.168.6.152','192.168.6.153','192.168.6.154','192.168.6.155','192.168.6.156','192.168.6.157','192.168.6.158','192.168.6.159','192.168.6.160']
-    master_ip=master_ip_array[int(master_num)-1]
-    print("master_ip",master_ip)
-    add='output add '
-    remove='output remove '
-
-    port_array=[':14551',':14552',':14553',':14554',':14555',':14556',':14557',':14558',':14559',':14560']
-
-
-    data=add+master_ip
-    #data=remove+master_ip
-    #print("data",(data+port_array[0]),type(data))	
-    '''
-    mavlink_sock1.sendto((data+port_array[0]).encode(), mavlink_server_address1)
-    time.sleep(0.5)
-    mavlink_sock2.sendto((data+port_array[1]).encode(), mavlink_server_address2)
-    time.sleep(0.5)
-    '''
-    mavlink_sock3.sendto((data+port_array[2]).encode(), mavlink_server_address3)
-    time.sleep(0.5)
-    '''
-    mavlink_sock4.sendto((data+port_array[3]).encode(), mavlink_server_address4)
-    time.sleep(0.5)
-    '''
-    mavlink_sock5.sendto((data+port_array[4]).encode(), mavlink_server_address5)
-    time.sleep(0.5)
-    '''
-    mavlink_sock6.sendto((data+port_array[5]).encode(), mavlink_server_address6)
-    time.sleep(0.5)
-
-    mavlink_sock7.sendto((data+port_array[6]).encode(), mavlink_server_address7)
-
-    time.sleep(0.5)
-    mavlink_sock8.sendto((data+port_array[7]).encode(), mavlink_server_address8)
-    time.sleep(0.5)
-    mavlink_sock9.sendto((data+port_array[8]).encode(), mavlink_server_address9)
-    time.sleep(0.5)
-    '''
-    mavlink_sock10.sendto((data+port_array[9]).encode(), mavlink_server_address10)
-    return True
-
-def mavlink_remove(remove_link):
-     #data = removelink_entry.get()
-    master_ip_array=['192.168.6.151','192.168.6.152','192.168.6.153','192.168.6.154','192.168.6.155','192.168.6.156','192.168.6.157','192.168.6.158','192.168.6.159','192.168.6.160']
-    master_ip=master_ip_array[int(remove_link)-1]
-    print("master_ip",master_ip)
-    add='output add '
-    remove='output remove '
-    port_array=[':14551',':14552',':14553',':14554',':14555',':14556',':14557',':14558',':14559',':14560']
-    data=remove+master_ip
-    print("data",(data+port_array[remove_link-1]),type(data))
-    '''
-    mavlink_sock1.sendto((data+port_array[0]).encode(), mavlink_server_address1)
-    time.sleep(0.5)
-    mavlink_sock2.sendto((data+port_array[1]).encode(), mavlink_server_address2)
-    time.sleep(0.5)
-    '''
-    mavlink_sock3.sendto((data+port_array[2]).encode(), mavlink_server_address3)
-    time.sleep(0.5)
-    '''
-    mavlink_sock4.sendto((data+port_array[3]).encode(), mavlink_server_address4)
-    time.sleep(0.5)
-    '''
-    mavlink_sock5.sendto((data+port_array[4]).encode(), mavlink_server_address5)
-    time.sleep(0.5)
-    '''
-    mavlink_sock6.sendto((data+port_array[5]).encode(), mavlink_server_address6)
-    time.sleep(0.5)
-        
-    mavlink_sock7.sendto((data+port_array[6]).encode(), mavlink_server_address7)
-
-    time.sleep(0.5)
-    mavlink_sock8.sendto((data+port_array[7]).encode(), mavlink_server_address8)
-    time.sleep(0.5)
-    mavlink_sock9.sendto((data+port_array[8]).encode(), mavlink_server_address9)
-    time.sleep(0.5)
-    '''
-    mavlink_sock10.sendto((data+port_array[9]).encode(), mavlink_server_address10)
-    return True
-
-def bot_remove(remove_uav_num):
-    print("!!!bot_remove!!")
-    
-    data = "remove_bot"+","+str(remove_uav_num)
-    print("remove_link_num",remove_uav_num)
-    '''
-    udp_socket.sendto(str(data).encode(), server_address1)
-    time.sleep(0.5)
-    udp_socket2.sendto(str(data).encode(), server_address2)
-    time.sleep(0.5)
-    '''
-    udp_socket3.sendto(str(data).encode(), server_address3)
-    time.sleep(0.5)
-    '''
-    udp_socket4.sendto(str(data).encode(), server_address4)
-    time.sleep(0.5)
-    '''
-    udp_socket5.sendto(str(data).encode(), server_address5)
-    time.sleep(0.5)
-    '''
-    udp_socket6.sendto(str(data).encode(), server_address6)
-    time.sleep(0.5)
-
-    udp_socket7.sendto(str(data).encode(), server_address7)
-
-    time.sleep(0.5)
-    udp_socket8.sendto(str(data).encode(), server_address8)
-    time.sleep(0.5)
-    udp_socket9.sendto(str(data).encode(), server_address9)
-    time.sleep(0.5)
-    '''
-    udp_socket10.sendto(str(data).encode(), server_address10)
-    return True
+    return flight_time_seconds / 60
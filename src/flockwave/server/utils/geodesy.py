@@ -0,0 +1,193 @@
+"""Vectorized geodesic calculations on a spherical Earth model.
+
+All functions accept scalars or NumPy arrays (or anything convertible to
+arrays) for their coordinate arguments and follow the usual NumPy
+broadcasting rules, so a single call can process whole waypoint lists
+instead of looping over the points in Python. Latitudes, longitudes and
+bearings are in degrees; distances are in meters. Bearings are measured
+clockwise from north and are returned in the range [-180, 180].
+
+The module is not imported by ``flockwave.server.utils`` to avoid loading
+NumPy in parts of the server that do not need it.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from numpy.typing import ArrayLike, NDArray
+from typing import Union
+
+__all__ = (
+    "EARTH_RADIUS",
+    "bearing",
+    "destination",
+    "distance_and_bearing",
+    "haversine",
+    "load_waypoints",
+    "offset_by_meters",
+    "path_length",
+    "segment_lengths",
+)
+
+
+EARTH_RADIUS = 6371000.0
+"""Mean radius of the Earth, in meters."""
+
+WGS84_EQUATORIAL_RADIUS = 6378137.0
+"""Equatorial radius of the Earth according to WGS84, in meters."""
+
+FloatOrArray = Union[float, NDArray[np.float64]]
+"""Type alias for the results of the functions in this module; scalars for
+scalar inputs and arrays otherwise.
+"""
+
+
+def _result(value: NDArray[np.float64]) -> FloatOrArray:
+    return float(value) if value.ndim == 0 else value
+
+
+def haversine(
+    lat1: ArrayLike,
+    lon1: ArrayLike,
+    lat2: ArrayLike,
+    lon2: ArrayLike,
+    *,
+    radius: float = EARTH_RADIUS,
+) -> FloatOrArray:
+    """Returns the great-circle distance between pairs of points using the
+    haversine formula.
+    """
+    phi1, lambda1, phi2, lambda2 = (
+        np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin((lambda2 - lambda1) / 2) ** 2
+    )
+    return _result(2 * radius * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+
+def bearing(
+    lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike
+) -> FloatOrArray:
+    """Returns the initial bearing of the great-circle path from the first
+    point of each pair to the second one.
+    """
+    phi1, lambda1, phi2, lambda2 = (
+        np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2)
+    )
+    dlambda = lambda2 - lambda1
+    y = np.sin(dlambda) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlambda)
+    return _result(np.degrees(np.arctan2(y, x)))
+
+
+def distance_and_bearing(
+    lat1: ArrayLike,
+    lon1: ArrayLike,
+    lat2: ArrayLike,
+    lon2: ArrayLike,
+    *,
+    radius: float = EARTH_RADIUS,
+) -> tuple[FloatOrArray, FloatOrArray]:
+    """Returns the great-circle distance and the initial bearing from the
+    first point of each pair to the second one.
+    """
+    return (
+        haversine(lat1, lon1, lat2, lon2, radius=radius),
+        bearing(lat1, lon1, lat2, lon2),
+    )
+
+
+def destination(
+    lat: ArrayLike,
+    lon: ArrayLike,
+    distance: ArrayLike,
+    bearing: ArrayLike,
+    *,
+    radius: float = EARTH_RADIUS,
+) -> tuple[FloatOrArray, FloatOrArray]:
+    """Returns the points reached when travelling the given distances along
+    great circles from the given points with the given initial bearings.
+
+    Returns:
+        the latitudes and the longitudes of the destinations
+    """
+    phi1 = np.radians(np.asarray(lat, dtype=float))
+    lambda1 = np.radians(np.asarray(lon, dtype=float))
+    theta = np.radians(np.asarray(bearing, dtype=float))
+    delta = np.asarray(distance, dtype=float) / radius
+
+    sin_phi1, cos_phi1 = np.sin(phi1), np.cos(phi1)
+    sin_delta, cos_delta = np.sin(delta), np.cos(delta)
+
+    phi2 = np.arcsin(sin_phi1 * cos_delta + cos_phi1 * sin_delta * np.cos(theta))
+    lambda2 = lambda1 + np.arctan2(
+        np.sin(theta) * sin_delta * cos_phi1, cos_delta - sin_phi1 * np.sin(phi2)
+    )
+    return _result(np.degrees(phi2)), _result(np.degrees(lambda2))
+
+
+def offset_by_meters(
+    lat: ArrayLike,
+    lon: ArrayLike,
+    north: ArrayLike,
+    east: ArrayLike,
+    *,
+    radius: float = WGS84_EQUATORIAL_RADIUS,
+) -> tuple[FloatOrArray, FloatOrArray]:
+    """Offsets the given points by the given number of meters towards north
+    and east, using a flat-Earth approximation that is accurate to about 10
+    meters over a kilometer except near the poles.
+
+    Returns:
+        the latitudes and the longitudes of the offset points
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    dlat = np.asarray(north, dtype=float) / radius
+    dlon = np.asarray(east, dtype=float) / (radius * np.cos(np.radians(lat)))
+    return _result(lat + np.degrees(dlat)), _result(lon + np.degrees(dlon))
+
+
+def segment_lengths(points: ArrayLike, *, radius: float = EARTH_RADIUS) -> NDArray:
+    """Returns the lengths of the segments of a path.
+
+    Parameters:
+        points: array of shape (N, 2) containing the latitudes and longitudes
+            of the points of the path
+
+    Returns:
+        array of length N-1 with the great-circle distances between consecutive
+        points
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return np.asarray(
+        haversine(
+            points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1], radius=radius
+        )
+    )
+
+
+def path_length(points: ArrayLike, *, radius: float = EARTH_RADIUS) -> float:
+    """Returns the total length of a path given by an array of shape (N, 2)
+    containing the latitudes and longitudes of its points.
+    """
+    return float(segment_lengths(points, radius=radius).sum())
+
+
+def load_waypoints(file_path: str, *, skip_header: bool = False) -> NDArray:
+    """Loads the latitudes and longitudes of waypoints from a CSV file with
+    two columns into an array of shape (N, 2).
+
+    Rows with missing values are ignored.
+    """
+    data = np.genfromtxt(
+        file_path,
+        delimiter=",",
+        usecols=(0, 1),
+        skip_header=1 if skip_header else 0,
+        ndmin=2,
+    )
+    return data[~np.isnan(data).any(axis=1)]
@@ -0,0 +1,59 @@
+from logging import getLogger
+from pytest import fixture
+
+from flockwave.server.ext.audit_log import DbStorage, Entry
+
+import flockwave.server.ext.audit_log as audit_log
+
+
+@fixture
+async def storage(tmp_path):
+    storage = DbStorage(tmp_path / "log.db")
+    async with storage.use(getLogger(__name__)):
+        yield storage
+
+
+def create_entries(count: int) -> list[Entry]:
+    return [
+        Entry(
+            timestamp=1000 + index,
+            component="foo" if index % 2 else "bar",
+            type="test",
+            data=str(index).encode("ascii"),
+        )
+        for index in range(count)
+    ]
+
+
+async def test_query(storage: DbStorage):
+    entries = create_entries(1000)
+    await storage.put(entries)
+    await storage.optimize()
+
+    assert list(await storage.query()) == entries
+    assert list(await storage.query("foo", min_date=1100, max_date=1110)) == [
+        entry for entry in entries[100:110] if entry.component == "foo"
+    ]
+    assert list(await storage.query([])) == []
+
+    streamed = [entry async for entry in storage.iter_query(["foo", "bar"])]
+    assert sorted(streamed, key=lambda entry: entry.timestamp) == entries
+
+    assert storage._conn is not None
+    plan = storage._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT timestamp FROM entries WHERE component = ?",
+        ("foo",),
+    ).fetchall()
+    assert "entries_by_component" in str(plan)
+
+
+async def test_prune(storage: DbStorage, monkeypatch):
+    monkeypatch.setattr(audit_log, "PRUNE_CHUNK_SIZE", 64)
+
+    entries = create_entries(1000)
+    await storage.put(entries)
+    await storage.optimize()
+
+    assert await storage.prune(1500) == 500
+    assert await storage.prune(1500) == 0
+    assert list(await storage.query()) == entries[500:]
@@ -0,0 +1,48 @@
+import httpx
+
+from pytest import raises
+from trio import sleep
+
+from flockwave.server.ext.camera_fleet import CameraFleet
+
+
+async def handle_request(request):
+    if request.url.host == "slow":
+        await sleep(10)
+    if request.url.host == "broken":
+        return httpx.Response(500)
+    return httpx.Response(200, json={"path": request.url.path})
+
+
+async def test_camera_fleet(autojump_clock):
+    fleet = CameraFleet(
+        {
+            "1": "http://camera:8000/",
+            "2": "http://camera:8001",
+            "3": "http://slow:8000/",
+            "4": "http://broken:8000/",
+        },
+        timeout=1,
+        transport=httpx.MockTransport(handle_request),
+    )
+
+    try:
+        results = await fleet.send("start_capture", ["1", "2", "3", "4", "5"])
+
+        assert results["1"] == (True, {"path": "/start_capture"})
+        assert results["2"] == (True, {"path": "/start_capture"})
+        assert results["3"] == (False, "Camera did not respond in time")
+        assert results["4"][0] is False
+        assert results["5"] == (False, "No such camera")
+
+        # One pooled client per camera host
+        assert len(fleet._clients) == 4
+
+        results = await fleet.send("stop_capture", ["1"])
+        assert results == {"1": (True, {"path": "/stop_capture"})}
+        assert len(fleet._clients) == 4
+
+        with raises(RuntimeError):
+            await fleet.send("self_destruct")
+    finally:
+        await fleet.aclose()
@@ -0,0 +1,162 @@
+from functools import partial
+from logging import getLogger
+from pytest import raises
+from trio import Event, fail_after, open_nursery, sleep, sleep_forever
+from trio.testing import wait_all_tasks_blocked
+
+from flockwave.server.comm import (
+    BULK_LANE,
+    COMMAND_LANE,
+    STREAM_LANE,
+    CommunicationManager,
+    DropPolicy,
+    OutboundLane,
+    OutboundQueue,
+)
+
+
+class FakeConnection:
+    """Connection that does nothing; used as a placeholder for the message
+    channels created by the communication manager.
+    """
+
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+
+
+class FakeChannel:
+    """Message channel that records the messages sent on it and never
+    receives anything. Sending blocks forever if the underlying connection
+    is stalled.
+    """
+
+    broadcast_address = "*"
+
+    def __init__(self, connection, log):
+        self.connection = connection
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await sleep_forever()
+
+    async def send(self, item):
+        if self.connection.stalled:
+            await sleep_forever()
+        self.sent.append(item)
+
+
+async def test_outbound_queue_priorities():
+    queue = OutboundQueue(
+        [
+            OutboundLane(COMMAND_LANE, 2),
+            OutboundLane(STREAM_LANE, 2, DropPolicy.DROP_OLDEST),
+            OutboundLane(BULK_LANE, 2),
+        ]
+    )
+
+    await queue.put("ftp1", BULK_LANE)
+    await queue.put("ftp2", BULK_LANE)
+    assert not queue.put_nowait("ftp3", BULK_LANE)
+
+    for item in ("rtk1", "rtk2", "rtk3"):
+        assert queue.put_nowait(item, STREAM_LANE)
+
+    await queue.put("cmd1", COMMAND_LANE)
+    assert len(queue) == 5
+
+    items = [await queue.get() for _ in range(5)]
+    assert items == [
+        (COMMAND_LANE, "cmd1"),
+        (STREAM_LANE, "rtk2"),
+        (STREAM_LANE, "rtk3"),
+        (BULK_LANE, "ftp1"),
+        (BULK_LANE, "ftp2"),
+    ]
+
+    stats = queue.statistics
+    assert stats[BULK_LANE].num_dropped == 1
+    assert stats[BULK_LANE].max_depth == 2
+    assert stats[STREAM_LANE].num_dropped == 1
+    assert stats[STREAM_LANE].depth == 0
+
+    with raises(ValueError):
+        OutboundLane(COMMAND_LANE, 0)
+
+
+async def test_outbound_queue_blocks_when_full():
+    queue = OutboundQueue([OutboundLane(COMMAND_LANE, 1)])
+    await queue.put(1, COMMAND_LANE)
+
+    done = Event()
+
+    async def put_second_item():
+        await queue.put(2, COMMAND_LANE)
+        done.set()
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(put_second_item)
+        await wait_all_tasks_blocked()
+        assert not done.is_set()
+
+        assert await queue.get() == (COMMAND_LANE, 1)
+        await done.wait()
+        assert await queue.get() == (COMMAND_LANE, 2)
+
+
+async def test_slow_link_does_not_block_other_links(autojump_clock):
+    manager = CommunicationManager(channel_factory=FakeChannel)
+    manager.add(FakeConnection(stalled=True), name="radio")
+    manager.add(FakeConnection(), name="wifi")
+
+    async def supervisor(connection, *, task):
+        await task(connection)
+
+    async def consumer(queue):
+        async for _ in queue:
+            pass
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(
+            partial(
+                manager.run,
+                consumer=consumer,
+                supervisor=supervisor,
+                log=getLogger(__name__),
+            )
+        )
+        await sleep(0.1)
+
+        # The stalled radio link must not block the packets sent to the wifi
+        # link, no matter which method was used to submit them
+        with fail_after(10):
+            for index in range(200):
+                await manager.broadcast_packet(index)
+                manager.enqueue_broadcast_packet(-index)
+                await manager.send_packet(index, ("wifi", "addr"))
+                await sleep(0.01)
+
+        await sleep(0.1)
+        wifi = next(
+            channel
+            for channel in manager.open_channels()
+            if not channel.connection.stalled
+        )
+        assert len(wifi.sent) == 600
+
+        stats = manager.outbound_statistics
+        radio_stats = stats["radio"][0]
+        assert radio_stats[STREAM_LANE].num_dropped > 0
+        assert radio_stats[COMMAND_LANE].depth == 64
+        assert radio_stats[COMMAND_LANE].num_dropped == 200 - 64 - 1
+        assert stats["wifi"][0][COMMAND_LANE].num_sent == 400
+
+        nursery.cancel_scope.cancel()
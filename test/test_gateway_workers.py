@@ -0,0 +1,184 @@
+from itertools import count
+from pytest import raises
+from trio import Event, current_time, open_nursery, sleep
+
+from flockwave.gateway.errors import NoIdleWorkerError
+from flockwave.gateway.workers import WorkerManager
+
+
+class FakeStream:
+    """Fake standard output of a fake process; yields nothing until the
+    process exits.
+    """
+
+    def __init__(self, process):
+        self._process = process
+
+    async def receive_some(self, max_bytes=None):
+        await self._process.wait()
+        return b""
+
+
+class FakeProcess:
+    """Fake worker process that runs until it is terminated."""
+
+    _pids = count(1000)
+
+    def __init__(self, exit_code=None):
+        self.pid = next(self._pids)
+        self.returncode = exit_code
+        self.stdout = FakeStream(self)
+        self._exited = Event()
+        if exit_code is not None:
+            self._exited.set()
+
+    def exit(self, code: int) -> None:
+        if self.returncode is None:
+            self.returncode = code
+            self._exited.set()
+
+    def kill(self):
+        self.exit(-9)
+
+    def terminate(self):
+        self.exit(-15)
+
+    async def wait(self):
+        await self._exited.wait()
+        return self.returncode
+
+
+class FakeProcessFactory:
+    """Process factory that records the processes that it started, optionally
+    creating processes that exit immediately with an error.
+    """
+
+    def __init__(self, failing: bool = False):
+        self.failing = failing
+        self.processes = []
+        self.timestamps = []
+
+    async def __call__(self, config_path):
+        process = FakeProcess(exit_code=1 if self.failing else None)
+        self.processes.append(process)
+        self.timestamps.append(current_time())
+        return process
+
+    @property
+    def running(self):
+        return [process for process in self.processes if process.returncode is None]
+
+
+def create_manager(**kwds):
+    factory = FakeProcessFactory(failing=kwds.pop("failing", False))
+    return WorkerManager(process_factory=factory, **kwds), factory
+
+
+async def test_spare_workers_are_handed_out_and_replenished(autojump_clock):
+    manager, factory = create_manager(max_count=3, spare_count=1)
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(manager.run)
+        await sleep(1)
+        assert len(factory.running) == 1
+
+        # First user gets the spare worker; a new spare is started in its place
+        first = await manager.request_worker("u1", "User 1")
+        await sleep(1)
+        assert len(factory.processes) == 2
+
+        second = await manager.request_worker("u2", "User 2")
+        await sleep(1)
+        assert first != second
+        assert len(factory.processes) == 3
+
+        # No slots left for another spare, but the last one is handed out
+        third = await manager.request_worker("u3", "User 3")
+        await sleep(1)
+        assert sorted([first, second, third]) == [0, 1, 2]
+        assert len(factory.processes) == 3
+
+        with raises(NoIdleWorkerError):
+            await manager.request_worker("u4", "User 4")
+
+        # Requesting a worker again replaces the old one of the same user
+        await manager.request_worker("u1", "User 1")
+        await sleep(1)
+        assert factory.processes[0].returncode is not None
+        assert len(factory.running) == 3
+
+        nursery.cancel_scope.cancel()
+
+
+async def test_lowering_spare_count_cancels_pending_spares(autojump_clock):
+    manager, factory = create_manager(max_count=4, spare_count=2, failing=True)
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(manager.run)
+
+        # Spares keep on failing so the next ones are launched with a delay
+        await sleep(0.5)
+        num_launched = len(factory.processes)
+        assert num_launched > 0
+
+        manager.spare_count = 0
+        await sleep(120)
+        assert len(factory.processes) == num_launched
+        assert manager._get_spare_entries() == []
+
+        # Spares that are running already are stopped as well
+        factory.failing = False
+        manager.spare_count = 2
+        await sleep(120)
+        assert len(factory.running) == 2
+
+        manager.spare_count = 0
+        await sleep(1)
+        assert factory.running == []
+
+        with raises(ValueError):
+            manager.spare_count = -1
+
+        nursery.cancel_scope.cancel()
+
+
+async def test_shrinking_the_pool(autojump_clock):
+    manager, factory = create_manager(max_count=2, spare_count=1)
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(manager.run)
+        await sleep(1)
+
+        index = await manager.request_worker("u1", "User 1")
+        await sleep(1)
+        assert len(factory.running) == 2
+
+        # Spare is stopped, the worker of the user keeps on running
+        manager.max_count = 0
+        await sleep(1)
+        assert len(factory.running) == 1
+        assert factory.processes[index].returncode is None
+
+        with raises(NoIdleWorkerError):
+            await manager.request_worker("u2", "User 2")
+
+        # Slot is removed when the worker of the user exits
+        factory.processes[index].exit(0)
+        await sleep(1)
+        assert manager._processes == []
+
+        nursery.cancel_scope.cancel()
+
+
+async def test_failing_spares_are_restarted_with_backoff(autojump_clock):
+    manager, factory = create_manager(max_count=1, spare_count=1, failing=True)
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(manager.run)
+        await sleep(200)
+        nursery.cancel_scope.cancel()
+
+    timestamps = factory.timestamps
+    delays = [round(b - a) for a, b in zip(timestamps, timestamps[1:])]
+    assert delays[:5] == [2, 4, 8, 16, 32]
+    assert all(delay <= 60 for delay in delays)
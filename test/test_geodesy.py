@@ -0,0 +1,70 @@
+from numpy import array
+from pytest import approx
+
+from flockwave.server.utils.geodesy import (
+    bearing,
+    destination,
+    distance_and_bearing,
+    haversine,
+    load_waypoints,
+    offset_by_meters,
+    path_length,
+    segment_lengths,
+)
+
+
+def test_haversine():
+    # One degree along the equator
+    assert haversine(0, 0, 0, 1) == approx(111195, rel=1e-4)
+    assert haversine(47.5, 19.0, 47.5, 19.0) == 0.0
+    assert isinstance(haversine(0, 0, 0, 1), float)
+
+    distances = haversine([0, 0], [0, 0], [0, 1], [1, 0])
+    assert distances.shape == (2,)
+    assert distances == approx([111195, 111195], rel=1e-4)
+
+
+def test_bearing():
+    assert bearing(0, 0, 1, 0) == approx(0)
+    assert bearing(0, 0, 0, 1) == approx(90)
+    assert bearing(0, 0, -1, 0) == approx(180)
+    assert bearing(0, 0, 0, -1) == approx(-90)
+
+    distance, heading = distance_and_bearing(0, 0, 0, 1)
+    assert distance == approx(111195, rel=1e-4)
+    assert heading == approx(90)
+
+
+def test_destination():
+    lat, lon = destination(12.948, 80.139, 500.0, 45.0)
+    assert haversine(12.948, 80.139, lat, lon) == approx(500.0)
+    assert bearing(12.948, 80.139, lat, lon) == approx(45.0, abs=1e-3)
+
+    lats, lons = destination(12.948, 80.139, 500.0, [-90.0, 90.0])
+    assert lats.shape == lons.shape == (2,)
+    assert lons[0] < 80.139 < lons[1]
+
+
+def test_offset_by_meters():
+    lat, lon = offset_by_meters(47.5, 19.0, 100, 0)
+    assert lon == 19.0
+    assert haversine(47.5, 19.0, lat, lon) == approx(100, rel=1e-2)
+
+    lat, lon = offset_by_meters(47.5, 19.0, 0, 100)
+    assert lat == 47.5
+    assert haversine(47.5, 19.0, lat, lon) == approx(100, rel=1e-2)
+
+
+def test_path_length():
+    points = array([[0, 0], [0, 1], [1, 1]])
+    assert segment_lengths(points) == approx([111195, 111195], rel=1e-4)
+    assert path_length(points) == approx(2 * 111195, rel=1e-4)
+    assert path_length(points[:1]) == 0.0
+
+
+def test_load_waypoints(tmp_path):
+    path = tmp_path / "waypoints.csv"
+    path.write_text("lat,lon\n47.5,19.0\n47.6,19.1,extra\n\n47.7,19.2\n")
+
+    points = load_waypoints(str(path), skip_header=True)
+    assert points.tolist() == [[47.5, 19.0], [47.6, 19.1], [47.7, 19.2]]
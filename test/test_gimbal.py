@@ -0,0 +1,101 @@
+import trio.socket
+
+from pytest import raises
+from struct import pack, unpack
+from trio import open_nursery, sleep
+
+from flockwave.server.Cam_Control.gimbal import (
+    CMD_ACQUIRE_GIMBAL_ATTITUDE,
+    CMD_SET_GIMBAL_ATTITUDE,
+    GimbalSessionManager,
+    decode_siyi_packet,
+    encode_siyi_packet,
+    parse_gimbal_address,
+)
+
+
+class FakeGimbal:
+    """Fake SIYI gimbal listening on a local UDP port that moves to every
+    attitude setpoint immediately.
+    """
+
+    def __init__(self):
+        self.setpoints = []
+        self.yaw = 0
+        self.pitch = 0
+        self.sock = trio.socket.socket(trio.socket.AF_INET, trio.socket.SOCK_DGRAM)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    async def run(self):
+        while True:
+            data, address = await self.sock.recvfrom(1024)
+            cmd_id, payload = decode_siyi_packet(data)
+            if cmd_id == CMD_SET_GIMBAL_ATTITUDE:
+                self.yaw, self.pitch = unpack("<hh", payload)
+                self.setpoints.append((self.yaw / 10, self.pitch / 10))
+            response = pack("<hhh", self.yaw, self.pitch, 0)
+            await self.sock.sendto(encode_siyi_packet(cmd_id, response), address)
+
+
+def test_siyi_packets():
+    # Examples from the SIYI SDK protocol documentation
+    assert encode_siyi_packet(0x01) == bytes.fromhex("55660100000000 0164c4")
+    assert encode_siyi_packet(CMD_ACQUIRE_GIMBAL_ATTITUDE) == bytes.fromhex(
+        "55660100000000 0de805"
+    )
+
+    packet = encode_siyi_packet(CMD_SET_GIMBAL_ATTITUDE, b"\x01\x02\x03\x04", seq=7)
+    assert decode_siyi_packet(packet) == (CMD_SET_GIMBAL_ATTITUDE, b"\x01\x02\x03\x04")
+
+    with raises(ValueError):
+        decode_siyi_packet(packet[:-1])
+    with raises(ValueError):
+        decode_siyi_packet(packet[:-1] + b"\x00")
+
+
+def test_parse_gimbal_address():
+    assert parse_gimbal_address("10.0.0.1") == ("10.0.0.1", 37260)
+    assert parse_gimbal_address("10.0.0.1:1234") == ("10.0.0.1", 1234)
+    assert parse_gimbal_address(("10.0.0.1", "1234")) == ("10.0.0.1", 1234)
+
+
+async def test_gimbal_session(autojump_clock):
+    gimbal = FakeGimbal()
+    await gimbal.sock.bind(("127.0.0.1", 0))
+
+    manager = GimbalSessionManager()
+    manager.configure({"default": "{0}:{1}".format(*gimbal.address)})
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(gimbal.run)
+        nursery.start_soon(manager.run)
+
+        session = manager.jog("up")
+        assert session is manager.get()
+
+        # Jogs issued before the gimbal processes them are coalesced
+        manager.jog("up")
+        manager.jog("right")
+        await sleep(0.1)
+
+        assert session.connected
+        assert gimbal.setpoints == [(4.0, 8.0)]
+        assert session.attitude.json == [4.0, 8.0, 0.0]
+
+        # Setpoints are clamped to the limits of the gimbal
+        for _ in range(10):
+            manager.jog("up")
+        await sleep(0.1)
+        assert gimbal.setpoints[-1] == (4.0, 25.0)
+
+        manager.jog("center")
+        await sleep(0.1)
+        assert gimbal.setpoints[-1] == (0.0, 0.0)
+
+        with raises(RuntimeError):
+            manager.jog("sideways")
+
+        nursery.cancel_scope.cancel()
@@ -0,0 +1,96 @@
+from logging import getLogger
+from trio import current_time, move_on_after, open_nursery, sleep
+from trio_util import RepeatedEvent
+from types import SimpleNamespace
+
+from flockwave.gps.vectors import GPSCoordinate
+from flockwave.server.ext.mavlink.driver import MAVLinkUAV
+
+#: Approximate length of one degree of latitude, in meters
+METERS_PER_DEGREE = 111195
+
+
+class FakeUAV:
+    """Fake MAVLink UAV that flies towards its current target along the
+    meridian with a constant speed and reports its position every second.
+    """
+
+    fly_through = MAVLinkUAV.fly_through
+    wait_until_near = MAVLinkUAV.wait_until_near
+
+    def __init__(self, speed: float = 5):
+        self.driver = SimpleNamespace(log=getLogger(__name__))
+        self.modes = []
+        self.speed = speed
+        self.target = None
+
+        self._position = GPSCoordinate(lat=47.0, lon=19.0, amsl=100)
+        self._position_updated = RepeatedEvent()
+
+    async def fly_to(self, target):
+        self.target = target
+
+    async def set_mode(self, mode):
+        self.modes.append(mode)
+
+    async def run(self):
+        step = self.speed / METERS_PER_DEGREE
+        while True:
+            await sleep(1)
+            lat = self._position.lat
+            if self.target is not None:
+                delta = self.target.lat - lat
+                lat += max(-step, min(step, delta))
+            self._position = GPSCoordinate(lat=lat, lon=19.0, amsl=100)
+            self._position_updated.set()
+
+
+def create_waypoints():
+    # Two legs of about 1.1 km each; more than 200 seconds per leg at 5 m/s
+    return [
+        GPSCoordinate(lat=47.01, lon=19.0, amsl=100),
+        GPSCoordinate(lat=47.02, lon=19.0, amsl=100),
+    ]
+
+
+async def test_fly_through_reports_progress_during_long_legs(autojump_clock):
+    uav = FakeUAV()
+    events = []
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(uav.run)
+        async for progress in uav.fly_through(
+            create_waypoints(), acceptance_radius=10, mode_after="loiter"
+        ):
+            events.append((current_time(), progress))
+        nursery.cancel_scope.cancel()
+
+    timestamps = [timestamp for timestamp, _ in events]
+    percentages = [progress.percentage for _, progress in events]
+
+    assert uav.modes == ["guided", "loiter"]
+    assert timestamps[-1] > 400
+    assert max(b - a for a, b in zip(timestamps, timestamps[1:])) < 10
+    assert percentages == sorted(percentages)
+    assert percentages[-1] == 100
+    assert any(0 < percentage < 50 for percentage in percentages)
+    assert any(50 < percentage < 100 for percentage in percentages)
+    assert any("waypoint 2 of 2" in progress.message for _, progress in events)
+
+
+async def test_fly_through_restores_mode_when_cancelled(autojump_clock):
+    uav = FakeUAV()
+    events = []
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(uav.run)
+        with move_on_after(100):
+            async for progress in uav.fly_through(
+                create_waypoints(), acceptance_radius=10, mode_after="loiter"
+            ):
+                events.append(progress)
+        nursery.cancel_scope.cancel()
+
+    assert uav.modes == ["guided", "loiter"]
+    assert events
+    assert all(progress.percentage < 50 for progress in events)
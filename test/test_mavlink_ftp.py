@@ -0,0 +1,212 @@
+from contextlib import contextmanager
+from pytest import fixture
+from random import Random
+from trio import sleep, sleep_forever
+from types import SimpleNamespace
+
+from flockwave.server.ext.mavlink.ftp import (
+    MAVFTP,
+    MAVFTPErrorCode,
+    MAVFTPMessage,
+    MAVFTPOpCode,
+    MAVFTPSwarmUploader,
+    _MAVFTP_CHUNK_SIZE,
+)
+from flockwave.server.show.utils import crc32_mavftp as crc32
+
+
+class FakeMAVFTPServer:
+    """Fake MAVFTP server of a single UAV with a random packet loss."""
+
+    def __init__(self, loss: float = 0.0, *, burst: bool = True, seed: int = 42):
+        self.burst = burst
+        self.files = {}
+        self.handlers = []
+        self.loss = loss
+        self.max_in_flight = 0
+        self.num_in_flight = 0
+        self.opcodes = []
+        self._random = Random(seed)
+        self._sessions = {}
+
+    def create_ftp(self, **kwds) -> MAVFTP:
+        return MAVFTP(self.send, listener=self.use_handler, **kwds)
+
+    @contextmanager
+    def use_handler(self, handler):
+        self.handlers.append(handler)
+        try:
+            yield
+        finally:
+            self.handlers.remove(handler)
+
+    async def send(self, spec, wait_for_response):
+        _, fields = spec
+        _, expected = wait_for_response
+        request = MAVFTPMessage.decode(fields["payload"])
+        self.opcodes.append(request.opcode)
+
+        self.num_in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.num_in_flight)
+        try:
+            if self._is_lost():
+                await sleep_forever()
+            else:
+                await sleep(0.01)
+
+            replies = self._handle(request)
+            for reply in replies[1:]:
+                if not self._is_lost():
+                    for handler in self.handlers:
+                        handler(self._to_mavlink(reply, 0))
+
+            return self._to_mavlink(replies[0], expected["seq_no"])
+        finally:
+            self.num_in_flight -= 1
+
+    def _handle(self, request: MAVFTPMessage) -> list[MAVFTPMessage]:
+        opcode = request.opcode
+        path = request.data.decode("utf-8", errors="replace")
+
+        if opcode == MAVFTPOpCode.CREATE_FILE:
+            self.files[path] = bytearray()
+            self._sessions[1] = path
+            return [self._ack(opcode, session_id=1)]
+        elif opcode == MAVFTPOpCode.OPEN_FILE_RO:
+            self._sessions[1] = path
+            size = len(self.files[path]).to_bytes(4, "little")
+            return [self._ack(opcode, session_id=1, data=size)]
+        elif opcode == MAVFTPOpCode.WRITE_FILE:
+            content = self.files[self._sessions[request.session_id]]
+            end = request.offset + len(request.data)
+            if len(content) < end:
+                content.extend(bytes(end - len(content)))
+            content[request.offset : end] = request.data
+            return [self._ack(opcode)]
+        elif opcode == MAVFTPOpCode.READ_FILE:
+            content = self.files[self._sessions[request.session_id]]
+            if request.offset >= len(content):
+                return [self._nak(opcode, MAVFTPErrorCode.EOF)]
+            data = content[request.offset : request.offset + request.size]
+            return [self._ack(opcode, offset=request.offset, data=bytes(data))]
+        elif opcode == MAVFTPOpCode.BURST_READ_FILE:
+            if not self.burst:
+                return [self._nak(opcode, MAVFTPErrorCode.UNKNOWN_COMMAND)]
+            content = self.files[self._sessions[request.session_id]]
+            if request.offset >= len(content):
+                return [self._nak(opcode, MAVFTPErrorCode.EOF)]
+            offsets = range(request.offset, len(content), request.size)
+            replies = [
+                self._ack(
+                    opcode,
+                    session_id=request.session_id,
+                    offset=offset,
+                    data=bytes(content[offset : offset + request.size]),
+                    burst_complete=offset == offsets[-1],
+                )
+                for offset in offsets
+            ]
+            return [replies[0]] + replies
+        elif opcode == MAVFTPOpCode.CALC_FILE_CRC32:
+            if path not in self.files:
+                return [self._nak(opcode, MAVFTPErrorCode.FILE_NOT_FOUND)]
+            crc = crc32(bytes(self.files[path]))
+            return [self._ack(opcode, data=crc.to_bytes(4, "little"))]
+        else:
+            return [self._ack(opcode)]
+
+    def _ack(self, opcode, **kwds) -> MAVFTPMessage:
+        return MAVFTPMessage(MAVFTPOpCode.ACK, req_opcode=opcode, **kwds)
+
+    def _nak(self, opcode, code) -> MAVFTPMessage:
+        return MAVFTPMessage(MAVFTPOpCode.NAK, req_opcode=opcode, data=bytes([code]))
+
+    def _is_lost(self) -> bool:
+        return self._random.random() < self.loss
+
+    def _to_mavlink(self, message: MAVFTPMessage, seq_no: int):
+        return SimpleNamespace(payload=message.encode(seq_no))
+
+
+@fixture
+def data():
+    return Random(1).randbytes(50 * _MAVFTP_CHUNK_SIZE + 17)
+
+
+async def test_windowed_put(data, autojump_clock):
+    server = FakeMAVFTPServer(loss=0.1)
+    ftp = server.create_ftp(window=4)
+
+    progress = []
+    await ftp.put(data, "show.skyb", on_progress=lambda *args: progress.append(args))
+
+    assert bytes(server.files["show.skyb"]) == data
+    assert server.max_in_flight == 4
+    assert progress[-1] == (len(data), len(data))
+
+
+async def test_burst_get(data, autojump_clock):
+    server = FakeMAVFTPServer(loss=0.1)
+    server.files["log.bin"] = bytearray(data)
+    ftp = server.create_ftp()
+
+    assert await ftp.get("log.bin", verify_crc=True) == data
+
+    # Lost packets of the bursts are re-requested with plain reads
+    assert MAVFTPOpCode.BURST_READ_FILE in server.opcodes
+    assert MAVFTPOpCode.READ_FILE in server.opcodes
+
+
+async def test_get_without_burst_support(data, autojump_clock):
+    server = FakeMAVFTPServer(burst=False)
+    server.files["log.bin"] = bytearray(data)
+    ftp = server.create_ftp(window=8)
+
+    assert await ftp.get("log.bin") == data
+    assert server.max_in_flight == 8
+
+    server.files["empty.bin"] = bytearray()
+    assert await ftp.get("empty.bin") == b""
+
+
+async def test_swarm_uploader(data, autojump_clock):
+    servers = {f"uav{i}": FakeMAVFTPServer(loss=0.05, seed=i) for i in range(5)}
+    servers["uav4"].files = None
+
+    uploader = MAVFTPSwarmUploader(
+        lambda uav: servers[uav].create_ftp(), max_parallel=2
+    )
+
+    progress = []
+    files = {uav: data[: 1000 * (i + 1)] for i, uav in enumerate(servers)}
+    results = await uploader.upload(files, "show.skyb", on_progress=progress.append)
+
+    for i in range(4):
+        assert results[f"uav{i}"] is None
+        assert bytes(servers[f"uav{i}"].files["show.skyb"]) == files[f"uav{i}"]
+
+    assert isinstance(results["uav4"], TypeError)
+
+    percentages = [item.percentage for item in progress]
+    assert percentages == sorted(percentages)
+    assert percentages[-1] == 100
+    assert progress[-1].message == "5/5 uploads finished"
+
+
+async def test_swarm_uploader_skips_unchanged_files(data, autojump_clock):
+    servers = {f"uav{i}": FakeMAVFTPServer(seed=i) for i in range(3)}
+    servers["uav0"].files["show.skyb"] = bytearray(data)
+    servers["uav1"].files["show.skyb"] = bytearray(data[:100])
+
+    uploader = MAVFTPSwarmUploader(lambda uav: servers[uav].create_ftp())
+    results = await uploader.upload(
+        dict.fromkeys(servers, data), "show.skyb", skip_unchanged=True
+    )
+
+    assert results == dict.fromkeys(servers)
+    for server in servers.values():
+        assert bytes(server.files["show.skyb"]) == data
+
+    assert MAVFTPOpCode.WRITE_FILE not in servers["uav0"].opcodes
+    assert MAVFTPOpCode.WRITE_FILE in servers["uav1"].opcodes
+    assert MAVFTPOpCode.WRITE_FILE in servers["uav2"].opcodes
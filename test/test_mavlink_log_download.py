@@ -0,0 +1,123 @@
+from base64 import b64decode
+from pytest import raises
+from random import Random
+from trio import TooSlowError, sleep, sleep_forever
+from types import SimpleNamespace
+from typing import Optional
+
+from flockwave.server.ext.mavlink.log_download import (
+    LogDownloadWindow,
+    MAVLinkLogDownloader,
+)
+
+
+class FakeLogServer:
+    """Fake MAVLink drone that serves a single log over a lossy link."""
+
+    def __init__(
+        self,
+        log: bytes,
+        loss: float = 0.0,
+        seed: int = 42,
+        max_requests: Optional[int] = None,
+    ):
+        self.downloader = None
+        self.log = log
+        self.loss = loss
+        self.max_requests = max_requests
+        self.requests = []
+        self._random = Random(seed)
+
+    async def send(self, message, wait_for_response=None):
+        type, fields = message
+        if type == "LOG_REQUEST_END":
+            return
+
+        if self.max_requests is not None and len(self.requests) >= self.max_requests:
+            # Simulate a lost connection
+            await sleep_forever()
+
+        await sleep(0.05)
+
+        if type == "LOG_REQUEST_LIST":
+            return SimpleNamespace(id=1, num_logs=1, size=len(self.log), time_utc=0)
+
+        assert type == "LOG_REQUEST_DATA"
+        self.requests.append((fields["ofs"], fields["count"]))
+
+        end = min(fields["ofs"] + fields["count"], len(self.log))
+        packets = [
+            self._create_packet(offset, self.log[offset : min(offset + 90, end)])
+            for offset in range(fields["ofs"], end, 90)
+        ]
+        for packet in packets[1:]:
+            if self._random.random() >= self.loss:
+                self.downloader.handle_message_log_data(packet)
+
+        return packets[0]
+
+    def _create_packet(self, offset: int, data: bytes):
+        return SimpleNamespace(
+            get_type=lambda: "LOG_DATA",
+            id=1,
+            ofs=offset,
+            count=len(data),
+            data=data.ljust(90, b"\x00"),
+        )
+
+
+async def download(downloader):
+    result = None
+    async for item in downloader.get_log(1):
+        result = item
+    return b64decode(result.body)
+
+
+async def test_download_over_lossy_link(autojump_clock):
+    log = Random(1).randbytes(100000)
+    server = FakeLogServer(log, loss=0.05)
+    server.downloader = downloader = MAVLinkLogDownloader(server.send)
+
+    assert await download(downloader) == log
+
+    # The window shrinks after losses and never exceeds its limits
+    assert all(count <= LogDownloadWindow.max_size for _, count in server.requests)
+    assert any(count < 64 * 90 for _, count in server.requests)
+    assert not downloader._partial_downloads
+
+
+async def test_resume_download(autojump_clock):
+    log = Random(2).randbytes(50000)
+    server = FakeLogServer(log, max_requests=2)
+    server.downloader = downloader = MAVLinkLogDownloader(server.send)
+
+    with raises(TooSlowError):
+        await download(downloader)
+
+    (partial,) = downloader._partial_downloads.values()
+    num_flushed = partial.num_flushed
+    assert num_flushed > 0
+
+    server.max_requests = None
+    server.requests.clear()
+    assert await download(downloader) == log
+    assert server.requests[0][0] == num_flushed
+    assert not downloader._partial_downloads
+
+
+def test_window():
+    window = LogDownloadWindow()
+    assert window.timeout == 3.0
+
+    for _ in range(100):
+        window.on_success()
+    assert window.size == LogDownloadWindow.max_size
+
+    for _ in range(100):
+        window.on_lost()
+    assert window.size == LogDownloadWindow.min_size
+
+    for _ in range(10):
+        window.observe_rtt(0.1)
+        window.observe_interval(0.01)
+    assert window.timeout == 0.25
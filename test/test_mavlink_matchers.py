@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from flockwave.concurrency import Future
+from flockwave.server.ext.mavlink.matchers import MAVLinkMessageMatcherRegistry
+
+
+def create_message(system_id, **kwds):
+    return SimpleNamespace(get_srcSystem=lambda: system_id, **kwds)
+
+
+def test_keyed_matchers():
+    registry = MAVLinkMessageMatcherRegistry()
+
+    futures = [Future() for _ in range(4)]
+    removers = [
+        registry.add("COMMAND_ACK", {"command": 400}, 1, futures[0]),
+        registry.add("COMMAND_ACK", {"command": 400, "result": 0}, 2, futures[1]),
+        registry.add("COMMAND_ACK", {"command": 176}, None, futures[2]),
+        registry.add("COMMAND_ACK", lambda msg: msg.result == 4, 1, futures[3]),
+    ]
+    assert registry.stats == {"pending": 4, "matched": 0, "expired": 0}
+
+    # Messages nobody is waiting for
+    registry.dispatch("PARAM_VALUE", create_message(1, param_id="FOO"))
+    registry.dispatch("COMMAND_ACK", create_message(3, command=400, result=0))
+    registry.dispatch("COMMAND_ACK", create_message(2, command=400, result=4))
+    assert not any(future.done() for future in futures)
+
+    message = create_message(1, command=400, result=4)
+    registry.dispatch("COMMAND_ACK", message)
+    assert futures[0].result() is message
+    assert futures[3].result() is message
+    assert not futures[1].done()
+
+    registry.dispatch("COMMAND_ACK", create_message(7, command=176, result=0))
+    assert futures[2].done()
+    assert registry.num_matched == 3
+
+    for remove in removers:
+        remove()
+    assert registry.stats == {"pending": 0, "matched": 3, "expired": 1}
+    assert not registry._buckets
+
+
+def test_ftp_sequence_number_matchers():
+    registry = MAVLinkMessageMatcherRegistry()
+
+    futures = {seq_no: Future() for seq_no in (1, 2, 258)}
+    for seq_no, future in futures.items():
+        registry.add("FILE_TRANSFER_PROTOCOL", {"seq_no": seq_no}, 1, future)
+
+    registry.dispatch("FILE_TRANSFER_PROTOCOL", create_message(1, payload=[2, 1, 0]))
+    registry.dispatch("FILE_TRANSFER_PROTOCOL", create_message(1, payload=[1]))
+    assert [future.done() for future in futures.values()] == [False, False, True]
+
+    registry.cancel_all()
+    assert futures[1].cancelled()
@@ -0,0 +1,74 @@
+from pytest import raises
+from types import SimpleNamespace
+
+from flockwave.server.ext.mavlink.enums import MAVCommand, MAVMissionResult
+from flockwave.server.ext.mavlink.mission import MissionItem, MissionManager
+
+
+class FakeAutopilot:
+    """Fake MAVLink autopilot that requests the items of a mission upload one
+    by one and then acknowledges the upload.
+    """
+
+    def __init__(self, result=MAVMissionResult.ACCEPTED, use_int=True):
+        self.count = None
+        self.items = []
+        self.result = result
+        self.use_int = use_int
+
+    async def __call__(self, message, wait_for_one_of):
+        type, fields = message
+        if type == "MISSION_COUNT":
+            self.count = fields["count"]
+        elif type == "MISSION_ITEM_INT":
+            self.items.append(fields)
+
+        if len(self.items) == self.count:
+            return "ack", SimpleNamespace(type=self.result)
+        else:
+            key = "request_int" if self.use_int else "request"
+            return key, SimpleNamespace(seq=len(self.items))
+
+
+def create_mission():
+    return [
+        MissionItem(MAVCommand.NAV_TAKEOFF, alt=30),
+        MissionItem.waypoint(47.5, 19.0, 30),
+        MissionItem.waypoint(47.6, 19.1, 30),
+    ]
+
+
+async def test_upload_mission():
+    autopilot = FakeAutopilot()
+    manager = MissionManager(autopilot)
+
+    progress = [event async for event in manager.upload_mission(create_mission())]
+
+    assert [event.percentage for event in progress] == [0, 0, 33, 66, 100]
+    assert [item["seq"] for item in autopilot.items] == [0, 1, 2]
+    assert autopilot.items[0]["command"] == MAVCommand.NAV_TAKEOFF
+    assert autopilot.items[1]["x"] == 475000000
+    assert autopilot.items[1]["y"] == 190000000
+
+
+async def test_upload_mission_with_legacy_requests():
+    autopilot = FakeAutopilot(use_int=False)
+    manager = MissionManager(autopilot)
+
+    async for _ in manager.upload_mission(create_mission()):
+        pass
+
+    assert len(autopilot.items) == 3
+
+
+async def test_upload_rejected_mission():
+    autopilot = FakeAutopilot(result=MAVMissionResult.NO_SPACE)
+    manager = MissionManager(autopilot)
+
+    with raises(RuntimeError, match="NO_SPACE"):
+        async for _ in manager.upload_mission(create_mission()):
+            pass
+
+    with raises(RuntimeError):
+        async for _ in manager.upload_mission([]):
+            pass
@@ -0,0 +1,47 @@
+from pytest import raises
+from trio import open_nursery, sleep
+
+from flockwave.server.ext.mavlink.driver import ShowUploadBatch
+from flockwave.server.model.commands import Progress
+
+
+async def collect(batch: ShowUploadBatch, uav, items: list):
+    try:
+        async for progress in batch.wait_for(uav):
+            items.append(progress.percentage)
+    except Exception as ex:
+        items.append(ex)
+
+
+async def test_show_upload_batch(autojump_clock):
+    async def upload(*, on_progress):
+        for percentage in (0, 50, 100):
+            on_progress(Progress(percentage=percentage))
+            await sleep(1.25)
+        return {"uav0": None, "uav1": error}
+
+    batch = ShowUploadBatch()
+    error = RuntimeError("upload failed")
+    items = {"uav0": [], "uav1": []}
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(batch.run, upload)
+        for uav, progress in items.items():
+            nursery.start_soon(collect, batch, uav, progress)
+
+    # Both UAVs observe the aggregate progress of the batch
+    assert items["uav0"] == [0, 0, 50, 100]
+    assert items["uav1"] == [0, 0, 50, 100, error]
+
+
+async def test_show_upload_batch_error(autojump_clock):
+    async def upload(*, on_progress):
+        raise RuntimeError("Only NWU coordinate systems are supported")
+
+    batch = ShowUploadBatch()
+    await batch.run(upload)
+
+    for uav in ("uav0", "uav1"):
+        with raises(RuntimeError, match="NWU"):
+            async for _ in batch.wait_for(uav):
+                pass
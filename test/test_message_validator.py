@@ -0,0 +1,75 @@
+from jsonschema import ValidationError
+from pytest import raises
+
+from flockwave.server.message_validator import MessageValidator
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "body": {"$ref": "#/definitions/body"},
+    },
+    "required": ["id", "body"],
+    "definitions": {
+        "body": {
+            "type": "object",
+            "oneOf": [
+                {"$ref": "#/definitions/SYS-PING"},
+                {"$ref": "#/definitions/UAV-INF"},
+            ],
+        },
+        "uavIds": {"type": "array", "items": {"type": "string"}},
+        "SYS-PING": {
+            "properties": {"type": {"const": "SYS-PING"}},
+            "required": ["type"],
+            "additionalProperties": False,
+        },
+        "UAV-INF": {
+            "allOf": [
+                {"properties": {"type": {"enum": ["UAV-INF"]}}},
+                {
+                    "properties": {"ids": {"$ref": "#/definitions/uavIds"}},
+                    "required": ["type", "ids"],
+                },
+            ]
+        },
+    },
+}
+
+
+def create_message(body):
+    return {"id": "1", "body": body}
+
+
+def test_message_validator():
+    validator = MessageValidator(SCHEMA)
+    assert validator.message_types == ["SYS-PING", "UAV-INF"]
+
+    validator.validate(create_message({"type": "SYS-PING"}))
+    validator.validate(create_message({"type": "UAV-INF", "ids": ["1", "2"]}))
+    assert sorted(validator._validators) == ["SYS-PING", "UAV-INF"]
+
+    invalid_messages = [
+        create_message({"type": "SYS-PING", "foo": 1}),
+        create_message({"type": "UAV-INF", "ids": [1]}),
+        create_message({"type": "UAV-INF"}),
+        create_message({"type": "NO-SUCH-TYPE"}),
+        create_message({"type": ["SYS-PING"]}),
+        create_message("SYS-PING"),
+        {"body": {"type": "SYS-PING"}},
+    ]
+    for message in invalid_messages:
+        with raises(ValidationError):
+            validator.validate(message)
+
+    # Unknown message types do not get a validator of their own
+    assert sorted(validator._validators) == ["SYS-PING", "UAV-INF"]
+
+
+def test_envelope_validation():
+    MessageValidator.validate_envelope(create_message({"type": "X-FOO"}))
+
+    for message in (None, create_message(None), create_message({"type": 42})):
+        with raises(ValidationError):
+            MessageValidator.validate_envelope(message)
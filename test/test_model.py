@@ -1,3 +1,7 @@
+from json import loads
+from zlib import decompress
+
+from flockwave.server.model import EncodedMessage, FlockwaveMessageBuilder
 from flockwave.server.model.attitude import Attitude
 from flockwave.server.model.gps import GPSFix, GPSFixType
 from flockwave.server.model.uav import UAVStatusInfo
@@ -17,6 +21,22 @@ def test_attitude():
     assert attitude.json == Attitude.from_json(attitude.json).json
 
 
+def test_encoded_message():
+    message = FlockwaveMessageBuilder().create_notification(
+        {"type": "SYS-MSG", "items": []}
+    )
+    encoded = EncodedMessage(message)
+
+    data = encoded.json
+    assert encoded.json is data
+    assert encoded.num_encodings == 1
+
+    assert loads(encoded.json_str)["body"] == {"type": "SYS-MSG", "items": []}
+    assert decompress(encoded.compressed) == data
+    assert encoded.num_encodings == 3
+    assert encoded.encoding_time > 0
+
+
 def test_gpsfix():
     gps = GPSFix(GPSFixType.FIX_3D, 15, 1.2, 1.5)
     assert gps.json == [3, 15, 1200, 1500]
@@ -40,4 +60,22 @@ def test_uavstatusinfo():
     assert status.attitude is None
 
 
+def test_uavstatusinfo_json_fragment():
+    status = UAVStatusInfo(id="01", timestamp=1000)
+
+    fragment = status.to_json_fragment()
+    assert fragment is status.to_json_fragment()
+    assert fragment["id"] == "01"
+    assert fragment["gps"] == status.gps.json
+    assert fragment["airspeed"] == 0
+
+    status.battery.voltage = 12.3
+    status.update_timestamp(2000)
+
+    updated = status.to_json_fragment()
+    assert updated is not fragment
+    assert updated["battery"] == [123]
+    assert updated is status.to_json_fragment()
+
+
 test_attitude()
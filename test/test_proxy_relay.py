@@ -0,0 +1,106 @@
+from trio import open_nursery
+from trio.testing import memory_stream_pair, wait_all_tasks_blocked
+
+from flockwave.proxy.relay import HTTPRelay, LocalConnectionPool
+
+
+class MemoryConnection:
+    """Minimal stream connection on top of one end of an in-memory stream
+    pair.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        await self._stream.aclose()
+
+    async def read(self, size: int = 65536) -> bytes:
+        return await self._stream.receive_some(size)
+
+    async def write(self, data: bytes) -> None:
+        await self._stream.send_all(data)
+
+
+async def read_response(stream) -> bytes:
+    data = b""
+    while b"\r\n\r\n" not in data:
+        data += await stream.receive_some()
+    head, _, body = data.partition(b"\r\n\r\n")
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+            while len(body) < length:
+                body += await stream.receive_some()
+    return head + b"\r\n\r\n" + body
+
+
+async def test_keep_alive_and_upgrade():
+    remote_client, remote_server = memory_stream_pair()
+    local_ends = []
+
+    def create_local_connection():
+        proxy_end, server_end = memory_stream_pair()
+        local_ends.append(server_end)
+        return MemoryConnection(proxy_end)
+
+    pool = LocalConnectionPool(create_local_connection)
+    relay = HTTPRelay(MemoryConnection(remote_server), pool)  # type: ignore
+
+    async with open_nursery() as nursery:
+        nursery.start_soon(relay.run)
+
+        # Plain request, response relayed with its body, local connection is
+        # returned to the pool
+        await remote_client.send_all(b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n")
+        await wait_all_tasks_blocked()
+        assert await local_ends[0].receive_some() == (
+            b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n"
+        )
+        await local_ends[0].send_all(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello"
+        )
+        assert (await read_response(remote_client)).endswith(b"\r\n\r\nhello")
+
+        # Second request with a chunked body reuses the pooled connection
+        # for the response but goes through a fresh one for the upload
+        await remote_client.send_all(
+            b"POST /b HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"3\r\nabc\r\n0\r\n\r\n"
+        )
+        await wait_all_tasks_blocked()
+        data = b""
+        while not data.endswith(b"0\r\n\r\n"):
+            data += await local_ends[1].receive_some()
+        assert data.endswith(b"3\r\nabc\r\n0\r\n\r\n")
+        await local_ends[1].send_all(b"HTTP/1.1 204 No Content\r\n\r\n")
+        assert await read_response(remote_client) == (
+            b"HTTP/1.1 204 No Content\r\n\r\n"
+        )
+
+        # WebSocket upgrade turns the connection into a tunnel
+        await remote_client.send_all(
+            b"GET /ws HTTP/1.1\r\nConnection: Upgrade\r\nUpgrade: websocket\r\n\r\n"
+        )
+        await wait_all_tasks_blocked()
+        local = local_ends[-1]
+        assert (await local.receive_some()).startswith(b"GET /ws")
+        await local.send_all(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n\r\n"
+        )
+        assert (await read_response(remote_client)).startswith(b"HTTP/1.1 101")
+
+        await remote_client.send_all(b"ping")
+        assert await local.receive_some() == b"ping"
+        await local.send_all(b"pong")
+        assert await remote_client.receive_some() == b"pong"
+
+        await remote_client.aclose()
+
+    stats = relay.statistics
+    assert stats.num_requests == 3
+    assert stats.num_reused_connections == 1
+    assert stats.bytes_sent > 0 and stats.bytes_received > 0
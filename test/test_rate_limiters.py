@@ -1,7 +1,13 @@
 from pytest_trio import trio_fixture
 from trio import sleep
 
-from flockwave.server.message_hub import BatchMessageRateLimiter, UAVMessageRateLimiter
+from flockwave.server.message_hub import (
+    BatchMessageRateLimiter,
+    UAVMessageRateLimiter,
+    UAVStatusDeltaRateLimiter,
+    UAVStatusSubscription,
+)
+from flockwave.server.model.uav import PassiveUAV
 
 
 @trio_fixture
@@ -9,8 +15,8 @@ def create_rate_limiter(nursery):
     def rate_limiter_factory(cls, *args, **kwds):
         result = []
 
-        async def dispatcher(message):
-            result.append(message)
+        async def dispatcher(message, to=None):
+            result.append(message if to is None else (to, message))
 
         rate_limiter = cls(*args, **kwds)
         nursery.start_soon(rate_limiter.run, dispatcher, nursery)
@@ -137,3 +143,124 @@ class TestUAVMessageRateLimiter:
         await sleep(1)
 
         assert result == [(1, 2), (1, 2, 3, 4), (3, 4, 5), (3, 4, 6)]
+
+
+class TestUAVStatusDeltaRateLimiter:
+    async def test_sends_keyframes_and_deltas(
+        self, create_rate_limiter, autojump_clock
+    ):
+        statuses = {
+            "1": {"position": [1, 2, 3], "heading": 90, "errors": []},
+            "2": {"position": [4, 5, 6], "heading": 180, "errors": []},
+        }
+
+        rate_limiter, result = create_rate_limiter(
+            UAVStatusDeltaRateLimiter,
+            lambda uav_ids: {id: statuses[id] for id in uav_ids if id in statuses},
+            lambda: list(statuses),
+            lambda body: body,
+            delay=0.1,
+            keyframe_interval=10,
+        )
+        await sleep(0.1)  # let the nursery start the rate limiter
+
+        rate_limiter.subscribe("a")
+        await sleep(0.01)
+        rate_limiter.subscribe("b", fields=["heading"], max_rate=1)
+        assert rate_limiter.is_subscribed("a")
+        await sleep(0.05)
+
+        # Subscribing sends a keyframe immediately
+        assert result == [
+            ("a", {"type": "X-UAV-INF-DELTA", "keyframe": True, "status": statuses}),
+            (
+                "b",
+                {
+                    "type": "X-UAV-INF-DELTA",
+                    "keyframe": True,
+                    "status": {"1": {"heading": 90}, "2": {"heading": 180}},
+                },
+            ),
+        ]
+        result.clear()
+
+        # Only changed fields are sent, and only to interested clients
+        statuses["1"] = {**statuses["1"], "position": [1, 2, 4]}
+        rate_limiter.add_request(["1"])
+        await sleep(0.5)
+        statuses["2"] = {**statuses["2"], "heading": 270}
+        rate_limiter.add_request(["2"])
+        await sleep(0.05)
+        del statuses["1"]
+        rate_limiter.add_request(["1"])
+        await sleep(1)
+
+        assert result == [
+            (
+                "a",
+                {
+                    "type": "X-UAV-INF-DELTA",
+                    "keyframe": False,
+                    "status": {"1": {"position": [1, 2, 4]}},
+                },
+            ),
+            (
+                "a",
+                {
+                    "type": "X-UAV-INF-DELTA",
+                    "keyframe": False,
+                    "status": {"2": {"heading": 270}},
+                },
+            ),
+            (
+                "a",
+                {
+                    "type": "X-UAV-INF-DELTA",
+                    "keyframe": False,
+                    "status": {},
+                    "removed": ["1"],
+                },
+            ),
+            # Client "b" is limited to one message per second so the changes
+            # are merged into a single message
+            (
+                "b",
+                {
+                    "type": "X-UAV-INF-DELTA",
+                    "keyframe": False,
+                    "status": {"2": {"heading": 270}},
+                    "removed": ["1"],
+                },
+            ),
+        ]
+        result.clear()
+
+        # Keyframes are sent periodically even if nothing changes
+        rate_limiter.unsubscribe("b")
+        await sleep(10)
+        assert result == [
+            (
+                "a",
+                {"type": "X-UAV-INF-DELTA", "keyframe": True, "status": statuses},
+            )
+        ]
+
+    def test_in_place_status_changes_are_sent(self):
+        uav = PassiveUAV("1", driver=None)
+        subscription = UAVStatusSubscription()
+
+        assert subscription.diff("1", uav.status.to_json_fragment())
+
+        # Error codes and RSSI values are modified in place by the UAV
+        uav.ensure_error(5)
+        uav.update_status()
+        delta = subscription.diff("1", uav.status.to_json_fragment())
+        assert delta is not None
+        assert delta["errors"] == [5]
+        assert "rssi" not in delta
+
+        uav.update_rssi(index=0, value=50)
+        delta = subscription.diff("1", uav.status.to_json_fragment())
+        assert delta is not None
+        assert delta["rssi"] == [50]
+        assert "errors" not in delta
@@ -0,0 +1,84 @@
+from base64 import b64encode
+from copy import deepcopy
+from pytest import fixture
+
+from flockwave.server.show.cache import EncodedShowFile, ShowEncodingCache
+from flockwave.server.show.formats import (
+    SkybrushBinaryShowFile,
+    encode_skybrush_binary_show_file,
+)
+from flockwave.server.show.rth_plan import RTHAction, RTHPlan, RTHPlanEntry
+from flockwave.server.show.specification import (
+    get_trajectory_from_show_specification,
+    get_yaw_setpoints_from_show_specification,
+)
+from flockwave.server.show.utils import crc32_mavftp
+
+
+@fixture
+def show():
+    return {
+        "coordinateSystem": {"origin": [19.0, 47.0], "orientation": "0", "type": "nwu"},
+        "trajectory": {
+            "version": 1,
+            "points": [
+                [0, [10, 20, 0], []],
+                [5, [10, 20, 20], [[10, 20, 0], [10, 20, 20]]],
+                [15, [20, 20, 20], [[10, 20, 20], [20, 20, 20]]],
+                [30, [20, 10, 0], [[20, 10, 20], [20, 10, 0]]],
+            ],
+            "takeoffTime": 7,
+        },
+        "lights": {"version": 1, "data": b64encode(b"\x04\xff\x00\x00\x00").decode()},
+        "yawControl": {"version": 1, "setpoints": [[0, 0], [10, 90]]},
+    }
+
+
+async def test_encoder_matches_show_file(show):
+    trajectory = get_trajectory_from_show_specification(show)
+    yaw_setpoints = get_yaw_setpoints_from_show_specification(show)
+    rth_plan = RTHPlan()
+    rth_plan.add_entry(RTHPlanEntry(time=0, action=RTHAction.LAND))
+
+    async with SkybrushBinaryShowFile.create_in_memory() as show_file:
+        await show_file.add_trajectory(trajectory)
+        await show_file.add_light_program(b"\x00")
+        await show_file.add_rth_plan(rth_plan)
+        await show_file.add_yaw_setpoints(yaw_setpoints)
+        await show_file.finalize()
+        expected = show_file.get_contents()
+
+    data = encode_skybrush_binary_show_file(
+        trajectory, b"\x00", rth_plan, yaw_setpoints
+    )
+    assert data == expected
+
+    async with SkybrushBinaryShowFile.from_bytes(data) as show_file:
+        blocks = await show_file.read_all_blocks(validate=True)
+        assert len(blocks) == 4
+
+
+async def test_cache_hits_and_eviction(show):
+    cache = ShowEncodingCache()
+
+    encoded = await cache.encode(show)
+    assert encoded == EncodedShowFile.from_show_specification(show)
+    assert encoded.crc == crc32_mavftp(encoded.data)
+
+    # Keys that do not affect the encoded file do not affect the cache key
+    other = deepcopy(show)
+    other["coordinateSystem"]["orientation"] = "30"
+    assert await cache.encode(other) is encoded
+    assert (cache.num_hits, cache.num_misses) == (1, 1)
+
+    # The cache evicts the least recently used entries when it is full
+    cache.max_size = 2 * len(encoded.data) + 1
+    shows = [deepcopy(show) for _ in range(3)]
+    for index, item in enumerate(shows):
+        item["trajectory"]["takeoffTime"] = index + 1
+        await cache.encode(item)
+
+    assert len(cache) == 2
+    assert cache.size <= cache.max_size
+    assert cache.get_key(show) not in cache._items
+    assert cache.get_key(shows[2]) in cache._items
@@ -1,6 +1,11 @@
 from pytest import approx
+from random import Random
 
-from flockwave.server.show.player import TrajectoryPlayer
+from flockwave.server.show.player import (
+    CompiledTrajectory,
+    TrajectoryFleet,
+    TrajectoryPlayer,
+)
 from flockwave.server.show.trajectory import TrajectorySpecification
 
 
@@ -111,3 +116,65 @@ def test_trajectory_player_bezier_curves():
     assert not player.is_before_takeoff(3)
     assert not player.is_before_takeoff(18)
     assert not player.is_before_takeoff(25)
+
+
+def create_random_trajectory(rng: Random, num_keyframes: int = 50) -> dict:
+    def random_point():
+        return [rng.uniform(-50, 50) for _ in range(3)]
+
+    t = rng.uniform(0, 5)
+    points = [[t, random_point(), []]]
+    for _ in range(num_keyframes):
+        t += rng.choice((0.2, 0.5, 1, 3))
+        num_controls = rng.choice((0, 1, 2, 6))
+        points.append(
+            [t, random_point(), [random_point() for _ in range(num_controls)]]
+        )
+
+    return {"version": 1, "points": points, "takeoffTime": rng.uniform(0, 10)}
+
+
+def test_compiled_trajectory():
+    rng = Random(42)
+    spec = TrajectorySpecification(create_random_trajectory(rng))
+    player = TrajectoryPlayer(spec)
+    compiled = CompiledTrajectory(spec)
+
+    times = [rng.uniform(-5, 120) for _ in range(500)] + [0, 1000]
+    positions = compiled.positions_at(times)
+    assert positions.shape == (len(times), 3)
+    for time, position in zip(times, positions):
+        assert tuple(position) == approx(player.position_at(time), abs=1e-9)
+
+    assert player.positions_at(times) == approx(positions)
+    assert compiled.positions_at(3.0).shape == (3,)
+
+    empty = CompiledTrajectory(TrajectorySpecification({"version": 1}))
+    assert empty.positions_at([-1, 0, 1]).tolist() == [[0, 0, 0]] * 3
+
+
+def test_trajectory_fleet():
+    rng = Random(7)
+    specs = {
+        f"uav{i}": TrajectorySpecification(create_random_trajectory(rng))
+        for i in range(20)
+    }
+    specs["empty"] = TrajectorySpecification({"version": 1})
+
+    fleet = TrajectoryFleet()
+    for key, spec in specs.items():
+        fleet.add(key, spec)
+    assert len(fleet) == 21
+
+    players = {key: TrajectoryPlayer(spec) for key, spec in specs.items()}
+
+    # Monotonic timestamps, then jumping backwards and forwards
+    times = [t * 0.1 for t in range(-20, 1200)] + [50, 3, 80, -10, 1000]
+    for time in times:
+        positions = fleet.positions_at(time)
+        for key, position in zip(fleet.keys(), positions):
+            assert tuple(position) == approx(players[key].position_at(time), abs=1e-9)
+
+    fleet.remove("uav3")
+    assert "uav3" not in fleet
+    assert fleet.positions_at(10).shape == (20, 3)
@@ -0,0 +1,108 @@
+import gzip
+import sys
+
+from json import load
+from pathlib import Path
+from pytest import mark, raises
+from random import Random
+
+from flockwave.server.show.formats import SegmentEncoder
+from flockwave.server.show.trajectory import TrajectorySpecification
+from flockwave.server.show.vectorized import BatchSegmentEncoder, TrajectoryArrays
+
+fixture_dir = Path(str(sys.modules[__name__].__file__)).parent / "fixtures"
+
+
+def create_random_trajectory(seed: int, num_keyframes: int = 500) -> dict:
+    rng = Random(seed)
+
+    def random_point():
+        return [round(rng.uniform(-50, 50), rng.choice((0, 1, 3, 6))) for _ in range(3)]
+
+    t, point = 0, random_point()
+    points = [[t, point, []]]
+    for _ in range(num_keyframes):
+        t += rng.choice((0.2, 0.25, 0.333, 1, 1.001, 7.3, 70, 140))
+        kind = rng.random()
+        if kind < 0.2:
+            # stationary or constant along some axes
+            point = [x if rng.random() < 0.7 else rng.uniform(-50, 50) for x in point]
+            control = []
+        elif kind < 0.4:
+            point, control = random_point(), []
+        elif kind < 0.6:
+            point, control = random_point(), [random_point()]
+        elif kind < 0.9:
+            point, control = random_point(), [random_point(), random_point()]
+        else:
+            point, control = random_point(), [random_point() for _ in range(6)]
+        points.append([round(t, 3), point, control])
+
+    return {"version": 1, "points": points, "takeoffTime": rng.choice((0, 12.5))}
+
+
+def encode_with_reference(trajectory: TrajectorySpecification, scale: int) -> bytes:
+    segments = trajectory.iter_segments(max_length=65, absolute=True)
+    return SegmentEncoder(scale).encode_multiple_segments(segments)
+
+
+def encode_with_arrays(trajectory: TrajectorySpecification) -> tuple[int, bytes]:
+    arrays = TrajectoryArrays.from_trajectory(trajectory, max_length=65, absolute=True)
+    scale = arrays.propose_scaling_factor()
+    return scale, BatchSegmentEncoder(scale).encode(arrays)
+
+
+@mark.parametrize("seed", range(5))
+def test_random_trajectories(seed):
+    trajectory = TrajectorySpecification(create_random_trajectory(seed))
+
+    scale, data = encode_with_arrays(trajectory)
+    assert scale == trajectory.propose_scaling_factor()
+    assert data == encode_with_reference(trajectory, scale)
+
+    arrays = TrajectoryArrays.from_trajectory(trajectory)
+    assert arrays.bounding_box == trajectory.bounding_box
+
+
+def test_show_fixture():
+    with gzip.open(fixture_dir / "show_5cf_demo.json.gz") as fp:
+        show = load(fp)
+
+    for drone in show["swarm"]["drones"]:
+        trajectory = TrajectorySpecification(drone["settings"]["trajectory"])
+        scale, data = encode_with_arrays(trajectory)
+        assert data == encode_with_reference(trajectory, scale)
+
+
+def test_edge_cases():
+    empty = TrajectorySpecification({"version": 1, "points": []})
+    assert encode_with_arrays(empty) == (1, b"")
+
+    single = TrajectorySpecification({"version": 1, "points": [[0, [1, 2, 3], []]]})
+    assert encode_with_arrays(single) == (1, b"")
+
+    with raises(ValueError, match="first keyframe"):
+        TrajectoryArrays.from_trajectory(
+            TrajectorySpecification(
+                {"version": 1, "points": [[0, [0, 0, 0], [[1, 1, 1]]]]}
+            )
+        )
+
+    with raises(ValueError, match="stand still"):
+        TrajectoryArrays.from_trajectory(
+            TrajectorySpecification(
+                {"version": 1, "points": [[0, [0, 0, 0], []], [0, [1, 1, 1], []]]}
+            )
+        )
+
+    five_points = TrajectorySpecification(
+        {
+            "version": 1,
+            "points": [
+                [0, [0, 0, 0], []],
+                [5, [1, 0, 0], [[0, 0, 0], [0, 0, 0], [1, 0, 0]]],
+            ],
+        }
+    )
+    with raises(NotImplementedError):
+        encode_with_arrays(five_points)
@@ -0,0 +1,142 @@
+import trio.socket
+
+from pytest import raises
+from trio import open_nursery, sleep
+
+from flockwave.server.socket.protocol import is_binary_frame
+from flockwave.server.swarm import SwarmCommandDispatcher, get_command_keyword
+
+
+async def create_echo_server(nursery, replies=None):
+    replies = replies or {}
+    sock = trio.socket.socket(trio.socket.AF_INET, trio.socket.SOCK_DGRAM)
+    await sock.bind(("127.0.0.1", 0))
+
+    async def echo():
+        while True:
+            data, address = await sock.recvfrom(1024)
+            default = get_command_keyword(data.decode()).encode()
+            reply = replies.get(data, default)
+            if reply is not None:
+                await sock.sendto(reply, address)
+
+    nursery.start_soon(echo)
+    return sock.getsockname()[1]
+
+
+def test_get_command_keyword():
+    assert get_command_keyword("start") == "start"
+    assert get_command_keyword("goal,3") == "goal"
+    assert get_command_keyword("master-5") == "master"
+
+
+async def test_dispatcher_acknowledgments(nursery):
+    port = await create_echo_server(
+        nursery, {b"clear_csv": b"CSV Cleared", b"search": None}
+    )
+
+    dispatcher = SwarmCommandDispatcher()
+    dispatcher.configure(
+        {
+            "drones": [{"id": 1, "host": "127.0.0.1"}],
+            "ports": {"command": port},
+            "ack_timeout": 0.5,
+        }
+    )
+    nursery.start_soon(dispatcher.run)
+    await sleep(0.1)
+
+    assert await dispatcher.send("start") == {1: "ack"}
+    assert await dispatcher.send("clear_csv") == {1: "ack"}
+    assert await dispatcher.send("search") == {1: "timeout"}
+    assert await dispatcher.send("search", ack=False) == {1: "sent"}
+
+
+async def test_dispatcher_ignores_telemetry_as_acknowledgment(nursery):
+    port = await create_echo_server(
+        nursery, {b"home": b"home_pos,47.1,19.2", b"goal": b"goal_points,1,2"}
+    )
+
+    dispatcher = SwarmCommandDispatcher()
+    dispatcher.configure(
+        {
+            "drones": [{"id": 1, "host": "127.0.0.1"}],
+            "ports": {"command": port},
+            "ack_timeout": 0.5,
+        }
+    )
+    nursery.start_soon(dispatcher.run)
+    await sleep(0.1)
+
+    assert await dispatcher.send("home") == {1: "timeout"}
+    assert await dispatcher.send("goal") == {1: "timeout"}
+    assert not dispatcher.notify_datagram(b"search,1,2", "127.0.0.1")
+
+
+async def test_dispatcher_concurrent_commands_with_same_ack(nursery):
+    port = await create_echo_server(nursery)
+
+    dispatcher = SwarmCommandDispatcher()
+    dispatcher.configure(
+        {
+            "drones": [{"id": 1, "host": "127.0.0.1"}],
+            "ports": {"command": port},
+            "ack_timeout": 0.5,
+        }
+    )
+    nursery.start_soon(dispatcher.run)
+    await sleep(0.1)
+
+    results = []
+
+    async def send(data):
+        results.append(await dispatcher.send(data))
+
+    async with open_nursery() as inner:
+        inner.start_soon(send, "start")
+        inner.start_soon(send, "start,2")
+
+    assert results == [{1: "ack"}, {1: "ack"}]
+    assert dispatcher._pending_acks == {}
+
+
+async def test_dispatcher_roster():
+    dispatcher = SwarmCommandDispatcher()
+    dispatcher.configure(
+        {
+            "drones": [{"id": 3, "host": "10.0.0.3"}, {"id": 5, "host": "10.0.0.5"}],
+            "ports": {"control": 1234},
+        }
+    )
+
+    assert [drone.id for drone in dispatcher.drones] == [3, 5]
+    assert dispatcher.find_drone_by_id(5).host == "10.0.0.5"  # type: ignore
+    assert dispatcher.find_drone_by_id(7) is None
+    assert dispatcher.ports["control"] == 1234
+    assert dispatcher.ports["command"] == 12008
+
+    with raises(RuntimeError):
+        await dispatcher.set_mavlink_output(7, True)
+
+
+async def test_dispatcher_share_data():
+    sock = trio.socket.socket(trio.socket.AF_INET, trio.socket.SOCK_DGRAM)
+    await sock.bind(("127.0.0.1", 0))
+    config = {
+        "drones": [{"id": 1, "host": "127.0.0.1"}],
+        "ports": {"command": sock.getsockname()[1]},
+    }
+    tables = {"goal_table": [1, 2], "grid_path_table": [[0, 1]]}
+
+    dispatcher = SwarmCommandDispatcher()
+    dispatcher.configure(config)
+    assert await dispatcher.share_data(tables) == {1: "sent"}
+    data, _ = await sock.recvfrom(65536)
+    assert data == b"share_data,[1, 2],grid_path_table,[[0, 1]]"
+
+    dispatcher.configure({**config, "share_data_format": "binary"})
+    assert await dispatcher.share_data(tables) == {1: "sent"}
+    data, _ = await sock.recvfrom(65536)
+    assert is_binary_frame(data)
+
+    sock.close()
@@ -0,0 +1,53 @@
+from flockwave.server.socket.globalVariable import (
+    get_goal_points,
+    get_home,
+    swarm_state,
+)
+from flockwave.server.socket.listen_sock import PrefixTable, SwarmTelemetryListener
+from flockwave.server.socket.protocol import ShareDataEncoder
+
+
+def test_prefix_table():
+    table = PrefixTable({"home": 1, "home_pos": 2, "Drone": 3})
+
+    assert table.find("home") == 1
+    assert table.find("home_lock") == 1
+    assert table.find("home_pos[1, 2]") == 2
+    assert table.find("Drone 3 reached") == 3
+    assert table.find("hom") is None
+    assert table.find("") is None
+
+    table["h"] = 4
+    assert table.find("hom") == 4
+
+    del table["home"]
+    assert table.find("home_lock") == 4
+
+
+def test_handle_datagram():
+    listener = SwarmTelemetryListener()
+
+    listener.handle_datagram("home_pos[47.5, 19.0, 0]")
+    assert get_home() == [47.5, 19.0, 0]
+
+    listener.handle_datagram("goal_points[[1, 2], [3, 4]]")
+    assert get_goal_points() == [[1, 2], [3, 4]]
+
+
+def test_handle_frame():
+    listener = SwarmTelemetryListener()
+    encoder = ShareDataEncoder()
+
+    (frame,) = encoder.encode(
+        {"goal_table": [101, 102], "grid_path_table": [["a", 1], ["b", 2]]}
+    )
+    assert listener.handle_frame(frame, "10.0.0.1") is not None
+    assert swarm_state.has_goal(101) and swarm_state.has_goal(102)
+    assert swarm_state.snapshot.grid_path_table == (["a", 1], ["b", 2])
+
+    encoder.notify_acknowledged(1)
+    (frame,) = encoder.encode(
+        {"goal_table": [101, 102], "grid_path_table": [["a", 1], ["b", 2], ["c", 3]]}
+    )
+    assert listener.handle_frame(frame, "10.0.0.1").is_delta  # type: ignore
+    assert swarm_state.has_grid_path(["c", 3])
@@ -0,0 +1,95 @@
+from pytest import raises
+
+from flockwave.server.socket.protocol import (
+    FrameAssembler,
+    ShareDataDecoder,
+    ShareDataEncoder,
+    ShareDataMessage,
+    decode_frame_header,
+    encode_message,
+    is_binary_frame,
+)
+
+
+def test_encode_decode_single_frame():
+    message = ShareDataMessage(seq=7, set={"goal_table": [1, 2, 3]})
+    frames = encode_message(message, message_id=7)
+
+    assert len(frames) == 1
+    assert is_binary_frame(frames[0])
+    assert decode_frame_header(frames[0]) == (0, 7, 0, 1)
+    assert FrameAssembler().feed(frames[0]) == message
+
+
+def test_invalid_frames():
+    with raises(ValueError):
+        decode_frame_header(b"share_data,[]")
+    with raises(ValueError):
+        decode_frame_header(b"\xfb\x5d\x02\x00")
+
+
+def test_chunking_and_reassembly():
+    grid_path = [[i, i * 0.5, "x" * 10] for i in range(500)]
+    message = ShareDataMessage(seq=1, set={"grid_path_table": grid_path})
+    frames = encode_message(message, message_id=1, mtu=256)
+
+    assert len(frames) > 1
+    assert all(len(frame) <= 256 for frame in frames)
+
+    assembler = FrameAssembler()
+    results = [assembler.feed(frame, "a") for frame in reversed(frames)]
+    assert results[:-1] == [None] * (len(frames) - 1)
+    assert results[-1] == message
+    assert assembler.num_pending == 0
+
+    # Frames from different senders are not mixed
+    assert assembler.feed(frames[0], "a") is None
+    assert assembler.feed(frames[1], "b") is None
+    assert assembler.num_pending == 2
+
+
+def test_delta_encoding():
+    encoder = ShareDataEncoder(keyframe_interval=2)
+    decoder = ShareDataDecoder()
+
+    def transfer(tables):
+        message = None
+        for frame in encoder.encode(tables):
+            message = decoder.feed(frame) or message
+        return message
+
+    first = transfer({"goal_table": [1], "grid_path_table": [[0, 1]]})
+    assert not first.is_delta
+
+    # No acknowledgment yet, so the next message is a full message too
+    second = transfer({"goal_table": [1, 2], "grid_path_table": [[0, 1]]})
+    assert not second.is_delta
+    encoder.notify_acknowledged(second.seq)
+
+    third = transfer({"goal_table": [1, 2, 5], "grid_path_table": [[0, 1]]})
+    assert third.is_delta
+    assert third.add == {"goal_table": [5]}
+    assert third.set == {}
+    assert decoder.tables == {"goal_table": [1, 2, 5], "grid_path_table": [[0, 1]]}
+
+    # Tables that were not simply appended to are sent in full
+    fourth = transfer({"goal_table": [2, 5], "grid_path_table": [[0, 1]]})
+    assert fourth.is_delta
+    assert fourth.set == {"goal_table": [2, 5]}
+
+    # Periodic keyframe
+    fifth = transfer({"goal_table": [2, 5], "grid_path_table": [[0, 1]]})
+    assert not fifth.is_delta
+
+
+def test_decoder_ignores_deltas_with_unknown_base():
+    encoder = ShareDataEncoder()
+    frames = encoder.encode({"goal_table": [1]})
+    encoder.notify_acknowledged(1)
+    delta = encoder.encode({"goal_table": [1, 2]})
+
+    decoder = ShareDataDecoder()
+    assert decoder.feed(delta[0]) is None
+    assert decoder.feed(frames[0]) is not None
+    assert decoder.feed(delta[0]) is not None
+    assert decoder.tables == {"goal_table": [1, 2]}
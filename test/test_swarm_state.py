@@ -0,0 +1,98 @@
+from pytest import raises
+from threading import Thread
+
+from flockwave.server.socket.state import SwarmState
+
+
+def test_goal_tables_are_deduplicated():
+    state = SwarmState()
+
+    assert state.add_goal(3)
+    assert state.add_goal(1)
+    assert not state.add_goal(3)
+    assert state.add_return_goal(3)
+
+    assert state.snapshot.goal_table == (3, 1)
+    assert state.snapshot.return_goal_table == (3,)
+    assert state.has_goal(1)
+    assert not state.has_return_goal(1)
+
+
+def test_grid_path_table():
+    state = SwarmState()
+
+    state.set_grid_path_table([[1, 2], [3, 4]])
+    assert state.has_grid_path([1, 2])
+    assert not state.add_grid_path([3, 4])
+    assert state.add_grid_path(5)
+    assert state.snapshot.grid_path_table == ([1, 2], [3, 4], 5)
+
+
+def test_snapshots_are_versioned():
+    state = SwarmState()
+    snapshot = state.snapshot
+
+    state.update(home=[47.5, 19.0])
+    state.add_removed_uav_grid_path("a.csv", 12)
+    assert not state.add_removed_uav_grid_path("a.csv", 34)
+
+    assert snapshot.version == 0
+    assert snapshot.home == []
+    assert state.version == 2
+    assert state.snapshot.home == [47.5, 19.0]
+    assert state.snapshot.to_json(["home", "removed_uav_grid_paths", "vehicles"]) == {
+        "home": [47.5, 19.0],
+        "removed_uav_grid_paths": {"a.csv": 12},
+    }
+
+    with raises(ValueError):
+        state.update(goal_table=(1, 2))
+
+
+def test_change_notifications():
+    state = SwarmState()
+    changes = []
+
+    def on_changed(sender, snapshot, fields):
+        changes.append((snapshot.version, fields))
+
+    state.changed.connect(on_changed, sender=state)
+    state.add_goal(1)
+    state.add_goal(1)
+    state.update(takeoff_alt=10)
+
+    assert changes == [(1, ("goal_table",)), (2, ("takeoff_alt",))]
+
+
+def test_change_notifications_are_per_instance():
+    state, other = SwarmState(), SwarmState()
+    changes = []
+
+    def on_changed(sender, **kwds):
+        changes.append(sender)
+
+    state.changed.connect(on_changed)
+    other.update(takeoff_alt=10)
+    state.update(takeoff_alt=10)
+
+    assert changes == [state]
+    assert not other.changed.receivers
+
+
+def test_concurrent_appends():
+    state = SwarmState()
+
+    def append(index):
+        for item in range(100):
+            state.add_vehicles([(index, item)])
+            state.extend_mission([(index, item)])
+
+    threads = [Thread(target=append, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(state.snapshot.vehicles) == 800
+    assert len(state.snapshot.mission) == 800
+    assert state.version == 1600
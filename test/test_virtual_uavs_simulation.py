@@ -0,0 +1,112 @@
+from pytest import approx
+
+from flockwave.server.ext.virtual_uavs.simulation import (
+    FleetKinematics,
+    VirtualUAVSimulation,
+)
+
+
+def create_fleet(count: int) -> FleetKinematics:
+    fleet = FleetKinematics(capacity=1)
+    for _ in range(count):
+        row = fleet.allocate()
+        fleet.max_acceleration_xy[row] = 4
+        fleet.max_acceleration_z[row] = 1
+        fleet.max_velocity_xy[row] = 10
+        fleet.max_velocity_z[row] = 2
+    return fleet
+
+
+def test_fleet_kinematics():
+    fleet = create_fleet(4)
+    assert len(fleet) == 4
+
+    fleet.position[:] = [[0, 0, 0], [0, 0, 10], [5, 5, 5], [1, 1, 1]]
+    fleet.target[:3] = [[30, 40, 0], [0, 0, -5], [5, 5, 5]]
+    fleet.has_target[:3] = True
+
+    dist_xy, dist_z = fleet.step(range(4), 1, [True, True, True, False], True)
+
+    # Horizontal motion is limited by the maximum acceleration
+    assert dist_xy[0] == approx(50)
+    assert fleet.position[0].tolist() == approx([2.4, 3.2, 0])
+    assert fleet.velocity[0].tolist() == approx([2.4, 3.2, 0])
+
+    # Descent is limited by the maximum acceleration; the UAV never goes
+    # below the ground
+    assert dist_z[1] == approx(15)
+    assert fleet.position[1].tolist() == approx([0, 0, 9])
+    for _ in range(20):
+        fleet.step([1], 1, [True], [True])
+    assert fleet.position[1].tolist() == approx([0, 0, 0])
+
+    # UAVs at their targets and UAVs without targets stay where they are
+    assert (dist_xy[2], dist_z[2]) == (0, 0)
+    assert fleet.position[2].tolist() == [5, 5, 5]
+    assert (dist_xy[3], dist_z[3]) == (0, 0)
+    assert fleet.position[3].tolist() == [1, 1, 1]
+
+    # UAVs may be restricted to move along some axes only
+    fleet.step([0], 1, [False], [True])
+    assert fleet.position[0].tolist() == approx([2.4, 3.2, 0])
+    assert fleet.velocity[0].tolist() == approx([0, 0, 0])
+
+
+class DummyUAV:
+    def __init__(self, id: str, fleet: FleetKinematics):
+        self.id = id
+        self.events = []
+        self._row = fleet.allocate()
+        self._request_shutdown = None
+        self._shutdown_reason = None
+
+    def _notify_autopilot_initialized(self):
+        self.events.append("autopilot")
+
+    def _notify_booted(self):
+        self.events.append("booted")
+
+    def _notify_shutdown(self):
+        self.events.append("shutdown")
+        self._request_shutdown = None
+        self._shutdown_reason = None
+
+    def _prepare_step(self):
+        return True, True
+
+    def _finish_step(self, dt, dist_xy, dist_z, mutator):
+        self.events.append("step")
+
+
+def test_simulation_lifecycle():
+    simulation = VirtualUAVSimulation()
+    uavs = [DummyUAV(f"{index}", simulation.kinematics) for index in range(3)]
+    for uav in uavs:
+        simulation.power_on(uav)
+
+    # UAVs boot in at most two seconds of simulated time
+    assert simulation.tick(0.5) == []
+    start = simulation.clock()
+    while simulation.tick(0.5) != ["0", "1", "2"]:
+        pass
+    assert simulation.clock() - start <= 2
+    assert all(uav.events[0] == "booted" for uav in uavs)
+
+    for _ in range(6):
+        simulation.tick(0.5)
+    assert all("autopilot" in uav.events for uav in uavs)
+
+    uavs[0]._shutdown_reason = "shutdown"
+    uavs[0]._request_shutdown()
+    uavs[1]._shutdown_reason = "reset"
+    uavs[1]._request_shutdown()
+    assert simulation.tick(0.5) == ["2"]
+    assert uavs[0].events[-1] == uavs[1].events[-1] == "shutdown"
+    assert not simulation.is_powered(uavs[0])
+    assert simulation.is_powered(uavs[1])
+
+    # Reset UAVs boot again
+    for _ in range(6):
+        simulation.tick(0.5)
+    assert uavs[1].events.count("booted") == 2
+    assert sorted(simulation.tick(0.5)) == ["1", "2"]
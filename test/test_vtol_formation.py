@@ -0,0 +1,88 @@
+from numpy import array
+from pytest import approx, raises
+
+from flockwave.server.utils.geodesy import haversine, load_waypoints
+from flockwave.server.VTOL.formation import (
+    formation_offsets,
+    plan_formation,
+    write_tracks,
+)
+
+#: Lawnmower pattern: north, east, south, east, north
+PATH = array(
+    [
+        [12.9480, 80.1397],
+        [12.9570, 80.1397],
+        [12.9570, 80.1420],
+        [12.9480, 80.1420],
+        [12.9480, 80.1443],
+        [12.9570, 80.1443],
+    ]
+)
+
+
+def test_formation_offsets():
+    offsets = formation_offsets(PATH, side="right")
+
+    # Straight ends: the formation is perpendicular to the leg
+    assert offsets[0] == approx([1, 0], abs=1e-3)
+    assert offsets[-1] == approx([1, 0], abs=1e-3)
+
+    # Right turn from north to east: miter towards south-east
+    assert offsets[1] == approx([1, -1], abs=1e-3)
+
+    # Right turn from east to south: miter towards south-west
+    assert offsets[2] == approx([-1, -1], abs=1e-3)
+
+    # Left turn from east to north; the formation is on the outer side
+    assert offsets[4] == approx([1, -1], abs=1e-3)
+
+    left = formation_offsets(PATH, side="left")
+    assert left == approx(-offsets)
+
+
+def test_formation_offsets_with_degenerate_input():
+    offsets = formation_offsets([PATH[0], PATH[0], PATH[1], PATH[1]])
+    assert offsets == approx(array([[1, 0]] * 4), abs=1e-3)
+
+    with raises(RuntimeError):
+        formation_offsets(PATH[:1])
+    with raises(RuntimeError):
+        formation_offsets([PATH[0], PATH[0]])
+
+
+def test_formation_offsets_with_u_turn():
+    # Sharp turns are clamped to the miter limit
+    offsets = formation_offsets(
+        [PATH[0], PATH[1], [PATH[0][0], PATH[0][1] + 0.0001]], miter_limit=3
+    )
+    assert (offsets[1] ** 2).sum() == approx(9)
+
+    # In a full U-turn the formation stays perpendicular to the incoming leg
+    offsets = formation_offsets([PATH[0], PATH[1], PATH[0]])
+    assert offsets[1] == approx([1, 0], abs=1e-3)
+
+
+def test_plan_formation():
+    tracks = plan_formation(PATH, 4, spacing=60)
+
+    assert tracks.shape == (4, len(PATH), 2)
+    assert tracks[0] == approx(PATH)
+
+    # Drones keep the lateral spacing along the straight legs
+    for k in range(1, 4):
+        assert haversine(*PATH[0], *tracks[k, 0]) == approx(60 * k, rel=1e-3)
+
+    # ...and along the miter line at the turns
+    assert haversine(*PATH[1], *tracks[1, 1]) == approx(60 * 2**0.5, rel=1e-3)
+
+
+def test_write_tracks(tmp_path):
+    tracks = plan_formation(PATH, 3, spacing=60)
+    write_tracks(tracks, str(tmp_path))
+
+    for i in range(3):
+        forward = load_waypoints(str(tmp_path / f"forward-drone-{i + 1}.csv"))
+        reverse = load_waypoints(str(tmp_path / f"reverse-drone-{i + 1}.csv"))
+        assert forward == approx(tracks[i])
+        assert reverse == approx(tracks[i][::-1])
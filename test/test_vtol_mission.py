@@ -0,0 +1,36 @@
+from numpy import array
+
+from flockwave.server.ext.mavlink.enums import MAVCommand
+from flockwave.server.VTOL import mission_basic_1
+from flockwave.server.VTOL.mission_basic_1 import create_vtol_mission
+
+WAYPOINTS = {
+    "forward": array([[12.9480, 80.1397], [12.9570, 80.1397]]),
+    "search": array([[12.9570, 80.1420], [12.9480, 80.1420]]),
+    "reverse": array([[12.9480, 80.1443], [12.9570, 80.1443]]),
+}
+
+
+def test_create_vtol_mission(monkeypatch):
+    monkeypatch.setattr(
+        mission_basic_1, "read_waypoints", lambda leg, i: WAYPOINTS[leg]
+    )
+
+    items = create_vtol_mission(0, altitude=100)
+    commands = [item.command for item in items]
+
+    # Item 0 is overwritten by ArduPilot with the home position
+    assert commands[1] == MAVCommand.NAV_VTOL_TAKEOFF
+    assert commands[2:] == [
+        MAVCommand.NAV_WAYPOINT,
+        MAVCommand.NAV_LOITER_UNLIM,
+        MAVCommand.NAV_WAYPOINT,
+        MAVCommand.NAV_WAYPOINT,
+        MAVCommand.NAV_WAYPOINT,
+        MAVCommand.NAV_LOITER_UNLIM,
+        MAVCommand.NAV_WAYPOINT,
+        MAVCommand.NAV_WAYPOINT,
+        MAVCommand.NAV_LOITER_UNLIM,
+    ]
+    assert items[-1].lat == 12.9570
+    assert items[-1].alt == 100